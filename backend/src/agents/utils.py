@@ -18,6 +18,7 @@ from typing import List
 from google.genai import types
 
 from ..db.models.db_file import Document, Image
+from ..services.blob_store import document_bytes, image_bytes
 
 
 def create_text_query(query: str) -> types.Content:
@@ -30,12 +31,12 @@ def create_docs_query(query: str, docs: List[Document], images: List[Image]) ->
     parts = [types.Part(text=query)]
     for doc in docs:
         parts.append(types.Part.from_bytes(
-            data=doc.file_data,
+            data=document_bytes(doc),
             mime_type=doc.content_type,
         ))
     for image in images:
         parts.append(types.Part.from_bytes(
-            data=image.image_data,
+            data=image_bytes(image),
             mime_type=image.content_type,
         ))
     return types.Content(role="user", parts=parts)
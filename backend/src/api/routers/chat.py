@@ -8,10 +8,9 @@ from pydantic import constr
 from sqlalchemy.orm import Session
 
 from ...db.database import get_db
-from ...db.models.db_user import User
 from ...db.database import get_db_context
 
-from ...utils.auth import get_current_active_user
+from ...utils.auth import Principal, get_current_active_user
 from ..schemas.chat import ChatRequest, ChatResponse
 from ...services.chat_service import chat_service
 from ...db.crud import chapters_crud
@@ -71,7 +70,7 @@ def _validate_chat_request(chat_request: ChatRequest) -> None:
 async def chat_with_agent(
     chapter_id: int,
     chat_request: ChatRequest,
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ) -> StreamingResponse:
     """Chat with the AI agent for a specific chapter.
     
@@ -91,7 +90,7 @@ async def chat_with_agent(
     """
     try:
         with get_db_context() as db:
-            chapter = chapters_crud.get_chapter_by_id(db, chapter_id)
+            chapter = chapters_crud.get_chapter_with_course(db, chapter_id)
             if not chapter:
                 raise HTTPException(status_code=404, detail="Chapter not found")
             if not chapter.course.is_public and chapter.course.user_id != current_user.id:
@@ -1,23 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
 import uuid
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 
 from ...db.models.db_course import Chapter, Course, CourseStatus
-from ...db.models.db_user import User
 from ...services.agent_service import AgentService
-from ...utils.auth import get_current_active_user
-from ...db.database import get_db, get_db_context, SessionLocal
+from ...utils.auth import Principal, get_current_active_user
+from ...db.database import get_async_db, get_db, get_db_context, SessionLocal
 from ...db.crud import courses_crud, chapters_crud, users_crud, usage_crud
+from ...db.crud.aio import chapters_crud as async_chapters_crud, courses_crud as async_courses_crud
 from ...services import course_service
-from ...services.course_service import verify_course_ownership
+from ...services.course_service import check_course_access, verify_course_ownership, verify_course_ownership_async
+from ...utils.http_cache import check_not_modified, latest, weak_etag
+from ...utils.pagination import decode_cursor, set_next_cursor
 
 #from ...services.notification_service import manager as ws_manager
 from ..schemas.course import (
     CourseInfo,
     CourseRequest,
     Chapter as ChapterSchema,
+    ChapterSummary,
     UpdateCoursePublicStatusRequest,
 )
 
@@ -39,7 +43,7 @@ agent_service = AgentService()
 async def create_course_request(
         course_request: CourseRequest,
         background_tasks: BackgroundTasks,
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_active_user),
 ) -> CourseInfo:
     """
     Initiate course creation as a background task and return a task ID for WebSocket progress updates.
@@ -114,40 +118,67 @@ async def create_course_request(
 
 
 
+def _course_keyset(course: CourseInfo):
+    return course.created_at, course.course_id
+
+
 @router.get("/public", response_model=List[CourseInfo])
-async def get_public_courses(db: Session = Depends(get_db), skip: int = 0, limit: int = 100):
+async def get_public_courses(response: Response, db: AsyncSession = Depends(get_async_db), skip: int = 0,
+                             limit: int = 100, cursor: Optional[str] = None):
     """
-    Get all public courses.
+    Get all public courses, newest first.
+    Full pages carry the cursor of the next page in the X-Next-Cursor header, pass it as cursor (instead of skip).
     """
-    return course_service.get_public_courses(db, skip=skip, limit=limit)
+    after = decode_cursor(cursor) if cursor else None
+    courses = await async_courses_crud.get_public_courses_infos(db, user_id="", skip=skip, limit=limit, after=after)
+    set_next_cursor(response, courses, limit, _course_keyset)
+    return courses
 
 
 @router.get("/", response_model=List[CourseInfo])
 async def get_user_courses(
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db),
+        response: Response,
+        current_user: Principal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_async_db),
         skip: int = 0,
-        limit: int = 200
+        limit: int = 200,
+        cursor: Optional[str] = None
 ):
     """
-    Get all courses belonging to the current user.
-    Pagination supported with skip and limit parameters.
+    Get all courses belonging to the current user, newest first.
+    Pagination supported with skip and limit parameters, or with the cursor from the X-Next-Cursor header
+    of the previous (full) page.
     """
-    return course_service.get_user_courses( db, current_user.id, skip, limit)
+    after = decode_cursor(cursor) if cursor else None
+    courses = await async_courses_crud.get_courses_infos(db, current_user.id, skip, limit, after=after)
+    set_next_cursor(response, courses, limit, _course_keyset)
+    return courses
 
 
 @router.get("/{course_id}", response_model=CourseInfo)
 async def get_course_by_id(
+        request: Request,
+        response: Response,
         course_id: int,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: Principal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific course by ID.
     Only accessible if the course belongs to the current user.
+    Supports conditional requests (ETag / Last-Modified).
     """
-    course = await verify_course_ownership(course_id, str(current_user.id), db)
-    
+    course, completed_chapter_count, chapters_updated_at = \
+        await async_courses_crud.get_course_with_completed_count(db, course_id)
+    course = check_course_access(course, str(current_user.id))
+
+    etag = weak_etag((course.id, course.version, completed_chapter_count))
+    # Completing a chapter changes completed_chapter_count but not the course row
+    last_modified = latest((course.updated_at, course.created_at, chapters_updated_at))
+    cached = check_not_modified(request, response, etag, last_modified)
+    if cached:
+        return cached
+
     return CourseInfo(
         course_id=int(course.id),
         total_time_hours=int(course.total_time_hours),
@@ -157,26 +188,57 @@ async def get_course_by_id(
         description=str(course.description),
         chapter_count=int(course.chapter_count) if course.chapter_count else None,
         image_url= str(course.image_url) if course.image_url else None,
-        completed_chapter_count=course_service.get_completed_chapters_count(db, course.id),
+        completed_chapter_count=completed_chapter_count,
         is_public=course.is_public,
         created_at=course.created_at,
     )
 
 
 # -------- CHAPTERS ----------
-@router.get("/{course_id}/chapters", response_model=List[ChapterSchema])
+@router.get("/{course_id}/chapters", response_model=Union[List[ChapterSchema], List[ChapterSummary]])
 async def get_course_chapters(
+        request: Request,
+        response: Response,
         course_id: int,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        view: Literal["full", "summary"] = "full",
+        current_user: Principal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all chapters for a specific course.
     Only accessible if the course belongs to the current user.
+    With view=summary only the metadata columns are read and returned (no content), for overviews;
+    the content of a chapter comes from GET /{course_id}/chapters/{chapter_id}.
+    Supports conditional requests, the check runs on the chapter versions before any content is loaded.
     """
-    await verify_course_ownership(course_id, str(current_user.id), db)
+    await verify_course_ownership_async(course_id, str(current_user.id), db)
+
+    if view == "summary":
+        # The rows carry their version, so the validators need no separate query
+        rows = await async_chapters_crud.get_chapter_summaries(db, course_id)
+        etag = weak_etag(("summary", *((row.id, row.version, row.last_change) for row in rows)))
+        cached = check_not_modified(request, response, etag, latest(row.last_change for row in rows))
+        if cached:
+            return cached
+        return [
+            ChapterSummary(
+                id=row.id,
+                index=row.index,
+                caption=row.caption,
+                summary=row.summary or "",
+                time_minutes=row.time_minutes,
+                is_completed=bool(row.is_completed),
+                image_url=row.image_url,
+            )
+            for row in rows
+        ]
+
+    versions = await async_chapters_crud.get_chapter_versions(db, course_id)
+    cached = check_not_modified(request, response, weak_etag(versions), latest(v[2] for v in versions))
+    if cached:
+        return cached
 
-    chapters = chapters_crud.get_chapters_by_course_id(db, course_id)
+    chapters = await async_chapters_crud.get_chapters_by_course_id(db, course_id, with_content=True)
     if not chapters:
         return []
 
@@ -188,21 +250,30 @@ async def get_course_chapters(
 
 @router.get("/{course_id}/chapters/{chapter_id}", response_model=ChapterSchema)
 async def get_chapter_by_id(
+        request: Request,
+        response: Response,
         course_id: int,
         chapter_id: int,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: Principal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific chapter by ID within a course.
     Only accessible if the course belongs to the current user.
+    Supports conditional requests, the check runs before the (deferred) content is loaded.
     """
     # First verify course ownership
-    course = await verify_course_ownership(course_id, str(current_user.id), db)
+    course = await verify_course_ownership_async(course_id, str(current_user.id), db)
     
     # Find the specific chapter
-    chapter = course_service.get_chapter_by_id(course_id, chapter_id, db)
-    
+    chapter = await course_service.get_chapter_by_id_async(course_id, chapter_id, db)
+
+    etag = weak_etag((chapter.id, chapter.version))
+    cached = check_not_modified(request, response, etag, latest((chapter.updated_at, chapter.created_at)))
+    if cached:
+        return cached
+    await async_chapters_crud.load_content(db, chapter)
+
     # Build chapter response
     return ChapterSchema(
         id=chapter.id,  
@@ -221,23 +292,23 @@ async def get_chapter_by_id(
 async def mark_chapter_complete(
         course_id: int,
         chapter_id: int,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: Principal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Mark a chapter as completed.
     Only accessible if the course belongs to the current user.
     """
     # First verify course ownership
-    course = await verify_course_ownership(course_id, current_user.id, db)
+    course = await verify_course_ownership_async(course_id, current_user.id, db)
     
     # Find the specific chapter
-    chapter = course_service.get_chapter_by_id(course_id, chapter_id, db)
+    chapter = await course_service.get_chapter_by_id_async(course_id, chapter_id, db)
     
     # Mark as completed
     chapter.is_completed = True
-    db.commit()
-    db.refresh(chapter)
+    await db.commit()
+    await db.refresh(chapter)
     
     return {
         "message": f"Chapter '{chapter.caption}' marked as completed",
@@ -253,7 +324,7 @@ async def update_course_details(
         course_id: int,
         title: str = None,
         description: str = None,
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_active_user),
         db: Session = Depends(get_db)
 ):
     """
@@ -286,7 +357,7 @@ async def update_course_details(
 async def update_course_public_status(
     course_id: int,
     request: UpdateCoursePublicStatusRequest,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -310,7 +381,7 @@ async def update_course_public_status(
 @router.delete("/{course_id}")
 async def delete_course(
         course_id: int,
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_active_user),
         db: Session = Depends(get_db)
 ):
     """
@@ -346,7 +417,7 @@ async def update_chapter(
         content: str,
         time_minutes: int,
         image_url: Optional[str] = None,
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_active_user),
         db: Session = Depends(get_db)
 ):
     """
@@ -401,7 +472,7 @@ async def update_chapter(
 async def delete_chapter(
         course_id: int,
         chapter_id: int,
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_active_user),
         db: Session = Depends(get_db)
 ):
     """
@@ -436,18 +507,18 @@ async def delete_chapter(
 async def mark_chapter_incomplete(
         course_id: int,
         chapter_id: int,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: Principal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Mark a chapter as incomplete (not completed).
     Only accessible if the course belongs to the current user.
     """
     # First verify course ownership
-    course = await verify_course_ownership(course_id, current_user.id, db)
+    course = await verify_course_ownership_async(course_id, current_user.id, db)
 
     # Find the specific chapter
-    chapter = course_service.get_chapter_by_id(course_id, chapter_id, db)
+    chapter = await course_service.get_chapter_by_id_async(course_id, chapter_id, db)
 
     if not chapter:
         raise HTTPException(
@@ -456,7 +527,7 @@ async def mark_chapter_incomplete(
         )
 
     # Mark as incomplete using crud method
-    updated_chapter = chapters_crud.mark_chapter_incomplete(db, chapter_id)
+    updated_chapter = await async_chapters_crud.mark_chapter_incomplete(db, chapter_id)
 
     if not updated_chapter:
         raise HTTPException(
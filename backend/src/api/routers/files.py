@@ -1,17 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Response
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Request
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+import asyncio
 import io
 
-from ...db.models.db_user import User
-from ...utils.auth import get_current_active_user
+from ...utils.auth import Principal, get_current_active_user
 from ...db.database import get_db
 from ...api.schemas.file import (
     DocumentInfo,
     ImageInfo
 )
 from ...db.models.db_file import Document, Image
+from ...db.crud import document_artifacts_crud
+from ...services.document_artifact_service import extract_document_artifacts
+from ...services import image_variant_service
+from ...services.blob_store import get_blob_store
+from ...utils.file_response import BlobFileResponse, blob_response
+from ...utils.http_cache import etag_matches, not_modified
+from ...utils.uploads import stream_upload, upload_openapi
 
 router = APIRouter(
     prefix="/files",
@@ -52,6 +59,24 @@ def validate_file_type(filename: str, content_type: str, allowed_types: dict) ->
     return any(filename_lower.endswith(ext) for ext in allowed_extensions)
 
 
+def _move_to_blob_store(db: Session, row, legacy_column: str):
+    row.blob_hash, row.file_size = get_blob_store().put(getattr(row, legacy_column) or b"")
+    setattr(row, legacy_column, None)
+    db.commit()
+
+
+async def ensure_blob(db: Session, row, legacy_column: str) -> str:
+    """
+    Blob hash of a document or image row.
+    Rows that still keep their bytes in the legacy column (not yet moved by scripts/migrate_blobs.py) are moved
+    into the blob store on first download, in a worker thread: loading the bytes, writing the blob and
+    the commit would otherwise block the event loop.
+    """
+    if not row.blob_hash:
+        await asyncio.to_thread(_move_to_blob_store, db, row, legacy_column)
+    return row.blob_hash
+
+
 async def verify_document_ownership(doc_id: int, user_id: str, db: Session) -> Document:
     """Verify document belongs to current user."""
     document = db.query(Document).filter(
@@ -84,56 +109,51 @@ async def verify_image_ownership(image_id: int, user_id: int, db: Session) -> Im
 
 # ========== DOCUMENT ENDPOINTS ==========
 
-@router.post("/documents", response_model=DocumentInfo)
+@router.post("/documents", response_model=DocumentInfo, openapi_extra=upload_openapi())
 async def upload_document(
-        file: UploadFile = File(...),
-        current_user: User = Depends(get_current_active_user),
+        request: Request,
+        background_tasks: BackgroundTasks,
+        current_user: Principal = Depends(get_current_active_user),
         db: Session = Depends(get_db)
 ):
-    """Upload a document (PDF, TXT, JSON, CSV, DOC, DOCX)."""
-    # Validate file type
-    if not validate_file_type(file.filename, file.content_type, ALLOWED_DOCUMENT_TYPES):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File type not allowed. Allowed types: {list(ALLOWED_DOCUMENT_TYPES.keys())}"
-        )
-
-    # Read file data
-    file_data = await file.read()
-    file_size = len(file_data)
-
-    # Validate file size
-    if file_size > MAX_DOCUMENT_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File too large. Maximum size: {MAX_DOCUMENT_SIZE // (1024 * 1024)} MB"
-        )
+    """
+    Upload a document (PDF, TXT, JSON, CSV, DOC, DOCX) as multipart field "file".
+    Files over MAX_DOCUMENT_SIZE are rejected with 413.
+    """
+    def accept(filename: str, content_type: str):
+        if not validate_file_type(filename, content_type, ALLOWED_DOCUMENT_TYPES):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"File type not allowed. Allowed types: {list(ALLOWED_DOCUMENT_TYPES.keys())}"
+            )
 
-    if file_size == 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Empty file not allowed"
-        )
+    # Stream the bytes into the blob store (deduplicated by hash), the row only keeps the hash
+    file = await stream_upload(request, get_blob_store().writer(MAX_DOCUMENT_SIZE), accept=accept)
 
     # Create document record
     document = Document(
         user_id=current_user.id,
         filename=file.filename,
         content_type=file.content_type,
-        file_data=file_data,
+        blob_hash=file.blob_hash,
+        file_size=file.size,
     )
 
     db.add(document)
     db.commit()
     db.refresh(document)
 
+    # Parse the document once in the background, course creation reuses the artifacts
+    document_artifacts_crud.create_pending_artifact(db, document.id)
+    background_tasks.add_task(extract_document_artifacts, document.id)
+
     return document
 
 
 @router.get("/documents", response_model=List[DocumentInfo])
 async def get_course_documents(
         course_id: int,
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_active_user),
         db: Session = Depends(get_db),
         skip: int = 0,
         limit: int = 100
@@ -154,79 +174,27 @@ async def get_course_documents(
 async def download_document(
         request: Request,
         doc_id: int,
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_active_user),
         db: Session = Depends(get_db)
 ):
     """Download a specific document with range request support."""
     document = await verify_document_ownership(doc_id, current_user.id, db)
-    file_data = document.file_data
-    file_size = len(file_data)
-    
+
     # Determine content disposition based on file type
     content_disposition = "inline" if document.content_type == "application/pdf" else f"attachment; filename={document.filename}"
-    
-    # Common headers
-    headers = {
-        "Content-Disposition": content_disposition,
-        "Content-Length": str(file_size),
-        "Accept-Ranges": "bytes",
-        "Content-Type": document.content_type,
-    }
-    
-    # Handle range requests
-    range_header = request.headers.get("Range")
-    if range_header:
-        try:
-            # Parse range header (e.g., "bytes=0-999")
-            range_type, range_spec = range_header.split('=')
-            if range_type.strip().lower() != 'bytes':
-                raise ValueError("Invalid range type")
-                
-            start_end = range_spec.split('-')
-            start = int(start_end[0]) if start_end[0] else 0
-            end = (int(start_end[1]) if len(start_end) > 1 and start_end[1] 
-                  else file_size - 1)
-            
-            start = max(0, start)
-            end = min(end, file_size - 1)
-            
-            if start >= file_size or end < start:
-                return Response(
-                    status_code=416,  # Range Not Satisfiable
-                    headers={"Content-Range": f"bytes */{file_size}"}
-                )
-            
-            content_length = end - start + 1
-            headers.update({
-                "Content-Range": f"bytes {start}-{end}/{file_size}",
-                "Content-Length": str(content_length)
-            })
-            
-            return Response(
-                content=file_data[start:end+1],
-                status_code=206,  # Partial Content
-                headers=headers,
-                media_type=document.content_type
-            )
-            
-        except (ValueError, IndexError):
-            return Response(
-                status_code=400,  # Bad Request
-                content="Invalid range header"
-            )
-    
-    # Full file response
-    return Response(
-        content=file_data,
-        headers=headers,
-        media_type=document.content_type
+
+    return blob_response(
+        request,
+        await ensure_blob(db, document, "file_data"),
+        media_type=document.content_type,
+        headers={"Content-Disposition": content_disposition},
     )
 
 
 @router.get("/documents/{doc_id}/info", response_model=DocumentInfo)
 async def get_document_info(
         doc_id: int,
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_active_user),
         db: Session = Depends(get_db)
 ):
     """Get document information without downloading the file."""
@@ -237,7 +205,7 @@ async def get_document_info(
 @router.delete("/documents/{doc_id}", response_model=DocumentInfo)
 async def delete_document(
         doc_id: int,
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_active_user),
         db: Session = Depends(get_db)
 ):
     """Delete a document."""
@@ -251,43 +219,33 @@ async def delete_document(
 
 # ========== IMAGE ENDPOINTS ==========
 
-@router.post("/images", response_model=ImageInfo)
+@router.post("/images", response_model=ImageInfo, openapi_extra=upload_openapi())
 async def upload_image(
-        file: UploadFile = File(...),
-        current_user: User = Depends(get_current_active_user),
+        request: Request,
+        current_user: Principal = Depends(get_current_active_user),
         db: Session = Depends(get_db)
 ):
-    """Upload an image (JPEG, PNG, GIF, WebP)."""
-    # Validate file type
-    if not validate_file_type(file.filename, file.content_type, ALLOWED_IMAGE_TYPES):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Image type not allowed. Allowed types: {list(ALLOWED_IMAGE_TYPES.keys())}"
-        )
+    """
+    Upload an image (JPEG, PNG, GIF, WebP) as multipart field "file".
+    Images over MAX_IMAGE_SIZE are rejected with 413.
+    """
+    def accept(filename: str, content_type: str):
+        if not validate_file_type(filename, content_type, ALLOWED_IMAGE_TYPES):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Image type not allowed. Allowed types: {list(ALLOWED_IMAGE_TYPES.keys())}"
+            )
 
-    # Read file data
-    image_data = await file.read()
-    file_size = len(image_data)
-
-    # Validate file size
-    if file_size > MAX_IMAGE_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Image too large. Maximum size: {MAX_IMAGE_SIZE // (1024 * 1024)} MB"
-        )
-
-    if file_size == 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Empty file not allowed"
-        )
+    # Stream the bytes into the blob store (deduplicated by hash), the row only keeps the hash
+    file = await stream_upload(request, get_blob_store().writer(MAX_IMAGE_SIZE), accept=accept)
 
     # Create image record
     image = Image(
         user_id=current_user.id,
         filename=file.filename,
         content_type=file.content_type,
-        image_data=image_data,
+        blob_hash=file.blob_hash,
+        file_size=file.size,
     )
 
     db.add(image)
@@ -300,7 +258,7 @@ async def upload_image(
 @router.get("/images", response_model=List[ImageInfo])
 async def get_course_images(
         course_id: int,
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_active_user),
         db: Session = Depends(get_db),
         skip: int = 0,
         limit: int = 100
@@ -321,76 +279,54 @@ async def get_course_images(
 async def download_image(
         request: Request,
         image_id: int,
-        current_user: User = Depends(get_current_active_user),
+        width: Optional[int] = None,
+        format: Optional[str] = None,
+        current_user: Principal = Depends(get_current_active_user),
         db: Session = Depends(get_db)
 ):
-    """Download a specific image with range request support."""
+    """
+    Download a specific image with range request support.
+    With width and/or format a resized or converted variant is returned instead of the original,
+    without format the variant is WebP if the client accepts it.
+    """
+    error = image_variant_service.validate_variant(width, format)
+    if error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
+
     image = await verify_image_ownership(image_id, current_user.id, db)
-    image_data = image.image_data
-    file_size = len(image_data)
-    
-    # Common headers with cache control
+    blob_hash = await ensure_blob(db, image, "image_data")
     headers = {
         "Content-Disposition": f"inline; filename={image.filename}",
-        "Content-Length": str(file_size),
-        "Content-Type": image.content_type,
         "Cache-Control": "public, max-age=31536000",  # Cache for 1 year
-        "Accept-Ranges": "bytes"
     }
-    
-    # Handle range requests
-    range_header = request.headers.get("Range")
-    if range_header:
-        try:
-            range_type, range_spec = range_header.split('=')
-            if range_type.strip().lower() != 'bytes':
-                raise ValueError("Invalid range type")
-                
-            start_end = range_spec.split('-')
-            start = int(start_end[0]) if start_end[0] else 0
-            end = (int(start_end[1]) if len(start_end) > 1 and start_end[1] 
-                  else file_size - 1)
-            
-            start = max(0, start)
-            end = min(end, file_size - 1)
-            
-            if start >= file_size or end < start:
-                return Response(
-                    status_code=416,  # Range Not Satisfiable
-                    headers={"Content-Range": f"bytes */{file_size}"}
-                )
-            
-            content_length = end - start + 1
-            headers.update({
-                "Content-Range": f"bytes {start}-{end}/{file_size}",
-                "Content-Length": str(content_length)
-            })
-            
-            return Response(
-                content=image_data[start:end+1],
-                status_code=206,  # Partial Content
-                headers=headers,
-                media_type=image.content_type
-            )
-            
-        except (ValueError, IndexError):
-            return Response(
-                status_code=400,  # Bad Request
-                content="Invalid range header"
-            )
-    
-    # Full file response
-    return Response(
-        content=image_data,
-        headers=headers,
-        media_type=image.content_type
-    )
+
+    if width is None and format is None:
+        etag = f'"{blob_hash}"'
+        if etag_matches(request, etag):
+            return not_modified(etag, headers)
+        return blob_response(request, blob_hash, media_type=image.content_type, headers={**headers, "ETag": etag})
+
+    if format is None:
+        format = image_variant_service.negotiate_format(request.headers.get("accept"), image.content_type)
+        headers["Vary"] = "Accept"
+    etag = image_variant_service.variant_etag(blob_hash, width, format)
+    if etag_matches(request, etag):
+        return not_modified(etag, headers)
+
+    try:
+        path, media_type = await image_variant_service.get_variant(blob_hash, width, format)
+    except (OSError, image_variant_service.UnsupportedImageError):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Image could not be converted"
+        )
+    return BlobFileResponse(path, headers={**headers, "ETag": etag}, media_type=media_type, method=request.method)
 
 
 @router.get("/images/{image_id}/info", response_model=ImageInfo)
 async def get_image_info(
         image_id: int,
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_active_user),
         db: Session = Depends(get_db)
 ):
     """Get image information without downloading the file."""
@@ -401,7 +337,7 @@ async def get_image_info(
 @router.delete("/images/{image_id}", response_model=ImageInfo)
 async def delete_image(
         image_id: int,
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_active_user),
         db: Session = Depends(get_db)
 ):
     """Delete an image."""
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Request
 from fastapi.responses import FileResponse
 from typing import Optional
 import os
@@ -10,12 +10,14 @@ from ..schemas.flashcard import (
 )
 from ...services.flashcard_service import FlashcardService
 from ...agents.flashcard_agent.schema import FlashcardConfig, FlashcardType
-from ...utils.auth import get_current_active_user
-from ...db.models.db_user import User
+from ...utils.auth import Principal, get_current_active_user
+from ...utils.uploads import stream_upload, upload_openapi
 from google.adk.sessions import InMemorySessionService
 
 router = APIRouter(prefix="/anki", tags=["flashcard"])
 
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024  # 50MB
+
 # Global service instance - in a real app, this would be dependency injected
 flashcard_service: Optional[FlashcardService] = None
 
@@ -30,25 +32,25 @@ def get_flashcard_service() -> FlashcardService:
     return flashcard_service
 
 
-@router.post("/upload", response_model=UploadResponse)
+@router.post("/upload", response_model=UploadResponse, openapi_extra=upload_openapi())
 async def upload_pdf(
-    file: UploadFile = File(...),
-    current_user: User = Depends(get_current_active_user),
+    request: Request,
+    current_user: Principal = Depends(get_current_active_user),
     service: FlashcardService = Depends(get_flashcard_service)
 ):
-    """Upload a PDF file for flashcard generation."""
-    
-    # Validate file type
-    if not file.filename.lower().endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
-    
-    # Validate file size (max 50MB)
-    content = await file.read()
-    if len(content) > 50 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="File size too large (max 50MB)")
-    
+    """Upload a PDF file (multipart field "file") for flashcard generation, files over MAX_UPLOAD_SIZE get 413."""
+
+    def accept(filename: str, content_type: str):
+        # Validate file type
+        if not filename.lower().endswith('.pdf'):
+            raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+
+    # Stream to disk, the size limit aborts the upload as soon as it is crossed
+    document_id, writer = service.create_upload_writer(MAX_UPLOAD_SIZE)
+    upload = await stream_upload(request, writer, accept=accept)
+
     try:
-        result = service.upload_document(content, file.filename)
+        result = service.upload_document(document_id, upload.filename, upload.size)
         return UploadResponse(**result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
@@ -57,7 +59,7 @@ async def upload_pdf(
 @router.post("/analyze", response_model=AnalyzeResponse)
 async def analyze_pdf(
     request: AnalyzeRequest,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     service: FlashcardService = Depends(get_flashcard_service)
 ):
     """Analyze a PDF and provide generation preview."""
@@ -104,7 +106,7 @@ async def analyze_pdf(
 @router.post("/generate", response_model=GenerateResponse)
 async def generate_flashcards(
     request: GenerateRequest,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     service: FlashcardService = Depends(get_flashcard_service)
 ):
     """Start flashcard generation process."""
@@ -129,7 +131,7 @@ async def generate_flashcards(
 @router.get("/tasks/{task_id}/status", response_model=TaskStatusResponse)
 async def get_task_status(
     task_id: str,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     service: FlashcardService = Depends(get_flashcard_service)
 ):
     """Get the status of a flashcard generation task."""
@@ -158,7 +160,7 @@ async def get_task_status(
 @router.get("/tasks/{task_id}/download")
 async def download_flashcards(
     task_id: str,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     service: FlashcardService = Depends(get_flashcard_service)
 ):
     """Download the generated flashcard deck."""
@@ -177,7 +179,7 @@ async def download_flashcards(
 @router.post("/tasks/{task_id}/cancel", response_model=TaskActionResponse)
 async def cancel_task(
     task_id: str,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     service: FlashcardService = Depends(get_flashcard_service)
 ):
     """Cancel a running flashcard generation task."""
@@ -196,7 +198,7 @@ async def cancel_task(
 @router.post("/tasks/{task_id}/retry", response_model=TaskActionResponse)
 async def retry_task(
     task_id: str,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     service: FlashcardService = Depends(get_flashcard_service)
 ):
     """Retry a failed flashcard generation task."""
@@ -215,7 +217,7 @@ async def retry_task(
 @router.get("/history")
 async def get_processing_history(
     limit: int = 10,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     service: FlashcardService = Depends(get_flashcard_service)
 ):
     """Get user's processing history."""
@@ -224,11 +226,11 @@ async def get_processing_history(
 
 @router.get("/config")
 async def get_upload_config(
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """Get supported file types and limits."""
     return {
-        "max_file_size": 50 * 1024 * 1024,  # 50MB
+        "max_file_size": MAX_UPLOAD_SIZE,
         "supported_types": [".pdf"],
         "max_pages": 500
     }
@@ -237,14 +239,14 @@ async def get_upload_config(
 @router.post("/validate")
 async def validate_pdf(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """Validate PDF before upload."""
     if not file.filename.lower().endswith('.pdf'):
         return {"valid": False, "error": "Only PDF files are allowed"}
     
     content = await file.read()
-    if len(content) > 50 * 1024 * 1024:
+    if len(content) > MAX_UPLOAD_SIZE:
         return {"valid": False, "error": "File size too large (max 50MB)"}
     
     return {"valid": True, "message": "File is valid"}
@@ -252,7 +254,7 @@ async def validate_pdf(
 
 @router.get("/stats")
 async def get_user_stats(
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     service: FlashcardService = Depends(get_flashcard_service)
 ):
     """Get processing statistics for the user."""
@@ -262,7 +264,7 @@ async def get_user_stats(
 @router.get("/tasks/{task_id}/details")
 async def get_task_details(
     task_id: str,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     service: FlashcardService = Depends(get_flashcard_service)
 ):
     """Get detailed information about a completed task."""
@@ -275,7 +277,7 @@ async def get_task_details(
 @router.delete("/tasks/{task_id}")
 async def delete_task(
     task_id: str,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     service: FlashcardService = Depends(get_flashcard_service)
 ):
     """Delete a processing task and its files."""
@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 
-from ...db.database import get_db
-from ...db.models.db_user import User
+from ...db.database import get_async_db, get_db
 from ...services import notes_service
-from ...utils.auth import get_current_active_user
+from ...utils.auth import Principal, get_current_active_user
+from ...utils.http_cache import check_not_modified, latest, weak_etag
 from ..schemas.notes import NoteOut, NoteCreate, NoteUpdate
 
 
@@ -18,15 +19,29 @@ router = APIRouter(
 
 @router.get("/", response_model=List[NoteOut])
 async def get_notes(
+    request: Request,
+    response: Response,
     courseId: int,
     chapterId: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Retrieve all notes for a specific course and chapter for the current user.
+    Supports conditional requests (ETag / Last-Modified).
     """
-    notes = notes_service.get_notes(
+    versions = await notes_service.get_note_versions_async(
+        db=db,
+        course_id=courseId,
+        chapter_id=chapterId,
+        current_user=current_user
+    )
+    if versions:
+        cached = check_not_modified(request, response, weak_etag(versions), latest(v[2] for v in versions))
+        if cached:
+            return cached
+
+    notes = await notes_service.get_notes_async(
         db=db,
         course_id=courseId,
         chapter_id=chapterId,
@@ -44,7 +59,7 @@ async def get_notes(
 async def add_note(
     note: NoteCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Create a new note for the current user.
@@ -64,7 +79,7 @@ async def update_note(
     note_id: int,
     note: NoteUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Update an existing note's text.
@@ -82,7 +97,7 @@ async def update_note(
 async def delete_note(
     note_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Delete a note.
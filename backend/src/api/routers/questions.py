@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 
-from ...db.database import get_db
+from ...db.database import get_async_db, get_db
 from ..schemas.questions import QuestionResponse
 from ...db.crud import questions_crud
-from ...db.models.db_course import Chapter, PracticeQuestion
-from ...db.models.db_user import User
-from ...utils.auth import get_current_active_user
-from ...services.course_service import verify_course_ownership
+from ...db.crud.aio import chapters_crud as async_chapters_crud, questions_crud as async_questions_crud
+from ...db.models.db_course import PracticeQuestion
+from ...utils.auth import Principal, get_current_active_user
+from ...utils.http_cache import check_not_modified, latest, weak_etag
+from ...services.course_service import verify_course_ownership, verify_course_ownership_async
 from .courses import agent_service
 
 
@@ -43,26 +45,32 @@ def get_practice_questions(questions: List[PracticeQuestion]) -> List[QuestionRe
 
 @router.get("/{course_id}/chapters/{chapter_id}", response_model=List[QuestionResponse])
 async def get_questions_by_chapter_id(
+        request: Request,
+        response: Response,
         course_id: int,
         chapter_id: int,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: Principal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    course = await verify_course_ownership(course_id, str(current_user.id), db)
+    """Practice questions of a chapter, supports conditional requests (ETag / Last-Modified)."""
+    course = await verify_course_ownership_async(course_id, str(current_user.id), db)
     # Find the specific chapter
-    chapter = (db.query(Chapter)
-               .filter(Chapter.id == chapter_id, Chapter.course_id == course_id)
-               .first())
+    chapter = await async_chapters_crud.get_chapter_by_course_id_and_chapter_id(db, course_id, chapter_id)
 
     if not chapter:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Chapter not found in this course"
         )
-    if not chapter.questions:
+
+    versions = await async_questions_crud.get_question_versions(db, chapter_id)
+    cached = check_not_modified(request, response, weak_etag(versions), latest(v[2] for v in versions))
+    if cached:
+        return cached
+    if not versions:
         return []
 
-    return get_practice_questions(chapter.questions)
+    return get_practice_questions(await async_questions_crud.get_questions_by_chapter_id(db, chapter_id))
 
 @router.get("/{course_id}/chapters/{chapter_id}/{question_id}/save", response_model=QuestionResponse)
 async def save_answer(
@@ -70,7 +78,7 @@ async def save_answer(
         chapter_id: int,
         question_id: int,
         users_answer: str,
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_active_user),
         db: Session = Depends(get_db)
 ):
     """ Save a user's answer to a question. Also saves user answer plus feedback in the database. """
@@ -119,7 +127,7 @@ async def get_feedback(
     chapter_id: int,
     question_id: int,
     users_answer: str,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """ Get feedback on an open text question. Also saves user answer plus feedback in the database. """
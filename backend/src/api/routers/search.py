@@ -1,12 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from typing import List
 
-from ...db.database import get_db
 from ...api.schemas.search import SearchResult
 from ...services.search_service import search_courses_and_chapters
-from ...utils.auth import get_current_active_user
-from ...db.models.db_user import User
+from ...services.search_suggest import suggest
+from ...utils.auth import Principal, get_current_active_user
 import traceback
 
 
@@ -20,12 +18,11 @@ router = APIRouter(
 @router.get("/", response_model=List[SearchResult])
 async def search(
     query: str,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Search for courses and chapters that match the given query string.
-    Returns a list of search results containing both courses and chapters.
+    Returns a list of search results containing both courses and chapters (matching notes as their chapter).
     """
     if not query or len(query.strip()) < 2:
         raise HTTPException(
@@ -34,7 +31,7 @@ async def search(
         )
     
     try:
-        results = await search_courses_and_chapters(db=db, query=query, user_id=str(current_user.id))
+        results = await search_courses_and_chapters(query=query, user_id=str(current_user.id))
         return results
     except Exception as e:
 
@@ -42,3 +39,16 @@ async def search(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred during search: {str(traceback.format_exc())}"
         )
+
+
+@router.get("/suggest", response_model=List[SearchResult])
+async def suggest_titles(
+    query: str,
+    limit: int = Query(8, ge=1, le=20),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """
+    Typeahead: course titles and chapter captions of the user that complete the typed query.
+    Cheap enough to call on every keystroke and not logged, use GET /search/ for submitted searches.
+    """
+    return await suggest(user_id=str(current_user.id), query=query, limit=limit)
@@ -1,22 +1,25 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse
+from datetime import date, datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks, WebSocket, WebSocketDisconnect
 import uuid
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
 from ...db.models.db_course import Chapter, Course, CourseStatus
-from ...db.models.db_user import User
 from ...services.agent_service import AgentService
-from ...utils.auth import get_current_active_user
-from ...db.database import get_db, get_db_context, SessionLocal
+from ...utils.auth import Principal, get_current_active_user
+from ...db.database import get_async_db, get_db_context, SessionLocal
 from ...db.crud import courses_crud, chapters_crud, users_crud
-from ...services import course_service
+from ...services import course_service, usage_writer
 from ...services.course_service import verify_course_ownership
-from ...db.crud import usage_crud
+from ...db.crud.aio import statistics_crud as async_statistics_crud
+from ...db.crud.aio import usage_crud as async_usage_crud
+from ...config.settings import STATS_MAX_DAYS
 
 
 from ..schemas.statistics import (
+    DailyStatistics,
+    PlatformStatistics,
     UsagePost,
 )
 
@@ -29,38 +32,51 @@ router = APIRouter(
 
 
 
-@router.get("/")
-def get_statistics():
-    # Dummy statistics data
-    return JSONResponse({
-        "users": 42,
-        "courses": 7,
-        "chapters": 23,
-        "active_today": 12,
-        "messages": 99
-    })
+@router.get("/", response_model=PlatformStatistics)
+async def get_statistics(db: AsyncSession = Depends(get_async_db)):
+    """
+    Platform statistics, read from the row materialized by the refresh_statistics job.
+    """
+    stats = await async_statistics_crud.get_platform_stats(db)
+    return stats if stats is not None else PlatformStatistics()
+
+
+@router.get("/daily", response_model=List[DailyStatistics])
+async def get_daily_statistics(
+    days: int = Query(30, ge=1, le=STATS_MAX_DAYS),
+    until: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """
+    Per-day platform aggregates of the last `days` days up to `until` (default today, UTC).
+    Days without any activity are left out.
+    """
+    until = until or datetime.now(timezone.utc).date()
+    return await async_statistics_crud.get_daily_stats(db, until - timedelta(days=days - 1), until)
 
 
 
-@router.post("/usage")
-def post_usage(
+@router.post("/usage", status_code=status.HTTP_202_ACCEPTED)
+async def post_usage(
     usage: UsagePost,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Log a user action on the site.
+    The event is buffered and written in a batch (services.usage_writer).
     """
-    return usage_crud.log_site_usage(db, usage)
+    usage_writer.log_site_usage(usage)
+    return {"status": "accepted"}
 
 
 @router.get("/{user_id}/total_learn_time")
-def get_usage(
+async def get_usage(
     user_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Get the total time spent on chapters by a user.
     """
-    return usage_crud.get_total_time_spent_on_chapters(db, user_id)
+    return await async_usage_crud.get_total_time_spent_on_chapters(db, user_id)
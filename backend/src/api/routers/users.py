@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 
 from ...db.database import get_db
@@ -10,6 +10,9 @@ from ...utils import auth
 from ...utils.auth import get_current_user_optional # Import the new dependency
 from ..schemas import user as user_schemas  # For Pydantic models
 from ..schemas import auth as auth_schemas  # For Pydantic models
+from ...utils.file_response import blob_response
+from ...utils.http_cache import etag_matches, not_modified
+from ...utils.pagination import decode_cursor, set_next_cursor
 from fastapi import FastAPI, Response, Cookie
 
 
@@ -36,20 +39,44 @@ async def read_current_user(
             response_model=List[user_schemas.User],
             dependencies=[Depends(auth.get_current_admin_user)])
 async def read_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
-    Retrieve all users. Only accessible by admin users.
+    Retrieve all users, newest first. Only accessible by admin users.
+    Full pages carry the cursor of the next page in the X-Next-Cursor header, pass it as cursor (instead of skip).
+    """
+    after = decode_cursor(cursor) if cursor else None
+    users = user_service.get_users(db, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, users, limit, lambda user: (user.created_at, user.id))
+    return users
+
+@router.get("/{user_id:str}/avatar")
+async def read_user_avatar(
+    request: Request,
+    user_id: str,
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(auth.get_current_active_user)
+):
+    """
+    Profile image of a user, same access rules as the profile itself.
+    The URL in profile_image_url carries the image hash, so the response can be cached indefinitely.
     """
-    return user_service.get_users(db, skip=skip, limit=limit)
+    user = user_service.get_avatar_user(db, user_id, current_user)
+    etag = f'"{user.avatar_hash}"'
+    headers = {"Cache-Control": "private, max-age=31536000, immutable"}
+    if etag_matches(request, etag):
+        return not_modified(etag, headers)
+    return blob_response(request, user.avatar_hash, media_type=user.avatar_content_type, headers={**headers, "ETag": etag})
 
 @router.get("/{user_id:str}", response_model=user_schemas.User)
 async def read_user(
     user_id: str,
     db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(auth.get_current_active_user)
+    current_user: auth.Principal = Depends(auth.get_current_active_user)
 ):
     """
     Retrieve a specific user by ID.
@@ -62,32 +89,32 @@ async def update_user(
     user_id: str,
     user_update: user_schemas.UserUpdate,
     db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(auth.get_current_active_user)
+    current_user: auth.Principal = Depends(auth.get_current_active_user)
 ):
     """
     Update a user's profile. Admins can update any user,
     regular users can only update their own profile.
     """
-    return user_service.update_user(db, user_id, user_update, current_user)
+    return await user_service.update_user(db, user_id, user_update, current_user)
 
 @router.put("/{user_id}/change_password", response_model=user_schemas.User)
 async def change_password(
     user_id: str,
     password_data: user_schemas.UserPasswordUpdate,
     db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(auth.get_current_active_user)
+    current_user: auth.Principal = Depends(auth.get_current_active_user)
 ):
     """
     Change a user's password.
     Admins can change any user's password, regular users can only change their own password.
     """
-    return user_service.change_password(db, user_id, password_data, current_user)
+    return await user_service.change_password(db, user_id, password_data, current_user)
 
 @router.delete("/{user_id:str}", response_model=user_schemas.User, dependencies=[Depends(auth.get_current_admin_user)])
 async def delete_user(
     user_id: str,
     db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(auth.get_current_admin_user)
+    current_user: auth.Principal = Depends(auth.get_current_admin_user)
 ):
     """
     Delete a user. Only accessible by admin users.
@@ -99,7 +126,7 @@ async def delete_user(
 async def delete_user(
     response: Response,
     db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(auth.get_current_active_user)
+    current_user: auth.Principal = Depends(auth.get_current_active_user)
 ):
     """
     Delete a user. Only accessible by the user itself.
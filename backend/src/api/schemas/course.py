@@ -12,6 +12,20 @@ class CourseRequest(BaseModel):
     difficulty: str = Field(..., description="Difficulty")
 
 
+class ChapterSummary(BaseModel):
+    """Chapter without its content, for course overviews (GET /courses/{id}/chapters?view=summary)."""
+    id: int
+    index: int
+    caption: str
+    summary: str
+    time_minutes: int
+    is_completed: bool = False
+    image_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
 class Chapter(BaseModel):
     """Schema for a chapter in the course."""
     id: int  # Add this line to include the database ID
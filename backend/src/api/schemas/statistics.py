@@ -1,3 +1,4 @@
+from datetime import date, datetime
 from typing import Literal, Optional
 from pydantic import BaseModel
 
@@ -9,3 +10,29 @@ class UsagePost(BaseModel):
     visible: Optional[bool] = None
     timestamp: str = None
 
+
+class PlatformStatistics(BaseModel):
+    """Materialized platform statistics (refreshed every STATS_REFRESH_INTERVAL_MINUTES)"""
+    users: int = 0
+    courses: int = 0
+    chapters: int = 0
+    active_today: int = 0
+    messages: int = 0
+    refreshed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class DailyStatistics(BaseModel):
+    """Platform aggregates of one day (UTC)"""
+    day: date
+    active_users: int
+    new_users: int
+    courses_created: int
+    chapters_created: int
+    chat_messages: int
+    learn_minutes: int
+
+    class Config:
+        from_attributes = True
@@ -1,8 +1,9 @@
 # app/schemas.py
-from pydantic import BaseModel, EmailStr, Field, field_validator # Make sure field_validator is imported
+from pydantic import BaseModel, EmailStr, Field, computed_field, field_validator # Make sure field_validator is imported
 from typing import Optional, List
 from datetime import datetime
 import re
+from ...services.avatar_service import avatar_url
 from ...config.settings import MIN_PASSWORD_LENGTH, REQUIRE_UPPERCASE, REQUIRE_LOWERCASE, REQUIRE_DIGIT, REQUIRE_SPECIAL_CHAR, SPECIAL_CHARACTERS_REGEX_PATTERN # Make sure SPECIAL_CHARACTERS_REGEX_PATTERN is imported
 
 class UserBase(BaseModel):
@@ -109,17 +110,25 @@ class UserPasswordUpdate(BaseModel):
         return v
 
 
-class User(UserBase):
+class User(BaseModel):
     """Model representing a user in the system."""
+    username: str
+    email: EmailStr
     id: str
     is_active: bool
     is_admin: bool
-    profile_image_base64: Optional[str] = None # Added for profile image
+    avatar_hash: Optional[str] = Field(default=None, exclude=True)
     created_at: datetime
     last_login: datetime
     login_streak: int
     total_learn_time: Optional[int] = None # Total time spent learning in Minutes
 
+    @computed_field
+    @property
+    def profile_image_url(self) -> Optional[str]:
+        """Cacheable avatar URL instead of the image itself"""
+        return avatar_url(self.id, self.avatar_hash)
+
     class Config:
         from_attributes = True
 
@@ -6,4 +6,22 @@ CHROMA_COLLECTION_NAME = os.getenv("CHROMA_COLLECTION_NAME", "nexora_content")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
 
 # For production, use HTTP client
-CHROMA_CLIENT_TYPE = os.getenv("CHROMA_CLIENT_TYPE", "http")  # "http" or "persistent"
\ No newline at end of file
+CHROMA_CLIENT_TYPE = os.getenv("CHROMA_CLIENT_TYPE", "http")  # "http" or "persistent"
+
+# Collection layout
+# "per_course": one collection per course (course_<id>)
+# "sharded": a fixed number of shard collections, keyed by hash(course_id) and filtered by course_id metadata
+CHROMA_LAYOUT = os.getenv("CHROMA_LAYOUT", "per_course")
+CHROMA_SHARD_COUNT = int(os.getenv("CHROMA_SHARD_COUNT", "16"))
+CHROMA_SHARD_PREFIX = os.getenv("CHROMA_SHARD_PREFIX", "courses_shard_")
+
+# Orphaned vector garbage collection (see core.routines.sweep_orphaned_vectors)
+VECTOR_GC_INTERVAL_MINUTES = int(os.getenv("VECTOR_GC_INTERVAL_MINUTES", "360"))
+VECTOR_GC_BATCH_SIZE = int(os.getenv("VECTOR_GC_BATCH_SIZE", "200"))
+VECTOR_GC_BATCH_PAUSE_SECONDS = float(os.getenv("VECTOR_GC_BATCH_PAUSE_SECONDS", "0.5"))
+VECTOR_GC_MAX_VECTORS_PER_RUN = int(os.getenv("VECTOR_GC_MAX_VECTORS_PER_RUN", "20000"))
+
+# RAG chunking of uploaded PDFs (tokens are approximated as words and punctuation)
+RAG_CHUNK_MAX_TOKENS = int(os.getenv("RAG_CHUNK_MAX_TOKENS", "200"))
+RAG_CHUNK_OVERLAP_TOKENS = int(os.getenv("RAG_CHUNK_OVERLAP_TOKENS", "30"))
+RAG_EMBEDDING_BATCH_SIZE = int(os.getenv("RAG_EMBEDDING_BATCH_SIZE", "32"))
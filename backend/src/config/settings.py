@@ -47,6 +47,61 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "20")
 REFRESH_TOKEN_EXPIRE_MINUTES = int(os.getenv("REFRESH_TOKEN_EXPIRE_MINUTES", "360000")) # 100h
 SECURE_COOKIE = os.getenv("SECURE_COOKIE", "true").lower() == "true"
 
+# In-process cache of verified tokens and slim user principals used by get_current_active_user.
+# Kept far below the token lifetime, it is the longest time a deactivation can take to reach other workers.
+PRINCIPAL_CACHE_TTL_SECONDS = min(int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30")), ACCESS_TOKEN_EXPIRE_MINUTES * 60 // 10)
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+PRINCIPAL_CACHE_STATS_INTERVAL_MINUTES = int(os.getenv("PRINCIPAL_CACHE_STATS_INTERVAL_MINUTES", "15"))
+
+# Password hashing runs in a bounded pool off the event loop (bcrypt releases the GIL, threads are enough).
+# Stored hashes with fewer rounds are re-hashed on the next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hash jobs waiting or running beyond this answer 503 instead of queueing up
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+
+# Usage events are buffered in-process and written in multi-row INSERTs (services.usage_writer)
+USAGE_FLUSH_MAX_EVENTS = int(os.getenv("USAGE_FLUSH_MAX_EVENTS", "200"))  # flush when this many events are buffered
+USAGE_FLUSH_INTERVAL_MS = int(os.getenv("USAGE_FLUSH_INTERVAL_MS", "1000"))  # ... or when the oldest is this old
+USAGE_BUFFER_MAX_EVENTS = int(os.getenv("USAGE_BUFFER_MAX_EVENTS", "10000"))
+# What happens when the buffer is full (database down or too slow): "drop_oldest" or "drop_newest"
+USAGE_DROP_POLICY = os.getenv("USAGE_DROP_POLICY", "drop_oldest")
+# Events that could not be written at shutdown are appended here and replayed on the next start
+USAGE_SPILL_PATH = os.getenv("USAGE_SPILL_PATH", "./usage_spill.jsonl")
+USAGE_STATS_INTERVAL_MINUTES = int(os.getenv("USAGE_STATS_INTERVAL_MINUTES", "15"))
+
+# Platform statistics (GET /statistics/) are materialized by a scheduler job
+STATS_REFRESH_INTERVAL_MINUTES = int(os.getenv("STATS_REFRESH_INTERVAL_MINUTES", "5"))
+# Usage events and users younger than this are left for the next refresh (their transactions may be in flight)
+STATS_SETTLE_SECONDS = int(os.getenv("STATS_SETTLE_SECONDS", "60"))
+STATS_MAX_DAYS = int(os.getenv("STATS_MAX_DAYS", "365"))  # longest range of GET /statistics/daily
+# Learn time is sessionized from the visible pings (sent every 10 s while a dashboard page is open):
+# gaps up to the cutoff count as learning, a ping without a next one within the cutoff counts LEARN_TAIL_SECONDS
+LEARN_IDLE_CUTOFF_SECONDS = int(os.getenv("LEARN_IDLE_CUTOFF_SECONDS", "60"))
+LEARN_TAIL_SECONDS = int(os.getenv("LEARN_TAIL_SECONDS", "10"))
+
+# Usage retention: older rows are moved to compressed jsonl.zst files (services.usage_archive), 0 keeps everything
+USAGE_RETENTION_DAYS = int(os.getenv("USAGE_RETENTION_DAYS", "180"))
+USAGE_ARCHIVE_PATH = os.getenv("USAGE_ARCHIVE_PATH", "./usage_archive")
+USAGE_ARCHIVE_BATCH_SIZE = int(os.getenv("USAGE_ARCHIVE_BATCH_SIZE", "5000"))  # rows per archive file
+USAGE_ARCHIVE_INTERVAL_MINUTES = int(os.getenv("USAGE_ARCHIVE_INTERVAL_MINUTES", "1440"))
+# Actions that stay in the table: rebuild_usage_counters recounts them (create_course is the course creation quota)
+USAGE_RETENTION_KEEP_ACTIONS = [
+    action.strip() for action in os.getenv("USAGE_RETENTION_KEEP_ACTIONS", "create_course").split(",") if action.strip()
+]
+
+
+# Search index over courses, chapters and notes (services.search_index), a SQLite FTS5 file next to the database
+SEARCH_INDEX_BACKEND = os.getenv("SEARCH_INDEX_BACKEND", "sqlite")
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", "./search_index.sqlite3")
+# Typeahead (GET /search/suggest): per-user title prefix index and completions, cached per worker process.
+# Local changes invalidate both, other workers see them after the TTL
+SEARCH_SUGGEST_INDEX_TTL_SECONDS = int(os.getenv("SEARCH_SUGGEST_INDEX_TTL_SECONDS", "60"))
+SEARCH_SUGGEST_RESULT_TTL_SECONDS = int(os.getenv("SEARCH_SUGGEST_RESULT_TTL_SECONDS", "10"))
+SEARCH_SUGGEST_MAX_USERS = int(os.getenv("SEARCH_SUGGEST_MAX_USERS", "2000"))
+SEARCH_SUGGEST_MAX_RESULTS = int(os.getenv("SEARCH_SUGGEST_MAX_RESULTS", "20000"))
+
 
 # Database settings
 DB_USER = os.getenv("DB_USER", "your_db_user")
@@ -56,6 +111,10 @@ DB_PORT = os.getenv("DB_PORT", "3306") # Default MySQL port
 DB_NAME = os.getenv("DB_NAME", "your_app_db")
 
 SQLALCHEMY_DATABASE_URL = f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Async driver for the request handlers that use AsyncSession (e.g. sqlite+aiosqlite:///./test.db for tests)
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL", f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
 # For SQLite (testing): # SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 # For PostgreSQL: # SQLALCHEMY_DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
@@ -90,4 +149,26 @@ UNSPLASH_SECRET_KEY = os.getenv("UNSPLASH_SECRET_KEY")
 CHROMA_DB_URL = os.getenv("CHROMA_DB_URL", "http://localhost:8000")
 
 
+# Blob store for document and image bytes (content addressed by sha256)
+BLOB_STORE_BACKEND = os.getenv("BLOB_STORE_BACKEND", "local")
+BLOB_STORE_PATH = os.getenv("BLOB_STORE_PATH", "./blob_store")
+BLOB_GC_INTERVAL_MINUTES = int(os.getenv("BLOB_GC_INTERVAL_MINUTES", "1440"))
+# Unreferenced blobs younger than this are kept, their row may still be in the making
+BLOB_GC_GRACE_MINUTES = int(os.getenv("BLOB_GC_GRACE_MINUTES", "60"))
+
+# Resized / converted image variants, rendered on demand and cached on disk
+IMAGE_VARIANT_CACHE_PATH = os.getenv("IMAGE_VARIANT_CACHE_PATH", os.path.join(BLOB_STORE_PATH, "variants"))
+IMAGE_VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", "2"))
+
+
+# Document artifacts (parsed once after upload)
+# How long course creation waits for a still running extraction before parsing the document itself
+ARTIFACT_WAIT_SECONDS = int(os.getenv("ARTIFACT_WAIT_SECONDS", "60"))
+
+# Document digests sent to the planner instead of the raw files
+DIGEST_TOKEN_BUDGET = int(os.getenv("DIGEST_TOKEN_BUDGET", "8000"))  # shared by all documents of a course
+DIGEST_TOP_K = int(os.getenv("DIGEST_TOP_K", "8"))  # passages retrieved per document
+DIGEST_RAW_MAX_BYTES = int(os.getenv("DIGEST_RAW_MAX_BYTES", str(256 * 1024)))  # smaller documents are sent as raw bytes
+
+
 AGENT_DEBUG_MODE = os.getenv("AGENT_DEBUG_MODE", "true").lower() == "true"
\ No newline at end of file
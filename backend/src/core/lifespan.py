@@ -1,10 +1,21 @@
 import logging
 from contextlib import asynccontextmanager
+from datetime import datetime
 from fastapi import FastAPI
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-from ..core.routines import update_stuck_courses
+from ..config.chroma_settings import VECTOR_GC_INTERVAL_MINUTES
+from ..config.settings import (BLOB_GC_INTERVAL_MINUTES, PRINCIPAL_CACHE_STATS_INTERVAL_MINUTES,
+                               STATS_REFRESH_INTERVAL_MINUTES, USAGE_ARCHIVE_INTERVAL_MINUTES,
+                               USAGE_STATS_INTERVAL_MINUTES)
+from ..core.password_hashing import shutdown_pool as shutdown_password_hash_pool
+from ..db.database import dispose_async_engine
+from ..core.routines import (archive_usages, build_search_index, refresh_statistics, update_stuck_courses,
+                             sweep_orphaned_vectors, sweep_orphaned_blobs)
+from ..services import search_index, usage_writer
+from ..services.image_variant_service import shutdown_pool as shutdown_image_variant_pool
+from ..utils import principal_cache
 
 scheduler = AsyncIOScheduler()
 logger = logging.getLogger(__name__)
@@ -15,7 +26,19 @@ async def lifespan(app: FastAPI):
     logger.info("Starting application...")
     
     try:
+        usage_writer.replay_spill()
         scheduler.add_job(update_stuck_courses, 'interval', hours=1)
+        scheduler.add_job(sweep_orphaned_vectors, 'interval', minutes=VECTOR_GC_INTERVAL_MINUTES,
+                          max_instances=1, coalesce=True)
+        scheduler.add_job(sweep_orphaned_blobs, 'interval', minutes=BLOB_GC_INTERVAL_MINUTES,
+                          max_instances=1, coalesce=True)
+        scheduler.add_job(refresh_statistics, 'interval', minutes=STATS_REFRESH_INTERVAL_MINUTES,
+                          max_instances=1, coalesce=True, next_run_time=datetime.now())
+        scheduler.add_job(archive_usages, 'interval', minutes=USAGE_ARCHIVE_INTERVAL_MINUTES,
+                          max_instances=1, coalesce=True)
+        scheduler.add_job(build_search_index, next_run_time=datetime.now())
+        scheduler.add_job(principal_cache.log_stats, 'interval', minutes=PRINCIPAL_CACHE_STATS_INTERVAL_MINUTES)
+        scheduler.add_job(usage_writer.log_stats, 'interval', minutes=USAGE_STATS_INTERVAL_MINUTES)
         scheduler.start()
         logger.info("Scheduler started.")   
 
@@ -28,4 +51,10 @@ async def lifespan(app: FastAPI):
         if scheduler.running:
             scheduler.shutdown()
             logger.info("Scheduler stopped.")
+        # Write buffered usage events before the engines go away
+        usage_writer.stop()
+        search_index.wait_for_pending()
+        shutdown_image_variant_pool()
+        shutdown_password_hash_pool()
+        await dispose_async_engine()
         logger.info("Application shutdown complete.")
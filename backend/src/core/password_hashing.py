@@ -0,0 +1,66 @@
+"""
+Password hashing off the event loop.
+
+bcrypt burns tens to hundreds of milliseconds of CPU per call. Running it on the event loop stalls every
+other request of the worker (SSE chat streams included), so hashes are computed in a small thread pool
+(the bcrypt extension releases the GIL). The pool is bounded: once PASSWORD_HASH_MAX_PENDING jobs are
+waiting or running, further logins are answered with 503 + Retry-After instead of piling up.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from ..config.settings import PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_WORKERS
+from . import security
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pending = 0  # only touched from the event loop
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max(1, PASSWORD_HASH_WORKERS), thread_name_prefix="password-hash")
+    return _executor
+
+
+async def _run(fn, *args):
+    global _pending
+    if _pending >= PASSWORD_HASH_MAX_PENDING:
+        logger.warning("Password hashing pool overloaded (%s jobs pending)", _pending)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in requests, please try again in a moment",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def verify_password(plain_password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """Verify a password in the pool, returns (valid, new_hash). Store new_hash if it is set."""
+    return await _run(security.verify_and_update_password, plain_password, hashed_password)
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password in the pool"""
+    return await _run(security.get_password_hash, password)
+
+
+def pending() -> int:
+    return _pending
+
+
+def shutdown_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
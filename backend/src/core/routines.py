@@ -2,13 +2,28 @@
 Core routines
 """
 import logging
+import sqlite3
+import time
 from datetime import datetime, timedelta, timezone
 
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
-from ..db.database import get_db
+from ..config.chroma_settings import (
+    VECTOR_GC_BATCH_SIZE, VECTOR_GC_BATCH_PAUSE_SECONDS, VECTOR_GC_MAX_VECTORS_PER_RUN
+)
+from ..config.settings import (BLOB_GC_GRACE_MINUTES, LEARN_IDLE_CUTOFF_SECONDS, LEARN_TAIL_SECONDS,
+                               STATS_SETTLE_SECONDS, USAGE_ARCHIVE_BATCH_SIZE, USAGE_ARCHIVE_PATH,
+                               USAGE_RETENTION_DAYS, USAGE_RETENTION_KEEP_ACTIONS)
+from ..db.crud import courses_crud, files_crud, learn_time_crud, statistics_crud
+from ..db.database import get_db, get_db_context
 from ..db.models.db_course import Course, CourseStatus  # Your SQLAlchemy model
+from ..services.blob_store import get_blob_store
+from ..services.search_index import get_search_index, rebuild_search_index
+from ..services.usage_archive import archive_old_usages
+from ..services.image_variant_service import delete_variants
+from ..services.vector_service import VectorService
 
 
 def update_stuck_courses():
@@ -42,3 +57,160 @@ def update_stuck_courses():
     finally:
         next(db_gen, None)
 
+
+def sweep_orphaned_vectors():
+    """
+    Delete vectors of courses that no longer exist or ended up FAILED.
+    Deletes in small batches with pauses and at most VECTOR_GC_MAX_VECTORS_PER_RUN vectors per run,
+    so the sweeper never competes with live retrieval. Leftovers are picked up by the next run.
+    """
+    logging.info("Sweeping orphaned vectors...")
+    report = {"courses": 0, "vectors": 0, "bytes": 0}
+
+    try:
+        # List the vectors before reading the live courses: a course committed while the shards are scanned
+        # then counts as live instead of as orphaned.
+        vector_service = VectorService()
+        vector_course_ids = vector_service.list_course_ids()
+
+        with get_db_context() as db:
+            live_course_ids = set(courses_crud.get_all_course_ids(db))
+            live_course_ids -= set(courses_crud.get_course_ids_by_status(db, CourseStatus.FAILED))
+
+        orphaned_course_ids = sorted(vector_course_ids - live_course_ids)
+
+        for course_id in orphaned_course_ids:
+            budget = VECTOR_GC_MAX_VECTORS_PER_RUN - report["vectors"]
+            if budget <= 0:
+                logging.info("Vector sweep budget exhausted, %s orphaned courses left for the next run.",
+                             len(orphaned_course_ids) - report["courses"])
+                break
+            deleted = vector_service.delete_course_vectors(
+                course_id,
+                batch_size=VECTOR_GC_BATCH_SIZE,
+                pause_seconds=VECTOR_GC_BATCH_PAUSE_SECONDS,
+                max_vectors=budget,
+            )
+            report["vectors"] += deleted["vectors"]
+            report["bytes"] += deleted["bytes"]
+            if deleted["complete"]:
+                report["courses"] += 1
+
+        logging.info("Vector sweep reclaimed %s vectors (~%s bytes) from %s orphaned courses.",
+                     report["vectors"], report["bytes"], report["courses"])
+
+    except SQLAlchemyError as e:
+        logging.error("Vector sweep database error: %s", e)
+    except Exception as e:
+        logging.error("Vector sweep failed: %s", e)
+
+    return report
+
+
+def sweep_orphaned_blobs():
+    """
+    Delete blobs that no document or image references anymore.
+    Blobs are shared between rows (deduplication), so deleting a row never deletes its blob directly.
+    Blobs written within the last BLOB_GC_GRACE_MINUTES are kept, their row may not be committed yet.
+    Temporary files of interrupted uploads older than the grace period and cached image variants
+    of deleted blobs are removed as well.
+    """
+    logging.info("Sweeping orphaned blobs...")
+    report = {"blobs": 0, "bytes": 0, "tmp_files": 0}
+
+    try:
+        store = get_blob_store()
+        threshold = time.time() - BLOB_GC_GRACE_MINUTES * 60
+        report["tmp_files"] = store.clean_tmp(threshold)
+        candidates = [blob_hash for blob_hash, mtime in store.iter_hashes() if mtime < threshold]
+
+        with get_db_context() as db:
+            referenced = files_crud.get_referenced_blob_hashes(db)
+
+        for blob_hash in candidates:
+            if blob_hash in referenced:
+                continue
+            # A deduplicated upload since the snapshot only refreshes the blob's mtime and may have committed
+            # its row after the references were read: re-check both right before deleting.
+            with get_db_context() as db:
+                if files_crud.is_blob_referenced(db, blob_hash):
+                    continue
+            try:
+                if store.mtime(blob_hash) >= threshold:
+                    continue
+                size = store.size(blob_hash)
+            except FileNotFoundError:
+                continue
+            if store.delete(blob_hash):
+                delete_variants(blob_hash)
+                report["blobs"] += 1
+                report["bytes"] += size
+
+        logging.info("Blob sweep deleted %s blobs (%s bytes) and %s temporary files.",
+                     report["blobs"], report["bytes"], report["tmp_files"])
+
+    except SQLAlchemyError as e:
+        logging.error("Blob sweep database error: %s", e)
+    except Exception as e:
+        logging.error("Blob sweep failed: %s", e)
+
+    return report
+
+
+def refresh_statistics():
+    """
+    Fold the usage events, courses, chapters and users written since the last run into the materialized
+    platform statistics and per-day aggregates that GET /statistics/ and /statistics/daily read,
+    and sessionize the new visible / hidden pings into learn time.
+    """
+    try:
+        start = time.perf_counter()
+        with get_db_context() as db:
+            learn_seconds = learn_time_crud.sessionize_learn_time(
+                db, LEARN_IDLE_CUTOFF_SECONDS, LEARN_TAIL_SECONDS, settle_seconds=STATS_SETTLE_SECONDS
+            )
+            stats = statistics_crud.refresh_statistics(db, settle_seconds=STATS_SETTLE_SECONDS)
+            logging.info("Statistics refreshed in %.0f ms (usages up to id %s, %s s of learn time).",
+                         (time.perf_counter() - start) * 1000, stats.usage_watermark, learn_seconds)
+    except SQLAlchemyError as e:
+        logging.error("Statistics refresh database error: %s", e)
+
+
+def archive_usages():
+    """
+    Move usage rows older than USAGE_RETENTION_DAYS to the compressed archive files (services.usage_archive).
+    """
+    if USAGE_RETENTION_DAYS <= 0:
+        return
+    logging.info("Archiving usages older than %s days...", USAGE_RETENTION_DAYS)
+    try:
+        with get_db_context() as db:
+            report = archive_old_usages(db, USAGE_RETENTION_DAYS, USAGE_ARCHIVE_PATH, USAGE_ARCHIVE_BATCH_SIZE,
+                                        USAGE_RETENTION_KEEP_ACTIONS)
+        logging.info("Usage archival moved %s rows into %s files.", report["rows"], report["files"])
+    except SQLAlchemyError as e:
+        logging.error("Usage archival database error: %s", e)
+    except OSError as e:
+        logging.error("Usage archival failed writing to %s: %s", USAGE_ARCHIVE_PATH, e)
+
+
+def build_search_index():
+    """
+    Fill the search index from the database if it is empty (first start, new SEARCH_INDEX_PATH).
+    After that it is kept up to date on every commit (services.search_index).
+    """
+    try:
+        index = get_search_index()
+        if index.count() > 0:
+            return
+        with get_db_context() as db:
+            if db.scalar(select(func.count(Course.id))) == 0:
+                return
+            logging.info("Search index is empty, indexing all courses, chapters and notes...")
+            start = time.perf_counter()
+            indexed = rebuild_search_index(db, index)
+        logging.info("Search index built with %s documents in %.0f s.", indexed, time.perf_counter() - start)
+    except SQLAlchemyError as e:
+        logging.error("Search index build database error: %s", e)
+    except sqlite3.Error as e:
+        logging.error("Search index build failed: %s", e)
@@ -10,9 +10,11 @@ from passlib.context import CryptContext
 from ..config import settings
 from ..config.settings import (ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM,
                                PRIVATE_KEY, PUBLIC_KEY, SECRET_KEY,
-                               REFRESH_TOKEN_EXPIRE_MINUTES)
+                               REFRESH_TOKEN_EXPIRE_MINUTES, BCRYPT_ROUNDS)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes below BCRYPT_ROUNDS (or of deprecated schemes) count as outdated, see verify_and_update_password
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto",
+                           bcrypt__rounds=BCRYPT_ROUNDS, bcrypt__min_rounds=BCRYPT_ROUNDS)
 oauth = OAuth()
 
 
@@ -25,6 +27,13 @@ def get_password_hash(password):
     """Hash a password using bcrypt."""
     return pwd_context.hash(password)
 
+
+def verify_and_update_password(plain_password, hashed_password):
+    """Verify a password, returns (valid, new_hash). new_hash is set if the stored hash is outdated."""
+    if not hashed_password:
+        return False, None
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def create_token(data: dict, expires_delta: timedelta) -> str:
     """Create a JWT access token with an expiration time."""
     to_encode = data.copy()
@@ -47,7 +56,12 @@ def create_refresh_token(data: dict) -> str:
 
 
 def verify_token(token: Optional[str]) -> str:
-    """Verify a JWT token and return the payload with user info."""
+    """Verify a JWT token and return the user id it was issued for."""
+    return verify_token_claims(token)["user_id"]
+
+
+def verify_token_claims(token: Optional[str]) -> dict:
+    """Verify a JWT token and return its payload (always contains user_id)."""
 
     if not token:
         raise HTTPException(
@@ -76,7 +90,7 @@ def verify_token(token: Optional[str]) -> str:
             detail="Token payload missing required claims",
         )
 
-    return user_id
+    return payload
 
 
 def set_access_cookie(response : Response, access_token: str):
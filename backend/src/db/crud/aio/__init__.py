@@ -0,0 +1,5 @@
+"""
+Async variants of the CRUD modules for request handlers that use AsyncSession (see db.database.get_async_db).
+Same function names and signatures as their sync counterparts, only awaitable.
+Deferred columns and relationships are never lazy loaded in async, so functions that need them load them explicitly.
+"""
@@ -0,0 +1,81 @@
+"""Async CRUD operations for chapters (see db.crud.chapters_crud)."""
+from typing import List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+
+from ...models.db_course import Chapter
+from ..chapters_crud import chapter_summaries_statement
+
+
+async def get_chapter_by_id(db: AsyncSession, chapter_id: int) -> Optional[Chapter]:
+    """Get chapter by ID"""
+    return await db.scalar(select(Chapter).where(Chapter.id == chapter_id))
+
+
+async def get_chapter_by_course_id_and_chapter_id(db: AsyncSession, course_id: int, chapter_id: int,
+                                                  with_content: bool = False) -> Optional[Chapter]:
+    """Get chapter by course_id and ID. Content is only loaded with with_content (or later via load_content)."""
+    query = select(Chapter).where(Chapter.id == chapter_id, Chapter.course_id == course_id)
+    if with_content:
+        query = query.options(undefer(Chapter.content))
+    return await db.scalar(query)
+
+
+async def load_content(db: AsyncSession, chapter: Chapter) -> Chapter:
+    """Load the deferred content of an already loaded chapter"""
+    await db.refresh(chapter, ["content"])
+    return chapter
+
+
+async def get_chapters_by_course_id(db: AsyncSession, course_id: int, with_content: bool = False) -> List[Chapter]:
+    """Get all chapters for a specific course, ordered by index. Content is only loaded with with_content."""
+    query = select(Chapter).where(Chapter.course_id == course_id).order_by(Chapter.index)
+    if with_content:
+        query = query.options(undefer(Chapter.content))
+    return list((await db.scalars(query)).all())
+
+
+async def get_chapter_versions(db: AsyncSession, course_id: int) -> List[tuple]:
+    """(id, version, last change) of the chapters of a course, ordered by index, without loading any content"""
+    result = await db.execute(
+        select(Chapter.id, Chapter.version, func.coalesce(Chapter.updated_at, Chapter.created_at))
+        .where(Chapter.course_id == course_id)
+        .order_by(Chapter.index)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def get_chapter_summaries(db: AsyncSession, course_id: int) -> List[tuple]:
+    """Chapters of a course without content (see chapter_summaries_statement), one row per chapter"""
+    return list((await db.execute(chapter_summaries_statement(course_id))).all())
+
+
+async def update_chapter(db: AsyncSession, chapter_id: int, **kwargs) -> Optional[Chapter]:
+    """Update chapter with provided fields"""
+    chapter = await get_chapter_by_id(db, chapter_id)
+    if chapter:
+        for key, value in kwargs.items():
+            if hasattr(chapter, key):
+                setattr(chapter, key, value)
+        await db.commit()
+        await db.refresh(chapter)
+    return chapter
+
+
+async def mark_chapter_complete(db: AsyncSession, chapter_id: int) -> Optional[Chapter]:
+    """Mark chapter as completed"""
+    return await update_chapter(db, chapter_id, is_completed=True)
+
+
+async def mark_chapter_incomplete(db: AsyncSession, chapter_id: int) -> Optional[Chapter]:
+    """Mark chapter as not completed"""
+    return await update_chapter(db, chapter_id, is_completed=False)
+
+
+async def get_completed_chapters_count(db: AsyncSession, course_id: int) -> int:
+    """Get total number of completed chapters in a course"""
+    return await db.scalar(
+        select(func.count(Chapter.id)).where(Chapter.course_id == course_id, Chapter.is_completed == True)
+    )
@@ -0,0 +1,51 @@
+"""Async CRUD operations for courses (see db.crud.courses_crud)."""
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ....api.schemas.course import CourseInfo
+from ....utils.pagination import Keyset
+from ...models.db_course import Course
+from ..courses_crud import (_course_info, course_with_completed_count_statement, courses_infos_statement,
+                            public_courses_infos_statement)
+
+
+async def get_course_by_id(db: AsyncSession, course_id: int) -> Optional[Course]:
+    """Get course by ID"""
+    return await db.scalar(select(Course).where(Course.id == course_id))
+
+
+async def get_course_with_completed_count(db: AsyncSession, course_id: int
+                                          ) -> Tuple[Optional[Course], int, Optional[datetime]]:
+    """
+    Get a course, the number of its completed chapters and the last update of its chapters,
+    (None, 0, None) if it does not exist
+    """
+    row = (await db.execute(course_with_completed_count_statement(course_id))).first()
+    return tuple(row) if row else (None, 0, None)
+
+
+async def get_courses_by_course_id_user_id(db: AsyncSession, course_id: int, user_id: str) -> Optional[Course]:
+    """Get a course if it belongs to a specific user"""
+    return await db.scalar(select(Course).where(Course.user_id == user_id, Course.id == course_id))
+
+
+async def get_course_count_by_user_id(db: AsyncSession, user_id: str) -> int:
+    """Get the count of courses for a specific user"""
+    return await db.scalar(select(func.count(Course.id)).where(Course.user_id == user_id))
+
+
+async def get_public_courses_infos(db: AsyncSession, user_id: str, skip: int = 0, limit: int = 200,
+                                   after: Optional[Keyset] = None) -> List[CourseInfo]:
+    """Public courses with the author's username"""
+    courses = (await db.execute(public_courses_infos_statement(skip, limit, after))).all()
+    return [_course_info(course, 0, user_name=username) for course, username in courses]
+
+
+async def get_courses_infos(db: AsyncSession, user_id: str, skip: int = 0, limit: int = 200,
+                            after: Optional[Keyset] = None) -> List[CourseInfo]:
+    """Courses of a user with their completed chapter count"""
+    courses = (await db.execute(courses_infos_statement(user_id, skip, limit, after))).all()
+    return [_course_info(course, completed_chapters) for course, completed_chapters in courses]
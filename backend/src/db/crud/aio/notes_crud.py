@@ -0,0 +1,53 @@
+"""Async CRUD operations for notes (see db.crud.notes_crud)."""
+from typing import List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...models.db_note import Note
+
+
+async def get_note_by_id(db: AsyncSession, note_id: int) -> Optional[Note]:
+    """Retrieve a note by its ID."""
+    return await db.scalar(select(Note).where(Note.id == note_id))
+
+
+async def get_notes_by_chapter(db: AsyncSession, course_id: int, chapter_id: int, user_id: str) -> List[Note]:
+    """Retrieve all notes for a specific chapter and user."""
+    return list((await db.scalars(
+        select(Note).where(Note.course_id == course_id, Note.chapter_id == chapter_id, Note.user_id == user_id)
+    )).all())
+
+
+async def get_note_versions(db: AsyncSession, course_id: int, chapter_id: int, user_id: str) -> List[tuple]:
+    """(id, version, last change) of the notes of a chapter and user, without loading their text."""
+    result = await db.execute(
+        select(Note.id, Note.version, func.coalesce(Note.updated_at, Note.created_at))
+        .where(Note.course_id == course_id, Note.chapter_id == chapter_id, Note.user_id == user_id)
+        .order_by(Note.id)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def create_note(db: AsyncSession, course_id: int, chapter_id: int, user_id: str, text: str) -> Note:
+    """Create a new note in the database."""
+    db_note = Note(course_id=course_id, chapter_id=chapter_id, user_id=user_id, text=text)
+    db.add(db_note)
+    await db.commit()
+    await db.refresh(db_note)
+    return db_note
+
+
+async def update_note(db: AsyncSession, db_note: Note, text: str) -> Note:
+    """Update an existing note's text."""
+    db_note.text = text
+    await db.commit()
+    await db.refresh(db_note)
+    return db_note
+
+
+async def delete_note(db: AsyncSession, db_note: Note) -> None:
+    """Delete a note from the database."""
+    await db.delete(db_note)
+    await db.commit()
+    return None
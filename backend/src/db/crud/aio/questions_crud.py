@@ -0,0 +1,30 @@
+"""Async CRUD operations for practice questions (see db.crud.questions_crud)."""
+from typing import List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...models.db_course import PracticeQuestion
+
+
+async def get_question_by_id(db: AsyncSession, question_id: int) -> Optional[PracticeQuestion]:
+    """Get question by ID"""
+    return await db.scalar(select(PracticeQuestion).where(PracticeQuestion.id == question_id))
+
+
+async def get_questions_by_chapter_id(db: AsyncSession, chapter_id: int) -> List[PracticeQuestion]:
+    """Get all questions for a specific chapter"""
+    return list((await db.scalars(
+        select(PracticeQuestion).where(PracticeQuestion.chapter_id == chapter_id).order_by(PracticeQuestion.id)
+    )).all())
+
+
+async def get_question_versions(db: AsyncSession, chapter_id: int) -> List[tuple]:
+    """(id, version, last change) of the questions of a chapter, ordered by id"""
+    result = await db.execute(
+        select(PracticeQuestion.id, PracticeQuestion.version,
+               func.coalesce(PracticeQuestion.updated_at, PracticeQuestion.created_at))
+        .where(PracticeQuestion.chapter_id == chapter_id)
+        .order_by(PracticeQuestion.id)
+    )
+    return [tuple(row) for row in result.all()]
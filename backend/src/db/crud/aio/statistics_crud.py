@@ -0,0 +1,22 @@
+"""Async CRUD operations for the materialized statistics (see db.crud.statistics_crud)."""
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...models.db_statistics import DailyStats, PlatformStats
+from ..statistics_crud import PLATFORM_STATS_ID
+
+
+async def get_platform_stats(db: AsyncSession) -> Optional[PlatformStats]:
+    """Get the materialized platform statistics, None before the first refresh"""
+    return await db.get(PlatformStats, PLATFORM_STATS_ID)
+
+
+async def get_daily_stats(db: AsyncSession, since: date, until: date) -> List[DailyStats]:
+    """Get the per-day aggregates of a date range (inclusive), ordered by day"""
+    result = await db.scalars(
+        select(DailyStats).where(DailyStats.day >= since, DailyStats.day <= until).order_by(DailyStats.day)
+    )
+    return list(result)
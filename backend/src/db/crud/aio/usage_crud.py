@@ -0,0 +1,59 @@
+"""Async CRUD operations for usage logging (see db.crud.usage_crud)."""
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ....api.schemas.statistics import UsagePost
+from ...models.db_statistics import LearnTimeTotal
+from ...models.db_usage import Usage, UsageCounter
+from ..usage_crud import counter_increments_statement
+
+
+async def log_usage(db: AsyncSession, user_id: str, action: str, course_id: Optional[int] = None,
+                    chapter_id: Optional[int] = None, details: Optional[str] = None) -> Usage:
+    """Log a user action in the database, returns the created Usage object"""
+    usage = Usage(user_id=user_id, action=action, course_id=course_id, chapter_id=chapter_id, details=details)
+    db.add(usage)
+    counters = counter_increments_statement(
+        db.get_bind().dialect.name,
+        [{"user_id": user_id, "action": action, "course_id": course_id, "chapter_id": chapter_id}]
+    )
+    await db.execute(counters)
+    await db.commit()
+    await db.refresh(usage)
+    return usage
+
+
+async def log_site_usage(db: AsyncSession, usage: UsagePost) -> Usage:
+    """Log a user action on the site (visible / hidden ping of a page)"""
+    return await log_usage(db,
+        user_id=usage.user_id,
+        action="site" + ("_visible" if usage.visible else "_hidden"),
+        course_id=usage.course_id,
+        chapter_id=usage.chapter_id,
+        details=usage.url)
+
+
+async def log_chapter_completion(db: AsyncSession, user_id: str, course_id: int, chapter_id: int) -> Usage:
+    """Log the completion of a chapter by a user"""
+    return await log_usage(db, user_id, action="complete_chapter", course_id=course_id, chapter_id=chapter_id)
+
+
+async def get_counter(db: AsyncSession, user_id: str, name: str) -> int:
+    """Current value of a usage counter (0 if the user has no such events)"""
+    total = await db.scalar(
+        select(UsageCounter.total).where(UsageCounter.user_id == user_id, UsageCounter.name == name)
+    )
+    return total or 0
+
+
+async def get_total_created_courses(db: AsyncSession, user_id: str) -> int:
+    """Get the total number of courses created by a user"""
+    return await get_counter(db, user_id, "create_course")
+
+
+async def get_total_time_spent_on_chapters(db: AsyncSession, user_id: str) -> int:
+    """Total time spent by a user on chapters in minutes, sessionized from the visible pings"""
+    seconds = await db.scalar(select(LearnTimeTotal.seconds).where(LearnTimeTotal.user_id == user_id))
+    return (seconds or 0) // 60
@@ -1,9 +1,8 @@
 from typing import List, Optional
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from sqlalchemy import text
-from ..models.db_course import Chapter, Course
+from sqlalchemy.orm import Session, joinedload, undefer
+from sqlalchemy import and_, func, select
+from ..models.db_course import Chapter
 
 
 
@@ -14,15 +13,45 @@ def get_chapter_by_id(db: Session, chapter_id: int) -> Optional[Chapter]:
     """Get chapter by ID"""
     return db.query(Chapter).filter(Chapter.id == chapter_id).first()
 
+def get_chapter_with_course(db: Session, chapter_id: int) -> Optional[Chapter]:
+    """Get chapter by ID with its course joined in the same query (for access checks)"""
+    return db.query(Chapter).options(joinedload(Chapter.course)).filter(Chapter.id == chapter_id).first()
+
 def get_chapter_by_course_id_and_chapter_id(db: Session, course_id: int, chapter_id: int) -> Optional[Chapter]:
     """Get chapter by course_id and ID. Unnecessary as chapters are unique per course."""
     return db.query(Chapter).filter(Chapter.id == chapter_id, Chapter.course_id == course_id).first()
 
 
 
-def get_chapters_by_course_id(db: Session, course_id: int) -> List[Chapter]:
-    """Get all chapters for a specific course, ordered by index"""
-    return db.query(Chapter).filter(Chapter.course_id == course_id).order_by(Chapter.index).all()
+def get_chapters_by_course_id(db: Session, course_id: int, with_content: bool = False) -> List[Chapter]:
+    """Get all chapters for a specific course, ordered by index. Content is only loaded with with_content."""
+    query = db.query(Chapter).filter(Chapter.course_id == course_id).order_by(Chapter.index)
+    if with_content:
+        query = query.options(undefer(Chapter.content))
+    return query.all()
+
+
+def get_chapter_versions(db: Session, course_id: int) -> List[tuple]:
+    """(id, version, last change) of the chapters of a course, ordered by index, without loading any content"""
+    return db.query(
+        Chapter.id, Chapter.version, func.coalesce(Chapter.updated_at, Chapter.created_at)
+    ).filter(Chapter.course_id == course_id).order_by(Chapter.index).all()
+
+
+def chapter_summaries_statement(course_id: int):
+    """Chapter metadata (no content) with version and last change, ordered by index (shared with the async variant)"""
+    return (
+        select(Chapter.id, Chapter.index, Chapter.caption, Chapter.summary, Chapter.time_minutes,
+               Chapter.is_completed, Chapter.image_url, Chapter.version,
+               func.coalesce(Chapter.updated_at, Chapter.created_at).label("last_change"))
+        .where(Chapter.course_id == course_id)
+        .order_by(Chapter.index)
+    )
+
+
+def get_chapter_summaries(db: Session, course_id: int) -> List[tuple]:
+    """Chapters of a course without content (see chapter_summaries_statement), one row per chapter"""
+    return db.execute(chapter_summaries_statement(course_id)).all()
 
 
 def get_chapter_by_course_and_index(db: Session, course_id: int, index: int) -> Optional[Chapter]:
@@ -95,64 +124,6 @@ def get_chapter_count_by_course(db: Session, course_id: int) -> int:
     return db.query(Chapter).filter(Chapter.course_id == course_id).count()
 
 
-def search_chapters_no_content(db: Session, query: str, user_id: str, limit: int = 10) -> List[Chapter]:
-    """
-    Search for chapters where title or content contains the query string (case-insensitive).
-    
-    Args:
-        db: Database session
-        query: Search string
-        limit: Maximum number of results to return
-        
-    Returns:
-        List of matching Chapter objects
-    """
-    search = f"%{query}%"
-    return (
-        db.query(Chapter)
-        .join(Chapter.course)  # Join with Course for access control
-        .filter(
-            (Course.user_id == user_id)
-        )
-        .filter(
-            (Chapter.caption.ilike(search)) |
-            #(Chapter.content.ilike(search)) |
-            (Chapter.summary.ilike(search))
-        )
-        .limit(limit)
-        .all()
-    )
-
-def search_chapters_indexed(db: Session, query: str, user_id: str, limit: int = 10):
-    """
-    Search for chapters using full-text search on indexed fields.
-    Args:
-        db: Database session
-        query: Search string
-        user_id: ID of the user to filter by
-        limit: Maximum number of results to return
-    Returns:
-        List of matching Chapter objects
-    """
-
-    stmt = text("""
-        SELECT 
-            chapters.id, chapters.course_id, chapters.index, 
-            chapters.caption, chapters.summary, chapters.content, 
-            chapters.time_minutes, chapters.is_completed, 
-            chapters.created_at, chapters.image_url
-        FROM chapters
-        JOIN courses ON courses.id = chapters.course_id
-        WHERE courses.user_id = :user_id
-        AND MATCH(chapters.caption, chapters.summary, chapters.content)
-            AGAINST (:query IN NATURAL LANGUAGE MODE)
-        LIMIT :limit
-    """)
-
-    results = db.execute(stmt, {"user_id": user_id, "query": query, "limit": limit})
-    return [Chapter(**row._asdict()) for row in results]
-
-
 def get_completed_chapters_count(db: Session, course_id: int) -> int:
     """Get total number of completed chapters in a course"""
     return db.query(Chapter).filter(
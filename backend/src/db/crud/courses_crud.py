@@ -1,12 +1,15 @@
 
-from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
+
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Optional, Tuple
 from ..models.db_course import Course, CourseStatus, Chapter
-from typing import List
+from ..models.db_user import User
 from ..models.db_course import Course, Chapter
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import select, func as sql_func
 from ...api.schemas.course import CourseInfo
+from ...utils.pagination import Keyset, after_keyset
 
 
 
@@ -16,6 +19,43 @@ def get_course_by_id(db: Session, course_id: int) -> Optional[Course]:
     return db.query(Course).filter(Course.id == course_id).first()
 
 
+def completed_chapters_column():
+    """Count of the completed chapters of the Course row in the same query (correlated subquery)"""
+    return (
+        select(sql_func.count(Chapter.id))
+        .where(Chapter.course_id == Course.id, Chapter.is_completed == True)
+        .correlate(Course)
+        .scalar_subquery()
+    )
+
+
+def chapters_updated_at_column():
+    """Last update of the chapters of the Course row in the same query (correlated subquery)"""
+    return (
+        select(sql_func.max(Chapter.updated_at))
+        .where(Chapter.course_id == Course.id)
+        .correlate(Course)
+        .scalar_subquery()
+    )
+
+
+def course_with_completed_count_statement(course_id: int):
+    """
+    A course, its completed chapter count and the last update of its chapters with one query
+    (shared with the async variant)
+    """
+    return select(Course, completed_chapters_column(), chapters_updated_at_column()).where(Course.id == course_id)
+
+
+def get_course_with_completed_count(db: Session, course_id: int) -> Tuple[Optional[Course], int, Optional[datetime]]:
+    """
+    Get a course, the number of its completed chapters and the last update of its chapters
+    (e.g. completing one), (None, 0, None) if it does not exist
+    """
+    row = db.execute(course_with_completed_count_statement(course_id)).first()
+    return tuple(row) if row else (None, 0, None)
+
+
 def get_course_by_session_id(db: Session, session_id: str) -> Optional[Course]:
     """Get course by session ID"""
     return db.query(Course).filter(Course.session_id == session_id).first()
@@ -100,8 +140,58 @@ def get_all_course_ids(db: Session) -> List[int]:
     return [course[0] for course in db.query(Course.id).all()]
 
 
+def get_course_ids_by_status(db: Session, status: CourseStatus) -> List[int]:
+    """Get the IDs of all courses with a specific status"""
+    return [course[0] for course in db.query(Course.id).filter(Course.status == status).all()]
+
+
+
+def _course_info(course: Course, completed_chapters: int, user_name: Optional[str] = None) -> CourseInfo:
+    return CourseInfo(
+        course_id=course.id,
+        total_time_hours=course.total_time_hours,
+        status=course.status.value,  # Convert enum to string
+        title=course.title,
+        description=course.description,
+        chapter_count=course.chapter_count,
+        image_url=course.image_url,
+        completed_chapter_count=completed_chapters,
+        user_name=user_name,
+        is_public=course.is_public,
+        created_at=course.created_at,
+    )
+
+
+def _newest_first(query, skip: int, limit: int, after: Optional[Keyset]):
+    # Keyset pages start after a cursor (see utils.pagination), id breaks ties of equal timestamps
+    if after is not None:
+        query = query.where(after_keyset(Course.created_at, Course.id, after))
+    return query.order_by(Course.created_at.desc(), Course.id.desc()).offset(skip).limit(limit)
+
 
-def get_public_courses_infos(db: Session, user_id: str, skip: int = 0, limit: int = 200) -> List[CourseInfo]:
+def public_courses_infos_statement(skip: int = 0, limit: int = 200, after: Optional[Keyset] = None):
+    """Public courses with the author's username (shared with the async variant)"""
+    # Join only the author's username, not the whole users row
+    return _newest_first(
+        select(Course, User.username)
+        .outerjoin(User, Course.user_id == User.id)
+        .where(Course.is_public == True),
+        skip, limit, after
+    )
+
+
+def courses_infos_statement(user_id: str, skip: int = 0, limit: int = 200, after: Optional[Keyset] = None):
+    """Courses of a user with their completed chapter count (shared with the async variant)"""
+    # Counted per listed course (ix_chapter_course_id_index), not grouped over the chapters of all courses
+    return _newest_first(
+        select(Course, completed_chapters_column().label('completed_chapters'))
+        .where(Course.user_id == user_id),
+        skip, limit, after
+    )
+
+
+def get_public_courses_infos(db: Session, user_id: str, skip: int = 0, limit: int = 200,
+                             after: Optional[Keyset] = None) -> List[CourseInfo]:
     """Get course info by user ID with completed chapter count
     
     Args:
@@ -109,44 +199,17 @@ def get_public_courses_infos(db: Session, user_id: str, skip: int = 0, limit: in
         user_id: ID of the user to get courses for
         skip: Number of records to skip (for pagination)
         limit: Maximum number of records to return
+        after: Keyset position (decoded cursor), only courses after it are returned
         
     Returns:
         List of CourseInfo objects containing course info with completed chapter count
     """
-    
-    # Eagerly load the related User object to get the username efficiently
-    courses = (
-        db.query(Course)
-        .options(joinedload(Course.user))
-        .filter(Course.is_public == True)
-        .order_by(Course.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
-    
-    # Convert to list of CourseInfo objects
-    result = []
-    for course in courses:
-        course_info = CourseInfo(
-            course_id=course.id,
-            total_time_hours=course.total_time_hours,
-            status=course.status.value,  # Convert enum to string
-            title=course.title,
-            description=course.description,
-            chapter_count=course.chapter_count,
-            image_url=course.image_url,
-            completed_chapter_count=0, # This can be calculated if needed
-            user_name=course.user.username if course.user else None,
-            is_public=course.is_public,
-            created_at=course.created_at,
-        )
-        result.append(course_info)
-    
-    return result
+    courses = db.execute(public_courses_infos_statement(skip, limit, after)).all()
+    return [_course_info(course, 0, user_name=username) for course, username in courses]
 
 
-def get_courses_infos(db: Session, user_id: str, skip: int = 0, limit: int = 200) -> List[CourseInfo]:
+def get_courses_infos(db: Session, user_id: str, skip: int = 0, limit: int = 200,
+                      after: Optional[Keyset] = None) -> List[CourseInfo]:
     """Get course info by user ID with completed chapter count
     
     Args:
@@ -154,76 +217,10 @@ def get_courses_infos(db: Session, user_id: str, skip: int = 0, limit: int = 200
         user_id: ID of the user to get courses for
         skip: Number of records to skip (for pagination)
         limit: Maximum number of records to return
+        after: Keyset position (decoded cursor), only courses after it are returned
         
     Returns:
         List of CourseInfo objects containing course info with completed chapter count
     """
-    # Subquery to count completed chapters per course
-    completed_chapters_subq = (
-        select(
-            Chapter.course_id,
-            sql_func.count(Chapter.id).label('completed_count')
-        )
-        .where(Chapter.is_completed == True)
-        .group_by(Chapter.course_id)
-        .subquery()
-    )
-    
-    # Main query joining with the subquery
-    courses = (db.query(
-            Course,
-            sql_func.coalesce(completed_chapters_subq.c.completed_count, 0).label('completed_chapters')
-        )
-        .outerjoin(
-            completed_chapters_subq,
-            Course.id == completed_chapters_subq.c.course_id
-        )
-        .filter(Course.user_id == user_id)
-        .order_by(Course.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all())
-    
-    # Convert to list of CourseInfo objects
-    result = []
-    for course, completed_chapters in courses:
-        course_info = CourseInfo(
-            course_id=course.id,
-            total_time_hours=course.total_time_hours,
-            status=course.status.value,  # Convert enum to string
-            title=course.title,
-            description=course.description,
-            chapter_count=course.chapter_count,
-            image_url=course.image_url,
-            completed_chapter_count=completed_chapters,
-            is_public=course.is_public,
-            created_at=course.created_at,
-        )
-        result.append(course_info)
-    
-    return result
-
-def search_courses(db: Session, query: str, user_id: str, limit: int = 10) -> List[Course]:
-    """
-    Search for courses where title or description contains the query string (case-insensitive).
-    
-    Args:
-        db: Database session
-        query: Search string
-        limit: Maximum number of results to return
-        
-    Returns:
-        List of matching Course objects
-    """
-    search = f"%{query}%"
-    return (
-        db.query(Course)
-        .filter(
-            (Course.user_id == user_id)
-        )
-        .filter(
-            (Course.title.ilike(search)) | (Course.description.ilike(search))
-        )
-        .limit(limit)
-        .all()
-    )
+    courses = db.execute(courses_infos_statement(user_id, skip, limit, after)).all()
+    return [_course_info(course, completed_chapters) for course, completed_chapters in courses]
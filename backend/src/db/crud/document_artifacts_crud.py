@@ -0,0 +1,42 @@
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from ..models.db_file import DocumentArtifact, ArtifactStatus
+
+
+############### DOCUMENT ARTIFACTS
+def get_artifact_by_document_id(db: Session, document_id: int) -> Optional[DocumentArtifact]:
+    """Get the artifact of a document"""
+    return db.query(DocumentArtifact).filter(DocumentArtifact.document_id == document_id).first()
+
+
+def get_artifacts_by_document_ids(db: Session, document_ids: List[int]) -> Dict[int, DocumentArtifact]:
+    """Get the artifacts of multiple documents, keyed by document ID"""
+    if not document_ids:
+        return {}
+    artifacts = db.query(DocumentArtifact).filter(DocumentArtifact.document_id.in_(document_ids)).all()
+    return {artifact.document_id: artifact for artifact in artifacts}
+
+
+def create_pending_artifact(db: Session, document_id: int) -> DocumentArtifact:
+    """Create (or reset) the artifact of a document in PENDING state"""
+    artifact = get_artifact_by_document_id(db, document_id)
+    if artifact is None:
+        artifact = DocumentArtifact(document_id=document_id)
+        db.add(artifact)
+    artifact.status = ArtifactStatus.PENDING
+    artifact.error_msg = None
+    db.commit()
+    db.refresh(artifact)
+    return artifact
+
+
+def update_artifact(db: Session, document_id: int, **kwargs) -> Optional[DocumentArtifact]:
+    """Update the artifact of a document with provided fields"""
+    artifact = get_artifact_by_document_id(db, document_id)
+    if artifact:
+        for key, value in kwargs.items():
+            if hasattr(artifact, key):
+                setattr(artifact, key, value)
+        db.commit()
+        db.refresh(artifact)
+    return artifact
@@ -1,4 +1,4 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer
 from sqlalchemy import and_
 from typing import List, Optional
 from ..models.db_file import Document
@@ -9,11 +9,14 @@ def get_document_by_id(db: Session, document_id: int) -> Optional[Document]:
     """Get document by ID"""
     return db.query(Document).filter(Document.id == document_id).first()
 
-def get_documents_by_ids(db: Session, document_ids: List[int]) -> List[Document]:
-    """Get multiple documents by their IDs"""
+def get_documents_by_ids(db: Session, document_ids: List[int], with_data: bool = False) -> List[Document]:
+    """Get multiple documents by their IDs, with_data also loads the legacy file_data column"""
     if not document_ids:
         return []
-    return db.query(Document).filter(Document.id.in_(document_ids)).all()
+    query = db.query(Document).filter(Document.id.in_(document_ids))
+    if with_data:
+        query = query.options(undefer(Document.file_data))
+    return query.all()
 
 
 def get_documents_by_user_id(db: Session, user_id: str) -> List[Document]:
@@ -45,14 +48,15 @@ def get_document_by_filename(db: Session, user_id: str, course_id: int, filename
 
 
 def create_document(db: Session, course_id: int, user_id: str, filename: str,
-                    content_type: str, file_data: bytes) -> Document:
-    """Create a new document"""
+                    content_type: str, blob_hash: str, file_size: int) -> Document:
+    """Create a new document, the bytes have to be in the blob store already"""
     db_document = Document(
         course_id=course_id,
         user_id=user_id,
         filename=filename,
         content_type=content_type,
-        file_data=file_data,
+        blob_hash=blob_hash,
+        file_size=file_size,
     )
     db.add(db_document)
     db.commit()
@@ -72,10 +76,10 @@ def update_document(db: Session, document_id: int, **kwargs) -> Optional[Documen
     return document
 
 
-def update_document_data(db: Session, document_id: int, file_data: bytes,
+def update_document_data(db: Session, document_id: int, blob_hash: str, file_size: int,
                          content_type: str = None, filename: str = None) -> Optional[Document]:
     """Update document file data and optionally filename/content_type"""
-    update_fields = {"file_data": file_data}
+    update_fields = {"blob_hash": blob_hash, "file_size": file_size, "file_data": None}
     if content_type:
         update_fields["content_type"] = content_type
     if filename:
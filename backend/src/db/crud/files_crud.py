@@ -1,7 +1,10 @@
-from typing import List, Dict
+from typing import List, Dict, Set
 
 from sqlalchemy.orm import Session
 
+from ..models.db_file import Document, Image
+from ..models.db_user import User
+
 from .documents_crud import (
     get_documents_by_user_id,
     get_documents_by_course_id,
@@ -74,3 +77,21 @@ def get_file_counts_by_user(db: Session, user_id: str) -> Dict[str, int]:
         "document_count": get_document_count_by_user(db, user_id),
         "image_count": get_image_count_by_user(db, user_id)
     }
+
+
+def get_referenced_blob_hashes(db: Session) -> Set[str]:
+    """Get all blob hashes referenced by documents, images or user avatars"""
+    hashes = {row[0] for row in db.query(Document.blob_hash).filter(Document.blob_hash.isnot(None)).distinct()}
+    hashes.update(row[0] for row in db.query(Image.blob_hash).filter(Image.blob_hash.isnot(None)).distinct())
+    hashes.update(row[0] for row in db.query(User.avatar_hash).filter(User.avatar_hash.isnot(None)).distinct())
+    return hashes
+
+
+def is_blob_referenced(db: Session, blob_hash: str) -> bool:
+    """Check whether a document, image or user avatar references a blob hash"""
+    return any(
+        db.query(query.exists()).scalar()
+        for query in (db.query(Document.id).filter(Document.blob_hash == blob_hash),
+                      db.query(Image.id).filter(Image.blob_hash == blob_hash),
+                      db.query(User.id).filter(User.avatar_hash == blob_hash))
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer
 from sqlalchemy import and_
 from typing import List, Optional
 from ..models.db_file import Image
@@ -9,11 +9,14 @@ def get_image_by_id(db: Session, image_id: int) -> Optional[Image]:
     """Get image by ID"""
     return db.query(Image).filter(Image.id == image_id).first()
 
-def get_images_by_ids(db: Session, image_ids: List[int]) -> List[Image]:
-    """Get multiple images by their IDs"""
+def get_images_by_ids(db: Session, image_ids: List[int], with_data: bool = False) -> List[Image]:
+    """Get multiple images by their IDs, with_data also loads the legacy image_data column"""
     if not image_ids:
         return []
-    return db.query(Image).filter(Image.id.in_(image_ids)).all()
+    query = db.query(Image).filter(Image.id.in_(image_ids))
+    if with_data:
+        query = query.options(undefer(Image.image_data))
+    return query.all()
 
 
 def get_images_by_user_id(db: Session, user_id: str) -> List[Image]:
@@ -45,14 +48,15 @@ def get_image_by_filename(db: Session, user_id: str, course_id: int, filename: s
 
 
 def create_image(db: Session, course_id: int, user_id: str, filename: str,
-                 content_type: str, image_data: bytes) -> Image:
-    """Create a new image"""
+                 content_type: str, blob_hash: str, file_size: int) -> Image:
+    """Create a new image, the bytes have to be in the blob store already"""
     db_image = Image(
         course_id=course_id,
         user_id=user_id,
         filename=filename,
         content_type=content_type,
-        image_data=image_data,
+        blob_hash=blob_hash,
+        file_size=file_size,
     )
     db.add(db_image)
     db.commit()
@@ -72,10 +76,10 @@ def update_image(db: Session, image_id: int, **kwargs) -> Optional[Image]:
     return image
 
 
-def update_image_data(db: Session, image_id: int, image_data: bytes,
+def update_image_data(db: Session, image_id: int, blob_hash: str, file_size: int,
                       content_type: str = None, filename: str = None) -> Optional[Image]:
     """Update image data and optionally filename/content_type"""
-    update_fields = {"image_data": image_data}
+    update_fields = {"blob_hash": blob_hash, "file_size": file_size, "image_data": None}
     if content_type:
         update_fields["content_type"] = content_type
     if filename:
@@ -0,0 +1,138 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from itertools import groupby
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..models.db_statistics import DailyStats, LearnSession, LearnTime, LearnTimeTotal
+from ..models.db_usage import Usage
+from .statistics_crud import get_or_create_daily_stats, lock_platform_stats
+
+PING_ACTIONS = ("site_visible", "site_hidden")
+
+
+def get_total_learn_seconds(db: Session, user_id: str) -> int:
+    """
+    Get the sessionized learn time of a user.
+
+    :param db: Database session
+    :param user_id: ID of the user
+    :return: Learn time in seconds
+    """
+    return db.scalar(select(LearnTimeTotal.seconds).where(LearnTimeTotal.user_id == user_id)) or 0
+
+
+def get_total_learn_seconds_by_user(db: Session, user_ids: List[str]) -> Dict[str, int]:
+    """
+    get_total_learn_seconds for many users with one query.
+
+    :param db: Database session
+    :param user_ids: IDs of the users
+    :return: Seconds per user ID (0 for users without learn time)
+    """
+    if not user_ids:
+        return {}
+    seconds = {user_id: 0 for user_id in user_ids}
+    seconds.update(db.execute(
+        select(LearnTimeTotal.user_id, LearnTimeTotal.seconds).where(LearnTimeTotal.user_id.in_(user_ids))
+    ).all())
+    return seconds
+
+
+def _credit(credits: Dict[Tuple[str, int, date], int], session: LearnSession, end: Optional[datetime],
+            idle_cutoff_seconds: int, tail_seconds: int):
+    """Credit the dwell interval that starts with the ping `session` and ends at `end` (None: no next ping)"""
+    if not session.visible or session.course_id is None or session.chapter_id is None:
+        return
+    gap = (end - session.timestamp).total_seconds() if end is not None else None
+    seconds = int(gap) if gap is not None and gap <= idle_cutoff_seconds else tail_seconds
+    credits[(session.user_id, session.course_id, session.timestamp.date())] += seconds
+
+
+def sessionize_learn_time(db: Session, idle_cutoff_seconds: int, tail_seconds: int, settle_seconds: int = 60,
+                          now: Optional[datetime] = None, batch_size: int = 20000) -> int:
+    """
+    Turn the visible / hidden pings written since the last run into learn time.
+
+    The pings of a user are walked in timestamp order. A visible ping on a chapter page starts a dwell interval
+    on its course that ends with the user's next ping (any page, visible or hidden). Gaps longer than
+    idle_cutoff_seconds mean the user was gone, the interval is credited tail_seconds only (one ping period).
+    The last ping of a user is kept in learn_sessions, its interval is credited when the next ping arrives or
+    the cutoff has passed. Pings that arrive older than the user's last sessionized ping are skipped.
+
+    Usages are consumed by id watermark (PlatformStats.session_watermark) like refresh_statistics, under the
+    same row lock. Credited seconds go to learn_time (user, course, day), learn_time_totals and
+    DailyStats.learn_minutes.
+
+    :param db: Database session
+    :param idle_cutoff_seconds: Longest gap between two pings that still counts as learning
+    :param tail_seconds: Credit for a ping without a next ping within the cutoff
+    :param settle_seconds: Age below which pings are left for the next run
+    :param now: Current time (UTC), for tests
+    :param batch_size: Usage ids read per query
+    :return: Number of credited seconds
+    """
+    now = (now or datetime.now(timezone.utc)).replace(tzinfo=None)
+    settled = now - timedelta(seconds=settle_seconds)
+    stats = lock_platform_stats(db)
+    watermark = stats.session_watermark or 0
+    credits: Dict[Tuple[str, int, date], int] = defaultdict(int)
+
+    upper = db.scalar(select(func.max(Usage.id)).where(Usage.id > watermark, Usage.timestamp <= settled))
+    # In id ranges of batch_size, so the first run over the whole history doesn't load it at once
+    for lower in range(watermark, upper or watermark, batch_size):
+        pings = db.execute(
+            select(Usage.user_id, Usage.timestamp, Usage.action, Usage.course_id, Usage.chapter_id)
+            .where(Usage.id > lower, Usage.id <= min(lower + batch_size, upper), Usage.action.in_(PING_ACTIONS))
+            .order_by(Usage.user_id, Usage.timestamp, Usage.id)
+        ).all()
+        for user_id, user_pings in groupby(pings, key=lambda ping: ping.user_id):
+            session = db.get(LearnSession, user_id)
+            for ping in user_pings:
+                if session is not None:
+                    if ping.timestamp < session.timestamp:
+                        continue
+                    _credit(credits, session, ping.timestamp, idle_cutoff_seconds, tail_seconds)
+                else:
+                    session = LearnSession(user_id=user_id)
+                    db.add(session)
+                session.timestamp = ping.timestamp
+                session.course_id = ping.course_id
+                session.chapter_id = ping.chapter_id
+                session.visible = ping.action == "site_visible"
+        db.flush()
+    if upper is not None:
+        stats.session_watermark = upper
+
+    # No ping can end these intervals within the cutoff anymore. The row stays (as not visible, nothing more
+    # to credit) so late pings older than it are still recognized
+    for session in db.scalars(select(LearnSession).where(
+        LearnSession.visible == True, LearnSession.timestamp < settled - timedelta(seconds=idle_cutoff_seconds)
+    )).all():
+        _credit(credits, session, None, idle_cutoff_seconds, tail_seconds)
+        session.visible = False
+
+    user_seconds: Dict[str, int] = defaultdict(int)
+    for (user_id, course_id, day), seconds in credits.items():
+        row = db.get(LearnTime, (user_id, course_id, day))
+        if row is None:
+            row = LearnTime(user_id=user_id, course_id=course_id, day=day, seconds=0)
+            db.add(row)
+        row.seconds += seconds
+        user_seconds[user_id] += seconds
+    for user_id, seconds in user_seconds.items():
+        total = db.get(LearnTimeTotal, user_id)
+        if total is None:
+            total = LearnTimeTotal(user_id=user_id, seconds=0)
+            db.add(total)
+        total.seconds += seconds
+    db.flush()
+
+    days: Dict[date, DailyStats] = {}
+    for day in {day for _, _, day in credits}:
+        day_seconds = db.scalar(select(func.sum(LearnTime.seconds)).where(LearnTime.day == day)) or 0
+        get_or_create_daily_stats(db, days, day).learn_minutes = day_seconds // 60
+    db.commit()
+    return sum(credits.values())
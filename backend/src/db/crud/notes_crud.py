@@ -1,5 +1,6 @@
 """CRUD operations for notes management in the database."""
 from typing import List, Optional
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from ..models.db_note import Note
 
@@ -20,6 +21,21 @@ def get_notes_by_chapter(
         Note.user_id == user_id
     ).all()
 
+def get_note_versions(
+    db: Session,
+    course_id: int,
+    chapter_id: int,
+    user_id: str
+) -> List[tuple]:
+    """(id, version, last change) of the notes of a chapter and user, without loading their text."""
+    return db.query(
+        Note.id, Note.version, func.coalesce(Note.updated_at, Note.created_at)
+    ).filter(
+        Note.course_id == course_id,
+        Note.chapter_id == chapter_id,
+        Note.user_id == user_id
+    ).order_by(Note.id).all()
+
 def create_note(
     db: Session,
     course_id: int,
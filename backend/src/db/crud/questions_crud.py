@@ -1,3 +1,4 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict
 from ..models.db_course import PracticeQuestion
@@ -14,6 +15,14 @@ def get_questions_by_chapter_id(db: Session, chapter_id: int) -> List[PracticeQu
     return db.query(PracticeQuestion).filter(PracticeQuestion.chapter_id == chapter_id).all()
 
 
+def get_question_versions(db: Session, chapter_id: int) -> List[tuple]:
+    """(id, version, last change) of the questions of a chapter, ordered by id"""
+    return db.query(
+        PracticeQuestion.id, PracticeQuestion.version,
+        func.coalesce(PracticeQuestion.updated_at, PracticeQuestion.created_at)
+    ).filter(PracticeQuestion.chapter_id == chapter_id).order_by(PracticeQuestion.id).all()
+
+
 def create_mc_question(db: Session, chapter_id: int, question: str, answer_a: str,
                     answer_b: str, answer_c: str, answer_d: str, correct_answer: str,
                     explanation: str) -> PracticeQuestion:
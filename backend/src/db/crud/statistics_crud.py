@@ -0,0 +1,151 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import Date, case, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.db_course import Chapter, Course
+from ..models.db_statistics import DailyActiveUser, DailyStats, PlatformStats
+from ..models.db_usage import Usage
+from ..models.db_user import User
+
+PLATFORM_STATS_ID = 1
+DAILY_COUNTERS = ("new_users", "courses_created", "chapters_created", "chat_messages", "learn_minutes")
+
+
+def get_platform_stats(db: Session) -> Optional[PlatformStats]:
+    """
+    Get the materialized platform statistics.
+
+    :param db: Database session
+    :return: The statistics row, None before the first refresh
+    """
+    return db.get(PlatformStats, PLATFORM_STATS_ID)
+
+
+def get_daily_stats(db: Session, since: date, until: date) -> List[DailyStats]:
+    """
+    Get the per-day aggregates of a date range.
+
+    :param db: Database session
+    :param since: First day (inclusive)
+    :param until: Last day (inclusive)
+    :return: Days with activity, ordered by day
+    """
+    return db.query(DailyStats).filter(DailyStats.day >= since, DailyStats.day <= until).order_by(DailyStats.day).all()
+
+
+def lock_platform_stats(db: Session) -> PlatformStats:
+    """Get the statistics row locked for the refresh (FOR UPDATE), so concurrent refreshes of several workers
+    run one after another and never aggregate the same rows twice"""
+    if db.get(PlatformStats, PLATFORM_STATS_ID) is None:
+        try:
+            db.add(PlatformStats(id=PLATFORM_STATS_ID))
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # created by another worker
+    db.expire_all()
+    return db.execute(
+        select(PlatformStats).where(PlatformStats.id == PLATFORM_STATS_ID).with_for_update()
+    ).scalar_one()
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def get_or_create_daily_stats(db: Session, days: Dict[date, DailyStats], day: date) -> DailyStats:
+    """The aggregates of a day, created with zeros if missing (days caches them within a refresh)"""
+    if day not in days:
+        days[day] = db.get(DailyStats, day) or DailyStats(
+            day=day, active_users=0, **{counter: 0 for counter in DAILY_COUNTERS}
+        )
+        db.add(days[day])
+    return days[day]
+
+
+def refresh_statistics(db: Session, settle_seconds: int = 60, now: Optional[datetime] = None) -> PlatformStats:
+    """
+    Fold everything written since the last refresh into the platform statistics and the per-day aggregates.
+
+    Usages, courses and chapters are aggregated by id watermark: usage events carry the time they were
+    recorded and may be written late (buffered writer, spill replay), ids only grow. Rows of the last
+    settle_seconds are left for the next refresh: their transactions, or those of rows with a lower id,
+    may still be in flight and would be skipped once the watermark passed them. New users are
+    aggregated by a created_at watermark. The totals of users, courses and chapters are counted, rows
+    of these tables are deleted as well. learn_minutes is filled by learn_time_crud.sessionize_learn_time.
+
+    :param db: Database session
+    :param settle_seconds: Age below which usage events, courses, chapters and new users are left for the next refresh
+    :param now: Current time (UTC), for tests
+    :return: The refreshed statistics row
+    """
+    now = (now or datetime.now(timezone.utc)).replace(tzinfo=None)
+    settled = now - timedelta(seconds=settle_seconds)
+    stats = lock_platform_stats(db)
+    days: Dict[date, DailyStats] = {}
+
+    # Usage events
+    usage_upper = db.scalar(
+        select(func.max(Usage.id)).where(Usage.id > stats.usage_watermark, Usage.timestamp <= settled)
+    )
+    if usage_upper is not None:
+        in_range = (Usage.id > stats.usage_watermark, Usage.id <= usage_upper)
+        usage_day = func.date(Usage.timestamp, type_=Date)
+        is_chat = case((Usage.action == "chat", 1), else_=0)
+        for day, chat_messages in db.execute(
+            select(usage_day, func.sum(is_chat)).where(*in_range).group_by(usage_day)
+        ).all():
+            daily = get_or_create_daily_stats(db, days, _as_date(day))
+            daily.chat_messages += chat_messages or 0
+            stats.messages += chat_messages or 0
+
+        active = {}
+        for day, user_id in db.execute(select(usage_day, Usage.user_id).where(*in_range).distinct()).all():
+            active.setdefault(_as_date(day), set()).add(user_id)
+        for day, user_ids in active.items():
+            known = set(db.scalars(select(DailyActiveUser.user_id).where(
+                DailyActiveUser.day == day, DailyActiveUser.user_id.in_(list(user_ids))
+            )))
+            db.add_all(DailyActiveUser(day=day, user_id=user_id) for user_id in user_ids - known)
+            get_or_create_daily_stats(db, days, day).active_users += len(user_ids - known)
+        stats.usage_watermark = usage_upper
+
+    # Courses and chapters
+    for model, watermark, counter in ((Course, "course_watermark", "courses_created"),
+                                      (Chapter, "chapter_watermark", "chapters_created")):
+        upper = db.scalar(
+            select(func.max(model.id)).where(model.id > getattr(stats, watermark), model.created_at <= settled)
+        )
+        if upper is None:
+            continue
+        created_day = func.date(model.created_at, type_=Date)
+        for day, created in db.execute(
+            select(created_day, func.count(model.id))
+            .where(model.id > getattr(stats, watermark), model.id <= upper, model.created_at != None)
+            .group_by(created_day)
+        ).all():
+            daily = get_or_create_daily_stats(db, days, _as_date(day))
+            setattr(daily, counter, getattr(daily, counter) + created)
+        setattr(stats, watermark, upper)
+
+    # New users
+    user_day = func.date(User.created_at, type_=Date)
+    new_users = select(user_day, func.count(User.id)).where(User.created_at <= settled)
+    if stats.user_watermark is not None:
+        new_users = new_users.where(User.created_at > stats.user_watermark)
+    for day, created in db.execute(new_users.group_by(user_day)).all():
+        get_or_create_daily_stats(db, days, _as_date(day)).new_users += created
+    stats.user_watermark = settled
+
+    db.flush()
+    stats.users = db.scalar(select(func.count(User.id)))
+    stats.courses = db.scalar(select(func.count(Course.id)))
+    stats.chapters = db.scalar(select(func.count(Chapter.id)))
+    stats.active_today = db.scalar(
+        select(func.count()).select_from(DailyActiveUser).where(DailyActiveUser.day == now.date())
+    )
+    stats.refreshed_at = now
+    db.commit()
+    return stats
@@ -1,7 +1,45 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
-from typing import List
-from ..models.db_usage import Usage
+from typing import Dict, Iterable, List, Optional
+from ..models.db_statistics import LearnTimeTotal
+from ..models.db_usage import Usage, UsageCounter
+from . import learn_time_crud
 from ...api.schemas.statistics import UsagePost
+from ...utils.pagination import Keyset, after_keyset
+
+def counter_increments_statement(dialect_name: str, events: Iterable[dict]):
+    """
+    Upsert that adds the events to usage_counters, None if there is nothing to count.
+    Shared with the async CRUD (db.crud.aio.usage_crud), executed in the same transaction as the usage INSERT.
+    """
+    increments = Counter((event["user_id"], event["action"]) for event in events)
+    if not increments:
+        return None
+    # Sorted, so concurrent transactions lock the counter rows in the same order
+    rows = [{"user_id": user_id, "name": name, "total": total}
+            for (user_id, name), total in sorted(increments.items())]
+
+    if dialect_name == "mysql":
+        stmt = mysql_insert(UsageCounter).values(rows)
+        return stmt.on_duplicate_key_update(total=UsageCounter.total + stmt.inserted["total"])
+    if dialect_name == "sqlite":
+        stmt = sqlite_insert(UsageCounter).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=[UsageCounter.user_id, UsageCounter.name],
+            set_={"total": UsageCounter.total + stmt.excluded["total"]}
+        )
+    raise NotImplementedError(f"Usage counters are not supported on {dialect_name}")
+
+
+def _bump_counters(db: Session, events: Iterable[dict]):
+    stmt = counter_increments_statement(db.get_bind().dialect.name, events)
+    if stmt is not None:
+        db.execute(stmt)
+
 
 def log_usage(db: Session, user_id: str, action: str, course_id: int = None, chapter_id: int = None, details: str = None) -> Usage:
     """
@@ -24,12 +62,101 @@ def log_usage(db: Session, user_id: str, action: str, course_id: int = None, cha
     )
     
     db.add(usage)
+    _bump_counters(db, [{"user_id": user_id, "action": action, "course_id": course_id, "chapter_id": chapter_id}])
     db.commit()
     db.refresh(usage)
     
     return usage
 
 
+def insert_usages(db: Session, rows: List[dict], batch_size: int = 500) -> int:
+    """
+    Write many usage events with multi-row INSERTs (one statement per batch_size rows) and update the
+    usage counters, in a single commit. Used by the buffered usage writer (services.usage_writer).
+    
+    :param db: Database session
+    :param rows: Column values per event (user_id, action, course_id, chapter_id, details, timestamp)
+    :param batch_size: Maximum rows per INSERT statement
+    :return: Number of written rows
+    """
+    for start in range(0, len(rows), batch_size):
+        db.execute(insert(Usage).values(rows[start:start + batch_size]))
+    _bump_counters(db, rows)
+    db.commit()
+    return len(rows)
+
+
+def get_counter(db: Session, user_id: str, name: str) -> int:
+    """
+    Current value of a usage counter (0 if the user has no such events).
+    
+    :param db: Database session
+    :param user_id: ID of the user
+    :param name: Counter name (the action)
+    :return: Number of counted events
+    """
+    return db.scalar(
+        select(UsageCounter.total).where(UsageCounter.user_id == user_id, UsageCounter.name == name)
+    ) or 0
+
+
+def rebuild_usage_counters(db: Session):
+    """
+    Recompute all usage counters from the usages table (initial fill, or repair after manual edits of usages).
+    Archived rows (services.usage_archive) are not counted anymore, only USAGE_RETENTION_KEEP_ACTIONS stay exact.
+    
+    :param db: Database session
+    """
+    db.execute(delete(UsageCounter))
+    db.execute(insert(UsageCounter).from_select(
+        ["user_id", "name", "total"],
+        select(Usage.user_id, Usage.action, func.count()).group_by(Usage.user_id, Usage.action)
+    ))
+    db.commit()
+
+
+def ensure_usage_counters(db: Session):
+    """
+    Fill the usage counters from the existing usages if they have never been filled (first start after the
+    usage_counters table was added). From then on they are maintained on write.
+    
+    :param db: Database session
+    """
+    if db.scalar(select(UsageCounter.user_id).limit(1)) is None and db.scalar(select(Usage.id).limit(1)) is not None:
+        rebuild_usage_counters(db)
+
+
+def get_archivable_usages(db: Session, before: datetime, max_id: int, keep_actions: List[str],
+                          limit: int) -> List[Usage]:
+    """
+    Get the oldest usage rows that the retention may move to the archive.
+    
+    :param db: Database session
+    :param before: Only rows recorded before this time
+    :param max_id: Only rows up to this id (already folded into the statistics and learn time)
+    :param keep_actions: Actions that are never archived
+    :param limit: Maximum number of rows
+    :return: Usage rows ordered by id
+    """
+    query = db.query(Usage).filter(Usage.timestamp < before, Usage.id <= max_id)
+    if keep_actions:
+        query = query.filter(Usage.action.notin_(keep_actions))
+    return query.order_by(Usage.id).limit(limit).all()
+
+
+def delete_usages(db: Session, usage_ids: List[int]) -> int:
+    """
+    Delete usage rows by id.
+    
+    :param db: Database session
+    :param usage_ids: IDs of the rows
+    :return: Number of deleted rows
+    """
+    deleted = db.execute(delete(Usage).where(Usage.id.in_(usage_ids))).rowcount
+    db.commit()
+    return deleted
+
+
 def get_user_usages(db: Session, user_id: str) -> List[Usage]:
     """
     Get all usage records for a specific user.
@@ -73,7 +200,7 @@ def get_total_chat_usages(db: Session, user_id: str) -> int:
     :param user_id: ID of the user
     :return: Total number of chat messages
     """
-    return db.query(Usage).filter(Usage.user_id == user_id, Usage.action == "chat").count()
+    return get_counter(db, user_id, "chat")
 
 
 def get_total_created_courses(db: Session, user_id: str) -> int:
@@ -84,7 +211,7 @@ def get_total_created_courses(db: Session, user_id: str) -> int:
     :param user_id: ID of the user
     :return: Total number of courses created
     """
-    return db.query(Usage).filter(Usage.user_id == user_id, Usage.action == "create_course").count()
+    return get_counter(db, user_id, "create_course")
 
 def log_course_creation(db: Session, user_id: str, course_id: int, detail: str) -> Usage:
     """
@@ -97,6 +224,18 @@ def log_course_creation(db: Session, user_id: str, course_id: int, detail: str)
     """
     return log_usage(db, user_id, action="create_course", course_id=course_id, details=detail)
 
+def log_document_digest(db: Session, user_id: str, course_id: int, detail: str) -> Usage:
+    """
+    Log the bytes and tokens saved by sending document digests instead of raw files.
+    
+    :param db: Database session
+    :param user_id: ID of the user creating the course
+    :param course_id: ID of the created course
+    :param detail: JSON report of the digest stage
+    :return: The created Usage object
+    """
+    return log_usage(db, user_id, action="document_digest", course_id=course_id, details=detail)
+
 def log_chapter_completion(db: Session, user_id: str, course_id: int, chapter_id: int) -> Usage:
     """
     Log the completion of a chapter by a user.
@@ -111,58 +250,54 @@ def log_chapter_completion(db: Session, user_id: str, course_id: int, chapter_id
 
 def get_total_time_spent_on_chapters(db: Session, user_id: str) -> int:
     """
-    Get the total time spent by a user on chapters: Calculate total time: every open followed by a close time differences summed up.
-    Handles edge cases: skips unmatched opens, ignores unmatched closes, and processes in timestamp order.
+    Get the total time spent by a user on chapters, sessionized from the visible pings
+    (learn_time_crud.sessionize_learn_time).
     :param db: Database session
     :param user_id: ID of the user
     :return: Total time spent on chapters in minutes
     """
-    usages = (
-        db.query(Usage)
-        .filter(Usage.user_id == user_id, Usage.action == "site_visible", Usage.course_id != None, Usage.chapter_id != None)
-        .count()
-    )
+    return learn_time_crud.get_total_learn_seconds(db, user_id) // 60
 
-    return usages * 10
 
+def get_total_time_spent_on_chapters_by_user(db: Session, user_ids: List[str]) -> Dict[str, int]:
+    """
+    get_total_time_spent_on_chapters for many users with one query.
+    
+    :param db: Database session
+    :param user_ids: IDs of the users
+    :return: Minutes per user ID (0 for users without learn time)
+    """
+    return {
+        user_id: seconds // 60
+        for user_id, seconds in learn_time_crud.get_total_learn_seconds_by_user(db, user_ids).items()
+    }
 
-def get_user_with_total_usage_time(db: Session, offset: int = 0, limit: int = 200):
+
+def get_user_with_total_usage_time(db: Session, offset: int = 0, limit: int = 200, after: Optional[Keyset] = None):
     """
-    Get users with their total usage time in minutes.
+    Get users with their total usage time in minutes, newest users first.
     
     :param db: Database session
     :param offset: Number of records to skip (for pagination)
     :param limit: Maximum number of records to return (for pagination)
+    :param after: Keyset position (decoded cursor), only users after it are returned
     :return: List of users with their total usage time in minutes
     """
-    from sqlalchemy import func
     from ..models.db_user import User
     
-    # Subquery to count site_visible actions per user
-    usage_counts = (
+    # Sessionized learn time per user (learn_time_crud.sessionize_learn_time)
+    query = (
         db.query(
-            Usage.user_id,
-            func.count('*').label('usage_count')
-        )
-        .filter(
-            Usage.action == "site_visible",
-            Usage.course_id != None,
-            Usage.chapter_id != None
+            User,
+            func.coalesce(LearnTimeTotal.seconds, 0).label('total_usage_seconds')
         )
-        .group_by(Usage.user_id)
-        .subquery()
+        .outerjoin(LearnTimeTotal, LearnTimeTotal.user_id == User.id)
     )
-    
-    # Main query to join with users and calculate total time
+    if after is not None:
+        query = query.filter(after_keyset(User.created_at, User.id, after))
     user_usages = (
-        db.query(
-            User,
-            (func.coalesce(usage_counts.c.usage_count, 0) * 10).label('total_usage_time')
-        )
-        .outerjoin(
-            usage_counts,
-            User.id == usage_counts.c.user_id
-        )
+        query
+        .order_by(User.created_at.desc(), User.id.desc())
         .offset(offset)
         .limit(limit)
         .all()
@@ -172,9 +307,9 @@ def get_user_with_total_usage_time(db: Session, offset: int = 0, limit: int = 20
     return [
         {
             'user': user,
-            'total_usage_time': total_usage_time
+            'total_usage_time': total_usage_seconds // 60
         }
-        for user, total_usage_time in user_usages
+        for user, total_usage_seconds in user_usages
     ]
 
 
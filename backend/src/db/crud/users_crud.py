@@ -4,6 +4,7 @@ from typing import Optional
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import text
 from ..models.db_user import User
+from ...utils.pagination import Keyset, after_keyset
 from datetime import datetime, timezone, timedelta
 
 def get_user_by_id(db: Session, user_id: str) -> Optional[User]:
@@ -26,8 +27,8 @@ def create_user(db: Session,
                 username: str,
                 email: str, hashed_password: str,
                 is_active=True, is_admin=False,
-                profile_image_base64=None):
-    """Create a new user in the database."""
+                avatar_hash=None, avatar_content_type=None):
+    """Create a new user in the database. The avatar has to be in the blob store already."""
     user = User(
         id=user_id,
         username=username,
@@ -35,10 +36,9 @@ def create_user(db: Session,
         hashed_password=hashed_password,
         is_active=is_active,
         is_admin=is_admin,
-        
+        avatar_hash=avatar_hash,
+        avatar_content_type=avatar_content_type,
     )
-    if profile_image_base64:
-        user.profile_image_base64 = profile_image_base64
     db.add(user)
     db.commit()
     db.refresh(user)
@@ -71,16 +71,21 @@ def update_user_last_login(db: Session, user_id: str) -> Optional[User]:
         db.refresh(user)
     return user
 
-def update_user_profile_image(db: Session, user: User, profile_image_base64: str):
-    """Update the profile image of an existing user."""
-    user.profile_image_base64 = profile_image_base64 # type: ignore
+def update_user_profile_image(db: Session, user: User, avatar_hash: Optional[str], avatar_content_type: Optional[str]):
+    """Point the profile image of an existing user to a blob (None removes it), drops the legacy base64 image."""
+    user.avatar_hash = avatar_hash # type: ignore
+    user.avatar_content_type = avatar_content_type # type: ignore
+    user.profile_image_base64 = None # type: ignore
     db.commit()
     db.refresh(user)
     return user
 
-def get_users(db: Session, skip: int = 0, limit: int = 200):
-    """Retrieve users with pagination."""
-    return db.query(User).offset(skip).limit(limit).all()
+def get_users(db: Session, skip: int = 0, limit: int = 200, after: Optional[Keyset] = None):
+    """Retrieve users with pagination, newest first. after is a keyset position (decoded cursor)."""
+    query = db.query(User)
+    if after is not None:
+        query = query.filter(after_keyset(User.created_at, User.id, after))
+    return query.order_by(User.created_at.desc(), User.id.desc()).offset(skip).limit(limit).all()
 
 def update_user(db: Session, db_user: User, update_data: dict):
     """Update an existing user's information."""
@@ -1,10 +1,11 @@
 import enum
 from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.dialects.mysql import LONGBLOB
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from ...db.database import Base
 from . import db_user as user_model
+from .versioning import Versioned
 from typing import List
 from pydantic import Field
 
@@ -15,7 +16,7 @@ class CourseStatus(enum.Enum):
     FAILED = "failed"
 
 
-class Course(Base):
+class Course(Versioned, Base):
     """Main course table containing all course information."""
     __tablename__ = "courses"
 
@@ -26,6 +27,7 @@ class Course(Base):
     user_id = Column(String(50), ForeignKey("users.id"), nullable=False, index=True)
     query = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     status = Column(Enum(CourseStatus), nullable=False, default=CourseStatus.CREATING)
     total_time_hours = Column(Integer, nullable=False)
     language = Column(String(50), nullable=False)
@@ -47,8 +49,14 @@ class Course(Base):
     documents = relationship("Document", foreign_keys="Document.course_id", cascade="all, delete-orphan")
     images = relationship("Image", foreign_keys="Image.course_id", cascade="all, delete-orphan")
 
+    # Keyset pagination of the course listings, newest first (utils.pagination)
+    __table_args__ = (
+        Index('ix_courses_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        Index('ix_courses_is_public_created_at_id', 'is_public', 'created_at', 'id'),
+    )
+
 
-class Chapter(Base):
+class Chapter(Versioned, Base):
     """Chapter table containing individual course sections."""
     __tablename__ = "chapters"
     
@@ -58,10 +66,11 @@ class Chapter(Base):
     index = Column(Integer, nullable=False)
     caption = Column(String(300), nullable=False)
     summary = Column(Text)
-    content = Column(Text, nullable=False)
+    content = deferred(Column(Text, nullable=False))  # Large React source, loaded only when accessed
     time_minutes = Column(Integer, nullable=False)
     is_completed = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     image_url = Column(Text, nullable=False)
 
     # Relationships
@@ -72,11 +81,10 @@ class Chapter(Base):
     # This makes ordering chapters by their index for a given course very fast.
     __table_args__ = (
         Index('ix_chapter_course_id_index', 'course_id', 'index'),
-        Index('ix_chapter_fulltext', 'caption', 'summary', 'content', mysql_prefix='FULLTEXT'),
     )
 
 
-class PracticeQuestion(Base):
+class PracticeQuestion(Versioned, Base):
     """Practice Questions for each chapter."""
     __tablename__ = "practice_questions"
     
@@ -94,6 +102,7 @@ class PracticeQuestion(Base):
     points_received = Column(Integer, nullable=True)
     feedback = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     chapter = relationship("Chapter", back_populates="questions")
\ No newline at end of file
@@ -1,9 +1,14 @@
-from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, ForeignKey
-from sqlalchemy.dialects.mysql import LONGBLOB
-from sqlalchemy.orm import relationship
+import enum
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, ForeignKey, Text, Enum
+from sqlalchemy.dialects.mysql import LONGBLOB, LONGTEXT
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from ..database import Base
 
+# MySQL column types with a generic fallback, so the models also work on SQLite (tests)
+LongBlob = LargeBinary().with_variant(LONGBLOB, "mysql")
+LongText = Text().with_variant(LONGTEXT, "mysql")
+
 
 class Document(Base):
     """Document storage table for PDFs, text files, JSON, etc."""
@@ -14,11 +19,44 @@ class Document(Base):
     user_id = Column(String(50), ForeignKey("users.id"), nullable=False)
     filename = Column(String(255), nullable=False)
     content_type = Column(String(100), nullable=False)
-    file_data = Column(LONGBLOB, nullable=True)  # Actual file content
+    file_data = deferred(Column(LongBlob, nullable=True))  # Legacy file content, new files live in the blob store
+    blob_hash = Column(String(64), nullable=True, index=True)  # sha256 of the content, key in the blob store
+    file_size = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
     user = relationship("User")
+    artifact = relationship("DocumentArtifact", uselist=False, back_populates="document",
+                            cascade="all, delete-orphan", passive_deletes=True)
+
+
+class ArtifactStatus(enum.Enum):
+    PENDING = "pending"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class DocumentArtifact(Base):
+    """Derived data of a document, extracted once after upload (text, chunks, outline, digest, embeddings)."""
+    __tablename__ = "document_artifacts"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, unique=True, index=True)
+    status = Column(Enum(ArtifactStatus), nullable=False, default=ArtifactStatus.PENDING)
+    page_count = Column(Integer, nullable=True)
+    page_texts = Column(LongText, nullable=True)  # JSON list of page texts
+    outline = Column(Text, nullable=True)  # JSON list of {"level", "title", "page"}
+    digest = Column(Text, nullable=True)  # First lines of the document
+    chunks = Column(LongText, nullable=True)  # JSON list of RAG chunks (see PDFProcessor.iter_chunks)
+    embeddings = Column(LongBlob, nullable=True)  # float32 matrix, one row per chunk
+    embedding_dim = Column(Integer, nullable=True)
+    embedding_model = Column(String(100), nullable=True)
+    error_msg = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    document = relationship("Document", back_populates="artifact")
 
 
 class Image(Base):
@@ -30,7 +68,9 @@ class Image(Base):
     user_id = Column(String(50), ForeignKey("users.id"), nullable=False)
     filename = Column(String(255), nullable=False)
     content_type = Column(String(100), nullable=False)
-    image_data = Column(LONGBLOB, nullable=False)  # Actual image content
+    image_data = deferred(Column(LongBlob, nullable=True))  # Legacy image content, new images live in the blob store
+    blob_hash = Column(String(64), nullable=True, index=True)  # sha256 of the content, key in the blob store
+    file_size = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
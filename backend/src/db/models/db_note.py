@@ -2,8 +2,9 @@ from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ...db.database import Base
+from .versioning import Versioned
 
-class Note(Base):
+class Note(Versioned, Base):
     __tablename__ = "notes"
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
@@ -0,0 +1,83 @@
+from sqlalchemy import Boolean, Column, Date, DateTime, Index, Integer, String
+
+from ..database import Base
+
+
+class PlatformStats(Base):
+    """
+    Materialized platform statistics, a single row (id 1) refreshed by a scheduler job (core.routines).
+    The watermarks mark how far the append-only sources have been aggregated.
+    """
+    __tablename__ = "platform_stats"
+
+    id = Column(Integer, primary_key=True)
+    users = Column(Integer, nullable=False, default=0)
+    courses = Column(Integer, nullable=False, default=0)
+    chapters = Column(Integer, nullable=False, default=0)
+    messages = Column(Integer, nullable=False, default=0)  # chat messages ever sent
+    active_today = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(DateTime, nullable=True)
+
+    usage_watermark = Column(Integer, nullable=False, default=0)  # last aggregated usages.id
+    course_watermark = Column(Integer, nullable=False, default=0)  # last aggregated courses.id
+    chapter_watermark = Column(Integer, nullable=False, default=0)  # last aggregated chapters.id
+    user_watermark = Column(DateTime, nullable=True)  # users.created_at up to which new users are aggregated
+    session_watermark = Column(Integer, nullable=True, default=0)  # last usages.id sessionized into learn_time
+
+
+class DailyStats(Base):
+    """Per-day (UTC) platform aggregates for dashboards"""
+    __tablename__ = "daily_stats"
+
+    day = Column(Date, primary_key=True)
+    active_users = Column(Integer, nullable=False, default=0)
+    new_users = Column(Integer, nullable=False, default=0)
+    courses_created = Column(Integer, nullable=False, default=0)
+    chapters_created = Column(Integer, nullable=False, default=0)
+    chat_messages = Column(Integer, nullable=False, default=0)
+    learn_minutes = Column(Integer, nullable=False, default=0)
+
+
+class DailyActiveUser(Base):
+    """Users with at least one usage event on a day, the set behind DailyStats.active_users"""
+    __tablename__ = "daily_active_users"
+
+    day = Column(Date, primary_key=True)
+    user_id = Column(String(50), primary_key=True)
+
+
+class LearnTime(Base):
+    """Seconds a user spent on chapter pages of a course on a day (UTC), computed from the visible pings"""
+    __tablename__ = "learn_time"
+
+    user_id = Column(String(50), primary_key=True)
+    course_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    seconds = Column(Integer, nullable=False, default=0)
+
+    # The per-day sum behind DailyStats.learn_minutes (learn_time_crud), read from the index alone
+    __table_args__ = (
+        Index('ix_learn_time_day_seconds', 'day', 'seconds'),
+    )
+
+
+class LearnTimeTotal(Base):
+    """All learn time of a user in seconds (sum of LearnTime)"""
+    __tablename__ = "learn_time_totals"
+
+    user_id = Column(String(50), primary_key=True)
+    seconds = Column(Integer, nullable=False, default=0)
+
+
+class LearnSession(Base):
+    """
+    The last sessionized visible / hidden ping of a user. Its dwell interval ends with the user's next ping,
+    which may only arrive with the next run (visible is cleared once the interval has been credited).
+    """
+    __tablename__ = "learn_sessions"
+
+    user_id = Column(String(50), primary_key=True)
+    timestamp = Column(DateTime, nullable=False)
+    course_id = Column(Integer, nullable=True)
+    chapter_id = Column(Integer, nullable=True)
+    visible = Column(Boolean, nullable=False)
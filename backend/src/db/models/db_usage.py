@@ -16,4 +16,12 @@ class Usage(Base):
     chapter_id = Column(Integer, nullable=True)  # Nullable for global actions not tied to a specific chapter
     action = Column(String(50), nullable=False)  # e.g., "view", "complete", "start", "create", "delete"
     details = Column(Text, nullable=True)  # Additional details about the action
-    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
\ No newline at end of file
+    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
+
+class UsageCounter(Base):
+    """Number of usage events per user and counter, maintained whenever usages are written (see usage_crud)."""
+    __tablename__ = "usage_counters"
+
+    user_id = Column(String(50), primary_key=True)
+    name = Column(String(50), primary_key=True)  # the action
+    total = Column(Integer, nullable=False, default=0)
@@ -1,8 +1,8 @@
-from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime # Added Text and DateTime
+from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, Index # Added Text and DateTime
 from datetime import datetime, timezone
 from ..database import Base
 from sqlalchemy.dialects.mysql import LONGTEXT
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 
 
 
@@ -17,7 +17,9 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_admin = Column(Boolean, default=False) # Added for admin role
     #später hier oauth accs erkennen: open_id = Column(String(50), unique=True, index=True, nullable=True) # New field for OpenID
-    profile_image_base64 = Column(LONGTEXT, nullable=True) # New field for profile image
+    profile_image_base64 = deferred(Column(Text().with_variant(LONGTEXT, "mysql"), nullable=True)) # Legacy profile image, new avatars live in the blob store
+    avatar_hash = Column(String(64), nullable=True, index=True)  # sha256 of the avatar image, key in the blob store
+    avatar_content_type = Column(String(100), nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=True)
     last_login = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=True) # Will be updated manually on login
     courses = relationship("Course", back_populates="user", cascade="all, delete-orphan")
@@ -27,6 +29,11 @@ class User(Base):
     verification_token = Column(String(100), nullable=True)  # Token for email verification
     is_subscribed = Column(Boolean, default=False)  # New field for subscription status
 
+    # Keyset pagination of the admin user listings, newest first (utils.pagination)
+    __table_args__ = (
+        Index('ix_users_created_at_id', 'created_at', 'id'),
+    )
+
 
 
     
\ No newline at end of file
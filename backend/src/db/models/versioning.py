@@ -0,0 +1,19 @@
+"""
+Row version counters, used as cheap validators (ETags) for read endpoints.
+Models that mix in Versioned get a version column that is incremented on every ORM update of the row,
+so a client's cached copy can be validated without loading or hashing the row's content.
+"""
+from sqlalchemy import Column, Integer, event
+from sqlalchemy.orm import object_session
+
+
+class Versioned:
+    # NULL for rows created before the column existed, read as 0
+    version = Column(Integer, nullable=True, default=1)
+
+
+@event.listens_for(Versioned, "before_update", propagate=True)
+def _bump_version(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and session.is_modified(target, include_collections=False):
+        target.version = (target.version or 0) + 1
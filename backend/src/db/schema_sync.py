@@ -0,0 +1,41 @@
+"""
+Minimal schema migration for columns added to existing tables.
+Base.metadata.create_all only creates missing tables, so new columns of existing tables
+(and columns that became nullable) are applied here at startup.
+"""
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex, MetaData
+
+logger = logging.getLogger(__name__)
+
+
+def sync_schema(engine: Engine, metadata: MetaData):
+    """Add missing columns (always as NULL-able) and their indexes, relax NOT NULL on MySQL where the model allows NULL"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            db_columns = {column["name"]: column for column in inspector.get_columns(table.name)}
+            db_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+
+            for column in table.columns:
+                if column.name not in db_columns:
+                    logger.info("Adding column %s.%s", table.name, column.name)
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type} NULL"))
+                elif engine.dialect.name == "mysql" and column.nullable and not db_columns[column.name]["nullable"] \
+                        and not column.primary_key:
+                    logger.info("Making column %s.%s nullable", table.name, column.name)
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} MODIFY {column.name} {column_type} NULL"))
+
+            for index in table.indexes:
+                if index.name not in db_indexes:
+                    logger.info("Creating index %s", index.name)
+                    conn.execute(CreateIndex(index))
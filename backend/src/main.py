@@ -21,8 +21,12 @@ from .api.routers import search as search_router
 from .api.routers import flashcard
 from .api.schemas import user as user_schema
 from .db.database import engine, SessionLocal
+from .db.schema_sync import sync_schema
+from .db.crud import usage_crud
 from .db.models import db_user as user_model
+from .services import search_index
 from .utils import auth
+from .utils.pagination import NEXT_CURSOR_HEADER
 
 from .core.routines import update_stuck_courses
 from .config.settings import SESSION_SECRET_KEY
@@ -32,6 +36,11 @@ from .core.lifespan import lifespan
 
 # Create database tables
 user_model.Base.metadata.create_all(bind=engine)
+sync_schema(engine, user_model.Base.metadata)
+with SessionLocal() as db:
+    usage_crud.ensure_usage_counters(db)
+# Index the course, chapter and note changes of every commit (filled on startup by core.routines.build_search_index)
+search_index.track_changes()
 
 # Create output directory for flashcard files
 output_dir = Path("/tmp/anki_output") if os.path.exists("/tmp") else Path("./anki_output")
@@ -62,6 +71,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Define /users/me BEFORE including users.router to ensure correct route matching
@@ -0,0 +1,236 @@
+"""
+Benchmark a mixed API load: handlers on the sync Session vs the AsyncSession layer.
+
+Usage (from the backend directory):
+    python -m src.scripts.bench_async_db [--seconds 10] [--concurrency 32] [--courses 50]
+        [--sync-url mysql+mysqlconnector://...] [--async-url mysql+aiomysql://...]
+
+Without URLs a temporary SQLite database is used (sqlite / sqlite+aiosqlite). Both URLs have to point to
+the same database; it is seeded with one user, --courses courses with 10 chapters each, and the usage
+rows written by the run. Point them at a disposable MySQL schema for numbers that include network
+round trips, which is where blocking the event loop hurts most.
+
+Each mode runs a uvicorn server in its own process. The handlers are async def in both modes, like the
+routers. "sync" queries through the sync Session (blocking the loop like the old handlers), "async"
+through the async CRUD variants. The load mixes course listings (60%), chapter reads with content (30%)
+and usage pings (10%). A probe requests a trivial endpoint every 20 ms to show event loop stalls.
+Reported are requests per second, request latency p50 / p99 and probe latency p99.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import tempfile
+import time
+
+import httpx
+
+MODES = ("sync", "async")
+CHAPTERS_PER_COURSE = 10
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _seed(sync_url: str, courses: int):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from ..db.database import Base
+    from ..db.models import db_chat, db_course, db_file, db_note, db_usage, db_user  # noqa: F401 (register all tables)
+    from ..db.models.db_course import Chapter, Course
+    from ..db.models.db_user import User
+
+    engine = create_engine(sync_url)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        if db.get(User, "bench") is None:
+            db.add(User(id="bench", username="bench", email="bench@example.com", hashed_password="x"))
+            for course_id in range(1, courses + 1):
+                db.add(Course(user_id="bench", query="q", total_time_hours=2, language="en", difficulty="b",
+                              title=f"Course {course_id}", description="d" * 200))
+            db.flush()
+            for course in db.query(Course).filter(Course.user_id == "bench").all():
+                for index in range(1, CHAPTERS_PER_COURSE + 1):
+                    db.add(Chapter(course_id=course.id, index=index, caption=f"Chapter {index}", summary="s" * 300,
+                                   content="c" * 20000, time_minutes=10, image_url="", is_completed=index % 2 == 0))
+            db.commit()
+        chapters = [tuple(row) for row in db.query(Chapter.course_id, Chapter.id)
+                    .join(Course, Course.id == Chapter.course_id).filter(Course.user_id == "bench").all()]
+    engine.dispose()
+    return chapters
+
+
+def _serve(mode: str, sync_url: str, async_url: str, port: int, concurrency: int):
+    os.environ["ASYNC_DATABASE_URL"] = async_url
+
+    import uvicorn
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from ..api.schemas.course import Chapter as ChapterSchema
+    from ..api.schemas.statistics import UsagePost
+    from ..db.crud import chapters_crud, courses_crud, usage_crud
+    from ..db.crud.aio import chapters_crud as async_chapters_crud
+    from ..db.crud.aio import courses_crud as async_courses_crud
+    from ..db.crud.aio import usage_crud as async_usage_crud
+    from ..db.database import get_async_db
+    from ..db.models import db_chat, db_course, db_file, db_note, db_usage, db_user  # noqa: F401 (register all tables)
+
+    # Enough connections for every client: a blocked loop can't run the teardown that returns a connection
+    engine = create_engine(sync_url, pool_size=concurrency + 4, max_overflow=0)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+
+    def get_sync_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    get_session = get_async_db if mode == "async" else get_sync_db
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    @app.get("/courses")
+    async def courses(db=Depends(get_session)):
+        if mode == "async":
+            return await async_courses_crud.get_courses_infos(db, "bench")
+        return courses_crud.get_courses_infos(db, "bench")
+
+    @app.get("/courses/{course_id}/chapters/{chapter_id}", response_model=ChapterSchema)
+    async def chapter(course_id: int, chapter_id: int, db=Depends(get_session)):
+        if mode == "async":
+            return await async_chapters_crud.get_chapter_by_course_id_and_chapter_id(db, course_id, chapter_id, with_content=True)
+        return chapters_crud.get_chapter_by_course_id_and_chapter_id(db, course_id, chapter_id)
+
+    @app.post("/usage")
+    async def usage(usage: UsagePost, db=Depends(get_session)):
+        if mode == "async":
+            await async_usage_crud.log_site_usage(db, usage)
+        else:
+            usage_crud.log_site_usage(db, usage)
+        return {}
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _wait_for_server(port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("Benchmark server did not start")
+
+
+async def _client_load(port: int, seconds: float, concurrency: int, chapters: list, seed: int = 42) -> dict:
+    rng = random.Random(seed)
+    base = f"http://127.0.0.1:{port}"
+    latencies, probe_latencies, errors = [], [], [0]
+    deadline = time.perf_counter() + seconds
+
+    async def worker(client: httpx.AsyncClient):
+        while time.perf_counter() < deadline:
+            roll = rng.random()
+            start = time.perf_counter()
+            if roll < 0.6:
+                response = await client.get(f"{base}/courses")
+            elif roll < 0.9:
+                course_id, chapter_id = rng.choice(chapters)
+                response = await client.get(f"{base}/courses/{course_id}/chapters/{chapter_id}")
+            else:
+                course_id, chapter_id = rng.choice(chapters)
+                response = await client.post(f"{base}/usage", json={"user_id": "bench", "course_id": course_id,
+                                                                  "chapter_id": chapter_id, "url": "/bench", "visible": True})
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors[0] += 1
+
+    async def probe(client: httpx.AsyncClient):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await client.get(f"{base}/ping")
+            probe_latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.02)
+
+    limits = httpx.Limits(max_connections=concurrency + 2)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(probe(client), *(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    probe_ms = sorted(latency * 1000 for latency in probe_latencies)
+    return {
+        "requests_per_s": len(latencies) / elapsed,
+        "errors": errors[0],
+        "p50_ms": statistics.median(latencies_ms),
+        "p99_ms": latencies_ms[int(len(latencies_ms) * 0.99) - 1],
+        "probe_p99_ms": probe_ms[int(len(probe_ms) * 0.99) - 1] if probe_ms else 0,
+    }
+
+
+def run_mode(mode: str, sync_url: str, async_url: str, seconds: float, concurrency: int, chapters: list) -> dict:
+    port = _free_port()
+    context = multiprocessing.get_context("spawn")
+    process = context.Process(target=_serve, args=(mode, sync_url, async_url, port, concurrency), daemon=True)
+    process.start()
+    try:
+        _wait_for_server(port)
+        result = asyncio.run(_client_load(port, seconds, concurrency, chapters))
+    finally:
+        process.terminate()
+        process.join()
+    result["mode"] = mode
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare sync Session and AsyncSession handlers under a mixed load.")
+    parser.add_argument("--seconds", type=float, default=10, help="Duration of each run.")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients.")
+    parser.add_argument("--courses", type=int, default=50, help="Courses to seed (10 chapters each).")
+    parser.add_argument("--sync-url", help="Sync SQLAlchemy URL of the benchmark database.")
+    parser.add_argument("--async-url", help="Async SQLAlchemy URL of the same database.")
+    args = parser.parse_args(argv)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if bool(args.sync_url) != bool(args.async_url):
+        parser.error("--sync-url and --async-url have to be given together")
+    tmp_dir = None
+    if args.sync_url:
+        sync_url, async_url = args.sync_url, args.async_url
+    else:
+        tmp_dir = tempfile.TemporaryDirectory(prefix="bench_async_db_")
+        path = os.path.join(tmp_dir.name, "bench.db")
+        sync_url, async_url = f"sqlite:///{path}", f"sqlite+aiosqlite:///{path}"
+
+    try:
+        chapters = _seed(sync_url, args.courses)
+        results = [run_mode(mode, sync_url, async_url, args.seconds, args.concurrency, chapters) for mode in MODES]
+    finally:
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+    print(f"{sync_url.split('://')[0]} / {async_url.split('://')[0]}, {args.concurrency} clients x {args.seconds:.0f} s, "
+          f"60% course lists / 30% chapters / 10% usage pings")
+    print(f"{'mode':<7}{'req/s':>9}{'errors':>8}{'p50 ms':>9}{'p99 ms':>9}{'probe p99 ms':>14}")
+    for r in results:
+        print(f"{r['mode']:<7}{r['requests_per_s']:>9.1f}{r['errors']:>8}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+              f"{r['probe_p99_ms']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark the chapter listing of a course: full chapters (with content) vs the summary view.
+
+Usage (from the backend directory):
+    python -m src.scripts.bench_chapter_listing [--chapters 20] [--content-kb 30] [--requests 500]
+
+Seeds a temporary SQLite database with one course of --chapters chapters, each with about --content-kb KB of
+generated React source, and serves the listing in-process (httpx ASGITransport, so no network) like
+GET /courses/{id}/chapters does: "full" loads the chapters with their content, "summary" reads the metadata
+projection (view=summary). Reports the payload size (raw and gzip) and request latency p50 / p95 per view.
+"""
+import argparse
+import asyncio
+import gzip
+import logging
+import os
+import random
+import tempfile
+import time
+from typing import List
+
+import httpx
+
+VIEWS = ("full", "summary")
+
+
+def _content(kb: int, rng: random.Random) -> str:
+    # Shaped like the generated chapters: JSX with Tailwind classes around varying prose (so gzip is realistic)
+    words = ["light", "energy", "glucose", "water", "carbon", "cycle", "plant", "cell", "membrane", "reaction",
+             "chlorophyll", "oxygen", "stored", "splits", "fixes", "turns", "the", "and", "into", "of", "a", "in"]
+    parts = ["() => {\n  return (<div className=\"space-y-6\">\n"]
+    size = 0
+    while size < kb * 1024:
+        prose = " ".join(rng.choice(words) for _ in range(rng.randint(20, 60)))
+        block = ('    <div className="rounded-lg border border-gray-200 bg-white p-6 shadow-sm">\n'
+                 f'      <h2 className="mb-2 text-xl font-semibold text-gray-900">{prose[:30]}</h2>\n'
+                 f'      <p className="leading-relaxed text-gray-700">{prose}.</p>\n'
+                 '    </div>\n')
+        parts.append(block)
+        size += len(block)
+    return "".join(parts) + "  </div>);\n}"
+
+
+def _seed(url: str, chapters: int, content_kb: int):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from ..db.database import Base
+    from ..db.models import db_chat, db_course, db_file, db_note, db_usage, db_user  # noqa: F401 (register all tables)
+    from ..db.models.db_course import Chapter, Course
+    from ..db.models.db_user import User
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    rng = random.Random(1)
+    with sessionmaker(bind=engine)() as db:
+        db.add(User(id="bench", username="bench", email="bench@example.com", hashed_password="x"))
+        db.add(Course(id=1, user_id="bench", query="q", total_time_hours=2, language="en", difficulty="b",
+                      title="Course", description="d" * 200))
+        db.add_all([Chapter(course_id=1, index=index, caption=f"Chapter {index}", summary="s" * 300,
+                            content=_content(content_kb, rng), time_minutes=10, image_url="https://example.com/image.png",
+                            is_completed=index % 2 == 0)
+                    for index in range(1, chapters + 1)])
+        db.commit()
+    engine.dispose()
+
+
+def _app(async_url: str):
+    from fastapi import FastAPI
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from ..api.schemas.course import Chapter as ChapterSchema, ChapterSummary
+    from ..db.crud.aio import chapters_crud as async_chapters_crud
+
+    Session = async_sessionmaker(create_async_engine(async_url), expire_on_commit=False)
+    app = FastAPI()
+
+    @app.get("/full", response_model=List[ChapterSchema])
+    async def full():
+        async with Session() as db:
+            await async_chapters_crud.get_chapter_versions(db, 1)
+            return await async_chapters_crud.get_chapters_by_course_id(db, 1, with_content=True)
+
+    @app.get("/summary", response_model=List[ChapterSummary])
+    async def summary():
+        async with Session() as db:
+            rows = await async_chapters_crud.get_chapter_summaries(db, 1)
+            return [ChapterSummary(id=row.id, index=row.index, caption=row.caption, summary=row.summary or "",
+                                   time_minutes=row.time_minutes, is_completed=bool(row.is_completed),
+                                   image_url=row.image_url) for row in rows]
+
+    return app
+
+
+async def _measure(app, requests: int) -> dict:
+    results = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for view in VIEWS:
+            body = (await client.get(f"/{view}")).content  # warm up
+            latencies = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                response = await client.get(f"/{view}")
+                latencies.append((time.perf_counter() - start) * 1000)
+                response.raise_for_status()
+            latencies.sort()
+            results[view] = {
+                "bytes": len(body),
+                "gzip_bytes": len(gzip.compress(body)),
+                "p50_ms": latencies[len(latencies) // 2],
+                "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+            }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the full and summary chapter listings.")
+    parser.add_argument("--chapters", type=int, default=20)
+    parser.add_argument("--content-kb", type=int, default=30)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args(argv)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        _seed(f"sqlite:///{path}", args.chapters, args.content_kb)
+        app = _app(f"sqlite+aiosqlite:///{path}")
+        print(f"{args.chapters} chapters with {args.content_kb} KB of content each")
+        for view, result in asyncio.run(_measure(app, args.requests)).items():
+            print(f"{view:>8}: {result['bytes'] / 1024:8.1f} KB ({result['gzip_bytes'] / 1024:.1f} KB gzip), "
+                  f"p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Benchmark server memory per concurrent download: in-memory slicing vs streamed blob responses.
+
+Usage (from the backend directory):
+    python -m src.scripts.bench_downloads [--size-mb 30] [--concurrency 20] [--rounds 3]
+
+Each mode runs a uvicorn server in its own process with a single test blob in a temporary blob store.
+"legacy" reads the whole blob into memory per request and slices it, like the old download endpoints
+did with the LONGBLOB column. "streamed" uses blob_response, which reads only the requested ranges.
+Clients request a mix of full downloads and random ranges (like a PDF viewer seeking) and discard the
+body. The peak RSS of the server process (VmHWM) above its idle baseline is reported per download.
+Linux only (reads /proc).
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import tempfile
+import time
+
+import httpx
+
+MODES = ("legacy", "streamed")
+
+
+def _vm_hwm_kb(pid: int) -> int:
+    """Peak resident set size of a process in KB"""
+    with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _vm_rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _reset_hwm(pid: int):
+    """Reset VmHWM to the current RSS (supported since Linux 4.0)"""
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w", encoding="utf-8") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _serve(mode: str, store_path: str, blob_hash: str, port: int):
+    os.environ["BLOB_STORE_PATH"] = store_path
+
+    import uvicorn
+    from fastapi import FastAPI, Request, Response
+    from ..services.blob_store import get_blob_store
+    from ..utils.file_response import blob_response
+
+    app = FastAPI()
+
+    @app.get("/download")
+    async def download(request: Request):
+        if mode == "streamed":
+            return blob_response(request, blob_hash, "application/pdf", {})
+
+        # Old behavior: full bytes in memory, slice for a single range
+        data = get_blob_store().get(blob_hash)
+        range_header = request.headers.get("Range")
+        if range_header:
+            start, end = (int(x) for x in range_header.split("=")[1].split("-"))
+            return Response(content=data[start:end + 1], status_code=206, media_type="application/pdf",
+                            headers={"Content-Range": f"bytes {start}-{end}/{len(data)}"})
+        return Response(content=data, media_type="application/pdf")
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+async def _client_load(port: int, size: int, concurrency: int, rounds: int, seed: int = 42) -> float:
+    rng = random.Random(seed)
+    url = f"http://127.0.0.1:{port}/download"
+
+    async def one(client: httpx.AsyncClient):
+        headers = {}
+        if rng.random() < 0.7:
+            start = rng.randrange(0, size - 1)
+            end = min(size - 1, start + rng.randrange(64 * 1024, 1024 * 1024))
+            headers["Range"] = f"bytes={start}-{end}"
+        async with client.stream("GET", url, headers=headers) as response:
+            async for _ in response.aiter_bytes():
+                await asyncio.sleep(0)  # slow-ish consumer, keeps downloads overlapping
+
+    start = time.perf_counter()
+    async with httpx.AsyncClient(timeout=120) as client:
+        for _ in range(rounds):
+            await asyncio.gather(*(one(client) for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+def _wait_for_server(port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("Benchmark server did not start")
+
+
+def run_mode(mode: str, store_path: str, blob_hash: str, size: int, concurrency: int, rounds: int) -> dict:
+    port = _free_port()
+    context = multiprocessing.get_context("spawn")
+    process = context.Process(target=_serve, args=(mode, store_path, blob_hash, port), daemon=True)
+    process.start()
+    try:
+        _wait_for_server(port)
+        baseline_kb = _vm_rss_kb(process.pid)
+        _reset_hwm(process.pid)
+        seconds = asyncio.run(_client_load(port, size, concurrency, rounds))
+        peak_kb = _vm_hwm_kb(process.pid)
+    finally:
+        process.terminate()
+        process.join()
+    return {
+        "mode": mode,
+        "seconds": seconds,
+        "baseline_mb": baseline_kb / 1024,
+        "peak_mb": peak_kb / 1024,
+        "per_download_mb": max(peak_kb - baseline_kb, 0) / 1024 / concurrency,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare server memory per concurrent download.")
+    parser.add_argument("--size-mb", type=int, default=30, help="Size of the test blob.")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args(argv)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    store_path = tempfile.mkdtemp(prefix="bench_downloads_")
+    try:
+        os.environ["BLOB_STORE_PATH"] = store_path
+        from ..services.blob_store import LocalBlobStore
+        size = args.size_mb * 1024 * 1024
+        blob_hash, _ = LocalBlobStore(store_path).put(os.urandom(size))
+
+        results = [run_mode(mode, store_path, blob_hash, size, args.concurrency, args.rounds) for mode in MODES]
+    finally:
+        shutil.rmtree(store_path, ignore_errors=True)
+
+    print(f"{args.size_mb} MB blob, {args.concurrency} concurrent downloads x {args.rounds} rounds")
+    print(f"{'mode':<10}{'time s':>9}{'idle MB':>10}{'peak MB':>10}{'MB/download':>13}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['seconds']:>9.2f}{r['baseline_mb']:>10.1f}{r['peak_mb']:>10.1f}{r['per_download_mb']:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
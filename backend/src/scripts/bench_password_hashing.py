@@ -0,0 +1,152 @@
+"""
+Benchmark login throughput against streaming latency: bcrypt on the event loop vs the hashing pool.
+
+Usage (from the backend directory):
+    python -m src.scripts.bench_password_hashing [--logins 200] [--concurrency 20] [--streams 10]
+
+Each mode runs a uvicorn server in its own process. /login verifies a password against a stored bcrypt
+hash (BCRYPT_ROUNDS), "inline" calls passlib directly in the async endpoint like login_user used to,
+"pool" goes through core.password_hashing. /stream emits a small event every 10 ms, like a chat stream.
+While a burst of logins runs, the clients of the open streams record the gaps between events.
+Reported are logins per second, rejected logins (503) and the p50 / p99 / max stream gap.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import socket
+import statistics
+import time
+
+import httpx
+
+MODES = ("inline", "pool")
+TICK_SECONDS = 0.01
+PASSWORD = "correct horse battery staple"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _serve(mode: str, port: int):
+    import uvicorn
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+    from ..core import password_hashing, security
+
+    stored_hash = security.get_password_hash(PASSWORD)
+    app = FastAPI()
+
+    @app.post("/login")
+    async def login():
+        if mode == "pool":
+            valid, _ = await password_hashing.verify_password(PASSWORD, stored_hash)
+        else:
+            valid, _ = security.verify_and_update_password(PASSWORD, stored_hash)
+        return {"valid": valid}
+
+    @app.get("/stream")
+    async def stream(ticks: int = 1000):
+        async def events():
+            for i in range(ticks):
+                yield f"data: {i}\n\n"
+                await asyncio.sleep(TICK_SECONDS)
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _wait_for_server(port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("Benchmark server did not start")
+
+
+async def _client_load(port: int, logins: int, concurrency: int, streams: int) -> dict:
+    base = f"http://127.0.0.1:{port}"
+    gaps = []
+    burst_done = asyncio.Event()
+    results = {"ok": 0, "rejected": 0}
+
+    async def watch_stream(client: httpx.AsyncClient):
+        async with client.stream("GET", f"{base}/stream", params={"ticks": 100000}) as response:
+            last = time.perf_counter()
+            async for _ in response.aiter_lines():
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+                if burst_done.is_set():
+                    break
+
+    async def login_worker(client: httpx.AsyncClient, count: int):
+        for _ in range(count):
+            response = await client.post(f"{base}/login")
+            results["ok" if response.status_code == 200 else "rejected"] += 1
+
+    async with httpx.AsyncClient(timeout=300, limits=httpx.Limits(max_connections=concurrency + streams + 5)) as client:
+        watchers = [asyncio.create_task(watch_stream(client)) for _ in range(streams)]
+        await asyncio.sleep(0.5)  # streams are flowing before the burst starts
+        gaps.clear()
+        start = time.perf_counter()
+        per_worker, extra = divmod(logins, concurrency)
+        await asyncio.gather(*(login_worker(client, per_worker + (1 if i < extra else 0)) for i in range(concurrency)))
+        seconds = time.perf_counter() - start
+        burst_done.set()
+        await asyncio.gather(*watchers)
+
+    gaps_ms = sorted(gap * 1000 for gap in gaps)
+    return {
+        "seconds": seconds,
+        "logins_per_s": results["ok"] / seconds,
+        "rejected": results["rejected"],
+        "gap_p50_ms": statistics.median(gaps_ms) if gaps_ms else 0,
+        "gap_p99_ms": gaps_ms[int(len(gaps_ms) * 0.99) - 1] if gaps_ms else 0,
+        "gap_max_ms": gaps_ms[-1] if gaps_ms else 0,
+    }
+
+
+def run_mode(mode: str, logins: int, concurrency: int, streams: int) -> dict:
+    port = _free_port()
+    context = multiprocessing.get_context("spawn")
+    process = context.Process(target=_serve, args=(mode, port), daemon=True)
+    process.start()
+    try:
+        _wait_for_server(port)
+        result = asyncio.run(_client_load(port, logins, concurrency, streams))
+    finally:
+        process.terminate()
+        process.join()
+    result["mode"] = mode
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare login throughput and stream latency during a login burst.")
+    parser.add_argument("--logins", type=int, default=200, help="Logins in the burst.")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent login clients.")
+    parser.add_argument("--streams", type=int, default=10, help="Open event streams during the burst.")
+    args = parser.parse_args(argv)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    from ..config.settings import BCRYPT_ROUNDS, PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_WORKERS
+    results = [run_mode(mode, args.logins, args.concurrency, args.streams) for mode in MODES]
+
+    print(f"{args.logins} logins ({args.concurrency} concurrent), {args.streams} streams ticking every "
+          f"{TICK_SECONDS * 1000:.0f} ms, bcrypt rounds {BCRYPT_ROUNDS}, "
+          f"pool {PASSWORD_HASH_WORKERS} workers / {PASSWORD_HASH_MAX_PENDING} pending")
+    print(f"{'mode':<8}{'logins/s':>10}{'503s':>7}{'gap p50 ms':>12}{'gap p99 ms':>12}{'gap max ms':>12}")
+    for r in results:
+        print(f"{r['mode']:<8}{r['logins_per_s']:>10.1f}{r['rejected']:>7}"
+              f"{r['gap_p50_ms']:>12.1f}{r['gap_p99_ms']:>12.1f}{r['gap_max_ms']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark search latency of the SQLite FTS5 search index with synthetic courses and chapters.
+
+Usage (from the backend directory):
+    python -m src.scripts.bench_search_index [--chapters 100000] [--users 2000] [--queries 2000]
+
+Builds a temporary index with --chapters chapters (10 per course, about 400 words of content each) spread over
+--users users, then runs --queries searches of random users with one or two terms taken from the vocabulary,
+the last one cut to a 3 to 6 character prefix (like typing in the search bar). Reports p50 / p95 / p99 latency.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from ..services.search_index import SearchDocument, SQLiteSearchIndex
+
+CHAPTERS_PER_COURSE = 10
+WORDS_PER_CHAPTER = 400
+
+
+def _vocabulary(rng: random.Random, size: int = 20000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 11))) for _ in range(size)]
+
+
+def _text(rng: random.Random, vocabulary, words: int) -> str:
+    # Zipf-like: few very common words, a long tail of rare ones
+    return " ".join(vocabulary[min(int(rng.paretovariate(1.1)) - 1, len(vocabulary) - 1)] for _ in range(words))
+
+
+def build(index: SQLiteSearchIndex, rng: random.Random, vocabulary, chapters: int, users: int):
+    documents = []
+    for course_id in range(1, chapters // CHAPTERS_PER_COURSE + 1):
+        user_id = f"user-{rng.randrange(users)}"
+        documents.append(SearchDocument("course", course_id, user_id, course_id, None, {
+            "title": _text(rng, vocabulary, 4), "summary": _text(rng, vocabulary, 30)}))
+        for chapter in range(CHAPTERS_PER_COURSE):
+            chapter_id = (course_id - 1) * CHAPTERS_PER_COURSE + chapter + 1
+            documents.append(SearchDocument("chapter", chapter_id, user_id, course_id, chapter_id, {
+                "title": _text(rng, vocabulary, 5), "summary": _text(rng, vocabulary, 40),
+                "content": _text(rng, vocabulary, WORDS_PER_CHAPTER)}))
+        if len(documents) >= 5000:
+            index.upsert(documents)
+            documents = []
+    index.upsert(documents)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the SQLite FTS5 search index.")
+    parser.add_argument("--chapters", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    vocabulary = _vocabulary(rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SQLiteSearchIndex(os.path.join(tmp, "search_index.sqlite3"))
+        start = time.perf_counter()
+        build(index, rng, vocabulary, args.chapters, args.users)
+        print(f"Indexed {index.count()} documents in {time.perf_counter() - start:.1f} s, "
+              f"{os.path.getsize(index.path) / 1024 / 1024:.0f} MB")
+
+        latencies = []
+        hits = 0
+        for _ in range(args.queries):
+            terms = [_text(rng, vocabulary, 1) for _ in range(rng.randint(1, 2))]
+            terms[-1] = terms[-1][:rng.randint(3, 6)]
+            start = time.perf_counter()
+            hits += len(index.search(f"user-{rng.randrange(args.users)}", " ".join(terms), limit=20))
+            latencies.append((time.perf_counter() - start) * 1000)
+        index.close()
+
+    latencies.sort()
+    for name, quantile in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        print(f"{name}: {latencies[int(quantile * (len(latencies) - 1))]:.2f} ms")
+    print(f"max: {latencies[-1]:.2f} ms, {hits / len(latencies):.1f} hits per query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark the per-course and the sharded chroma layout.
+
+Usage (from the backend directory):
+    python -m src.scripts.bench_vector_layout [--courses 500] [--vectors 40] [--queries 500]
+
+Each layout runs in its own process against an embedded PersistentClient in a temporary
+directory, so peak RSS approximates what the chroma server has to hold for the HNSW indexes.
+Random embeddings are used, the sentence transformer is not needed.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import statistics
+import tempfile
+import time
+
+from ..services.vector_service import VectorService, PER_COURSE_LAYOUT, SHARDED_LAYOUT
+
+
+def _directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def _random_embedding(rng: random.Random, dim: int):
+    return [rng.random() for _ in range(dim)]
+
+
+def _run_layout(layout: str, courses: int, vectors: int, queries: int, dim: int, shard_count: int, result_queue):
+    import chromadb
+
+    path = tempfile.mkdtemp(prefix=f"bench_{layout}_")
+    rng = random.Random(42)
+    try:
+        service = VectorService(client=chromadb.PersistentClient(path=path), layout=layout, shard_count=shard_count)
+
+        start = time.perf_counter()
+        for course_id in range(1, courses + 1):
+            service.add_embeddings_by_course_id(
+                course_id=course_id,
+                content_ids=[f"doc_{course_id}_para_{i}" for i in range(vectors)],
+                embeddings=[_random_embedding(rng, dim) for _ in range(vectors)],
+                texts=[f"course {course_id} paragraph {i}" for i in range(vectors)],
+                metadatas=[{"type": "pdf_paragraph", "paragraph_index": i} for i in range(vectors)],
+            )
+        ingest_seconds = time.perf_counter() - start
+
+        # Reopen, so the query phase pays the cold-load cost of the indexes like a restarted server does
+        service = VectorService(client=chromadb.PersistentClient(path=path), layout=layout, shard_count=shard_count)
+        latencies = []
+        for _ in range(queries):
+            course_id = rng.randint(1, courses)
+            start = time.perf_counter()
+            service.query_by_course_id(course_id, [_random_embedding(rng, dim)], n_results=3)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        latencies.sort()
+        result_queue.put({
+            "layout": layout,
+            "collections": len(service.client.list_collections()),
+            "ingest_s": ingest_seconds,
+            "p50_ms": statistics.median(latencies),
+            "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "disk_mb": _directory_size(path) / (1024 * 1024),
+        })
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare memory use and query latency of the chroma layouts.")
+    parser.add_argument("--courses", type=int, default=500)
+    parser.add_argument("--vectors", type=int, default=40, help="Vectors per course.")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension (all-MiniLM-L6-v2 uses 384).")
+    parser.add_argument("--shards", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for layout in (PER_COURSE_LAYOUT, SHARDED_LAYOUT):
+        queue = context.Queue()
+        process = context.Process(
+            target=_run_layout,
+            args=(layout, args.courses, args.vectors, args.queries, args.dim, args.shards, queue),
+        )
+        process.start()
+        results.append(queue.get())
+        process.join()
+
+    print(f"{args.courses} courses x {args.vectors} vectors, {args.queries} queries")
+    print(f"{'layout':<12}{'collections':>12}{'ingest s':>10}{'p50 ms':>9}{'p95 ms':>9}{'max RSS MB':>12}{'disk MB':>9}")
+    for r in results:
+        print(f"{r['layout']:<12}{r['collections']:>12}{r['ingest_s']:>10.1f}{r['p50_ms']:>9.2f}"
+              f"{r['p95_ms']:>9.2f}{r['max_rss_mb']:>12.1f}{r['disk_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Move document and image bytes (LONGBLOB columns) and profile images (base64 LONGTEXT column)
+out of MySQL into the blob store.
+
+Usage (from the backend directory):
+    python -m src.scripts.migrate_blobs [--batch-size 50] [--pause 0.2] [--keep-data] [--dry-run]
+
+The migration runs online: rows are migrated one by one in small batches, and until a row has
+a blob_hash the application keeps reading the legacy column. Each row is only cleared after the
+stored blob was verified (hash and size), so the tool can be interrupted and re-run at any time.
+After all rows are migrated run OPTIMIZE TABLE documents / images / users to give the space back to MySQL.
+"""
+import argparse
+import hashlib
+import logging
+import sys
+import time
+from typing import Callable, NamedTuple, Optional
+
+from sqlalchemy import select
+
+from ..db.database import Base, engine, get_db_context
+from ..db.models.db_file import Document, Image
+from ..db.models.db_user import User
+from ..db.schema_sync import sync_schema
+from ..services.avatar_service import decode_image, sniff_image_type
+from ..services.blob_store import get_blob_store
+
+logger = logging.getLogger(__name__)
+
+
+def _assign_file(row, blob_hash: str, size: int, data: bytes):
+    row.blob_hash = blob_hash
+    row.file_size = size
+
+
+def _assign_avatar(row, blob_hash: str, size: int, data: bytes):
+    content_type = sniff_image_type(data)
+    if content_type is None:
+        raise ValueError("Profile image is not a supported image")
+    row.avatar_hash = blob_hash
+    row.avatar_content_type = content_type
+
+
+class Target(NamedTuple):
+    model: type
+    legacy_column: str
+    hash_column: str
+    assign: Callable  # assign(row, blob_hash, size, data) sets the blob columns of a row
+    decode: Optional[Callable] = None  # turns the legacy value into bytes
+
+
+TARGETS = [
+    Target(Document, "file_data", "blob_hash", _assign_file),
+    Target(Image, "image_data", "blob_hash", _assign_file),
+    Target(User, "profile_image_base64", "avatar_hash", _assign_avatar, decode_image),
+]
+
+
+def _pending_ids(target: Target, after_id, batch_size: int):
+    """Ids of the next rows that still hold their bytes in the database (without loading the bytes)"""
+    model = target.model
+    query = select(model.id).where(
+        getattr(model, target.hash_column).is_(None), getattr(model, target.legacy_column).isnot(None)
+    )
+    if after_id is not None:
+        query = query.where(model.id > after_id)
+    with get_db_context() as db:
+        rows = db.execute(query.order_by(model.id).limit(batch_size)).all()
+    return [row[0] for row in rows]
+
+
+def migrate_row(target: Target, row_id, keep_data: bool, dry_run: bool) -> int:
+    """Move the bytes of one row into the blob store. Returns the number of moved bytes."""
+    store = get_blob_store()
+    model = target.model
+    with get_db_context() as db:
+        row = db.get(model, row_id)
+        data = getattr(row, target.legacy_column) if row else None
+        if not data or getattr(row, target.hash_column):
+            return 0
+        if target.decode:
+            data = target.decode(data)
+        if dry_run:
+            return len(data)
+
+        blob_hash, size = store.put(data)
+        if store.size(blob_hash) != size or hashlib.sha256(store.get(blob_hash)).hexdigest() != blob_hash:
+            raise RuntimeError(f"Verification of blob {blob_hash} for {model.__tablename__} {row_id} failed")
+
+        target.assign(row, blob_hash, size, data)
+        if not keep_data:
+            setattr(row, target.legacy_column, None)
+        db.commit()
+        return size
+
+
+def migrate(batch_size: int = 50, pause_seconds: float = 0.2, keep_data: bool = False, dry_run: bool = False) -> dict:
+    """Migrate all documents, images and profile images that are not in the blob store yet"""
+    if not dry_run:
+        sync_schema(engine, Base.metadata)
+
+    report = {}
+    for target in TARGETS:
+        model = target.model
+        table_report = {"rows": 0, "bytes": 0, "failed": 0}
+        last_id = None
+        while True:
+            ids = _pending_ids(target, last_id, batch_size)
+            if not ids:
+                break
+            for row_id in ids:
+                try:
+                    moved = migrate_row(target, row_id, keep_data, dry_run)
+                except Exception as e:
+                    logger.error("Failed to migrate %s %s: %s", model.__tablename__, row_id, e)
+                    table_report["failed"] += 1
+                    continue
+                if moved:
+                    table_report["rows"] += 1
+                    table_report["bytes"] += moved
+            last_id = ids[-1]
+            logger.info("%s: migrated %s rows (%s bytes) so far", model.__tablename__, table_report["rows"], table_report["bytes"])
+            if pause_seconds:
+                time.sleep(pause_seconds)
+        report[model.__tablename__] = table_report
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Move document, image and profile image bytes from MySQL into the blob store.")
+    parser.add_argument("--batch-size", type=int, default=50, help="Rows per batch.")
+    parser.add_argument("--pause", type=float, default=0.2, help="Seconds to sleep between batches.")
+    parser.add_argument("--keep-data", action="store_true", help="Set the blob hash but keep the bytes in the database.")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be migrated.")
+    args = parser.parse_args(argv)
+
+    report = migrate(batch_size=args.batch_size, pause_seconds=args.pause, keep_data=args.keep_data, dry_run=args.dry_run)
+    for table, table_report in report.items():
+        print(f"{table}: {table_report['rows']} rows, {table_report['bytes']} bytes, {table_report['failed']} failed")
+    return 1 if any(table_report["failed"] for table_report in report.values()) else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
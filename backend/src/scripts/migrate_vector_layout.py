@@ -0,0 +1,100 @@
+"""
+Migrate RAG vectors from the per-course collection layout (course_<id>) to the sharded layout.
+
+Usage (from the backend directory):
+    python -m src.scripts.migrate_vector_layout [--batch-size 500] [--delete-source] [--dry-run]
+
+The migration is idempotent: vectors are upserted into the shards with the same ids the
+sharded VectorService would use, so it can be re-run after an interruption.
+Switch CHROMA_LAYOUT to "sharded" once all collections are migrated.
+"""
+import argparse
+import logging
+import sys
+from typing import Optional
+
+from ..services.vector_service import (
+    VectorService, SHARDED_LAYOUT, COURSE_COLLECTION_PREFIX, create_chroma_client
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _collection_names(client):
+    """Collection names for both old (objects) and new (names) chroma clients"""
+    return [getattr(collection, "name", collection) for collection in client.list_collections()]
+
+
+def _course_id_from_collection_name(name: str) -> Optional[int]:
+    if not name.startswith(COURSE_COLLECTION_PREFIX):
+        return None
+    suffix = name[len(COURSE_COLLECTION_PREFIX):]
+    return int(suffix) if suffix.isdigit() else None
+
+
+def migrate_collection(client, target: VectorService, course_id: int, batch_size: int, dry_run: bool) -> int:
+    """Copy all vectors of one per-course collection into its shard. Returns the number of copied vectors."""
+    source = client.get_collection(COURSE_COLLECTION_PREFIX + str(course_id))
+    copied = 0
+    offset = 0
+    while True:
+        batch = source.get(include=["documents", "embeddings", "metadatas"], limit=batch_size, offset=offset)
+        ids = batch["ids"]
+        if not ids:
+            break
+        if not dry_run:
+            target.add_embeddings_by_course_id(
+                course_id=course_id,
+                content_ids=ids,
+                embeddings=[list(embedding) for embedding in batch["embeddings"]],
+                texts=batch["documents"],
+                metadatas=[metadata or {} for metadata in batch["metadatas"]],
+            )
+        copied += len(ids)
+        offset += len(ids)
+    return copied
+
+
+def migrate(batch_size: int = 500, delete_source: bool = False, dry_run: bool = False, client=None) -> dict:
+    """Migrate every course_<id> collection into the shard collections"""
+    client = client if client is not None else create_chroma_client()
+    target = VectorService(client=client, layout=SHARDED_LAYOUT)
+
+    report = {"collections": 0, "vectors": 0, "deleted_collections": 0}
+    for name in _collection_names(client):
+        course_id = _course_id_from_collection_name(name)
+        if course_id is None:
+            continue
+
+        copied = migrate_collection(client, target, course_id, batch_size, dry_run)
+        report["collections"] += 1
+        report["vectors"] += copied
+        logger.info("Migrated %s vectors of %s", copied, name)
+
+        if delete_source and not dry_run:
+            migrated = len(target.get_collection_by_course_id(course_id).get(where={"course_id": course_id}, include=[])["ids"])
+            if migrated < copied:
+                logger.error("Shard holds only %s of %s vectors for %s, keeping the source collection", migrated, copied, name)
+                continue
+            client.delete_collection(name)
+            report["deleted_collections"] += 1
+
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Migrate per-course chroma collections to the sharded layout.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Vectors per read/write batch.")
+    parser.add_argument("--delete-source", action="store_true", help="Delete course_<id> collections after a verified copy.")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be migrated.")
+    args = parser.parse_args(argv)
+
+    report = migrate(batch_size=args.batch_size, delete_source=args.delete_source, dry_run=args.dry_run)
+    print(f"Migrated {report['vectors']} vectors from {report['collections']} collections, "
+          f"deleted {report['deleted_collections']} source collections.")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
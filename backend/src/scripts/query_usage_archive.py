@@ -0,0 +1,67 @@
+"""
+Ad-hoc queries over the archived usage rows (services.usage_archive).
+
+Usage (from the backend directory):
+    python -m src.scripts.query_usage_archive [--archive-dir DIR] [--since 2025-01-01] [--until 2025-03-31]
+        [--user USER_ID] [--action chat --action search] [--course COURSE_ID]
+        [--group-by action|user|course|day|month] [--limit 50]
+
+Without --group-by the matching rows are printed as JSON lines (at most --limit, 0 for all).
+With --group-by the number of matching rows per group is printed, largest first (at most --limit groups).
+Only the archives are read, rows still in the usages table are not included.
+"""
+import argparse
+import json
+from collections import Counter
+from datetime import date
+
+from ..config.settings import USAGE_ARCHIVE_PATH
+from ..services.usage_archive import archive_files, iter_archived_usages
+
+GROUP_KEYS = {
+    "action": lambda row: row["action"],
+    "user": lambda row: row["user_id"],
+    "course": lambda row: row["course_id"],
+    "day": lambda row: row["timestamp"][:10],
+    "month": lambda row: row["timestamp"][:7],
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Filter and count archived usage rows.")
+    parser.add_argument("--archive-dir", default=USAGE_ARCHIVE_PATH, help="Directory of the archive files.")
+    parser.add_argument("--since", type=date.fromisoformat, help="First day (inclusive, YYYY-MM-DD).")
+    parser.add_argument("--until", type=date.fromisoformat, help="Last day (inclusive, YYYY-MM-DD).")
+    parser.add_argument("--user", help="Only rows of this user id.")
+    parser.add_argument("--action", action="append", help="Only rows with this action (repeatable).")
+    parser.add_argument("--course", type=int, help="Only rows of this course id.")
+    parser.add_argument("--group-by", choices=sorted(GROUP_KEYS), help="Count rows per group instead of printing them.")
+    parser.add_argument("--limit", type=int, default=50, help="Maximum rows / groups to print, 0 for all.")
+    args = parser.parse_args(argv)
+
+    if not archive_files(args.archive_dir):
+        parser.error(f"No archive files in {args.archive_dir}")
+
+    def matches(row: dict) -> bool:
+        return ((args.user is None or row["user_id"] == args.user)
+                and (not args.action or row["action"] in args.action)
+                and (args.course is None or row["course_id"] == args.course))
+
+    rows = (row for row in iter_archived_usages(args.archive_dir, args.since, args.until) if matches(row))
+
+    if args.group_by is None:
+        for printed, row in enumerate(rows):
+            if args.limit and printed >= args.limit:
+                break
+            print(json.dumps(row, ensure_ascii=False))
+        return
+
+    counts = Counter(GROUP_KEYS[args.group_by](row) for row in rows)
+    print(f"{args.group_by:<40}{'rows':>12}")
+    for key, count in counts.most_common(args.limit or None):
+        print(f"{str(key):<40}{count:>12}")
+    print(f"{'total':<40}{sum(counts.values()):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Rebuild the search index (services.search_index) from the database.
+
+Usage (from the backend directory):
+    python -m src.scripts.rebuild_search_index [--batch-size 500]
+
+The application builds an empty index by itself on startup and keeps it up to date afterwards. Use this after
+changing the text extraction or ranking, or if index updates failed (logged by services.search_index).
+Commits that happen while the rebuild runs may be indexed with their old values, run it while writes are quiet.
+"""
+import argparse
+import logging
+
+from ..db.database import get_db_context
+from ..services.search_index import get_search_index, rebuild_search_index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the course, chapter and note search index.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows loaded per query.")
+    args = parser.parse_args(argv)
+
+    with get_db_context() as db:
+        indexed = rebuild_search_index(db, get_search_index(), batch_size=args.batch_size)
+    print(f"Indexed {indexed} documents")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
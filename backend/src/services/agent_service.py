@@ -12,6 +12,8 @@ from google.adk.sessions import InMemorySessionService
 
 from ..services import vector_service
 from ..services.course_content_service import CourseContentService
+from ..services.document_artifact_service import ensure_artifacts
+from ..services.document_digest_service import digest_documents
 
 from .query_service import QueryService
 from .state_service import StateService, CourseState
@@ -131,97 +133,119 @@ class AgentService:
 
             # Retrieve documents from database
             with get_db_context() as db:
-                docs: List[Document] = documents_crud.get_documents_by_ids(db, request.document_ids)
-                images: List[Image] = images_crud.get_images_by_ids(db, request.picture_ids)
+                # Legacy bytes are needed after the session is closed, so load them eagerly
+                docs: List[Document] = documents_crud.get_documents_by_ids(db, request.document_ids, with_data=True)
+                images: List[Image] = images_crud.get_images_by_ids(db, request.picture_ids, with_data=True)
             
             logger.info("[%s] Retrieved %d documents and %d images.", task_id, len(docs), len(images))
 
-            #Add Data to ChromaDB for RAG
-            self.contentService.process_course_documents(
+            # Documents are parsed once at upload, wait for (or create) their artifacts
+            artifacts = await asyncio.to_thread(ensure_artifacts, [doc.id for doc in docs])
+            logger.info("[%s] Using stored artifacts for %d of %d documents.", task_id, len(artifacts), len(docs))
+
+            # Add Data to ChromaDB for RAG, runs in the background while the agents work
+            rag_task = asyncio.create_task(asyncio.to_thread(
+                self.contentService.process_course_documents,
                 course_id=course_id,
-                documents=docs
-            )
+                documents=docs,
+                artifacts=artifacts
+            ))
 
-            # Get a short course title and description from the info_agent
-            info_response = await self.info_agent.run(
-                user_id=user_id,
-                state={},
-                content=self.query_service.get_info_query(request, docs, images,)
-            )
-            logger.info("[%s] InfoAgent response: %s", task_id, info_response['title'])
+            try:
+                # Get a short course title and description from the info_agent
+                info_response = await self.info_agent.run(
+                    user_id=user_id,
+                    state={},
+                    content=self.query_service.get_info_query(request, docs, images, artifacts)
+                )
+                logger.info("[%s] InfoAgent response: %s", task_id, info_response['title'])
 
-            # Get unsplash image url
-            image_response = await self.image_agent.run(
-                user_id=user_id,
-                state={},
-                content=create_text_query(
-                    f"Title: {info_response['title']}, Description: {info_response['description']}")
-            )
+                # Get unsplash image url
+                image_response = await self.image_agent.run(
+                    user_id=user_id,
+                    state={},
+                    content=create_text_query(
+                        f"Title: {info_response['title']}, Description: {info_response['description']}")
+                )
 
-            # Update course in database
-            with get_db_context() as db:
-                course_db = courses_crud.update_course(
-                    db=db,
-                    course_id=course_id,
-                    session_id=session_id,
-                    title=info_response['title'],
-                    description=info_response['description'],
-                    image_url=image_response['explanation'],
-                    total_time_hours=request.time_hours,
+                # Update course in database
+                with get_db_context() as db:
+                    course_db = courses_crud.update_course(
+                        db=db,
+                        course_id=course_id,
+                        session_id=session_id,
+                        title=info_response['title'],
+                        description=info_response['description'],
+                        image_url=image_response['explanation'],
+                        total_time_hours=request.time_hours,
+                    )
+                    if not course_db:
+                        raise ValueError(f"Failed to update course in DB for user {user_id} with course_id {course_id}")
+                print(f"[{task_id}] Course updated in DB with ID: {course_id}")
+
+                # Send Notification to WebSocket
+                ###await ws_manager.send_json_message(task_id, {"type": "course_info", "data": "updating course info"})
+
+                init_state = CourseState(
+                    query=request.query,
+                    time_hours=request.time_hours,
+                    language=request.language,
+                    difficulty=request.difficulty,
                 )
-                if not course_db:
-                    raise ValueError(f"Failed to update course in DB for user {user_id} with course_id {course_id}")
-            print(f"[{task_id}] Course updated in DB with ID: {course_id}")
-
-            # Send Notification to WebSocket
-            ###await ws_manager.send_json_message(task_id, {"type": "course_info", "data": "updating course info"})
-
-            init_state = CourseState(
-                query=request.query,
-                time_hours=request.time_hours,
-                language=request.language,
-                difficulty=request.difficulty,
-            )
-            # Create initial state for the course
-            self.state_manager.create_state(user_id, course_id, init_state)
-            print(f"[{task_id}] Initial state created for course {course_id}.")
+                # Create initial state for the course
+                self.state_manager.create_state(user_id, course_id, init_state)
+                print(f"[{task_id}] Initial state created for course {course_id}.")
 
  
-            # Bind documents to this course
-            with get_db_context() as db:
-                for doc in docs:
-                    documents_crud.update_document(db, int(doc.id), course_id=course_id)
-                for img in images:
-                    images_crud.update_image(db, int(img.id), course_id=course_id)
-            print(f"[{task_id}] Documents and images bound to course.")
-
-            # Notify WebSocket about course info
-            ###await ws_manager.send_json_message(task_id, {"type": "course_info", "data": course_info_data})
-            ###print(f"[{task_id}] Sent course_info update.")
-
-            # Query the planner agent
-            response_planner = await self.planner_agent.run(
-                user_id=user_id,
-                state=self.state_manager.get_state(user_id=user_id, course_id=course_id),
-                content=self.query_service.get_planner_query(request, docs, images),
-                debug=True
-            )
-            if not response_planner or "chapters" not in response_planner:
-                raise ValueError(f"PlannerAgent did not return valid chapters for user {user_id} with course_id {course_id}")
-            print(f"[{task_id}] PlannerAgent responded with {len(response_planner.get('chapters', []))} chapters.")
+                # Bind documents to this course
+                with get_db_context() as db:
+                    for doc in docs:
+                        documents_crud.update_document(db, int(doc.id), course_id=course_id)
+                    for img in images:
+                        images_crud.update_image(db, int(img.id), course_id=course_id)
+                print(f"[{task_id}] Documents and images bound to course.")
+
+                # Notify WebSocket about course info
+                ###await ws_manager.send_json_message(task_id, {"type": "course_info", "data": course_info_data})
+                ###print(f"[{task_id}] Sent course_info update.")
+
+                # Large documents go to the planner as digest, only small ones as raw bytes
+                digest, raw_docs, digest_report = await asyncio.to_thread(digest_documents, request.query, docs, artifacts)
+                if digest_report["digested_documents"]:
+                    with get_db_context() as db:
+                        usage_crud.log_document_digest(db, user_id, course_id, json.dumps(digest_report))
 
-            # Update course in database
-            with get_db_context() as db:
-                course_db = courses_crud.update_course(
-                    db=db,
-                    course_id=course_id,
-                    chapter_count=len(response_planner["chapters"])
+                # Query the planner agent
+                response_planner = await self.planner_agent.run(
+                    user_id=user_id,
+                    state=self.state_manager.get_state(user_id=user_id, course_id=course_id),
+                    content=self.query_service.get_planner_query(request, raw_docs, images, digest),
+                    debug=True
                 )
-            # Send notification to WebSocket that course info is being updated
-            ###await ws_manager.send_json_message(task_id, {"type": "course_info", "data": "updating course info"})
+                if not response_planner or "chapters" not in response_planner:
+                    raise ValueError(f"PlannerAgent did not return valid chapters for user {user_id} with course_id {course_id}")
+                print(f"[{task_id}] PlannerAgent responded with {len(response_planner.get('chapters', []))} chapters.")
 
-            # Save chapters to state
-            self.state_manager.save_chapters(user_id, course_id, response_planner["chapters"])
+                # Update course in database
+                with get_db_context() as db:
+                    course_db = courses_crud.update_course(
+                        db=db,
+                        course_id=course_id,
+                        chapter_count=len(response_planner["chapters"])
+                    )
+                # Send notification to WebSocket that course info is being updated
+                ###await ws_manager.send_json_message(task_id, {"type": "course_info", "data": "updating course info"})
+
+                # Save chapters to state
+                self.state_manager.save_chapters(user_id, course_id, response_planner["chapters"])
+            except BaseException:
+                # The ingestion thread can't be cancelled: wait for it, so it writes no vectors after the course
+                # is marked FAILED (the orphaned vector sweep then removes them)
+                await asyncio.gather(rag_task, return_exceptions=True)
+                raise
+
+            # Chapters query the vector database, so the RAG ingestion has to be done here
+            await rag_task
 
             async def process_chapter(idx: int, topic: dict):
 
@@ -2,7 +2,6 @@
 Authentication service for handling user login,
 registration, and Google OAuth callback.
 """
-import base64
 import secrets
 from typing import Optional
 import uuid
@@ -20,11 +19,12 @@ from sqlalchemy.orm import Session
 from ..api.schemas import auth as auth_schema
 from ..api.schemas import user as user_schema
 from ..config import settings as settings
-from ..core import security
+from ..core import password_hashing, security
 from ..core.security import oauth
 from ..db.crud import users_crud
 from ..db.models.db_user import User as UserModel
-from ..db.crud import usage_crud
+from . import avatar_service, usage_writer
+from ..utils.principal_cache import Principal
 
 
 logger = Logger(__name__)
@@ -40,12 +40,17 @@ async def login_user(form_data: OAuth2PasswordRequestForm, db: Session, response
     if not user:
         user = users_crud.get_user_by_email(db, form_data.username)
 
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    password_valid, new_hash = (await password_hashing.verify_password(form_data.password, user.hashed_password)
+                                if user else (False, None))
+    if not password_valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                             detail="Incorrect username or password")
     if not user.is_active: # type: ignore
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Inactive user")
+    if new_hash:
+        # Stored hash is outdated (fewer rounds than BCRYPT_ROUNDS), replace it while we know the password
+        users_crud.change_user_password(db, user, new_hash)
 
     # Generate access token with user details
     access_token = security.create_access_token(
@@ -66,7 +71,7 @@ async def login_user(form_data: OAuth2PasswordRequestForm, db: Session, response
     previous_last_login = user.last_login
     users_crud.update_user_last_login(db, user_id=str(user.id))
     # Log the user login action
-    usage_crud.log_login(db, user_id=str(user.id))
+    usage_writer.log_login(user_id=str(user.id))
 
 
     # Set the access token in the response cookie
@@ -142,7 +147,7 @@ async def admin_login_as(current_user_id: str, user_id: str, db: Session, respon
     # Update last login time
     previous_last_login = user.last_login
     # No update on last login!
-    usage_crud.log_admin_login_as(db, user_who=current_user_id, user_as=str(user.id))
+    usage_writer.log_admin_login_as(user_who=current_user_id, user_as=str(user.id))
 
     return auth_schema.APIResponseStatus(
         status="success",
@@ -174,13 +179,15 @@ async def register_user(user_data: user_schema.UserCreate, db: Session, response
     
     # Create the user in the database
     # When a user is registered, created_at and last_login are set by default in the model
+    avatar_hash, avatar_content_type = avatar_service.store_base64_avatar(user_data.profile_image_base64)
     new_user = users_crud.create_user(
         db = db,
         user_id = user_id,
         username = user_data.username,
         email = user_data.email,
-        hashed_password = security.get_password_hash(user_data.password),
-        profile_image_base64 = user_data.profile_image_base64,
+        hashed_password = await password_hashing.hash_password(user_data.password),
+        avatar_hash = avatar_hash,
+        avatar_content_type = avatar_content_type,
     )
 
     # Set access cookie
@@ -209,7 +216,7 @@ async def register_user(user_data: user_schema.UserCreate, db: Session, response
 
 
 
-async def logout_user(user: user_schema.User, db: Session, response: Response) -> auth_schema.APIResponseStatus:
+async def logout_user(user: Principal, db: Session, response: Response) -> auth_schema.APIResponseStatus:
     """Logs out a user by clearing the access and refresh tokens."""
     
     # Disable the user session in the database if needed
@@ -222,7 +229,7 @@ async def logout_user(user: user_schema.User, db: Session, response: Response) -
 
     # Log logout
     
-    usage_crud.log_logout(db, user_id=str(user.id))
+    usage_writer.log_logout(user_id=str(user.id))
 
     return auth_schema.APIResponseStatus(status="success", msg="Successfully logged out")
     
@@ -248,7 +255,7 @@ async def refresh_token(token: Optional[str], db: Session, response: Response) -
               "email": user.email}
     )
     # Log the user refresh action
-    usage_crud.log_refresh(db, user_id=str(user.id))
+    usage_writer.log_refresh(user_id=str(user.id))
 
     # Set the access token in the response cookie
     security.set_access_cookie(response, access_token)
@@ -331,16 +338,16 @@ async def handle_oauth_callback(request: Request, db: Session, website: str = "g
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail=f"Could not fetch user email from {website}.")
     db_user = db.query(UserModel).filter(UserModel.email == email).first()
-    profile_image_base64_data = None
+    avatar_hash, avatar_content_type = None, None
 
-    # If a profile picture URL is provided, fetch the image and convert it to base64
+    # If a profile picture URL is provided, fetch the image and store it in the blob store
     if picture_url:
         try:
             response = requests.get(picture_url, timeout=10)
             response.raise_for_status()
-            profile_image_base64_data = base64.b64encode(response.content).decode('utf-8')
-        except requests.exceptions.RequestException:
-            profile_image_base64_data = None
+            avatar_hash, avatar_content_type = avatar_service.store_avatar(response.content)
+        except (requests.exceptions.RequestException, HTTPException):
+            avatar_hash, avatar_content_type = None, None
 
     # Check if the user already exists in the database
     if not db_user:
@@ -353,7 +360,7 @@ async def handle_oauth_callback(request: Request, db: Session, website: str = "g
             suffix = secrets.token_hex(3)
             final_username = f"{username_candidate[:42]}.{suffix}"
         random_password = secrets.token_urlsafe(16)
-        hashed_password = security.get_password_hash(random_password)
+        hashed_password = await password_hashing.hash_password(random_password)
 
         # Create a new user with the provided details
         db_user = users_crud.create_user(
@@ -364,14 +371,14 @@ async def handle_oauth_callback(request: Request, db: Session, website: str = "g
             hashed_password,
             is_active=True,
             is_admin=False,
-            profile_image_base64=profile_image_base64_data,
+            avatar_hash=avatar_hash,
+            avatar_content_type=avatar_content_type,
         )
     else:
         logger.info(f"Use existung user %s from database for {website} OAuth login.", db_user.username)
         # If the user exists, update their details if necessary
-        if profile_image_base64_data and getattr(db_user, 'profile_image_base64',
-                                                None) != profile_image_base64_data:
-            users_crud.update_user_profile_image(db, db_user, profile_image_base64_data)
+        if avatar_hash and db_user.avatar_hash != avatar_hash:
+            users_crud.update_user_profile_image(db, db_user, avatar_hash, avatar_content_type)
 
 
     if not db_user or not db_user.is_active: # type: ignore
@@ -397,7 +404,7 @@ async def handle_oauth_callback(request: Request, db: Session, website: str = "g
     # Update the user's last login time
     users_crud.update_user_last_login(db, user_id=str(db_user.id))
     # Log the user login action
-    usage_crud.log_login(db, user_id=str(db_user.id))
+    usage_writer.log_login(user_id=str(db_user.id))
 
     # Redirect to the frontend
     frontend_base_url = settings.FRONTEND_BASE_URL
@@ -0,0 +1,70 @@
+"""
+Profile images (avatars).
+Avatars are stored as raw bytes in the blob store, the users row only keeps the hash and the content type.
+Clients load them from /users/{id}/avatar, versioned by the hash, so browsers can cache them indefinitely.
+"""
+import base64
+import binascii
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from .blob_store import get_blob_store
+
+MAX_AVATAR_SIZE = 2 * 1024 * 1024  # 2 MB
+
+# Magic numbers of the accepted image formats
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def sniff_image_type(data: bytes) -> Optional[str]:
+    """Content type of an image by its magic number, None if it is not a supported image"""
+    for signature, content_type in _SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def decode_image(value: str) -> bytes:
+    """Bytes of a base64 image, plain or as data URI (data:image/png;base64,...)"""
+    if value.startswith("data:"):
+        value = value.split(",", 1)[-1]
+    try:
+        return base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Profile image is not valid base64")
+
+
+def store_avatar(data: bytes) -> Tuple[str, str]:
+    """Validate avatar bytes and store them in the blob store, returns the blob hash and content type"""
+    if len(data) > MAX_AVATAR_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Profile image too large. Maximum size: {MAX_AVATAR_SIZE // (1024 * 1024)} MB"
+        )
+    content_type = sniff_image_type(data)
+    if content_type is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Profile image must be a JPEG, PNG, GIF or WebP image")
+    blob_hash, _ = get_blob_store().put(data)
+    return blob_hash, content_type
+
+
+def store_base64_avatar(value: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Store a base64 avatar from an API request, (None, None) for an empty value (no / removed avatar)"""
+    if not value:
+        return None, None
+    return store_avatar(decode_image(value))
+
+
+def avatar_url(user_id: str, avatar_hash: Optional[str]) -> Optional[str]:
+    """URL of a user's avatar, the hash in the query string changes with every new image"""
+    if not avatar_hash:
+        return None
+    return f"/api/users/{user_id}/avatar?v={avatar_hash[:16]}"
@@ -0,0 +1,298 @@
+"""
+Content-addressed storage for file bytes (documents, images).
+Blobs are keyed by their sha256 hex digest, so identical uploads are stored only once.
+The database keeps the metadata and the hash, the bytes live in the blob store.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple
+
+from ..config.settings import BLOB_STORE_BACKEND, BLOB_STORE_PATH
+
+
+class BlobTooLargeError(ValueError):
+    """Raised by BlobWriter.write as soon as more than max_size bytes were written"""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"Blob exceeds the maximum size of {max_size} bytes")
+        self.max_size = max_size
+
+
+class BlobWriter(ABC):
+    """
+    Writes one blob incrementally, for data that arrives in chunks (e.g. uploads).
+    Keeps a running sha256 and size, so the data never has to be in memory at once.
+    Nothing is stored until commit, abort (or leaving the with block without commit) discards the data.
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._closed = False
+
+    def write(self, chunk: bytes):
+        if self._closed:
+            raise ValueError("Blob writer is closed")
+        self.size += len(chunk)
+        if self.max_size is not None and self.size > self.max_size:
+            self.abort()
+            raise BlobTooLargeError(self.max_size)
+        self._hash.update(chunk)
+        self._write(chunk)
+
+    def commit(self) -> Tuple[str, int]:
+        """Store the written data and return its hash and size"""
+        if self._closed:
+            raise ValueError("Blob writer is closed")
+        blob_hash = self._hash.hexdigest()
+        try:
+            self._commit(blob_hash)
+        except BaseException:
+            self.abort()
+            raise
+        self._closed = True
+        return blob_hash, self.size
+
+    def abort(self):
+        if not self._closed:
+            self._closed = True
+            self._abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.abort()
+
+    @abstractmethod
+    def _write(self, chunk: bytes):
+        ...
+
+    @abstractmethod
+    def _commit(self, blob_hash: str):
+        ...
+
+    @abstractmethod
+    def _abort(self):
+        ...
+
+
+class BlobStore(ABC):
+    """Interface of a blob store backend, e.g. the local filesystem or an object storage bucket"""
+
+    @abstractmethod
+    def put(self, data: bytes) -> Tuple[str, int]:
+        """Store data (if not stored yet) and return its hash and size"""
+
+    @abstractmethod
+    def open(self, blob_hash: str) -> BinaryIO:
+        """Open a blob for reading, raises FileNotFoundError if it does not exist"""
+
+    @abstractmethod
+    def exists(self, blob_hash: str) -> bool:
+        ...
+
+    @abstractmethod
+    def size(self, blob_hash: str) -> int:
+        ...
+
+    @abstractmethod
+    def mtime(self, blob_hash: str) -> float:
+        """Last modification time of a blob, raises FileNotFoundError if it does not exist"""
+
+    @abstractmethod
+    def delete(self, blob_hash: str) -> bool:
+        """Delete a blob, returns False if it did not exist"""
+
+    def local_path(self, blob_hash: str) -> Optional[str]:
+        """Filesystem path of a blob if the backend has one (lets the server send the file directly)"""
+        return None
+
+    @abstractmethod
+    def iter_hashes(self) -> Iterator[Tuple[str, float]]:
+        """All stored blob hashes with their last modification time"""
+
+    def get(self, blob_hash: str) -> bytes:
+        """Read a whole blob into memory"""
+        with self.open(blob_hash) as f:
+            return f.read()
+
+    def writer(self, max_size: Optional[int] = None) -> BlobWriter:
+        """Writer for a new blob, backends without a streaming write path buffer the chunks and put them on commit"""
+        return _BufferedBlobWriter(self, max_size)
+
+    def clean_tmp(self, older_than: float) -> int:
+        """Remove leftovers of interrupted writes last modified before older_than, returns the number removed"""
+        return 0
+
+
+class _BufferedBlobWriter(BlobWriter):
+
+    def __init__(self, store: BlobStore, max_size: Optional[int] = None):
+        super().__init__(max_size)
+        self._store = store
+        self._chunks: List[bytes] = []
+
+    def _write(self, chunk: bytes):
+        self._chunks.append(chunk)
+
+    def _commit(self, blob_hash: str):
+        self._store.put(b"".join(self._chunks))
+        self._chunks = []
+
+    def _abort(self):
+        self._chunks = []
+
+
+class LocalBlobWriter(BlobWriter):
+    """
+    Streams into a temporary file in tmp_dir, commit fsyncs it and moves it to path_for_hash(hash) atomically.
+    If that path exists already (same content), the temporary file is dropped and the existing file's mtime refreshed.
+    """
+
+    def __init__(self, tmp_dir: str, path_for_hash: Callable[[str], str], max_size: Optional[int] = None):
+        super().__init__(max_size)
+        self._path_for_hash = path_for_hash
+        fd, self._tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        self._file = os.fdopen(fd, "wb")
+
+    def _write(self, chunk: bytes):
+        self._file.write(chunk)
+
+    def _commit(self, blob_hash: str):
+        path = self._path_for_hash(blob_hash)
+        if os.path.exists(path):
+            self._file.close()
+            os.remove(self._tmp_path)
+            # Refresh the mtime, so the garbage collector's grace period covers the new reference
+            os.utime(path)
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self._tmp_path, path)
+
+    def _abort(self):
+        self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Blobs as files below root, sharded by the first hash characters: root/ab/cd/abcd....
+    Writes go to a temporary file in root/tmp first and are moved into place atomically,
+    so readers never see partially written blobs.
+    """
+
+    def __init__(self, root: str = BLOB_STORE_PATH):
+        self.root = os.path.abspath(root)
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def _path(self, blob_hash: str) -> str:
+        if len(blob_hash) != 64 or not all(c in "0123456789abcdef" for c in blob_hash):
+            raise ValueError(f"Invalid blob hash: {blob_hash}")
+        return os.path.join(self.root, blob_hash[:2], blob_hash[2:4], blob_hash)
+
+    def put(self, data: bytes) -> Tuple[str, int]:
+        blob_hash = hashlib.sha256(data).hexdigest()
+        path = self._path(blob_hash)
+        if os.path.exists(path):
+            # Refresh the mtime, so the garbage collector's grace period covers the new reference
+            os.utime(path)
+            return blob_hash, len(data)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return blob_hash, len(data)
+
+    def open(self, blob_hash: str) -> BinaryIO:
+        return open(self._path(blob_hash), "rb")
+
+    def exists(self, blob_hash: str) -> bool:
+        return os.path.exists(self._path(blob_hash))
+
+    def size(self, blob_hash: str) -> int:
+        return os.path.getsize(self._path(blob_hash))
+
+    def mtime(self, blob_hash: str) -> float:
+        return os.path.getmtime(self._path(blob_hash))
+
+    def delete(self, blob_hash: str) -> bool:
+        try:
+            os.remove(self._path(blob_hash))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def local_path(self, blob_hash: str) -> Optional[str]:
+        return self._path(blob_hash)
+
+    def writer(self, max_size: Optional[int] = None) -> BlobWriter:
+        return LocalBlobWriter(self.tmp_dir, self._path, max_size)
+
+    def clean_tmp(self, older_than: float) -> int:
+        removed = 0
+        for name in os.listdir(self.tmp_dir):
+            path = os.path.join(self.tmp_dir, name)
+            try:
+                if os.path.getmtime(path) < older_than:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+    def iter_hashes(self) -> Iterator[Tuple[str, float]]:
+        for shard in os.listdir(self.root):
+            if shard == "tmp" or len(shard) != 2:
+                continue
+            for dirpath, _, filenames in os.walk(os.path.join(self.root, shard)):
+                for name in filenames:
+                    yield name, os.path.getmtime(os.path.join(dirpath, name))
+
+
+_blob_store: Optional[BlobStore] = None
+_blob_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """Blob store configured in settings, created once per process"""
+    global _blob_store
+    with _blob_store_lock:
+        if _blob_store is None:
+            if BLOB_STORE_BACKEND == "local":
+                _blob_store = LocalBlobStore(BLOB_STORE_PATH)
+            else:
+                raise ValueError(f"Unknown blob store backend: {BLOB_STORE_BACKEND}")
+        return _blob_store
+
+
+def document_bytes(document) -> bytes:
+    """Bytes of a document, from the blob store or from the legacy file_data column if not migrated yet"""
+    if document.blob_hash:
+        return get_blob_store().get(document.blob_hash)
+    return document.file_data or b""
+
+
+def image_bytes(image) -> bytes:
+    """Bytes of an image, from the blob store or from the legacy image_data column if not migrated yet"""
+    if image.blob_hash:
+        return get_blob_store().get(image.blob_hash)
+    return image.image_data or b""
@@ -23,7 +23,7 @@ from ..config.settings import SQLALCHEMY_DATABASE_URL
 from ..db.database import get_db_context
 
 from ..db.crud import chapters_crud
-from ..db.crud import usage_crud
+from . import usage_writer
 
 
 logger = logging.getLogger(__name__)
@@ -90,8 +90,7 @@ class ChatService:
                 chapter_content = chapter.content
             
                 # Log the chat usage
-                usage_crud.log_chat_usage(
-                    db=db,
+                usage_writer.log_chat_usage(
                     user_id=user_id,
                     message=request.message,
                     course_id=chapter.course_id,
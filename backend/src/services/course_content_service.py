@@ -1,9 +1,12 @@
 # backend/src/services/course_content_service.py
-from typing import List
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 from .data_processors.pdf_processor import PDFProcessor
 from .vector_service import VectorService
-from ..db.models.db_file import Document
+from ..config.chroma_settings import RAG_EMBEDDING_BATCH_SIZE
+from ..db.models.db_file import Document, DocumentArtifact
+from . import document_artifact_service
+from .blob_store import document_bytes
 import logging
 
 
@@ -30,18 +33,24 @@ class CourseContentService:
                     ragInfos.add(str_inf)
         return list(set(ragInfos))
     
-    def process_course_documents(self, course_id: int, documents: List[Document]):
+    def process_course_documents(self, course_id: int, documents: List[Document],
+                                 artifacts: Optional[Dict[int, DocumentArtifact]] = None):
         """
         Process all uploaded documents for a course and add to vector database.
+        Documents with a ready artifact reuse its stored chunks and embeddings instead of parsing the PDF again.
         """
+        artifacts = artifacts or {}
         try:
             for document in documents:
                 if not document:
                     self.logger.warning(f"Document {document.id} not found")
                     continue
-                
+
+                artifact = artifacts.get(document.id)
+                if artifact is not None:
+                    self._process_artifact(course_id, document, artifact)
                 # Only process PDFs for now
-                if document.content_type == "application/pdf":
+                elif document.content_type == "application/pdf":
                     self._process_pdf_document(course_id, document)
                 else:
                     self.logger.info(f"Skipping non-PDF document: {document.filename}")
@@ -54,36 +63,67 @@ class CourseContentService:
     
     def _process_pdf_document(self, course_id: int, document: Document):
         """
-        Extract paragraphs from PDF and add to vector database.
+        Chunk a PDF into token-bounded chunks and add them to the vector database.
+        Chunks are embedded in batches of RAG_EMBEDDING_BATCH_SIZE.
         """
         try:
-            # Extract structured content
-            content_data = self.pdf_processor.extract_structured_content(document.file_data)
-            
-            # Add each paragraph to vector database
-            for para_data in content_data["paragraphs"]:
-                content_id = f"doc_{document.id}_page_{para_data['page_number']}_para_{para_data['paragraph_index']}"
-                
-                metadata = {
-                    "type": "pdf_paragraph",
+            chunk_count = 0
+            batch = []
+            for chunk in self.pdf_processor.iter_chunks(document_bytes(document)):
+                batch.append(chunk)
+                if len(batch) >= RAG_EMBEDDING_BATCH_SIZE:
+                    self._add_chunks(course_id, document, batch)
+                    chunk_count += len(batch)
+                    batch = []
+            if batch:
+                self._add_chunks(course_id, document, batch)
+                chunk_count += len(batch)
+
+            self.logger.info(f"Added {chunk_count} chunks from {document.filename}")
+
+        except Exception as e:
+            self.logger.error(f"Failed to process PDF {document.filename}: {e}")
+            raise
+
+    def _process_artifact(self, course_id: int, document: Document, artifact: DocumentArtifact):
+        """
+        Add the chunks stored in a document artifact to the vector database.
+        Embeddings are only computed again if they were made with another embedding model.
+        """
+        chunks = document_artifact_service.load_chunks(artifact)
+        embeddings = document_artifact_service.load_embeddings(artifact)
+        if embeddings is not None and len(embeddings) != len(chunks):
+            embeddings = None
+
+        for start in range(0, len(chunks), RAG_EMBEDDING_BATCH_SIZE):
+            end = start + RAG_EMBEDDING_BATCH_SIZE
+            self._add_chunks(course_id, document, chunks[start:end], embeddings[start:end] if embeddings is not None else None)
+
+        self.logger.info(f"Added {len(chunks)} stored chunks from {document.filename}"
+                         f"{'' if embeddings is not None else ' (re-embedded)'}")
+
+    def _add_chunks(self, course_id: int, document: Document, chunks: List[dict],
+                    embeddings: Optional[List[List[float]]] = None):
+        """Embed a batch of chunks (unless embeddings are given) and add them to the vector database."""
+        texts = [chunk["text"] for chunk in chunks]
+        if embeddings is None:
+            embeddings = self.vector_service.embedding_model.encode(texts).tolist()
+        self.vector_service.add_embeddings_by_course_id(
+            course_id=course_id,
+            content_ids=[f"doc_{document.id}_chunk_{chunk['chunk_index']}" for chunk in chunks],
+            embeddings=embeddings,
+            texts=texts,
+            metadatas=[
+                {
+                    "type": "pdf_chunk",
                     "course_id": course_id,
                     "document_id": document.id,
                     "filename": document.filename,
-                    "page_number": para_data["page_number"],
-                    "paragraph_index": para_data["paragraph_index"],
-                    "word_count": para_data["word_count"]
+                    "page_number": chunk["page_start"],
+                    "page_end": chunk["page_end"],
+                    "chunk_index": chunk["chunk_index"],
+                    "token_count": chunk["token_count"],
                 }
-                
-                # Add to vector database
-                self.vector_service.add_content_by_course_id(
-                    course_id=course_id,
-                    content_id=content_id,
-                    text=para_data["text"],
-                    metadata=metadata
-                )
-            
-            self.logger.info(f"Added {len(content_data['paragraphs'])} paragraphs from {document.filename}")
-            
-        except Exception as e:
-            self.logger.error(f"Failed to process PDF {document.filename}: {e}")
-            raise
\ No newline at end of file
+                for chunk in chunks
+            ],
+        )
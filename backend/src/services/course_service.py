@@ -3,6 +3,7 @@ from ..db.crud import courses_crud
 from ..db.models import db_course as course_model
 from ..api.schemas.course import CourseInfo
 from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from ..db.models.db_course import Course
@@ -12,6 +13,7 @@ from typing import Optional
 from ..db.models.db_course import Chapter
 
 from ..db.crud import usage_crud, chapters_crud
+from ..db.crud.aio import chapters_crud as async_chapters_crud, courses_crud as async_courses_crud
 
 
 
@@ -48,24 +50,51 @@ def get_course_by_id(db: Session, course_id: int, user_id: str) -> Optional[Cour
     return courses_crud.get_courses_by_course_id_user_id(db, course_id, user_id)
 
 
+def check_course_access(course: Optional[Course], user_id: str) -> Course:
+    """
+    Check that a loaded course belongs to the user or is public.
+    Returns the course, raises HTTPException if it is missing or not accessible.
+    """
+    if not course or (str(course.user_id) != str(user_id) and not course.is_public):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found or access denied"
+        )
+
+    return course
+
+
 async def verify_course_ownership(course_id: int, user_id: str, db: Session) -> Course:
     """
     Verify that a course belongs to the current user.
     Returns the course if valid, raises HTTPException if not found or unauthorized.
     """
-    course = get_course_by_id(db, course_id, user_id)
-    
-    if not course:
-        course = courses_crud.get_course_by_id(db, course_id)
-        if course and course.is_public:
-            return course
+    # One query for owned and public courses alike
+    return check_course_access(courses_crud.get_course_by_id(db, course_id), user_id)
+
+async def verify_course_ownership_async(course_id: int, user_id: str, db: AsyncSession) -> Course:
+    """
+    verify_course_ownership for handlers that use an AsyncSession.
+    Returns the course if it belongs to the user or is public, raises HTTPException otherwise.
+    """
+    return check_course_access(await async_courses_crud.get_course_by_id(db, course_id), user_id)
 
+
+async def get_chapter_by_id_async(course_id: int, chapter_id: int, db: AsyncSession) -> Chapter:
+    """
+    get_chapter_by_id for handlers that use an AsyncSession. The content is not loaded.
+    Raises HTTPException if the chapter does not exist in the course.
+    """
+    chapter = await async_chapters_crud.get_chapter_by_course_id_and_chapter_id(db, course_id, chapter_id)
+
+    if not chapter:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found or access denied"
+            detail="Chapter not found in this course"
         )
-    
-    return course
+
+    return chapter
+
 
 def get_chapter_by_id(course_id: int, chapter_id: int, db: Session) -> Chapter:
     """
@@ -1,9 +1,24 @@
 # backend/src/services/pdf_processor.py
 import fitz  # PyMuPDF
 import re
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional
 import logging
 
+from ...config.chroma_settings import RAG_CHUNK_MAX_TOKENS, RAG_CHUNK_OVERLAP_TOKENS
+
+# Rough token approximation: words and single punctuation characters
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s+")
+# Blocks this close to the top or bottom edge of a page are treated as header/footer candidates
+_MARGIN_RATIO = 0.06
+_MAX_MARGIN_BLOCK_TOKENS = 12
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count of a text"""
+    return len(_TOKEN_PATTERN.findall(text))
+
+
 class PDFProcessor:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
@@ -93,4 +108,139 @@ class PDFProcessor:
             
         except Exception as e:
             self.logger.error(f"PDF structured extraction failed: {e}")
-            return {"paragraphs": [], "metadata": {}}
\ No newline at end of file
+            return {"paragraphs": [], "metadata": {}}
+
+    def iter_chunks(self, file_data: bytes, max_tokens: int = RAG_CHUNK_MAX_TOKENS,
+                    overlap_tokens: int = RAG_CHUNK_OVERLAP_TOKENS) -> Iterator[Dict]:
+        """
+        Yield token-bounded chunks of a PDF, built from PyMuPDF text blocks.
+        Pages are processed one at a time and chunks are stitched across page boundaries,
+        so memory stays flat for long documents. Consecutive chunks share overlap_tokens tokens.
+        Each chunk is a dict with text, page_start, page_end, chunk_index and token_count.
+        """
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+
+        try:
+            doc = fitz.open(stream=file_data, filetype="pdf")
+        except Exception as e:
+            self.logger.error(f"PDF chunking failed: {e}")
+            return
+
+        try:
+            units: List[str] = []
+            unit_tokens = 0
+            page_start: Optional[int] = None
+            last_page: Optional[int] = None
+            chunk_index = 0
+            continues_paragraph = False
+
+            for page_num in range(len(doc)):
+                page_number = page_num + 1
+                for block_text in self._iter_page_blocks(doc[page_num]):
+                    for piece in self._split_oversized(block_text, max_tokens):
+                        piece_tokens = count_tokens(piece)
+                        if units and unit_tokens + piece_tokens > max_tokens:
+                            text = self._join_units(units)
+                            yield {
+                                "text": text,
+                                "page_start": page_start,
+                                "page_end": last_page,
+                                "chunk_index": chunk_index,
+                                "token_count": unit_tokens,
+                            }
+                            chunk_index += 1
+                            # Never let the overlap push the next chunk over the limit
+                            overlap = self._tail_tokens(text, min(overlap_tokens, max_tokens - piece_tokens))
+                            units = [overlap] if overlap else []
+                            unit_tokens = count_tokens(overlap) if overlap else 0
+                            # Without overlap the next chunk starts on the page of its first piece
+                            page_start = last_page if overlap else None
+
+                        if units and continues_paragraph and not self._starts_new_paragraph(piece):
+                            # Paragraph cut by a page break: glue it back together
+                            units[-1] = units[-1] + " " + piece
+                        else:
+                            units.append(piece)
+                        unit_tokens += piece_tokens
+                        if page_start is None:
+                            page_start = page_number
+                        last_page = page_number
+                        continues_paragraph = False
+
+                # A page ending mid-sentence most likely continues on the next page
+                continues_paragraph = bool(units) and not units[-1].rstrip().endswith((".", "!", "?", ":"))
+
+            if units and unit_tokens > 0:
+                yield {
+                    "text": self._join_units(units),
+                    "page_start": page_start,
+                    "page_end": last_page,
+                    "chunk_index": chunk_index,
+                    "token_count": unit_tokens,
+                }
+        finally:
+            doc.close()
+
+    def _iter_page_blocks(self, page) -> Iterator[str]:
+        """
+        Yield the cleaned text blocks of a page in reading order.
+        Short blocks in the top/bottom margin (page numbers, running headers) are dropped.
+        """
+        height = page.rect.height or 1
+        for x0, y0, x1, y1, text, _block_no, block_type in page.get_text("blocks", sort=True):
+            if block_type != 0:  # image block
+                continue
+            # Join hyphenated line breaks, then all remaining line breaks
+            text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+            text = re.sub(r"\s+", " ", text).strip()
+            if not text:
+                continue
+            in_margin = y1 < height * _MARGIN_RATIO or y0 > height * (1 - _MARGIN_RATIO)
+            if in_margin and count_tokens(text) <= _MAX_MARGIN_BLOCK_TOKENS:
+                continue
+            yield text
+
+    @staticmethod
+    def _split_oversized(text: str, max_tokens: int) -> Iterator[str]:
+        """Split a block that does not fit into one chunk, first by sentences, then by words"""
+        if count_tokens(text) <= max_tokens:
+            yield text
+            return
+        for sentence in _SENTENCE_END_PATTERN.split(text):
+            if count_tokens(sentence) <= max_tokens:
+                yield sentence
+                continue
+            words, window_tokens = [], 0
+            for word in sentence.split(" "):
+                word_tokens = count_tokens(word)
+                if words and window_tokens + word_tokens > max_tokens:
+                    yield " ".join(words)
+                    words, window_tokens = [], 0
+                words.append(word)
+                window_tokens += word_tokens
+            if words:
+                yield " ".join(words)
+
+    @staticmethod
+    def _tail_tokens(text: str, overlap_tokens: int) -> str:
+        """The last words of a text, holding at most overlap_tokens tokens"""
+        if overlap_tokens <= 0:
+            return ""
+        tail, tokens = [], 0
+        for word in reversed(text.split()):
+            word_tokens = count_tokens(word)
+            if tokens + word_tokens > overlap_tokens:
+                break
+            tail.append(word)
+            tokens += word_tokens
+        return " ".join(reversed(tail))
+
+    @staticmethod
+    def _starts_new_paragraph(text: str) -> bool:
+        first = text.lstrip()[:1]
+        return not first or not first.islower()
+
+    @staticmethod
+    def _join_units(units: List[str]) -> str:
+        return "\n".join(units)
@@ -0,0 +1,162 @@
+"""
+Parse-once document artifacts.
+Uploaded documents are parsed in a background job right after upload. Page texts, RAG chunks,
+outline, a short digest and the chunk embeddings are stored in the document_artifacts table,
+so course creation reads them instead of parsing the raw file again.
+"""
+import json
+import logging
+import time
+from typing import Dict, List, Optional
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from ..config.chroma_settings import EMBEDDING_MODEL, RAG_EMBEDDING_BATCH_SIZE
+from ..config.settings import ARTIFACT_WAIT_SECONDS
+from ..db.crud import documents_crud, document_artifacts_crud
+from ..db.database import get_db_context
+from ..db.models.db_file import ArtifactStatus, DocumentArtifact
+from .blob_store import document_bytes
+from .data_processors.pdf_processor import PDFProcessor
+from .vector_service import get_embedding_model
+
+logger = logging.getLogger(__name__)
+
+TEXT_EXTENSIONS = {'.txt', '.md', '.py', '.js', '.html', '.css', '.json', '.xml', '.csv', '.yaml', '.yml'}
+DIGEST_LINES = 10
+
+_pdf_processor = PDFProcessor()
+
+
+def is_pdf(filename: str) -> bool:
+    return filename.lower().endswith('.pdf')
+
+
+def is_text_document(filename: str) -> bool:
+    ext = filename.lower().split('.')[-1] if '.' in filename else ''
+    return f'.{ext}' in TEXT_EXTENSIONS
+
+
+def extract_document_artifacts(document_id: int) -> Optional[DocumentArtifact]:
+    """
+    Parse a document and store its artifacts. Meant to run as a background task after upload.
+    The DB session is only held to read the file and to write the result, not while parsing.
+    """
+    with get_db_context() as db:
+        document = documents_crud.get_document_by_id(db, document_id)
+        if not document:
+            logger.warning("Document %s not found, skipping artifact extraction", document_id)
+            return None
+        filename, file_data = document.filename, document_bytes(document)
+        if not document_artifacts_crud.get_artifact_by_document_id(db, document_id):
+            document_artifacts_crud.create_pending_artifact(db, document_id)
+
+    try:
+        start = time.perf_counter()
+        fields = _extract(filename, file_data)
+        logger.info("Extracted artifacts of %s (%s chunks) in %.2fs",
+                    filename, fields.get("chunk_count", 0), time.perf_counter() - start)
+        fields.pop("chunk_count", None)
+        with get_db_context() as db:
+            return document_artifacts_crud.update_artifact(db, document_id, status=ArtifactStatus.READY, **fields)
+    except Exception as e:
+        logger.error("Artifact extraction failed for %s: %s", filename, e)
+        with get_db_context() as db:
+            return document_artifacts_crud.update_artifact(db, document_id, status=ArtifactStatus.FAILED, error_msg=str(e))
+
+
+def _extract(filename: str, file_data: bytes) -> Dict:
+    """Compute all artifact fields of a document"""
+    page_texts: List[str] = []
+    outline: List[Dict] = []
+    chunks: List[Dict] = []
+
+    if is_pdf(filename):
+        pdf_doc = fitz.open(stream=file_data, filetype="pdf")
+        try:
+            page_texts = [page.get_text() for page in pdf_doc]
+            outline = [{"level": level, "title": title, "page": page} for level, title, page in pdf_doc.get_toc()]
+        finally:
+            pdf_doc.close()
+        chunks = list(_pdf_processor.iter_chunks(file_data))
+    elif is_text_document(filename):
+        page_texts = [file_data.decode('utf-8', errors='ignore')]
+
+    text = "".join(page_texts)
+    fields = {
+        "page_count": len(page_texts),
+        "page_texts": json.dumps(page_texts),
+        "outline": json.dumps(outline),
+        "digest": "\n".join(text.strip().splitlines()[:DIGEST_LINES]),
+        "chunks": json.dumps(chunks),
+        "embeddings": None,
+        "embedding_dim": None,
+        "embedding_model": None,
+        "error_msg": None,
+        "chunk_count": len(chunks),
+    }
+
+    if chunks:
+        embeddings = get_embedding_model().encode([chunk["text"] for chunk in chunks], batch_size=RAG_EMBEDDING_BATCH_SIZE)
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        fields.update(
+            embeddings=embeddings.tobytes(),
+            embedding_dim=int(embeddings.shape[1]),
+            embedding_model=EMBEDDING_MODEL,
+        )
+    return fields
+
+
+def ensure_artifacts(document_ids: List[int], wait_seconds: int = ARTIFACT_WAIT_SECONDS) -> Dict[int, DocumentArtifact]:
+    """
+    Return the artifacts of the given documents, keyed by document ID.
+    Waits up to wait_seconds for extractions that are still running and extracts missing
+    artifacts (e.g. documents uploaded before artifacts existed) inline.
+    Documents whose extraction failed are left out, callers fall back to the raw file.
+    """
+    if not document_ids:
+        return {}
+
+    deadline = time.monotonic() + wait_seconds
+    while True:
+        with get_db_context() as db:
+            artifacts = document_artifacts_crud.get_artifacts_by_document_ids(db, document_ids)
+        pending = [doc_id for doc_id, artifact in artifacts.items() if artifact.status == ArtifactStatus.PENDING]
+        if not pending or time.monotonic() >= deadline:
+            break
+        time.sleep(0.5)
+
+    for doc_id in document_ids:
+        artifact = artifacts.get(doc_id)
+        if artifact is None or artifact.status == ArtifactStatus.PENDING:
+            artifacts[doc_id] = extract_document_artifacts(doc_id)
+
+    return {doc_id: artifact for doc_id, artifact in artifacts.items()
+            if artifact is not None and artifact.status == ArtifactStatus.READY}
+
+
+def load_chunks(artifact: DocumentArtifact) -> List[Dict]:
+    """RAG chunks stored in an artifact"""
+    return json.loads(artifact.chunks or "[]")
+
+
+def load_outline(artifact: DocumentArtifact) -> List[Dict]:
+    """Outline (table of contents) stored in an artifact"""
+    return json.loads(artifact.outline or "[]")
+
+
+def load_page_texts(artifact: DocumentArtifact) -> List[str]:
+    """Page texts stored in an artifact"""
+    return json.loads(artifact.page_texts or "[]")
+
+
+def load_embeddings(artifact: DocumentArtifact) -> Optional[List[List[float]]]:
+    """
+    Chunk embeddings stored in an artifact.
+    Returns None if there are none or they were computed with a different embedding model.
+    """
+    if not artifact.embeddings or artifact.embedding_model != EMBEDDING_MODEL:
+        return None
+    matrix = np.frombuffer(artifact.embeddings, dtype=np.float32).reshape(-1, artifact.embedding_dim)
+    return matrix.tolist()
@@ -0,0 +1,177 @@
+"""
+Digest stage for the planner.
+Instead of attaching every uploaded document as raw bytes, large documents are replaced by a compact
+text digest (outline, key sections and the passages most relevant to the course query) that fits
+into a configurable token budget. Small documents and documents without artifacts are still sent raw.
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config.settings import DIGEST_TOKEN_BUDGET, DIGEST_TOP_K, DIGEST_RAW_MAX_BYTES
+from ..db.models.db_file import Document, DocumentArtifact
+from . import document_artifact_service
+from .blob_store import document_bytes
+from .data_processors.pdf_processor import count_tokens
+from .vector_service import get_embedding_model
+
+logger = logging.getLogger(__name__)
+
+# Share of a document's budget the outline may take, the rest goes to passages and sections
+OUTLINE_BUDGET_SHARE = 0.2
+# Outline levels whose first chunk counts as key section
+KEY_SECTION_MAX_LEVEL = 2
+
+
+def _estimate_raw_tokens(artifact: DocumentArtifact) -> int:
+    """Text tokens of the whole document, the model has to read at least these for the raw file"""
+    chunks = document_artifact_service.load_chunks(artifact)
+    if chunks:
+        return sum(chunk["token_count"] for chunk in chunks)
+    return sum(count_tokens(text) for text in document_artifact_service.load_page_texts(artifact))
+
+
+def _document_size(document: Document) -> int:
+    """Size of a document without loading its bytes if the size is known"""
+    if document.file_size is not None:
+        return document.file_size
+    return len(document_bytes(document))
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut a text after max_tokens word tokens"""
+    words = text.split()
+    out, used = [], 0
+    for word in words:
+        tokens = count_tokens(word)
+        if used + tokens > max_tokens:
+            break
+        out.append(word)
+        used += tokens
+    return " ".join(out)
+
+
+def _rank_chunks(query_embedding: Optional[np.ndarray], artifact: DocumentArtifact, top_k: int) -> List[int]:
+    """Indexes of the top_k chunks by cosine similarity to the query"""
+    embeddings = document_artifact_service.load_embeddings(artifact)
+    if query_embedding is None or not embeddings:
+        return []
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_embedding)
+    scores = matrix @ query_embedding / np.where(norms == 0, 1, norms)
+    return [int(i) for i in np.argsort(-scores)[:top_k]]
+
+
+def _key_section_chunks(outline: List[Dict], chunks: List[Dict]) -> List[int]:
+    """First chunk of every top level outline entry, or the first chunk if there is no outline"""
+    indexes = []
+    for entry in outline:
+        if entry["level"] > KEY_SECTION_MAX_LEVEL:
+            continue
+        index = next((i for i, chunk in enumerate(chunks) if chunk["page_end"] >= entry["page"]), None)
+        if index is not None and index not in indexes:
+            indexes.append(index)
+    if not indexes and chunks:
+        indexes.append(0)
+    return indexes
+
+
+def build_document_digest(document: Document, artifact: DocumentArtifact, query_embedding: Optional[np.ndarray],
+                          token_budget: int, top_k: int = DIGEST_TOP_K) -> str:
+    """Compact digest of one document that stays within token_budget word tokens"""
+    outline = document_artifact_service.load_outline(artifact)
+    chunks = document_artifact_service.load_chunks(artifact)
+
+    header = f"Document: {document.filename} ({artifact.page_count} pages)"
+    parts = [header]
+    used = count_tokens(header)
+
+    if outline:
+        outline_budget = int(token_budget * OUTLINE_BUDGET_SHARE)
+        outline_lines = []
+        for entry in outline:
+            line = f"{'  ' * (entry['level'] - 1)}- {entry['title']} (p. {entry['page']})"
+            tokens = count_tokens(line)
+            if tokens > outline_budget:
+                break
+            outline_lines.append(line)
+            outline_budget -= tokens
+            used += tokens
+        parts.append("Outline:\n" + "\n".join(outline_lines))
+
+    if not chunks:
+        # Text documents have no chunks, use as much of their text as fits
+        text = "\n".join(document_artifact_service.load_page_texts(artifact))
+        parts.append("Content:\n" + _truncate_to_tokens(text, max(token_budget - used, 0)))
+        return "\n\n".join(parts)
+
+    # Retrieved passages first, key sections fill the remaining budget
+    selected = []
+    for index in _rank_chunks(query_embedding, artifact, top_k) + _key_section_chunks(outline, chunks):
+        if index in selected:
+            continue
+        tokens = chunks[index]["token_count"]
+        if used + tokens > token_budget:
+            continue
+        selected.append(index)
+        used += tokens
+
+    for index in sorted(selected):
+        chunk = chunks[index]
+        pages = f"p. {chunk['page_start']}" if chunk["page_start"] == chunk["page_end"] \
+            else f"p. {chunk['page_start']}-{chunk['page_end']}"
+        parts.append(f"[{pages}] {chunk['text']}")
+    return "\n\n".join(parts)
+
+
+def digest_documents(query: str, docs: List[Document], artifacts: Dict[int, DocumentArtifact],
+                     token_budget: int = DIGEST_TOKEN_BUDGET,
+                     raw_max_bytes: int = DIGEST_RAW_MAX_BYTES) -> Tuple[str, List[Document], Dict]:
+    """
+    Split the documents of a course into digested and raw ones.
+    Returns the digest text, the documents that still have to be sent as raw bytes
+    and a report of the bytes and (estimated text) tokens saved.
+    """
+    raw_docs, digest_docs = [], []
+    for doc in docs:
+        artifact = artifacts.get(doc.id)
+        has_content = artifact is not None and bool(artifact.page_count)
+        if _document_size(doc) <= raw_max_bytes or not has_content:
+            raw_docs.append(doc)
+        else:
+            digest_docs.append((doc, artifact))
+
+    report = {
+        "raw_documents": len(raw_docs),
+        "digested_documents": len(digest_docs),
+        "bytes_original": 0,
+        "bytes_sent": 0,
+        "tokens_original": 0,
+        "tokens_sent": 0,
+        "bytes_saved": 0,
+        "tokens_saved": 0,
+    }
+    if not digest_docs:
+        return "", raw_docs, report
+
+    query_embedding = None
+    if any(artifact.embeddings for _, artifact in digest_docs):
+        query_embedding = np.asarray(get_embedding_model().encode([query])[0], dtype=np.float32)
+
+    per_document_budget = max(token_budget // len(digest_docs), 1)
+    digests = []
+    for doc, artifact in digest_docs:
+        digest = build_document_digest(doc, artifact, query_embedding, per_document_budget)
+        digests.append(digest)
+        report["bytes_original"] += _document_size(doc)
+        report["bytes_sent"] += len(digest.encode("utf-8"))
+        report["tokens_original"] += _estimate_raw_tokens(artifact)
+        report["tokens_sent"] += count_tokens(digest)
+
+    report["bytes_saved"] = report["bytes_original"] - report["bytes_sent"]
+    report["tokens_saved"] = report["tokens_original"] - report["tokens_sent"]
+    logger.info("Digested %d documents: %d -> %d bytes, ~%d -> %d tokens",
+                len(digest_docs), report["bytes_original"], report["bytes_sent"],
+                report["tokens_original"], report["tokens_sent"])
+    return "\n\n---\n\n".join(digests), raw_docs, report
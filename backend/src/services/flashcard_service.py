@@ -2,10 +2,11 @@ import asyncio
 import uuid
 import os
 import tempfile
-from typing import Dict, Any, Optional, Callable, List
+from typing import Dict, Any, Optional, Callable, List, Tuple
 from pathlib import Path
 import shutil
 
+from .blob_store import BlobWriter, LocalBlobWriter
 from ..agents.flashcard_agent.agent import FlashcardAgent
 from ..agents.flashcard_agent.schema import (
     FlashcardConfig, TaskStatus, TaskProgress, FlashcardPreview
@@ -125,24 +126,20 @@ class DocumentManager:
         self.upload_dir.mkdir(exist_ok=True)
         self.documents: Dict[str, Dict[str, Any]] = {}
 
-    def save_uploaded_file(self, file_content: bytes, filename: str) -> str:
-        """Save uploaded file and return document ID."""
+    def create_upload_writer(self, max_size: int) -> Tuple[str, LocalBlobWriter]:
+        """Reserve a document ID and return a writer that streams the upload into its file."""
         document_id = str(uuid.uuid4())
+        file_path = str(self.upload_dir / f"{document_id}.pdf")
+        return document_id, LocalBlobWriter(str(self.upload_dir), lambda _: file_path, max_size)
 
-        # Save file
-        file_path = self.upload_dir / f"{document_id}_{filename}"
-        with open(file_path, "wb") as f:
-            f.write(file_content)
-
-        # Store metadata
+    def register_uploaded_file(self, document_id: str, filename: str, size: int):
+        """Store the metadata of a committed upload."""
         self.documents[document_id] = {
             "filename": filename,
-            "file_path": str(file_path),
-            "size": len(file_content)
+            "file_path": str(self.upload_dir / f"{document_id}.pdf"),
+            "size": size
         }
 
-        return document_id
-
     def get_document_path(self, document_id: str) -> Optional[str]:
         """Get the file path for a document."""
         doc = self.documents.get(document_id)
@@ -165,9 +162,13 @@ class FlashcardService:
         self.output_dir = Path("/tmp/anki_output") if os.path.exists("/tmp") else Path("./anki_output")
         self.output_dir.mkdir(exist_ok=True)
 
-    def upload_document(self, file_content: bytes, filename: str) -> Dict[str, Any]:
-        """Upload and save a PDF document."""
-        document_id = self.document_manager.save_uploaded_file(file_content, filename)
+    def create_upload_writer(self, max_size: int) -> Tuple[str, BlobWriter]:
+        """Document ID and writer for a PDF upload that is streamed to disk."""
+        return self.document_manager.create_upload_writer(max_size)
+
+    def upload_document(self, document_id: str, filename: str, size: int) -> Dict[str, Any]:
+        """Register a streamed PDF document."""
+        self.document_manager.register_uploaded_file(document_id, filename, size)
         doc_info = self.document_manager.get_document_info(document_id)
 
         return {
@@ -0,0 +1,157 @@
+"""
+Resized and converted variants of uploaded images (thumbnails, WebP).
+Variants are rendered on demand in a process pool (Pillow work is CPU bound and would block the event loop)
+and cached on disk, keyed by (image blob hash, width, format). A variant is never rendered twice:
+concurrent requests for the same key wait for the same render.
+"""
+import asyncio
+import io
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple, Union
+
+from ..config.settings import IMAGE_VARIANT_CACHE_PATH, IMAGE_VARIANT_WORKERS
+from .blob_store import get_blob_store
+
+logger = logging.getLogger(__name__)
+
+# Allowed variant widths, a fixed set keeps the cache bounded
+VARIANT_WIDTHS = (128, 256, 512, 1024)
+VARIANT_FORMATS = {
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+}
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+
+_pool: Optional[ProcessPoolExecutor] = None
+_in_flight: Dict[str, asyncio.Future] = {}
+
+
+class UnsupportedImageError(Exception):
+    """The source is not an image Pillow can decode, or exceeds its pixel limit (decompression bomb)"""
+
+
+def _render_variant(source: Union[str, bytes], dest_path: str, width: Optional[int], fmt: str):
+    """Render one variant into dest_path (runs in a worker process)"""
+    from PIL import Image as PILImage, ImageOps, UnidentifiedImageError
+
+    try:
+        original = PILImage.open(source if isinstance(source, str) else io.BytesIO(source))
+    except (UnidentifiedImageError, PILImage.DecompressionBombError) as e:
+        raise UnsupportedImageError(str(e)) from None
+    with original:
+        image = ImageOps.exif_transpose(original)
+        if width is not None and image.width > width:
+            # Bound the width only, never upscale
+            image.thumbnail((width, image.height), PILImage.LANCZOS)
+
+        if fmt == "jpeg":
+            image = image.convert("RGB")
+            options = {"quality": JPEG_QUALITY, "optimize": True, "progressive": True}
+        elif fmt == "webp":
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+            options = {"quality": WEBP_QUALITY, "method": 4}
+        else:
+            if image.mode not in ("1", "L", "LA", "P", "RGB", "RGBA"):
+                image = image.convert("RGBA")
+            options = {"optimize": True}
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest_path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                image.save(f, format=fmt.upper(), **options)
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_VARIANT_WORKERS)
+    return _pool
+
+
+def shutdown_pool():
+    """Stop the worker processes (on application shutdown)"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def variant_key(blob_hash: str, width: Optional[int], fmt: str) -> str:
+    return f"{blob_hash}_{width or 'full'}.{fmt}"
+
+
+def variant_etag(blob_hash: str, width: Optional[int], fmt: str) -> str:
+    """Strong ETag of a variant, the cache key determines its bytes"""
+    return f'"{blob_hash}-{width or "full"}-{fmt}"'
+
+
+def _variant_path(key: str) -> str:
+    return os.path.join(IMAGE_VARIANT_CACHE_PATH, key[:2], key)
+
+
+def negotiate_format(accept: str, content_type: str) -> str:
+    """WebP for clients that accept it, otherwise the original format (PNG for formats without a variant)"""
+    if "image/webp" in (accept or ""):
+        return "webp"
+    return "jpeg" if content_type == "image/jpeg" else "png"
+
+
+def validate_variant(width: Optional[int], fmt: Optional[str]) -> Optional[str]:
+    """Error message for an unsupported variant, None if it is supported"""
+    if width is not None and width not in VARIANT_WIDTHS:
+        return f"Unsupported width. Allowed widths: {list(VARIANT_WIDTHS)}"
+    if fmt is not None and fmt not in VARIANT_FORMATS:
+        return f"Unsupported format. Allowed formats: {list(VARIANT_FORMATS)}"
+    return None
+
+
+async def get_variant(blob_hash: str, width: Optional[int], fmt: str) -> Tuple[str, str]:
+    """
+    Path and media type of a variant, rendered first if it is not cached yet.
+    Raises UnsupportedImageError if the blob can't be rendered.
+    """
+    key = variant_key(blob_hash, width, fmt)
+    path = _variant_path(key)
+    if os.path.exists(path):
+        return path, VARIANT_FORMATS[fmt]
+
+    future = _in_flight.get(key)
+    if future is None:
+        store = get_blob_store()
+        source = store.local_path(blob_hash) or await asyncio.to_thread(store.get, blob_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(_get_pool(), _render_variant, source, path, width, fmt)
+        _in_flight[key] = future
+        future.add_done_callback(lambda _: _in_flight.pop(key, None))
+        logger.info("Rendering image variant %s", key)
+
+    await asyncio.shield(future)
+    return path, VARIANT_FORMATS[fmt]
+
+
+def delete_variants(blob_hash: str) -> int:
+    """Remove all cached variants of a blob, returns the number removed"""
+    directory = os.path.join(IMAGE_VARIANT_CACHE_PATH, blob_hash[:2])
+    if not os.path.isdir(directory):
+        return 0
+    removed = 0
+    for name in os.listdir(directory):
+        if name.startswith(f"{blob_hash}_"):
+            try:
+                os.remove(os.path.join(directory, name))
+                removed += 1
+            except FileNotFoundError:
+                continue
+    return removed
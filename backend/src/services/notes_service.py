@@ -2,10 +2,12 @@
 Notes service for handling notes-related business logic.
 """
 from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 
 from ..db.crud import notes_crud
+from ..db.crud.aio import notes_crud as async_notes_crud
 from ..db.models.db_note import Note
 from ..db.models.db_user import User
 
@@ -39,6 +41,54 @@ def get_notes(
     )
 
 
+def get_note_versions(
+    db: Session,
+    course_id: int,
+    chapter_id: int,
+    current_user: User
+) -> List[tuple]:
+    """
+    (id, version, last change) of the notes of a chapter and user.
+    Cheap enough to validate a client's cached copy before the notes are loaded.
+    """
+    return notes_crud.get_note_versions(
+        db=db,
+        course_id=course_id,
+        chapter_id=chapter_id,
+        user_id=current_user.id
+    )
+
+
+async def get_notes_async(
+    db: AsyncSession,
+    course_id: int,
+    chapter_id: int,
+    current_user: User
+) -> List[Note]:
+    """get_notes for handlers that use an AsyncSession."""
+    return await async_notes_crud.get_notes_by_chapter(
+        db=db,
+        course_id=course_id,
+        chapter_id=chapter_id,
+        user_id=current_user.id
+    )
+
+
+async def get_note_versions_async(
+    db: AsyncSession,
+    course_id: int,
+    chapter_id: int,
+    current_user: User
+) -> List[tuple]:
+    """get_note_versions for handlers that use an AsyncSession."""
+    return await async_notes_crud.get_note_versions(
+        db=db,
+        course_id=course_id,
+        chapter_id=chapter_id,
+        user_id=current_user.id
+    )
+
+
 def create_note(
     db: Session,
     course_id: int,
@@ -6,6 +6,7 @@ import json
 import fitz #pymupdf
 
 from ..agents.utils import create_text_query, create_docs_query
+from .blob_store import document_bytes
 
 
 class QueryService:
@@ -64,21 +65,31 @@ User Answer: {users_answer}
         return create_text_query(pretty_chapter)
 
     @staticmethod
-    def get_info_query(request, docs, images):
-        """Get the query for the info agent"""
+    def get_info_query(request, docs, images, artifacts=None):
+        """
+        Get the query for the info agent.
+        Uses the digest stored in the document artifacts and only parses documents without one.
+        """
         doc_data = []
         text_extensions = {'.txt', '.md', '.py', '.js', '.html', '.css', '.json', '.xml', '.csv', '.yaml', '.yml'}
+        artifacts = artifacts or {}
 
         for doc in docs:
             ext = doc.filename.lower().split('.')[-1] if '.' in doc.filename else ''
 
+            artifact = artifacts.get(doc.id)
+            if artifact is not None:
+                if artifact.digest:
+                    doc_data.append(f"{doc.filename}:\n" + artifact.digest)
+                continue
+
             try:
                 if doc.filename.lower().endswith('.pdf'):
-                    pdf_doc = fitz.open(stream=doc.file_data, filetype="pdf")
+                    pdf_doc = fitz.open(stream=document_bytes(doc), filetype="pdf")
                     text = "".join(page.get_text() for page in pdf_doc)
                     pdf_doc.close()
                 elif f'.{ext}' in text_extensions:
-                    text = doc.file_data.decode('utf-8', errors='ignore')
+                    text = document_bytes(doc).decode('utf-8', errors='ignore')
                 else:
                     continue  # Skip non-text files
 
@@ -101,8 +112,9 @@ User Answer: {users_answer}
         """)
 
     @staticmethod
-    def get_planner_query(request, docs, images):
+    def get_planner_query(request, docs, images, digest: str = ""):
         # query for the planner agent
+        # docs are only the documents sent as raw bytes, larger ones are summarized in digest
         planner_query = \
         f"""
             Question (System): What do you want to learn?
@@ -114,4 +126,9 @@ User Answer: {users_answer}
             Question (System): What difficulty do you want to learn?
             Answer (User): {request.difficulty}
         """
+        if digest:
+            planner_query += f"""
+            The user uploaded the following documents (digest with outline and the most relevant passages):
+            {digest}
+        """
         return create_docs_query(planner_query, docs, images)
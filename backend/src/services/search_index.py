@@ -0,0 +1,562 @@
+"""
+Full text search index over courses, chapters and notes, kept next to the database instead of in it.
+
+The index is maintained incrementally from SQLAlchemy session events: after_flush records the indexed fields of
+new, changed and deleted Course / Chapter / Note rows, after_commit queues them (after_rollback drops them).
+This covers every write path (sync and async sessions, crud functions and agents) without touching them.
+A background thread applies the queued changes in commit order, so extracting the text and writing the index
+never runs on the committing thread (the event loop for AsyncSession commits).
+Chapters are indexed with the plain text of their React content (content_text), not the source code.
+
+Backends implement SearchIndex. The default (SEARCH_INDEX_BACKEND=sqlite) is a SQLite FTS5 file at
+SEARCH_INDEX_PATH with BM25 ranking and prefix matching. Terms are indexed per owner, so a query only ever
+expands and ranks the documents of the searching user. rebuild_search_index fills an empty index from the database.
+"""
+import hashlib
+import html
+import logging
+import queue
+import re
+import sqlite3
+import threading
+import unicodedata
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, undefer
+
+from ..config.settings import SEARCH_INDEX_BACKEND, SEARCH_INDEX_PATH
+from ..db.models.db_course import Chapter, Course
+from ..db.models.db_note import Note
+
+logger = logging.getLogger(__name__)
+
+# Indexed fields per model: model attribute -> index column
+INDEXED_FIELDS = {
+    Course: {"title": "title", "description": "summary"},
+    Chapter: {"caption": "title", "summary": "summary", "content": "content"},
+    Note: {"text": "content"},
+}
+KINDS = {Course: "course", Chapter: "chapter", Note: "note"}
+MAX_QUERY_TERMS = 8
+
+
+@dataclass
+class SearchDocument:
+    """New values of a document. Columns that are missing keep their indexed value (or stay empty)"""
+    kind: str
+    doc_id: int
+    user_id: Optional[str] = None  # None for chapters: the owner of the course
+    course_id: Optional[int] = None
+    chapter_id: Optional[int] = None
+    columns: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class SearchHit:
+    kind: str
+    doc_id: int
+    course_id: Optional[int]
+    chapter_id: Optional[int]
+    title: str
+    snippet: str
+    course_title: Optional[str] = None
+    chapter_title: Optional[str] = None
+
+
+############### PLAIN TEXT OF REACT CONTENT
+_JS_LITERAL = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)
+""", re.S | re.X)
+# Text between a closing > or } and the next < or {: JSX text children
+_JSX_TEXT = re.compile(r"(?<=[>}])[^<>{}]+(?=[<{])")
+_TEMPLATE_EXPRESSION = re.compile(r"\$\{[^}]*\}")
+_CLASS_LIST_TOKEN = re.compile(r"^[a-z0-9:\-\[\]#./%()_]+$")
+_CODE_MARKERS = ("=", ";", "&&", "||", "=>")
+_JS_KEYWORDS = {"else", "return", "try", "finally", "do", "case", "default", "break", "continue"}
+_WORD = re.compile(r"[^\W\d_]{2,}")
+
+
+def _is_prose_string(value: str) -> bool:
+    """String literals that are text shown to the user, not class names, colors, paths or identifiers"""
+    tokens = value.split()
+    if len(tokens) < 2 or not _WORD.search(value):
+        return False
+    # Tailwind / CSS class lists: only lower case class tokens, some with - or :
+    if all(_CLASS_LIST_TOKEN.match(token) for token in tokens) and any(
+            "-" in token or ":" in token for token in tokens):
+        return False
+    return True
+
+
+def _is_jsx_text(value: str) -> bool:
+    value = value.strip()
+    if not _WORD.search(value) or value in _JS_KEYWORDS:
+        return False
+    return not any(marker in value for marker in _CODE_MARKERS)
+
+
+def content_text(content: Optional[str]) -> str:
+    """
+    Plain text of generated React / JSX chapter content: JSX text children and the string literals that read
+    like prose (e.g. the data arrays the explanations are rendered from). Heuristic, meant for indexing only.
+    """
+    if not content:
+        return ""
+    pieces: List[str] = []
+    code: List[str] = []
+    position = 0
+    for match in _JS_LITERAL.finditer(content):
+        code.append(content[position:match.start()])
+        code.append(" ")
+        position = match.end()
+        if match.group("string"):
+            value = _TEMPLATE_EXPRESSION.sub(" ", match.group("string")[1:-1])
+            value = value.replace("\\n", " ").replace("\\'", "'").replace('\\"', '"')
+            if _is_prose_string(value):
+                pieces.append(value)
+    code.append(content[position:])
+
+    pieces.extend(text for text in map(html.unescape, _JSX_TEXT.findall("".join(code))) if _is_jsx_text(text))
+    return " ".join(" ".join(pieces).split())
+
+
+############### BACKENDS
+_change_listeners: List[Callable[[Optional[Set[str]]], None]] = []
+
+
+def add_change_listener(listener: Callable[[Optional[Set[str]]], None]):
+    """Call listener(user_ids) after documents of these users were indexed or removed (None: all users)"""
+    _change_listeners.append(listener)
+
+
+def _notify(user_ids: Optional[Set[str]]):
+    for listener in _change_listeners:
+        listener(user_ids)
+
+
+class SearchIndex(ABC):
+    """Interface of the search index backends. Implementations call _notify after each change."""
+
+    @abstractmethod
+    def upsert(self, documents: Iterable[SearchDocument]):
+        ...
+
+    @abstractmethod
+    def delete(self, kind: str, doc_id: int):
+        """Remove a document. Deleting a course also removes its chapters and notes, a chapter its notes"""
+
+    @abstractmethod
+    def search(self, user_id: str, query: str, limit: int = 20) -> List[SearchHit]:
+        """Documents of user_id matching all terms of query (as prefixes), best match first"""
+
+    @abstractmethod
+    def titles(self, user_id: str) -> List[Tuple[str, int, Optional[int], str]]:
+        """(kind, id, course id, title) of the user's courses and chapters"""
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+
+_TERM = re.compile(r"[^\W_]+")
+MAX_TERM_LENGTH = 40
+OWNER_KEY_LENGTH = 12
+
+
+def terms(text: str) -> List[str]:
+    """Lower case words of a text without diacritics (what the index matches on)"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return [term[:MAX_TERM_LENGTH] for term in _TERM.findall(text)]
+
+
+def owner_key(user_id: str) -> str:
+    """Fixed length alphanumeric key of a user, prepended to every indexed term of their documents"""
+    return hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:OWNER_KEY_LENGTH]
+
+
+def _scoped(key: str, text: str) -> str:
+    return " ".join(key + term for term in terms(text))
+
+
+def match_expression(user_id: str, query: str) -> Optional[str]:
+    """FTS5 query: the user's documents that contain every term of query as a prefix"""
+    query_terms = terms(query)[:MAX_QUERY_TERMS]
+    if not query_terms:
+        return None
+    key = owner_key(user_id)
+    # Terms are alphanumeric, quoting keeps FTS5 operators (AND, NEAR, ...) literal
+    return " ".join(f'"{key}{term}"*' for term in query_terms)
+
+
+def _snippet(text: str, query_terms: List[str], words: int = 24) -> str:
+    """Window of text around the first word that starts with a query term (the start of text if none does)"""
+    text_words = text.split()
+    start = 0
+    for position, word in enumerate(text_words):
+        word_terms = terms(word)
+        if any(term.startswith(query_term) for term in word_terms for query_term in query_terms):
+            start = max(0, position - words // 4)
+            break
+    snippet = " ".join(text_words[start:start + words])
+    return ("…" if start > 0 else "") + snippet + ("…" if start + words < len(text_words) else "")
+
+
+class SQLiteSearchIndex(SearchIndex):
+    """
+    SQLite FTS5 sidecar. documents maps the index rows to (kind, id), keeps the ids needed for cascading deletes
+    and the title and summary for the results, documents_fts holds the indexed terms. Ranked by BM25 with
+    title > summary > content.
+
+    Every term is stored with the owner key of the document in front (photosynthesis -> 3f2a...photosynthesis),
+    so a prefix query only expands to the terms of the searching user instead of the whole vocabulary.
+    """
+    RANK = "bm25(10.0, 4.0, 1.0)"  # title, summary, content
+    SUMMARY_LENGTH = 1000  # characters of summary / note text kept for snippets
+
+    def __init__(self, path: str = SEARCH_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._lock:
+            self._conn.executescript(f"""
+                CREATE TABLE IF NOT EXISTS documents (
+                    id INTEGER PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    doc_id INTEGER NOT NULL,
+                    user_id TEXT NOT NULL,
+                    course_id INTEGER,
+                    chapter_id INTEGER,
+                    title TEXT NOT NULL DEFAULT '',
+                    summary TEXT NOT NULL DEFAULT '',
+                    UNIQUE (kind, doc_id)
+                );
+                CREATE INDEX IF NOT EXISTS ix_documents_course_id ON documents (course_id);
+                CREATE INDEX IF NOT EXISTS ix_documents_chapter_id ON documents (chapter_id);
+                CREATE INDEX IF NOT EXISTS ix_documents_user_id ON documents (user_id, kind);
+                CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+                    title, summary, content, tokenize = 'unicode61 remove_diacritics 0'
+                );
+                INSERT INTO documents_fts (documents_fts, rank) VALUES ('rank', '{self.RANK}');
+            """)
+
+    def _owner(self, document: SearchDocument) -> Optional[str]:
+        if document.user_id is not None:
+            return document.user_id
+        row = self._conn.execute(
+            "SELECT user_id FROM documents WHERE kind = 'course' AND doc_id = ?", (document.course_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _upsert(self, document: SearchDocument) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT id, user_id FROM documents WHERE kind = ? AND doc_id = ?", (document.kind, document.doc_id)
+        ).fetchone()
+        columns = document.columns
+        if row is None:
+            user_id = self._owner(document)
+            if user_id is None:
+                logger.debug("No owner for %s %s, not indexed", document.kind, document.doc_id)
+                return None
+            rowid = self._conn.execute(
+                "INSERT INTO documents (kind, doc_id, user_id, course_id, chapter_id) VALUES (?, ?, ?, ?, ?)",
+                (document.kind, document.doc_id, user_id, document.course_id, document.chapter_id)
+            ).lastrowid
+            indexed = {"title": "", "summary": "", "content": ""}
+        else:
+            rowid, user_id = row
+            indexed = dict(zip(("title", "summary", "content"), self._conn.execute(
+                "SELECT title, summary, content FROM documents_fts WHERE rowid = ?", (rowid,)
+            ).fetchone() or ("", "", "")))
+            self._conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (rowid,))
+
+        key = owner_key(user_id)
+        indexed.update({column: _scoped(key, text) for column, text in columns.items()})
+        if "title" in columns:
+            self._conn.execute("UPDATE documents SET title = ? WHERE id = ?", (columns["title"], rowid))
+        # Notes have no summary, their text is shown instead
+        summary = columns.get("summary", columns.get("content") if document.kind == "note" else None)
+        if summary is not None:
+            self._conn.execute("UPDATE documents SET summary = ? WHERE id = ?",
+                               (summary[:self.SUMMARY_LENGTH], rowid))
+        self._conn.execute(
+            "INSERT INTO documents_fts (rowid, title, summary, content) VALUES (?, ?, ?, ?)",
+            (rowid, indexed["title"], indexed["summary"], indexed["content"])
+        )
+        return user_id
+
+    def upsert(self, documents: Iterable[SearchDocument]):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                user_ids = {self._upsert(document) for document in documents}
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        _notify(user_ids - {None})
+
+    def delete(self, kind: str, doc_id: int):
+        if kind == "course":
+            where, params = "course_id = ?", (doc_id,)
+        elif kind == "chapter":
+            where, params = "chapter_id = ?", (doc_id,)  # the chapter and its notes
+        else:
+            where, params = "kind = ? AND doc_id = ?", (kind, doc_id)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                user_ids = {row[0] for row in self._conn.execute(
+                    f"SELECT DISTINCT user_id FROM documents WHERE {where}", params)}
+                self._conn.execute(f"DELETE FROM documents_fts WHERE rowid IN (SELECT id FROM documents WHERE {where})",
+                                   params)
+                self._conn.execute(f"DELETE FROM documents WHERE {where}", params)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        _notify(user_ids)
+
+    def _titles(self, kind: str, doc_ids: Iterable[int]) -> Dict[int, str]:
+        doc_ids = list(set(doc_ids))
+        if not doc_ids:
+            return {}
+        placeholders = ", ".join("?" * len(doc_ids))
+        return dict(self._conn.execute(
+            f"SELECT doc_id, title FROM documents WHERE kind = ? AND doc_id IN ({placeholders})", (kind, *doc_ids)
+        ).fetchall())
+
+    def search(self, user_id: str, query: str, limit: int = 20) -> List[SearchHit]:
+        expression = match_expression(user_id, query)
+        if expression is None:
+            return []
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT d.kind, d.doc_id, d.course_id, d.chapter_id, d.title, d.summary
+                FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid
+                WHERE documents_fts MATCH ? AND d.user_id = ?
+                ORDER BY documents_fts.rank
+                LIMIT ?
+            """, (expression, user_id, limit)).fetchall()
+            hits = [SearchHit(*row) for row in rows]
+            course_titles = self._titles("course", (hit.course_id for hit in hits if hit.course_id is not None))
+            chapter_titles = self._titles("chapter", (hit.chapter_id for hit in hits if hit.kind == "note"))
+        query_terms = terms(query)
+        for hit in hits:
+            hit.snippet = _snippet(hit.snippet, query_terms)
+            hit.course_title = course_titles.get(hit.course_id)
+            hit.chapter_title = hit.title if hit.kind == "chapter" else chapter_titles.get(hit.chapter_id)
+        return hits
+
+    def titles(self, user_id: str) -> List[Tuple[str, int, Optional[int], str]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT kind, doc_id, course_id, title FROM documents "
+                "WHERE user_id = ? AND kind IN ('course', 'chapter')", (user_id,)
+            ).fetchall()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM documents").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM documents_fts")
+            self._conn.execute("DELETE FROM documents")
+        _notify(None)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_search_index: Optional[SearchIndex] = None
+_search_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """Search index configured in settings, created once per process"""
+    global _search_index
+    with _search_index_lock:
+        if _search_index is None:
+            if SEARCH_INDEX_BACKEND == "sqlite":
+                _search_index = SQLiteSearchIndex(SEARCH_INDEX_PATH)
+            else:
+                raise ValueError(f"Unknown search index backend: {SEARCH_INDEX_BACKEND}")
+        return _search_index
+
+
+def set_search_index(index: Optional[SearchIndex]):
+    """Use another index instance (tests, scripts), None goes back to the configured one"""
+    global _search_index
+    with _search_index_lock:
+        _search_index = index
+
+
+############### DOCUMENTS FROM ROWS
+def _columns(obj, changed_only: bool) -> Dict[str, str]:
+    """Index columns of a row, only the loaded and (with changed_only) modified attributes"""
+    state = inspect(obj)
+    columns = {}
+    for attribute, column in INDEXED_FIELDS[type(obj)].items():
+        if attribute in state.unloaded:
+            continue
+        if changed_only and not state.attrs[attribute].history.has_changes():
+            continue
+        columns[column] = getattr(obj, attribute) or ""
+    return columns
+
+
+def _with_content_text(document: SearchDocument) -> SearchDocument:
+    """Replace the React source of a chapter document by its plain text (content_text)"""
+    if document.kind == "chapter" and "content" in document.columns:
+        document.columns["content"] = content_text(document.columns["content"])
+    return document
+
+
+def _document(obj, columns: Dict[str, str]) -> SearchDocument:
+    if isinstance(obj, Course):
+        return SearchDocument("course", obj.id, obj.user_id, obj.id, None, columns)
+    if isinstance(obj, Chapter):
+        course = inspect(obj).dict.get("course")  # only if already loaded, no lazy load during the flush
+        return SearchDocument("chapter", obj.id, course.user_id if course is not None else None,
+                              obj.course_id, obj.id, columns)
+    return SearchDocument("note", obj.id, obj.user_id, obj.course_id, obj.chapter_id, columns)
+
+
+_CHANGES_KEY = "search_index_changes"
+
+
+def _record_flush(session: Session, flush_context):
+    changes: List[Tuple[str, object]] = session.info.setdefault(_CHANGES_KEY, [])
+    for obj in session.new:
+        if type(obj) in INDEXED_FIELDS:
+            changes.append(("upsert", _document(obj, _columns(obj, changed_only=False))))
+    for obj in session.dirty:
+        if type(obj) in INDEXED_FIELDS and obj not in session.deleted:
+            columns = _columns(obj, changed_only=True)
+            if columns:
+                changes.append(("upsert", _document(obj, columns)))
+    for obj in session.deleted:
+        if type(obj) in INDEXED_FIELDS:
+            changes.append(("delete", (KINDS[type(obj)], obj.id)))
+
+
+_pending: "queue.Queue[List[Tuple[str, object]]]" = queue.Queue()
+_applier: Optional[threading.Thread] = None
+_applier_lock = threading.Lock()
+
+
+def _apply_commit(session: Session):
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if not changes:
+        return
+    _ensure_applier()
+    _pending.put(changes)
+
+
+def _ensure_applier():
+    """Start the thread that applies the queued changes on first use"""
+    global _applier
+    with _applier_lock:
+        if _applier is None or not _applier.is_alive():
+            _applier = threading.Thread(target=_run_applier, name="search-index", daemon=True)
+            _applier.start()
+
+
+def _run_applier():
+    while True:
+        changes = _pending.get()
+        try:
+            _apply(changes)
+        finally:
+            _pending.task_done()
+
+
+def _apply(changes: List[Tuple[str, object]]):
+    try:
+        index = get_search_index()
+        for operation, payload in changes:
+            if operation == "upsert":
+                index.upsert([_with_content_text(payload)])
+            else:
+                index.delete(*payload)
+    except Exception:
+        # The database commit stands, scripts/rebuild_search_index.py repairs the index
+        logger.exception("Failed to update the search index with %s changes", len(changes))
+
+
+def wait_for_pending():
+    """Block until the changes of all commits so far are in the index (tests, shutdown)"""
+    _pending.join()
+
+
+def _discard_changes(session: Session):
+    session.info.pop(_CHANGES_KEY, None)
+
+
+def track_changes():
+    """Keep the search index up to date with the commits of all sessions of this process"""
+    if not event.contains(Session, "after_flush", _record_flush):
+        event.listen(Session, "after_flush", _record_flush)
+        event.listen(Session, "after_commit", _apply_commit)
+        event.listen(Session, "after_rollback", _discard_changes)
+
+
+def stop_tracking_changes():
+    """Apply the pending changes and remove the listeners of track_changes (tests)"""
+    wait_for_pending()
+    for name, listener in (("after_flush", _record_flush), ("after_commit", _apply_commit),
+                           ("after_rollback", _discard_changes)):
+        if event.contains(Session, name, listener):
+            event.remove(Session, name, listener)
+
+
+############### REBUILD
+def rebuild_search_index(db: Session, index: Optional[SearchIndex] = None, batch_size: int = 500) -> int:
+    """
+    Index all courses, chapters and notes (replaces the index content).
+    Rows committed while the rebuild runs may be indexed with their old values, run it while writes are quiet.
+
+    :param db: Database session
+    :param index: Index to fill (default: the configured one)
+    :param batch_size: Rows loaded per query
+    :return: Number of indexed documents
+    """
+    index = index or get_search_index()
+    index.clear()
+    indexed = 0
+    for model, options in ((Course, ()), (Chapter, (undefer(Chapter.content),)), (Note, ())):
+        last_id = 0
+        while True:
+            rows = db.scalars(
+                select(model).options(*options).where(model.id > last_id).order_by(model.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            documents = [_with_content_text(_document(row, _columns(row, changed_only=False))) for row in rows]
+            if model is Chapter:
+                owners = dict(db.execute(
+                    select(Course.id, Course.user_id).where(Course.id.in_({row.course_id for row in rows}))
+                ).all())
+                for document in documents:
+                    document.user_id = owners.get(document.course_id)
+            index.upsert(documents)
+            indexed += len(documents)
+            last_id = rows[-1].id
+            db.expunge_all()
+    logger.info("Search index rebuilt with %s documents", indexed)
+    return indexed
@@ -0,0 +1,120 @@
+"""
+Typeahead for the search bar: completions of the user's course titles and chapter captions.
+
+Per user, the titles are loaded once from the search index into a TitleIndex, a sorted array of
+(term, title) pairs, so a prefix is found by binary search. Indexes and the completions of recent queries are
+cached with a short TTL (SEARCH_SUGGEST_*). Changes indexed by this process drop the user's entries at once.
+Suggestions are not logged as searches, only submitted searches (GET /search/) are.
+"""
+import asyncio
+from bisect import bisect_left
+from typing import List, Optional, Set, Tuple
+
+from ..api.schemas.search import SearchResult
+from ..config.settings import (SEARCH_SUGGEST_INDEX_TTL_SECONDS, SEARCH_SUGGEST_MAX_RESULTS,
+                               SEARCH_SUGGEST_MAX_USERS, SEARCH_SUGGEST_RESULT_TTL_SECONDS)
+from ..utils.principal_cache import TTLCache
+from .search_index import add_change_listener, get_search_index, terms
+
+
+class TitleIndex:
+    """Prefix lookup over the (kind, id, course id, title) entries of one user"""
+
+    def __init__(self, entries: List[Tuple[str, int, Optional[int], str]]):
+        self.entries = [entry for entry in entries if entry[3]]
+        self.entry_terms = [terms(entry[3]) for entry in self.entries]
+        pairs = sorted({(term, position) for position, entry_terms in enumerate(self.entry_terms)
+                        for term in entry_terms})
+        self.terms = [term for term, _ in pairs]
+        self.positions = [position for _, position in pairs]
+        self.course_titles = {doc_id: title for kind, doc_id, _, title in self.entries if kind == "course"}
+
+    def complete(self, query: str, limit: int) -> List[SearchResult]:
+        """Titles with a word starting with each term of query, whole title prefix matches and courses first"""
+        query_terms = terms(query)
+        if not query_terms:
+            return []
+        last = query_terms[-1]
+        candidates = set()
+        start = bisect_left(self.terms, last)
+        for i in range(start, len(self.terms)):
+            if not self.terms[i].startswith(last):
+                break
+            candidates.add(self.positions[i])
+
+        matches = [
+            position for position in candidates
+            if all(any(term.startswith(query_term) for term in self.entry_terms[position])
+                   for query_term in query_terms[:-1])
+        ]
+
+        def rank(position: int):
+            kind, _, _, title = self.entries[position]
+            title_prefix = self.entry_terms[position][:len(query_terms)]
+            whole_prefix = len(title_prefix) == len(query_terms) and all(
+                term.startswith(query_term) for term, query_term in zip(title_prefix, query_terms))
+            return not whole_prefix, kind != "course", len(title), title
+
+        return [self._result(self.entries[position]) for position in sorted(matches, key=rank)[:limit]]
+
+    def _result(self, entry: Tuple[str, int, Optional[int], str]) -> SearchResult:
+        kind, doc_id, course_id, title = entry
+        return SearchResult(
+            id=str(doc_id),
+            type=kind,
+            title=title,
+            course_id=str(course_id),
+            course_title=self.course_titles.get(course_id) if kind == "chapter" else None
+        )
+
+
+_indexes = TTLCache("search suggest index", SEARCH_SUGGEST_INDEX_TTL_SECONDS, SEARCH_SUGGEST_MAX_USERS)
+_results = TTLCache("search suggest results", SEARCH_SUGGEST_RESULT_TTL_SECONDS, SEARCH_SUGGEST_MAX_RESULTS)
+
+
+def _build(user_id: str) -> TitleIndex:
+    index = TitleIndex(get_search_index().titles(user_id))
+    _indexes.set(user_id, index)
+    return index
+
+
+def invalidate(user_ids: Optional[Set[str]]):
+    """Drop the title indexes of these users (None: all users), their cached completions go with them"""
+    if user_ids is None:
+        _indexes.clear()
+        _results.clear()
+        return
+    for user_id in user_ids:
+        _indexes.pop(user_id)
+
+
+add_change_listener(invalidate)
+
+
+async def suggest(user_id: str, query: str, limit: int = 8) -> List[SearchResult]:
+    """
+    Completions of the user's course titles and chapter captions for a partially typed query.
+
+    Args:
+        user_id: ID of the current user, only their titles are completed
+        query: Typed text, every term matches the start of a word of the title (the last one as a prefix)
+        limit: Maximum number of completions
+
+    Returns:
+        List of SearchResult objects (title only, no description)
+    """
+    query = " ".join(terms(query))
+    if len(query) < 2:
+        return []
+    index = _indexes.get(user_id)
+    if index is None:
+        index = await asyncio.to_thread(_build, user_id)
+
+    key = (user_id, query, limit)
+    cached = _results.get(key)
+    # Completions of an index that was rebuilt in the meantime are stale
+    if cached is not None and cached[0] is index:
+        return cached[1]
+    results = index.complete(query, limit)
+    _results.set(key, (index, results))
+    return results
@@ -0,0 +1,144 @@
+"""
+Retention for the usages table. Rows older than USAGE_RETENTION_DAYS are moved, oldest first and in batches of
+USAGE_ARCHIVE_BATCH_SIZE, to zstd compressed JSON lines files in USAGE_ARCHIVE_PATH and deleted from the table.
+
+Archive files are named usages-<YYYY-MM of the first row>-<first id>-<last id>.jsonl.zst and written atomically
+(temporary file, fsync, rename) before their rows are deleted. Each batch holds the platform_stats row lock of
+statistics_crud.refresh_statistics, so the runs of several workers never overlap. If the process dies in between, the next run
+finds the file of the same first id and only deletes its rows.
+
+Only rows that the statistics and the learn time sessionization have consumed are archived (their id watermarks),
+and actions in USAGE_RETENTION_KEEP_ACTIONS stay in the table. iter_archived_usages reads the archives back,
+scripts/query_usage_archive.py uses it for ad-hoc analysis.
+"""
+import glob
+import io
+import json
+import logging
+import os
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterator, List, Optional
+
+import zstandard
+from sqlalchemy.orm import Session
+
+from ..db.crud import statistics_crud, usage_crud
+from ..db.models.db_usage import Usage
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_PATTERN = "usages-*.jsonl.zst"
+COMPRESSION_LEVEL = 10
+
+
+def _archive_name(rows: List[Usage]) -> str:
+    return f"usages-{rows[0].timestamp:%Y-%m}-{rows[0].id:012d}-{rows[-1].id:012d}.jsonl.zst"
+
+
+def _to_dict(usage: Usage) -> dict:
+    return {
+        "id": usage.id,
+        "user_id": usage.user_id,
+        "course_id": usage.course_id,
+        "chapter_id": usage.chapter_id,
+        "action": usage.action,
+        "details": usage.details,
+        "timestamp": usage.timestamp.isoformat(),
+    }
+
+
+def _write_archive(path: str, rows: List[Usage]):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".usages-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            with zstandard.ZstdCompressor(level=COMPRESSION_LEVEL).stream_writer(f, closefd=False) as writer:
+                for usage in rows:
+                    writer.write((json.dumps(_to_dict(usage), ensure_ascii=False) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_archive(path: str) -> Iterator[dict]:
+    """The rows of one archive file"""
+    with open(path, "rb") as f:
+        with zstandard.ZstdDecompressor().stream_reader(f) as reader:
+            for line in io.TextIOWrapper(reader, encoding="utf-8"):
+                if line.strip():
+                    yield json.loads(line)
+
+
+def archive_files(archive_dir: str) -> List[str]:
+    """Archive files ordered by first id"""
+    return sorted(glob.glob(os.path.join(archive_dir, ARCHIVE_PATTERN)), key=lambda path: path.rsplit("-", 2)[-2])
+
+
+def iter_archived_usages(archive_dir: str, since: Optional[date] = None, until: Optional[date] = None) -> Iterator[dict]:
+    """
+    Archived usage rows recorded between since and until (inclusive days), in id order.
+    Files are skipped by the month in their name where possible, rows carry their timestamp as ISO string.
+    """
+    for path in archive_files(archive_dir):
+        first_month = os.path.basename(path)[len("usages-"):len("usages-YYYY-MM")]
+        if until is not None and first_month > f"{until:%Y-%m}":
+            continue
+        for row in read_archive(path):
+            day = row["timestamp"][:10]
+            if since is not None and day < since.isoformat():
+                continue
+            if until is not None and day > until.isoformat():
+                continue
+            yield row
+
+
+def archive_old_usages(db: Session, retention_days: int, archive_dir: str, batch_size: int,
+                       keep_actions: List[str], now: Optional[datetime] = None,
+                       max_batches: Optional[int] = None) -> dict:
+    """
+    Move usage rows older than retention_days to archive files and delete them from the table.
+
+    :param db: Database session
+    :param retention_days: Days of usage rows to keep in the table
+    :param archive_dir: Directory of the archive files
+    :param batch_size: Rows per archive file
+    :param keep_actions: Actions that are never archived
+    :param now: Current time (UTC), for tests
+    :param max_batches: Stop after this many batches (None: until everything old enough is archived)
+    :return: Report with the number of archived rows and written files
+    """
+    report = {"rows": 0, "files": 0}
+    if statistics_crud.get_platform_stats(db) is None:
+        return report  # nothing aggregated yet
+    before = (now or datetime.now(timezone.utc)).replace(tzinfo=None) - timedelta(days=retention_days)
+    os.makedirs(archive_dir, exist_ok=True)
+
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        # Every worker schedules this job: the statistics row lock (held until delete_usages commits) makes
+        # their batches run one after another, so no two runs archive and delete the same rows
+        stats = statistics_crud.lock_platform_stats(db)
+        max_id = min(stats.usage_watermark, stats.session_watermark or 0)
+        rows = usage_crud.get_archivable_usages(db, before, max_id, keep_actions, batch_size)
+        if not rows:
+            db.commit()
+            break
+        existing = glob.glob(os.path.join(archive_dir, f"usages-*-{rows[0].id:012d}-*.jsonl.zst"))
+        if existing:
+            # Written by a run that died before deleting the rows
+            archived_ids = [row["id"] for row in read_archive(existing[0])]
+            usage_crud.delete_usages(db, archived_ids)
+            logger.info("Deleted %s usage rows already archived in %s", len(archived_ids), existing[0])
+        else:
+            path = os.path.join(archive_dir, _archive_name(rows))
+            _write_archive(path, rows)
+            usage_crud.delete_usages(db, [usage.id for usage in rows])
+            report["rows"] += len(rows)
+            report["files"] += 1
+        db.expunge_all()
+        batches += 1
+    return report
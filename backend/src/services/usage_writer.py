@@ -0,0 +1,259 @@
+"""
+Buffered writer for usage events (heartbeats, chat messages, searches, logins, ...).
+
+record() only appends the event to an in-process buffer and returns. A background thread writes the buffer
+with multi-row INSERTs (usage_crud.insert_usages) as soon as USAGE_FLUSH_MAX_EVENTS events are buffered or
+the oldest one is USAGE_FLUSH_INTERVAL_MS old, so hundreds of events share one commit.
+
+The timestamp is taken when the event is recorded, not when it is written. If the database is unavailable the
+batch goes back into the buffer and is retried; the buffer is bounded by USAGE_BUFFER_MAX_EVENTS and
+USAGE_DROP_POLICY decides which events are dropped when it is full. stop() (application shutdown) writes what
+is left and appends events that still can't be written to USAGE_SPILL_PATH, replay_spill (application startup)
+buffers them again.
+
+Events that quotas depend on (create_course, document_digest, complete_chapter) are still written directly
+through usage_crud, they have to be visible to the next request.
+"""
+import json
+import logging
+import glob
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional
+
+from ..api.schemas.statistics import UsagePost
+from ..config.settings import (USAGE_BUFFER_MAX_EVENTS, USAGE_DROP_POLICY, USAGE_FLUSH_INTERVAL_MS,
+                               USAGE_FLUSH_MAX_EVENTS, USAGE_SPILL_PATH)
+from ..db.crud import usage_crud
+from ..db.database import get_db_context
+
+logger = logging.getLogger(__name__)
+
+DROP_POLICIES = ("drop_oldest", "drop_newest")
+if USAGE_DROP_POLICY not in DROP_POLICIES:
+    raise ValueError(f"USAGE_DROP_POLICY must be one of {DROP_POLICIES}, got {USAGE_DROP_POLICY!r}")
+
+_buffer: Deque[dict] = deque()
+_oldest_at: Optional[float] = None  # monotonic time the oldest buffered event was recorded
+_condition = threading.Condition()
+_write_lock = threading.Lock()  # one batch at a time, keeps the insert order
+_thread: Optional[threading.Thread] = None
+_stopping = False
+_metrics = {"enqueued": 0, "written": 0, "dropped": 0, "flushes": 0, "failed_flushes": 0, "last_flush_ms": 0.0}
+
+
+def record(user_id: str, action: str, course_id: Optional[int] = None, chapter_id: Optional[int] = None,
+           details: Optional[str] = None) -> None:
+    """Buffer a usage event, it is written by the background flusher"""
+    global _oldest_at
+    event = {
+        "user_id": user_id,
+        "action": action,
+        "course_id": course_id,
+        "chapter_id": chapter_id,
+        "details": details,
+        "timestamp": datetime.now(timezone.utc),
+    }
+    with _condition:
+        _ensure_started()
+        if len(_buffer) >= USAGE_BUFFER_MAX_EVENTS:
+            _metrics["dropped"] += 1
+            if USAGE_DROP_POLICY == "drop_newest":
+                return
+            _buffer.popleft()
+        first = not _buffer
+        if first:
+            _oldest_at = time.monotonic()
+        _buffer.append(event)
+        _metrics["enqueued"] += 1
+        # The flusher sleeps without timeout while the buffer is empty
+        if first or len(_buffer) >= USAGE_FLUSH_MAX_EVENTS:
+            _condition.notify()
+
+
+def _ensure_started():
+    """Start the flusher thread on first use (caller holds _condition)"""
+    global _thread, _stopping
+    if _thread is not None and _thread.is_alive():
+        return
+    _stopping = False
+    _thread = threading.Thread(target=_run, name="usage-writer", daemon=True)
+    _thread.start()
+
+
+def _take_batch() -> List[dict]:
+    """Remove and return everything buffered (caller holds _condition)"""
+    global _oldest_at
+    batch = list(_buffer)
+    _buffer.clear()
+    _oldest_at = None
+    return batch
+
+
+def _requeue(batch: List[dict]):
+    """Put a batch that could not be written back in front of the buffer, within the buffer bound"""
+    global _oldest_at
+    with _condition:
+        _buffer.extendleft(reversed(batch))
+        while len(_buffer) > USAGE_BUFFER_MAX_EVENTS:
+            if USAGE_DROP_POLICY == "drop_newest":
+                _buffer.pop()
+            else:
+                _buffer.popleft()
+            _metrics["dropped"] += 1
+        _oldest_at = time.monotonic()
+
+
+def _write(batch: List[dict]) -> bool:
+    """Write one batch, on failure it goes back into the buffer"""
+    if not batch:
+        return True
+    start = time.perf_counter()
+    with _write_lock:
+        try:
+            with get_db_context() as db:
+                usage_crud.insert_usages(db, batch)
+        except Exception as e:
+            _metrics["failed_flushes"] += 1
+            logger.warning("Writing %d usage events failed, keeping them buffered: %s", len(batch), e)
+            _requeue(batch)
+            return False
+    _metrics["flushes"] += 1
+    _metrics["written"] += len(batch)
+    _metrics["last_flush_ms"] = (time.perf_counter() - start) * 1000
+    return True
+
+
+def _run():
+    interval = USAGE_FLUSH_INTERVAL_MS / 1000
+    while True:
+        with _condition:
+            while not _stopping:
+                if len(_buffer) >= USAGE_FLUSH_MAX_EVENTS:
+                    break
+                if _buffer and time.monotonic() - _oldest_at >= interval:
+                    break
+                timeout = interval - (time.monotonic() - _oldest_at) if _buffer else None
+                _condition.wait(timeout)
+            if _stopping:
+                return
+            batch = _take_batch()
+        if not _write(batch):
+            # Database unavailable, don't retry in a tight loop
+            with _condition:
+                _condition.wait(interval)
+
+
+def flush() -> bool:
+    """Write everything buffered now, returns False if the write failed (the events stay buffered)"""
+    with _condition:
+        batch = _take_batch()
+    return _write(batch)
+
+
+def stop(timeout: float = 10):
+    """Stop the flusher and write what is left (application shutdown). Unwritten events are spilled to disk."""
+    global _thread, _stopping
+    with _condition:
+        _stopping = True
+        _condition.notify_all()
+    if _thread is not None:
+        _thread.join(timeout)
+        _thread = None
+    if flush():
+        return
+    with _condition:
+        batch = _take_batch()
+    _spill(batch)
+
+
+def _spill(batch: List[dict]):
+    try:
+        with open(USAGE_SPILL_PATH, "a", encoding="utf-8") as f:
+            for event in batch:
+                f.write(json.dumps({**event, "timestamp": event["timestamp"].isoformat()}) + "\n")
+        logger.warning("Spilled %d unwritten usage events to %s", len(batch), USAGE_SPILL_PATH)
+    except OSError as e:
+        _metrics["dropped"] += len(batch)
+        logger.error("Could not spill %d usage events to %s: %s", len(batch), USAGE_SPILL_PATH, e)
+
+
+def replay_spill():
+    """
+    Buffer the events spilled at the last shutdown (application startup).
+    Each file is first renamed to a name of its own, so of several workers starting at once only one replays it.
+    Files left by a replay that died before removing them are picked up as well.
+    """
+    global _oldest_at
+    events = []
+    for path in sorted(glob.glob(USAGE_SPILL_PATH + ".replay-*")) + [USAGE_SPILL_PATH]:
+        claimed = f"{USAGE_SPILL_PATH}.replay-{uuid.uuid4().hex}"
+        try:
+            os.replace(path, claimed)
+        except FileNotFoundError:
+            continue  # nothing spilled or claimed by another worker
+        try:
+            with open(claimed, encoding="utf-8") as f:
+                file_events = [json.loads(line) for line in f if line.strip()]
+            for event in file_events:
+                event["timestamp"] = datetime.fromisoformat(event["timestamp"])
+        except (OSError, ValueError) as e:
+            logger.error("Could not replay spilled usage events from %s: %s", claimed, e)
+            continue
+        events.extend(file_events)
+        os.remove(claimed)
+    if not events:
+        return
+    with _condition:
+        _ensure_started()
+        _buffer.extendleft(reversed(events))
+        _oldest_at = time.monotonic()
+        _condition.notify()
+    logger.info("Replaying %d spilled usage events", len(events))
+
+
+def stats() -> Dict[str, float]:
+    with _condition:
+        return {**_metrics, "buffered": len(_buffer)}
+
+
+def log_stats():
+    s = stats()
+    logger.info(
+        "Usage writer: %d enqueued, %d written in %d flushes (%d failed, last %.1f ms), %d dropped, %d buffered",
+        s["enqueued"], s["written"], s["flushes"], s["failed_flushes"], s["last_flush_ms"], s["dropped"], s["buffered"],
+    )
+
+
+def log_site_usage(usage: UsagePost):
+    """Visible / hidden ping of a page"""
+    record(usage.user_id, "site" + ("_visible" if usage.visible else "_hidden"),
+           course_id=usage.course_id, chapter_id=usage.chapter_id, details=usage.url)
+
+
+def log_chat_usage(user_id: str, course_id: int, chapter_id: int, message: str):
+    record(user_id, "chat", course_id=course_id, chapter_id=chapter_id, details=message)
+
+
+def log_search(user_id: str, query: str):
+    record(user_id, "search", details=query)
+
+
+def log_login(user_id: str):
+    record(user_id, "login")
+
+
+def log_admin_login_as(user_who: str, user_as: str):
+    record(user_who, "admin_login_as", details="Admin logged in as user: " + user_as)
+
+
+def log_refresh(user_id: str):
+    record(user_id, "refresh")
+
+
+def log_logout(user_id: str):
+    record(user_id, "logout")
@@ -6,25 +6,29 @@ from sqlalchemy.orm import Session
 
 from ..db.crud import users_crud
 from ..db.models import db_user as user_model
-from ..core.security import get_password_hash, verify_password
+from ..core import password_hashing
+from ..utils import principal_cache
+from ..utils.principal_cache import Principal
+from . import avatar_service
 
 from ..db.crud import usage_crud
 
-def get_users(db: Session, skip: int = 0, limit: int = 999):
-    """Retrieve a list of users."""
-    users = users_crud.get_users(db, skip=skip, limit=limit)
+def get_users(db: Session, skip: int = 0, limit: int = 999, after=None):
+    """Retrieve a list of users, newest first (after: keyset position of a cursor)."""
+    users = users_crud.get_users(db, skip=skip, limit=limit, after=after)
 
 
+    learn_times = usage_crud.get_total_time_spent_on_chapters_by_user(db, [user.id for user in users])
     extended_users = []
     for user in users:
-        user.total_learn_time = usage_crud.get_total_time_spent_on_chapters(db, user.id)
+        user.total_learn_time = learn_times[user.id]
         extended_users.append(user)
 
     return extended_users
 
 
 
-def get_user_by_id(db: Session, user_id: str, current_user: user_model.User):
+def get_user_by_id(db: Session, user_id: str, current_user: Principal):
     """ Retrieve a user by their ID. """
     user = users_crud.get_user_by_id(db, user_id)
     if not user:
@@ -34,7 +38,7 @@ def get_user_by_id(db: Session, user_id: str, current_user: user_model.User):
     return user
 
 
-def update_user(db: Session, user_id: str, user_update, current_user: user_model.User):
+async def update_user(db: Session, user_id: str, user_update, current_user: Principal):
     """ Update a user's profile. Admins can update any user, regular users can only update their own profile. """
     db_user = users_crud.get_user_by_id(db, user_id)
     if not db_user:
@@ -46,7 +50,7 @@ def update_user(db: Session, user_id: str, user_update, current_user: user_model
         if str(db_user.id) == str(current_user.id):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use /change_password to update your password.")
         elif getattr(current_user, 'is_admin', False):
-            hashed_password = get_password_hash(update_data["password"])
+            hashed_password = await password_hashing.hash_password(update_data["password"])
             update_data["hashed_password"] = hashed_password
         del update_data["password"]
     elif "password" in update_data:
@@ -54,10 +58,25 @@ def update_user(db: Session, user_id: str, user_update, current_user: user_model
     if getattr(current_user, 'is_admin', False) is not True:
         update_data.pop("is_active", None)
         update_data.pop("is_admin", None)
-    return users_crud.update_user(db, db_user, update_data)
+    if "profile_image_base64" in update_data:
+        # The image goes to the blob store, an empty value removes the avatar
+        avatar_hash, avatar_content_type = avatar_service.store_base64_avatar(update_data.pop("profile_image_base64"))
+        users_crud.update_user_profile_image(db, db_user, avatar_hash, avatar_content_type)
+    updated_user = users_crud.update_user(db, db_user, update_data)
+    # Deactivation or a role change has to reach get_current_active_user right away
+    principal_cache.invalidate_user(updated_user.id)
+    return updated_user
+
+
+def get_avatar_user(db: Session, user_id: str, current_user: Principal) -> user_model.User:
+    """ User whose avatar is requested. Same access rules as get_user_by_id. """
+    user = get_user_by_id(db, user_id, current_user)
+    if not user.avatar_hash:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User has no profile image")
+    return user
 
 
-def change_password(db: Session, user_id: str, password_data, current_user: user_model.User):
+async def change_password(db: Session, user_id: str, password_data, current_user: Principal):
     """ Change a user's password. """
     if str(user_id) != str(current_user.id) and getattr(current_user, 'is_admin', False) is not True:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to change this user's password")
@@ -67,20 +86,23 @@ def change_password(db: Session, user_id: str, password_data, current_user: user
     if not password_data.new_password:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="New password not provided")
     if getattr(current_user, 'is_admin', False) is not True and password_data.old_password:
-        if not verify_password(password_data.old_password, db_user.hashed_password):
+        old_password_valid, _ = await password_hashing.verify_password(password_data.old_password, db_user.hashed_password)
+        if not old_password_valid:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect old password")
     elif getattr(current_user, 'is_admin', False) is not True and not password_data.old_password:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Old password is required")
-    hashed_password = get_password_hash(password_data.new_password)
+    hashed_password = await password_hashing.hash_password(password_data.new_password)
     return users_crud.change_user_password(db, db_user, hashed_password)
 
 
-def delete_user(db: Session, user_id: str, current_user: user_model.User):
+def delete_user(db: Session, user_id: str, current_user: Principal):
     """ Delete a user. Admins can delete any user, regular users can only delete their own profile. """
     if str(user_id) == str(current_user.id):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admins cannot delete themselves.")
     db_user = users_crud.get_user_by_id(db, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
-    return users_crud.delete_user(db, db_user)
+    deleted_user = users_crud.delete_user(db, db_user)
+    principal_cache.invalidate_user(user_id)
+    return deleted_user
 
@@ -1,25 +1,120 @@
+import threading
+import time
+import zlib
+
 import chromadb
 from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set
 from ..config.chroma_settings import (
-    CHROMA_HOST, CHROMA_PORT, CHROMA_COLLECTION_NAME, 
-    EMBEDDING_MODEL, CHROMA_CLIENT_TYPE
+    CHROMA_HOST, CHROMA_PORT, CHROMA_COLLECTION_NAME,
+    EMBEDDING_MODEL, CHROMA_CLIENT_TYPE,
+    CHROMA_LAYOUT, CHROMA_SHARD_COUNT, CHROMA_SHARD_PREFIX
 )
 
+PER_COURSE_LAYOUT = "per_course"
+SHARDED_LAYOUT = "sharded"
+COURSE_COLLECTION_PREFIX = "course_"
+
+_embedding_models = {}
+_embedding_models_lock = threading.Lock()
+
+
+def get_embedding_model(model_name: str = EMBEDDING_MODEL):
+    """Load a sentence transformer once per process and share it between all services"""
+    with _embedding_models_lock:
+        if model_name not in _embedding_models:
+            from sentence_transformers import SentenceTransformer
+            _embedding_models[model_name] = SentenceTransformer(model_name)
+        return _embedding_models[model_name]
+
+
+def create_chroma_client():
+    """Create the chroma client configured in chroma_settings"""
+    # Use HTTP client to connect to separate ChromaDB container
+    if CHROMA_CLIENT_TYPE == "http":
+        return chromadb.HttpClient(
+            host=CHROMA_HOST,
+            port=CHROMA_PORT
+        )
+    # Fallback for development
+    return chromadb.PersistentClient(path="./chroma_db")
+
+
+def course_collection_name(course_id: int) -> str:
+    """Name of the per-course collection of a course"""
+    return COURSE_COLLECTION_PREFIX + str(course_id)
+
+
+def shard_index(course_id: int, shard_count: int = CHROMA_SHARD_COUNT) -> int:
+    """Stable shard index of a course (crc32, so it does not change between processes)"""
+    return zlib.crc32(str(course_id).encode("utf-8")) % shard_count
+
+
+def shard_collection_name(index: int) -> str:
+    """Name of the shard collection with the given index"""
+    return f"{CHROMA_SHARD_PREFIX}{index}"
+
+
 class VectorService:
-    def __init__(self, ):
-        # Use HTTP client to connect to separate ChromaDB container
-        if CHROMA_CLIENT_TYPE == "http":
-            self.client = chromadb.HttpClient(
-                host=CHROMA_HOST,
-                port=CHROMA_PORT
-            )
+    def __init__(self, client=None, layout: Optional[str] = None, shard_count: Optional[int] = None):
+        self._client = client
+        self._client_lock = threading.Lock()
+        self.layout = layout or CHROMA_LAYOUT
+        self.shard_count = shard_count or CHROMA_SHARD_COUNT
+        if self.layout not in (PER_COURSE_LAYOUT, SHARDED_LAYOUT):
+            raise ValueError(f"Unknown chroma layout: {self.layout}")
+
+    @property
+    def client(self):
+        """Chroma client, connected on first use so importing and constructing services needs no running server"""
+        with self._client_lock:
+            if self._client is None:
+                self._client = create_chroma_client()
+            return self._client
+
+    @property
+    def embedding_model(self):
+        """Embedding model, loaded on first use"""
+        return get_embedding_model()
+
+    @property
+    def is_sharded(self) -> bool:
+        return self.layout == SHARDED_LAYOUT
+
+    def _collection_for_course(self, course_id: int):
+        """Collection holding the vectors of a course in the active layout"""
+        if self.is_sharded:
+            return self.client.get_or_create_collection(shard_collection_name(shard_index(course_id, self.shard_count)))
+        return self.client.get_or_create_collection(course_collection_name(course_id))
+
+    def _collection_names(self) -> List[str]:
+        """Collection names for both old (objects) and new (names) chroma clients"""
+        return [getattr(collection, "name", collection) for collection in self.client.list_collections()]
+
+    def _existing_collection_for_course(self, course_id: int):
+        """Like _collection_for_course, but returns None instead of creating a missing collection"""
+        if self.is_sharded:
+            name = shard_collection_name(shard_index(course_id, self.shard_count))
         else:
-            # Fallback for development
-            self.client = chromadb.PersistentClient(path="./chroma_db")
-            
-        self.embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+            name = course_collection_name(course_id)
+        if name not in self._collection_names():
+            return None
+        return self.client.get_collection(name)
+
+    def _scoped_id(self, course_id: int, content_id: str) -> str:
+        """Shards are shared between courses, so ids get the course as prefix there"""
+        if self.is_sharded:
+            return f"{course_collection_name(course_id)}:{content_id}"
+        return content_id
+
+    def _scoped_where(self, course_id: int, filter_metadata: Optional[Dict] = None) -> Optional[Dict]:
+        """Restrict queries on a shard to the vectors of one course"""
+        if not self.is_sharded:
+            return filter_metadata
+        course_filter = {"course_id": course_id}
+        if not filter_metadata:
+            return course_filter
+        return {"$and": [course_filter, filter_metadata]}
 
     def create_collection(self, collection_id: str):
         """Create a new collection in the vector store"""
@@ -30,42 +125,116 @@ class VectorService:
 
     def create_collection_by_course_id(self, course_id: int):
         """Create a collection for a specific course"""
-        collection_id = "course_" + str(course_id)
-        self.create_collection(collection_id)
-    
+        if self.is_sharded:
+            # Shards are created lazily and shared, nothing to do per course
+            self._collection_for_course(course_id)
+            return
+        self.create_collection(course_collection_name(course_id))
+
     def add_content_by_course_id(self, course_id: int, content_id: str, text: str, metadata: Dict):
         """Add content to vector store"""
         embedding = self.embedding_model.encode([text])
-        self.client.get_or_create_collection("course_" + str(course_id)).add(
-            documents=[text],
-            embeddings=embedding.tolist(),
-            metadatas=[metadata],
-            ids=[content_id]
+        self.add_embeddings_by_course_id(course_id, [content_id], embedding.tolist(), [text], [metadata])
+
+    def add_embeddings_by_course_id(self, course_id: int, content_ids: List[str], embeddings: List[List[float]],
+                                    texts: List[str], metadatas: List[Dict]):
+        """Add already embedded content to vector store"""
+        if self.is_sharded:
+            metadatas = [{**metadata, "course_id": course_id} for metadata in metadatas]
+        self._collection_for_course(course_id).upsert(
+            documents=texts,
+            embeddings=embeddings,
+            metadatas=metadatas,
+            ids=[self._scoped_id(course_id, content_id) for content_id in content_ids]
         )
-    
+
     def search_by_course_id(self, course_id: int, query: str, n_results: int = 5, filter_metadata: Optional[Dict] = None):
         """Search for similar content"""
         query_embedding = self.embedding_model.encode([query])
-        results = self.client.get_or_create_collection("course_" + str(course_id)).query(
-            query_embeddings=query_embedding.tolist(),
+        return self.query_by_course_id(course_id, query_embedding.tolist(), n_results, filter_metadata)
+
+    def query_by_course_id(self, course_id: int, query_embeddings: List[List[float]], n_results: int = 5,
+                           filter_metadata: Optional[Dict] = None):
+        """Search for similar content with already embedded queries"""
+        return self._collection_for_course(course_id).query(
+            query_embeddings=query_embeddings,
             n_results=n_results,
-            where=filter_metadata
+            where=self._scoped_where(course_id, filter_metadata)
         )
-        return results
 
-    
     def delete_content_by_course_id(self, course_id: int, content_id: str):
         """Delete content from vector store"""
         try:
-            self.client.get_or_create_collection("course_" + str(course_id)).delete(ids=[content_id])
+            self._collection_for_course(course_id).delete(ids=[self._scoped_id(course_id, content_id)])
         except Exception as e:
             print(f"Error deleting content {content_id}: {e}")
-    
+
     def update_content_by_course_id(self, course_id: int, content_id: str, text: str, metadata: Dict):
         """Update existing content"""
         self.delete_content_by_course_id(course_id, content_id)
         self.add_content_by_course_id(course_id, content_id, text, metadata)
 
     def get_collection_by_course_id(self, course_id: int):
-        """Get collection by course ID"""
-        return self.client.get_or_create_collection("course_" + str(course_id))
+        """
+        Get collection by course ID.
+        In the sharded layout this is the shared shard, so reads have to filter by course_id metadata.
+        """
+        return self._collection_for_course(course_id)
+
+    def list_course_ids(self, batch_size: int = 1000) -> Set[int]:
+        """Ids of all courses that currently have vectors in the store"""
+        course_ids = set()
+        names = self._collection_names()
+        if not self.is_sharded:
+            for name in names:
+                suffix = name[len(COURSE_COLLECTION_PREFIX):] if name.startswith(COURSE_COLLECTION_PREFIX) else ""
+                if suffix.isdigit():
+                    course_ids.add(int(suffix))
+            return course_ids
+
+        for index in range(self.shard_count):
+            name = shard_collection_name(index)
+            if name not in names:
+                continue
+            collection = self.client.get_collection(name)
+            offset = 0
+            while True:
+                batch = collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+                if not batch["ids"]:
+                    break
+                course_ids.update(int(metadata["course_id"]) for metadata in batch["metadatas"]
+                                  if metadata and "course_id" in metadata)
+                offset += len(batch["ids"])
+        return course_ids
+
+    def delete_course_vectors(self, course_id: int, batch_size: int = 200, pause_seconds: float = 0.0,
+                              max_vectors: Optional[int] = None) -> Dict[str, int]:
+        """
+        Delete the vectors of a course in batches, sleeping pause_seconds between batches.
+        Returns the number of deleted vectors, an estimate of the reclaimed bytes (float32 embeddings
+        plus stored documents) and whether the course is now completely removed.
+        """
+        report = {"vectors": 0, "bytes": 0, "complete": True}
+        collection = self._existing_collection_for_course(course_id)
+        if collection is None:
+            return report
+
+        where = {"course_id": course_id} if self.is_sharded else None
+        while True:
+            limit = batch_size if max_vectors is None else min(batch_size, max_vectors - report["vectors"])
+            if limit <= 0:
+                report["complete"] = False
+                break
+            batch = collection.get(where=where, include=["documents", "embeddings"], limit=limit)
+            if not batch["ids"]:
+                break
+            report["bytes"] += sum(len(embedding) * 4 for embedding in batch["embeddings"])
+            report["bytes"] += sum(len(document.encode("utf-8")) for document in batch["documents"] if document)
+            collection.delete(ids=batch["ids"])
+            report["vectors"] += len(batch["ids"])
+            if pause_seconds:
+                time.sleep(pause_seconds)
+
+        if report["complete"] and not self.is_sharded:
+            self.client.delete_collection(collection.name)
+        return report
@@ -1,6 +1,7 @@
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
@@ -8,14 +9,17 @@ from pydantic import BaseModel
 # Import the SQLAlchemy User model module correctly
 from ..db.models import db_user as user_model
 # Import Pydantic schemas (only TokenData is directly used here)
-from ..db.database import get_db
+from ..db.database import get_async_db, get_db
 # Import security utilities
 from ..core import security
 from ..core.security import get_access_token_from_cookie
 # Import settings
 
 from ..db.crud.users_crud import get_active_user_by_id
+from ..db.crud.aio import users_crud as async_users_crud
 from fastapi import Request # Added Request for get_optional_current_user
+from . import principal_cache
+from .principal_cache import Principal
 
 class TokenData(BaseModel):
     """Schema for the token data."""
@@ -36,10 +40,11 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[use
 
 
 async def get_current_active_user(access_token: Optional[str] = Depends(get_access_token_from_cookie),
-                                  db: Session = Depends(get_db)) -> user_model.User:
+                                  db: AsyncSession = Depends(get_async_db)) -> Principal:
     """
     Get the current user based on the provided token.
-    Ensures the user is active and returns the user model instance.
+    Ensures the user is active and returns a slim Principal (id, is_active, is_admin, is_subscribed).
+    Verified tokens and principals are cached for a few seconds, see utils.principal_cache.
     Removed get_current_user dependency to avoid usage of get_current_user instead of get_current_active_user.
     """
 
@@ -53,17 +58,21 @@ async def get_current_active_user(access_token: Optional[str] = Depends(get_acce
         )
 
     # Verify the token and extract user ID
-    user_id = security.verify_token(access_token)
+    user_id = principal_cache.user_id_for_token(access_token, security.verify_token_claims)
+
+    principal = principal_cache.get_principal(user_id)
+    if principal is not None:
+        return principal
 
     # Fetch the user from the database using the user ID
-    user = get_active_user_by_id(db, user_id)
+    user = await async_users_crud.get_active_user_by_id(db, user_id)
 
     if user is None:
         raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
     )
-    return user
+    return principal_cache.remember_user(user)
 
 
 async def get_current_user_optional(access_token: Optional[str] = Depends(get_access_token_from_cookie),
@@ -77,11 +86,11 @@ async def get_current_user_optional(access_token: Optional[str] = Depends(get_ac
         return None  # No token means no user, which is acceptable in this context
 
     # Verify the token and extract user ID
-    user_id = security.verify_token(access_token)
+    user_id = principal_cache.user_id_for_token(access_token, security.verify_token_claims)
     user = get_active_user_by_id(db, user_id)
     return user # if user else None
 
-async def get_current_admin_user(current_db_user: user_model.User = Depends(get_current_active_user)) -> user_model.User:
+async def get_current_admin_user(current_db_user: Principal = Depends(get_current_active_user)) -> Principal:
     """Ensure the current user is an admin."""
      # Check if the user is an admin
      # If not, raise a 403 Forbidden error
@@ -0,0 +1,79 @@
+from secrets import token_hex
+from typing import List, Tuple
+
+import anyio
+from fastapi import Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.types import Send
+
+from ..services.blob_store import get_blob_store
+
+# Chunk size for streaming blobs from stores without a local file
+BLOB_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class BlobFileResponse(FileResponse):
+    """
+    FileResponse with a standard conformant multipart/byteranges body.
+    Starlette's own version puts the multipart type into Content-Range and declares a Content-Length
+    one byte shorter than the body, which strict clients and servers reject.
+    _handle_multiple_ranges is a private Starlette hook: Starlette is pinned in requirements.txt
+    and test_file_response fails if an upgrade removes it or changes its signature.
+    """
+
+    async def _handle_multiple_ranges(self, send: Send, ranges: List[Tuple[int, int]], file_size: int,
+                                      send_header_only: bool) -> None:
+        boundary = token_hex(13)
+        part_type = self.headers["content-type"]
+        part_headers = [
+            f"--{boundary}\r\nContent-Type: {part_type}\r\nContent-Range: bytes {start}-{end - 1}/{file_size}\r\n\r\n"
+            .encode("latin-1")
+            for start, end in ranges
+        ]
+        closing = f"--{boundary}--\r\n".encode("latin-1")
+        # every part: headers, data, CRLF
+        content_length = sum(len(header) + (end - start) + 2 for header, (start, end) in zip(part_headers, ranges)) + len(closing)
+
+        self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+        self.headers["content-length"] = str(content_length)
+        await send({"type": "http.response.start", "status": 206, "headers": self.raw_headers})
+        if send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            for header, (start, end) in zip(part_headers, ranges):
+                await send({"type": "http.response.body", "body": header, "more_body": True})
+                await file.seek(start)
+                while start < end:
+                    chunk = await file.read(min(self.chunk_size, end - start))
+                    if not chunk:
+                        break
+                    start += len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                await send({"type": "http.response.body", "body": b"\r\n", "more_body": True})
+        await send({"type": "http.response.body", "body": closing, "more_body": False})
+
+
+def blob_response(request: Request, blob_hash: str, media_type: str, headers: dict) -> Response:
+    """
+    Stream a blob to the client.
+    Blobs on the local filesystem are sent as FileResponse, which reads only the requested
+    byte ranges in small chunks (single and multi range, 416 for unsatisfiable ranges).
+    Other backends are streamed in full without range support.
+    """
+    store = get_blob_store()
+    path = store.local_path(blob_hash)
+    if path is not None:
+        return BlobFileResponse(path, headers=headers, media_type=media_type, method=request.method)
+
+    def iter_blob():
+        with store.open(blob_hash) as f:
+            while chunk := f.read(BLOB_STREAM_CHUNK_SIZE):
+                yield chunk
+
+    return StreamingResponse(
+        iter_blob(),
+        media_type=media_type,
+        headers={**headers, "Content-Length": str(store.size(blob_hash)), "Accept-Ranges": "none"},
+    )
@@ -0,0 +1,81 @@
+"""
+Helpers for conditional GET requests (ETag / If-None-Match, Last-Modified / If-Modified-Since).
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+
+# Clients may keep a copy but have to revalidate it on every use (a cheap 304 if it did not change)
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def _strip_weak(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    True if the request's If-None-Match covers etag.
+    If-None-Match uses the weak comparison (RFC 9110, 13.1.2), so W/ prefixes are ignored.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    etag = _strip_weak(etag)
+    return any(_strip_weak(candidate.strip()) == etag for candidate in header.split(","))
+
+
+def not_modified(etag: str, headers: dict = None) -> Response:
+    """304 response, repeating the validator and cache headers of the full response"""
+    return Response(status_code=304, headers={**(headers or {}), "ETag": etag})
+
+
+def weak_etag(parts: Iterable) -> str:
+    """Weak ETag over the string form of parts, e.g. (id, version) pairs of the rows in a response"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Naive timestamps from the database are UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def latest(timestamps: Iterable[Optional[datetime]]) -> Optional[datetime]:
+    """Most recent of the given timestamps, None if there is none"""
+    values = [_as_utc(value) for value in timestamps if value is not None]
+    return max(values) if values else None
+
+
+def check_not_modified(request: Request, response: Response, etag: str,
+                       last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """
+    Set the validators on response and return a 304 response if the client's copy is still current.
+    If-None-Match takes precedence, If-Modified-Since is only evaluated without it (RFC 9110, 13.2.2).
+    Call it before loading the heavy parts of the response.
+    """
+    headers = {"Cache-Control": REVALIDATE_CACHE_CONTROL}
+    if last_modified is not None:
+        last_modified = _as_utc(last_modified).replace(microsecond=0)
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if request.headers.get("if-none-match"):
+        current = etag_matches(request, etag)
+    else:
+        current = False
+        since = request.headers.get("if-modified-since")
+        if since and last_modified is not None:
+            try:
+                current = last_modified <= _as_utc(parsedate_to_datetime(since))
+            except (TypeError, ValueError):
+                current = False
+
+    if current:
+        return not_modified(etag, headers)
+    response.headers.update({**headers, "ETag": etag})
+    return None
@@ -0,0 +1,58 @@
+"""
+Keyset (cursor) pagination over (created_at, id), newest first.
+
+A page ends with a cursor for the position of its last row. The next page starts strictly after that position,
+so it takes one index range scan however deep it is, and rows inserted in the meantime don't shift it
+(unlike OFFSET). Cursors are opaque to clients: urlsafe base64 of the JSON encoded position.
+Rows without created_at sort last (NULL is the smallest value on MySQL and SQLite).
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import and_, or_
+
+# Position of a row in the listing: (created_at, id)
+Keyset = Tuple[Optional[datetime], Any]
+
+# Response header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: Optional[datetime], row_id: Any) -> str:
+    """Opaque cursor for the position after a row"""
+    data = json.dumps([created_at.isoformat() if created_at else None, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Keyset:
+    """Position of a cursor from encode_cursor, raises HTTPException (400) if it is malformed"""
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return (datetime.fromisoformat(created_at) if created_at is not None else None), row_id
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def after_keyset(created_column, id_column, after: Keyset):
+    """Filter for the rows after position in the (created_at DESC, id DESC) order"""
+    created_at, row_id = after
+    if created_at is None:
+        return and_(created_column.is_(None), id_column < row_id)
+    return or_(
+        created_column < created_at,
+        and_(created_column == created_at, id_column < row_id),
+        created_column.is_(None),
+    )
+
+
+def set_next_cursor(response: Response, rows: Sequence, limit: int, keyset) -> None:
+    """
+    Set the next page cursor header if the page is full.
+    keyset maps the last row to its (created_at, id) position.
+    """
+    if rows and len(rows) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*keyset(rows[-1]))
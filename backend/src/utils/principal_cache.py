@@ -0,0 +1,144 @@
+"""
+Short lived in-process caches for the authentication hot path.
+
+Every authenticated request used to decode and verify the JWT and load the user row. Page loads fan out
+into many API calls with the same cookie, so both results are cached for a few seconds:
+
+- token -> user id of the verified claims (never longer than the token itself is valid)
+- user id -> Principal (id, is_active, is_admin, is_subscribed), only active users are cached
+
+The caches live per worker process. update_user / delete_user invalidate the principal locally,
+other workers pick up the change once the entry expires (PRINCIPAL_CACHE_TTL_SECONDS).
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from ..config.settings import PRINCIPAL_CACHE_MAX_ENTRIES, PRINCIPAL_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The parts of a user that authorization checks need"""
+    id: str
+    is_active: bool
+    is_admin: bool
+    is_subscribed: bool
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=str(user.id),
+            is_active=bool(user.is_active),
+            is_admin=bool(user.is_admin),
+            is_subscribed=bool(user.is_subscribed),
+        )
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire after a time to live. Thread safe."""
+
+    def __init__(self, name: str, ttl_seconds: float, max_entries: int, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key) -> Optional[Any]:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl_seconds: Optional[float] = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+token_cache = TTLCache("token", PRINCIPAL_CACHE_TTL_SECONDS, PRINCIPAL_CACHE_MAX_ENTRIES)
+principal_cache = TTLCache("principal", PRINCIPAL_CACHE_TTL_SECONDS, PRINCIPAL_CACHE_MAX_ENTRIES)
+
+
+def user_id_for_token(token: str, verify: Callable[[str], dict]) -> str:
+    """User id of a token, verify(token) -> claims is only called on a cache miss (and raises for bad tokens)."""
+    user_id = token_cache.get(token)
+    if user_id is None:
+        claims = verify(token)
+        user_id = str(claims["user_id"])
+        ttl = PRINCIPAL_CACHE_TTL_SECONDS
+        if claims.get("exp") is not None:
+            ttl = min(ttl, float(claims["exp"]) - time.time())
+        token_cache.set(token, user_id, ttl)
+    return user_id
+
+
+def get_principal(user_id: str) -> Optional[Principal]:
+    return principal_cache.get(str(user_id))
+
+
+def remember_user(user) -> Principal:
+    """Principal of a freshly loaded user, cached if the user is active"""
+    principal = Principal.from_user(user)
+    if principal.is_active:
+        principal_cache.set(principal.id, principal)
+    return principal
+
+
+def invalidate_user(user_id: str):
+    """Drop the cached principal after the user was updated, deactivated or deleted"""
+    principal_cache.pop(str(user_id))
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    return {cache.name: cache.stats() for cache in (token_cache, principal_cache)}
+
+
+def log_stats():
+    """Report the hit rates (scheduled, see core.lifespan)"""
+    for name, cache_stats in stats().items():
+        logger.info("Auth %s cache: hit rate %s (%s hits, %s misses, %s evictions, %s entries)",
+                    name, cache_stats["hit_rate"], cache_stats["hits"], cache_stats["misses"],
+                    cache_stats["evictions"], cache_stats["size"])
@@ -0,0 +1,182 @@
+"""
+Streaming multipart upload handling.
+The request body is parsed while it arrives and the file part is written chunk by chunk into a BlobWriter,
+so an upload never sits in memory (or in a spooled temporary file) as a whole. The size limit is checked
+against Content-Length before anything is read and against the running byte count while streaming.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from fastapi import HTTPException, Request, status
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from ..services.blob_store import BlobTooLargeError, BlobWriter
+
+# Allowance for the multipart boundaries, part headers and small form fields around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+@dataclass
+class StreamedUpload:
+    filename: str
+    content_type: str
+    blob_hash: str
+    size: int
+
+
+def upload_openapi(field_name: str = "file") -> dict:
+    """
+    openapi_extra of an endpoint that reads its body with stream_upload. The body is no FastAPI parameter,
+    so the multipart file field and the 413 answer are documented here.
+    """
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"multipart/form-data": {"schema": {
+                "type": "object",
+                "required": [field_name],
+                "properties": {field_name: {"type": "string", "format": "binary"}},
+            }}},
+        },
+        "responses": {"413": {"description": "File too large"}},
+    }
+
+
+def _decode(value: bytes) -> str:
+    try:
+        return value.decode("utf-8")
+    except UnicodeDecodeError:
+        return value.decode("latin-1")
+
+
+def _too_large(max_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large. Maximum size: {max_size // (1024 * 1024)} MB"
+    )
+
+
+class _FilePartCollector:
+    """python-multipart callbacks that pick the file field and collect its data of the current chunk"""
+
+    def __init__(self, field_name: str, accept: Optional[Callable[[str, str], None]]):
+        self.field_name = field_name
+        self.accept = accept
+        self.filename: Optional[str] = None
+        self.content_type = ""
+        self.pending: List[bytes] = []
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_file = False
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        is_file = b"filename" in options and _decode(options.get(b"name", b"")) == self.field_name
+        if not is_file or self.filename is not None:
+            return
+        self.filename = _decode(options[b"filename"])
+        self.content_type = _decode(self._headers.get(b"content-type", b"application/octet-stream"))
+        if self.accept is not None:
+            # Reject the file by its name and type before any of its data is stored
+            self.accept(self.filename, self.content_type)
+        self._in_file = True
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self.pending.append(data[start:end])
+
+    def on_part_end(self):
+        self._in_file = False
+
+
+async def stream_upload(request: Request, writer: BlobWriter, field_name: str = "file",
+                        accept: Optional[Callable[[str, str], None]] = None) -> StreamedUpload:
+    """
+    Stream the file field of a multipart/form-data request into writer and commit it.
+    accept(filename, content_type) may raise an HTTPException to reject the file before its data is read.
+    The writer's max_size is the upload limit, crossing it aborts the upload with 413.
+    """
+    max_size = writer.max_size
+    with writer:
+        content_length = request.headers.get("content-length")
+        if max_size is not None and content_length and content_length.isdigit() \
+                and int(content_length) > max_size + MULTIPART_OVERHEAD:
+            raise _too_large(max_size)
+
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        boundary = params.get(b"boundary")
+        if content_type != b"multipart/form-data" or not boundary:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Expected a multipart/form-data upload"
+            )
+
+        collector = _FilePartCollector(field_name, accept)
+        parser = MultipartParser(boundary, collector.callbacks())
+        received = 0
+        try:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if max_size is not None and received > max_size + MULTIPART_OVERHEAD:
+                    raise BlobTooLargeError(max_size)
+                parser.write(chunk)
+                if collector.pending:
+                    data = b"".join(collector.pending)
+                    collector.pending.clear()
+                    await asyncio.to_thread(writer.write, data)
+            parser.finalize()
+        except BlobTooLargeError:
+            raise _too_large(max_size)
+        except MultipartParseError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Malformed multipart body"
+            )
+
+        if collector.filename is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Missing file field '{field_name}'"
+            )
+        if writer.size == 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Empty file not allowed"
+            )
+
+        blob_hash, size = await asyncio.to_thread(writer.commit)
+
+    return StreamedUpload(
+        filename=collector.filename,
+        content_type=collector.content_type,
+        blob_hash=blob_hash,
+        size=size,
+    )
@@ -0,0 +1,48 @@
+"""Counts the SQL statements an engine executes, for tests that pin the number of queries of an endpoint."""
+from contextlib import contextmanager
+from typing import List
+
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """
+    Records the statements executed on an engine while active (sync engines, or AsyncEngine.sync_engine).
+
+        with QueryCounter(engine) as queries:
+            ...
+        assert queries.count <= 2, queries
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements: List[str] = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __enter__(self) -> "QueryCounter":
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    def __repr__(self):
+        return f"{self.count} queries:\n" + "\n".join(f"  {i}. {s}" for i, s in enumerate(self.statements, 1))
+
+
+class QueryCountMixin:
+    """assertMaxQueries for unittest.TestCase classes that set self.query_engine"""
+
+    @contextmanager
+    def assertMaxQueries(self, limit: int):
+        with QueryCounter(self.query_engine) as queries:
+            yield queries
+        if queries.count > limit:
+            self.fail(f"Expected at most {limit} queries, got {queries!r}")
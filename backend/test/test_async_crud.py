@@ -0,0 +1,116 @@
+import unittest
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from ..src.api.schemas.statistics import UsagePost
+from ..src.db.database import Base
+from ..src.db.models import db_chat, db_course, db_file, db_note, db_statistics, db_usage, db_user  # noqa: F401
+from ..src.db.models.db_course import Chapter, Course, PracticeQuestion
+from ..src.db.models.db_note import Note
+from ..src.db.models.db_statistics import LearnTimeTotal
+from ..src.db.models.db_user import User
+from ..src.db.crud import chapters_crud, courses_crud, notes_crud, questions_crud, usage_crud
+from ..src.db.crud.aio import chapters_crud as async_chapters_crud
+from ..src.db.crud.aio import courses_crud as async_courses_crud
+from ..src.db.crud.aio import notes_crud as async_notes_crud
+from ..src.db.crud.aio import questions_crud as async_questions_crud
+from ..src.db.crud.aio import usage_crud as async_usage_crud
+from ..src.db.crud.aio import users_crud as async_users_crud
+
+
+class TestAsyncCrud(unittest.IsolatedAsyncioTestCase):
+    """The async CRUD variants (aiosqlite) return the same data as the sync ones"""
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.Session = async_sessionmaker(self.engine, autoflush=False, expire_on_commit=False)
+
+        async with self.Session() as db:
+            db.add(User(id="u1", username="alice", email="alice@example.com", hashed_password="x"))
+            db.add(User(id="u2", username="bob", email="bob@example.com", hashed_password="x", is_active=False))
+            db.add(Course(id=1, user_id="u1", query="q", total_time_hours=1, language="English",
+                          difficulty="Beginner", title="Course", is_public=True))
+            db.add(Chapter(id=1, course_id=1, index=1, caption="One", summary="s", content="C" * 1000,
+                           time_minutes=5, image_url="", is_completed=True))
+            db.add(Chapter(id=2, course_id=1, index=2, caption="Two", summary="s", content="D",
+                           time_minutes=5, image_url=""))
+            db.add(PracticeQuestion(id=1, chapter_id=1, type="OT", question="?", correct_answer="!"))
+            db.add(Note(id=1, course_id=1, chapter_id=1, user_id="u1", text="note"))
+            await db.commit()
+        self.db = self.Session()
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        await self.engine.dispose()
+
+    async def _sync(self, fn, *args, **kwargs):
+        """Run a sync CRUD function on the same in-memory database"""
+        def call(connection):
+            with sessionmaker(bind=connection)() as db:
+                return fn(db, *args, **kwargs)
+        async with self.engine.connect() as conn:
+            return await conn.run_sync(call)
+
+    async def test_users(self):
+        self.assertEqual((await async_users_crud.get_user_by_id(self.db, "u2")).username, "bob")
+        self.assertIsNotNone(await async_users_crud.get_active_user_by_id(self.db, "u1"))
+        self.assertIsNone(await async_users_crud.get_active_user_by_id(self.db, "u2"))
+
+    async def test_course_infos_match_sync(self):
+        infos = await async_courses_crud.get_courses_infos(self.db, "u1")
+        self.assertEqual(infos, await self._sync(courses_crud.get_courses_infos, "u1"))
+        self.assertEqual(infos[0].completed_chapter_count, 1)
+
+        public = await async_courses_crud.get_public_courses_infos(self.db, user_id="")
+        self.assertEqual(public, await self._sync(courses_crud.get_public_courses_infos, ""))
+        self.assertEqual(public[0].user_name, "alice")
+        self.assertEqual(await async_courses_crud.get_course_count_by_user_id(self.db, "u1"), 1)
+
+    async def test_chapters(self):
+        versions = await async_chapters_crud.get_chapter_versions(self.db, 1)
+        self.assertEqual(versions, [tuple(v) for v in await self._sync(chapters_crud.get_chapter_versions, 1)])
+        self.assertEqual(await async_chapters_crud.get_completed_chapters_count(self.db, 1), 1)
+
+        chapter = await async_chapters_crud.get_chapter_by_course_id_and_chapter_id(self.db, 1, 1)
+        self.assertNotIn("content", chapter.__dict__)  # deferred, async never lazy loads
+        await async_chapters_crud.load_content(self.db, chapter)
+        self.assertEqual(chapter.content, "C" * 1000)
+
+        chapters = await async_chapters_crud.get_chapters_by_course_id(self.db, 1, with_content=True)
+        self.assertEqual([c.content for c in chapters], ["C" * 1000, "D"])
+
+        updated = await async_chapters_crud.mark_chapter_complete(self.db, 2)
+        self.assertTrue(updated.is_completed)
+        self.assertEqual(updated.version, 2)
+
+    async def test_questions_and_notes(self):
+        self.assertEqual([q.id for q in await async_questions_crud.get_questions_by_chapter_id(self.db, 1)], [1])
+        self.assertEqual(await async_questions_crud.get_question_versions(self.db, 1),
+                         [tuple(v) for v in await self._sync(questions_crud.get_question_versions, 1)])
+
+        versions = await async_notes_crud.get_note_versions(self.db, 1, 1, "u1")
+        self.assertEqual(versions, [tuple(v) for v in await self._sync(notes_crud.get_note_versions, 1, 1, "u1")])
+        note = await async_notes_crud.create_note(self.db, 1, 1, "u1", "second")
+        await async_notes_crud.update_note(self.db, note, "changed")
+        self.assertEqual([n.text for n in await async_notes_crud.get_notes_by_chapter(self.db, 1, 1, "u1")],
+                         ["note", "changed"])
+        await async_notes_crud.delete_note(self.db, note)
+        self.assertIsNone(await async_notes_crud.get_note_by_id(self.db, note.id))
+
+    async def test_usage(self):
+        await async_usage_crud.log_site_usage(self.db, UsagePost(user_id="u1", course_id=1, chapter_id=1,
+                                                                 url="/x", visible=True))
+        await async_usage_crud.log_usage(self.db, "u1", "create_course", course_id=1)
+        self.db.add(LearnTimeTotal(user_id="u1", seconds=630))
+        await self.db.commit()
+        self.assertEqual(await async_usage_crud.get_total_time_spent_on_chapters(self.db, "u1"), 10)
+        self.assertEqual(await self._sync(usage_crud.get_total_time_spent_on_chapters, "u1"), 10)
+        self.assertEqual(await async_usage_crud.get_total_created_courses(self.db, "u1"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import re
+import unittest
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from ..src.db.database import Base
+from ..src.db.models import db_chat, db_course, db_file, db_note, db_usage, db_user  # noqa: F401 (register all tables)
+from ..src.db.models.db_course import Chapter, Course
+from ..src.db.models.db_file import Document, Image
+from ..src.db.models.db_user import User
+from ..src.db.crud import chapters_crud, documents_crud, images_crud, users_crud
+
+LARGE_COLUMNS = ("file_data", "image_data", "content", "profile_image_base64")
+LARGE_SIZE = 2 * 1024 * 1024
+
+
+class TestDeferredColumns(unittest.TestCase):
+    """Listing and ownership queries must not fetch the large blob/text columns"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=cls.engine)
+        cls.Session = sessionmaker(bind=cls.engine, autoflush=False)
+
+        with cls.Session() as db:
+            db.add(User(id="u1", username="alice", email="alice@example.com", hashed_password="x",
+                        profile_image_base64="A" * LARGE_SIZE))
+            db.add(Course(id=1, user_id="u1", query="q", total_time_hours=1, language="English", difficulty="Beginner"))
+            db.add(Chapter(id=1, course_id=1, index=1, caption="Intro", summary="s", content="C" * LARGE_SIZE,
+                           time_minutes=5, image_url=""))
+            db.add(Document(id=1, user_id="u1", course_id=1, filename="a.pdf", content_type="application/pdf",
+                            file_data=b"D" * LARGE_SIZE))
+            db.add(Image(id=1, user_id="u1", course_id=1, filename="a.png", content_type="image/png",
+                         image_data=b"I" * LARGE_SIZE))
+            db.commit()
+
+    def setUp(self):
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._record_statement)
+        self.db = self.Session()
+
+    def tearDown(self):
+        self.db.close()
+        event.remove(self.engine, "before_cursor_execute", self._record_statement)
+
+    def _record_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def _selected_large_columns(self):
+        """Large columns that appear in the select list of any recorded statement"""
+        found = set()
+        for statement in self.statements:
+            select_list = statement.split(" FROM ", 1)[0]
+            found.update(column for column in LARGE_COLUMNS if re.search(rf"\.{column}\b", select_list))
+        return found
+
+    def _row_size(self, obj) -> int:
+        """Bytes of the column values currently loaded on an instance"""
+        return sum(len(value) for value in obj.__dict__.values() if isinstance(value, (bytes, str)))
+
+    def test_document_and_image_listings_skip_data(self):
+        documents = documents_crud.get_documents_by_course_id(self.db, 1)
+        documents += documents_crud.get_documents_by_user_id(self.db, "u1")
+        images = images_crud.get_images_by_course_id(self.db, 1)
+        images += images_crud.get_images_by_user_id(self.db, "u1")
+
+        self.assertEqual(self._selected_large_columns(), set())
+        for row in documents + images:
+            self.assertLess(self._row_size(row), 1024)
+
+    def test_ownership_check_skips_data(self):
+        document = self.db.query(Document).filter(Document.id == 1, Document.user_id == "u1").first()
+        image = self.db.query(Image).filter(Image.id == 1, Image.user_id == "u1").first()
+
+        self.assertIsNotNone(document)
+        self.assertIsNotNone(image)
+        self.assertEqual(self._selected_large_columns(), set())
+
+    def test_chapter_listing_skips_content_unless_requested(self):
+        chapters = chapters_crud.get_chapters_by_course_id(self.db, 1)
+        self.assertEqual(self._selected_large_columns(), set())
+        self.assertLess(self._row_size(chapters[0]), 1024)
+
+        self.db.expunge_all()
+        chapters = chapters_crud.get_chapters_by_course_id(self.db, 1, with_content=True)
+        self.assertEqual(len(chapters[0].__dict__["content"]), LARGE_SIZE)
+
+    def test_user_lookup_skips_profile_image(self):
+        user = users_crud.get_active_user_by_id(self.db, "u1")
+        self.assertEqual(self._selected_large_columns(), set())
+        self.assertLess(self._row_size(user), 1024)
+
+    def test_deferred_column_loads_on_access(self):
+        document = documents_crud.get_document_by_id(self.db, 1)
+        statements_before = len(self.statements)
+
+        self.assertEqual(len(document.file_data), LARGE_SIZE)
+        self.assertEqual(len(self.statements), statements_before + 1)
+
+    def test_with_data_loads_in_one_query(self):
+        documents = documents_crud.get_documents_by_ids(self.db, [1], with_data=True)
+        images = images_crud.get_images_by_ids(self.db, [1], with_data=True)
+
+        self.assertEqual(len(self.statements), 2)
+        self.assertEqual(len(documents[0].__dict__["file_data"]), LARGE_SIZE)
+        self.assertEqual(len(images[0].__dict__["image_data"]), LARGE_SIZE)
+
+
+if __name__ == "__main__":
+    unittest.main()
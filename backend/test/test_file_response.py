@@ -0,0 +1,65 @@
+import inspect
+import os
+import tempfile
+import unittest
+
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse
+from fastapi.testclient import TestClient
+
+from ..src.utils.file_response import BlobFileResponse
+
+
+class TestBlobFileResponse(unittest.TestCase):
+    """
+    BlobFileResponse overrides FileResponse._handle_multiple_ranges, a private Starlette hook.
+    Starlette is pinned in requirements.txt, these tests fail if an upgrade removes or reshapes the hook.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "blob")
+        with open(self.path, "wb") as f:
+            f.write(bytes(range(100)))
+
+        app = FastAPI()
+
+        @app.get("/blob")
+        def get_blob(request: Request):
+            return BlobFileResponse(self.path, media_type="application/octet-stream", method=request.method)
+
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        self.client.close()
+        self.tmp.cleanup()
+
+    def test_private_hook_is_still_called_with_the_same_signature(self):
+        def parameters(method):
+            return [(name, parameter.kind) for name, parameter in inspect.signature(method).parameters.items()]
+
+        self.assertEqual(parameters(FileResponse._handle_multiple_ranges),
+                         parameters(BlobFileResponse._handle_multiple_ranges))
+        self.assertIn("self._handle_multiple_ranges(", inspect.getsource(FileResponse.__call__))
+
+    def test_multiple_ranges(self):
+        response = self.client.get("/blob", headers={"Range": "bytes=0-9,-5"})
+
+        self.assertEqual(response.status_code, 206)
+        content_type = response.headers["content-type"]
+        self.assertTrue(content_type.startswith("multipart/byteranges; boundary="))
+        self.assertNotIn("content-range", response.headers)
+        self.assertEqual(int(response.headers["content-length"]), len(response.content))
+
+        boundary = content_type.split("boundary=")[1]
+        self.assertEqual(response.content, (
+            f"--{boundary}\r\nContent-Type: application/octet-stream\r\nContent-Range: bytes 0-9/100\r\n\r\n".encode()
+            + bytes(range(10)) + b"\r\n"
+            + f"--{boundary}\r\nContent-Type: application/octet-stream\r\nContent-Range: bytes 95-99/100\r\n\r\n".encode()
+            + bytes(range(95, 100)) + b"\r\n"
+            + f"--{boundary}--\r\n".encode()
+        ))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from PIL import Image
+
+from ..src.services import image_variant_service
+from ..src.services.image_variant_service import UnsupportedImageError
+
+
+def _png(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "red").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TestRenderVariant(unittest.TestCase):
+    """_render_variant runs in the worker process, called directly here"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dest = os.path.join(self.tmp.name, "variant")
+
+    def test_resizes(self):
+        image_variant_service._render_variant(_png(300, 100), self.dest, 128, "webp")
+        with Image.open(self.dest) as variant:
+            self.assertEqual((variant.format, variant.size), ("WEBP", (128, 43)))
+
+    def test_not_an_image(self):
+        with self.assertRaises(UnsupportedImageError):
+            image_variant_service._render_variant(b"not an image", self.dest, 128, "webp")
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_decompression_bomb(self):
+        # More than twice the pixel limit is refused when the header is read, before decoding
+        with patch.object(Image, "MAX_IMAGE_PIXELS", 100):
+            with self.assertRaises(UnsupportedImageError):
+                image_variant_service._render_variant(_png(20, 20), self.dest, 128, "webp")
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from ..src.db.database import Base
+from ..src.db.models import db_chat, db_course, db_file, db_note, db_statistics, db_usage, db_user  # noqa: F401
+from ..src.db.models.db_course import Course
+from ..src.db.models.db_user import User
+from ..src.db.crud import courses_crud, usage_crud, users_crud
+from ..src.utils.pagination import decode_cursor, encode_cursor
+
+START = datetime(2026, 1, 1, 12, 0)
+
+
+class TestKeysetPagination(unittest.TestCase):
+    """Cursor pages cover every row once, newest first, and don't shift when rows are added"""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine, autoflush=False)()
+        # Users 0-4 with distinct timestamps, 5 and 6 without one (sorted last)
+        self.db.add_all([User(id=f"u{i}", username=f"u{i}", email=f"u{i}@example.com", hashed_password="x",
+                              created_at=START + timedelta(days=i)) for i in range(7)])
+        # Pairs of courses share a timestamp, id decides
+        self.db.add_all([Course(id=i, user_id="u0", query="q", total_time_hours=1, language="en", difficulty="easy",
+                                title=f"Course {i}", is_public=i % 3 != 0, created_at=START + timedelta(hours=i // 2))
+                         for i in range(1, 10)])
+        self.db.commit()
+        # Accounts from before created_at was set (the column default replaces an explicit None on insert)
+        self.db.query(User).filter(User.id.in_(["u5", "u6"])).update({User.created_at: None})
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def _pages(self, fetch, keyset, limit=2):
+        pages, after = [], None
+        while True:
+            page = fetch(limit, after)
+            pages.append(page)
+            if len(page) < limit:
+                return pages
+            # Through the opaque cursor, like a client
+            after = decode_cursor(encode_cursor(*keyset(page[-1])))
+
+    def test_courses(self):
+        pages = self._pages(lambda limit, after: courses_crud.get_courses_infos(self.db, "u0", limit=limit, after=after),
+                            lambda course: (course.created_at, course.course_id))
+        self.assertEqual([course.course_id for page in pages for course in page], list(range(9, 0, -1)))
+        offset = courses_crud.get_courses_infos(self.db, "u0", skip=2, limit=2)
+        self.assertEqual([course.course_id for course in offset], [7, 6])
+
+        public = self._pages(lambda limit, after: courses_crud.get_public_courses_infos(self.db, "", limit=limit,
+                                                                                       after=after),
+                             lambda course: (course.created_at, course.course_id), limit=4)
+        self.assertEqual([course.course_id for page in public for course in page], [8, 7, 5, 4, 2, 1])
+
+    def test_insert_does_not_shift_pages(self):
+        first = courses_crud.get_courses_infos(self.db, "u0", limit=3)
+        after = (first[-1].created_at, first[-1].course_id)
+        self.db.add(Course(id=10, user_id="u0", query="q", total_time_hours=1, language="en", difficulty="easy",
+                           title="New", created_at=START + timedelta(days=1)))
+        self.db.commit()
+        second = courses_crud.get_courses_infos(self.db, "u0", limit=3, after=after)
+        self.assertEqual([course.course_id for course in second], [6, 5, 4])
+
+    def test_users_with_missing_timestamps(self):
+        pages = self._pages(lambda limit, after: users_crud.get_users(self.db, limit=limit, after=after),
+                            lambda user: (user.created_at, user.id), limit=3)
+        self.assertEqual([user.id for page in pages for user in page], ["u4", "u3", "u2", "u1", "u0", "u6", "u5"])
+
+        rows = self._pages(lambda limit, after: usage_crud.get_user_with_total_usage_time(self.db, limit=limit,
+                                                                                         after=after),
+                           lambda row: (row["user"].created_at, row["user"].id), limit=4)
+        self.assertEqual([row["user"].id for page in rows for row in page], ["u4", "u3", "u2", "u1", "u0", "u6", "u5"])
+
+    def test_invalid_cursor(self):
+        for cursor in ("not a cursor", "bnVsbA", encode_cursor(None, 1)[:-2]):
+            with self.assertRaises(HTTPException) as raised:
+                decode_cursor(cursor)
+            self.assertEqual(raised.exception.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from fastapi import HTTPException, Response
+from passlib.context import CryptContext
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from ..src.core import password_hashing, security
+from ..src.db.database import Base
+from ..src.db.models import db_chat, db_course, db_file, db_note, db_statistics, db_usage, db_user  # noqa: F401
+from ..src.db.models.db_user import User
+from ..src.services import auth_service, usage_writer
+
+# Cheap rounds, the current policy is one round above the stored hashes
+CURRENT_CONTEXT = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5, bcrypt__min_rounds=5)
+OUTDATED_HASH = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("secret")
+
+
+class TestHashingPool(unittest.TestCase):
+    """The bounded pool answers with 503 instead of queueing without limit"""
+
+    def tearDown(self):
+        password_hashing.shutdown_pool()
+
+    def test_rejects_when_overloaded(self):
+        release = threading.Event()
+
+        def slow_verify(plain_password, hashed_password):
+            release.wait(5)
+            return True, None
+
+        async def scenario():
+            first = asyncio.create_task(password_hashing.verify_password("secret", "hash"))
+            while password_hashing.pending() == 0:
+                await asyncio.sleep(0.01)
+            with self.assertRaises(HTTPException) as raised:
+                await password_hashing.verify_password("secret", "hash")
+            release.set()
+            self.assertEqual(await first, (True, None))
+            return raised.exception
+
+        with patch.object(password_hashing, "PASSWORD_HASH_MAX_PENDING", 1), \
+                patch.object(security, "verify_and_update_password", slow_verify):
+            error = asyncio.run(scenario())
+
+        self.assertEqual(error.status_code, 503)
+        self.assertEqual(error.headers["Retry-After"], "1")
+        self.assertEqual(password_hashing.pending(), 0)
+
+    def test_verify_in_the_pool(self):
+        with patch.object(security, "pwd_context", CURRENT_CONTEXT):
+            hashed = asyncio.run(password_hashing.hash_password("secret"))
+            self.assertEqual(asyncio.run(password_hashing.verify_password("secret", hashed)), (True, None))
+            self.assertEqual(asyncio.run(password_hashing.verify_password("wrong", hashed)), (False, None))
+            self.assertEqual(asyncio.run(password_hashing.verify_password("secret", None)), (False, None))
+
+
+class TestLoginRehash(unittest.TestCase):
+    """Outdated hashes are replaced on login, but only for active users"""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine, autoflush=False)()
+        self.db.add_all([
+            User(id="u1", username="alice", email="alice@example.com", hashed_password=OUTDATED_HASH),
+            User(id="u2", username="bob", email="bob@example.com", hashed_password=OUTDATED_HASH, is_active=False),
+        ])
+        self.db.commit()
+        for patcher in (patch.object(security, "pwd_context", CURRENT_CONTEXT),
+                        patch.object(usage_writer, "log_login")):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        password_hashing.shutdown_pool()
+        self.db.close()
+        self.engine.dispose()
+
+    def _login(self, username, password="secret"):
+        form = SimpleNamespace(username=username, password=password)
+        return asyncio.run(auth_service.login_user(form, self.db, Response()))
+
+    def test_outdated_hash_is_replaced(self):
+        self.assertEqual(self._login("alice").status, "success")
+        user = self.db.get(User, "u1")
+        self.assertNotEqual(user.hashed_password, OUTDATED_HASH)
+        self.assertFalse(CURRENT_CONTEXT.needs_update(user.hashed_password))
+        self.assertEqual(self._login("alice@example.com").status, "success")
+
+    def test_wrong_password_keeps_the_hash(self):
+        with self.assertRaises(HTTPException) as raised:
+            self._login("alice", "wrong")
+        self.assertEqual(raised.exception.status_code, 401)
+        self.assertEqual(self.db.get(User, "u1").hashed_password, OUTDATED_HASH)
+
+    def test_inactive_user_is_not_rehashed(self):
+        with self.assertRaises(HTTPException) as raised:
+            self._login("bob")
+        self.assertEqual(raised.exception.status_code, 400)
+        self.assertEqual(self.db.get(User, "u2").hashed_password, OUTDATED_HASH)
+
+
+if __name__ == "__main__":
+    unittest.main()
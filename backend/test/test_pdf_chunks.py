@@ -0,0 +1,123 @@
+import re
+import unittest
+
+import fitz
+
+from ..src.services.data_processors.pdf_processor import PDFProcessor, count_tokens
+
+
+def _pdf(*pages) -> bytes:
+    """A PDF with one page per argument, each a list of paragraphs (text blocks)"""
+    doc = fitz.open()
+    for paragraphs in pages:
+        page = doc.new_page()
+        y = 100
+        for paragraph in paragraphs:
+            rect = fitz.Rect(72, y, 520, y + 120)
+            assert page.insert_textbox(rect, paragraph, fontsize=10) >= 0, "paragraph does not fit its box"
+            y += 130
+        page.insert_text((300, 820), str(doc.page_count), fontsize=9)  # page number in the footer
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _words(start, count, sentence_length=None):
+    """Numbered words w<start>.., a period after every sentence_length words"""
+    words = []
+    for i in range(start, start + count):
+        words.append(f"w{i}")
+        if sentence_length and (i - start + 1) % sentence_length == 0:
+            words[-1] += "."
+    return " ".join(words)
+
+
+def _numbers(text):
+    return [int(n) for n in re.findall(r"\bw(\d+)", text)]
+
+
+class TestIterChunks(unittest.TestCase):
+
+    def setUp(self):
+        self.processor = PDFProcessor()
+
+    def _chunks(self, data, max_tokens, overlap_tokens):
+        chunks = list(self.processor.iter_chunks(data, max_tokens=max_tokens, overlap_tokens=overlap_tokens))
+        self.assertEqual([chunk["chunk_index"] for chunk in chunks], list(range(len(chunks))))
+        for chunk in chunks:
+            self.assertEqual(chunk["token_count"], count_tokens(chunk["text"]))
+            self.assertLessEqual(chunk["token_count"], max_tokens)
+        return chunks
+
+    def test_paragraph_cut_by_a_page_break_is_joined(self):
+        data = _pdf(["First paragraph ends here.", "The second paragraph continues on"],
+                    ["the next page without a break.", "Another paragraph."])
+        chunks = self._chunks(data, max_tokens=100, overlap_tokens=10)
+
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual((chunks[0]["page_start"], chunks[0]["page_end"]), (1, 2))
+        self.assertEqual(chunks[0]["text"].split("\n"), [
+            "First paragraph ends here.",
+            "The second paragraph continues on the next page without a break.",
+            "Another paragraph.",
+        ])  # and the page numbers in the footer are dropped
+
+    def test_chunks_span_pages(self):
+        # Paragraphs of 9 tokens, two per chunk
+        data = _pdf([_words(i * 8, 8, 8) for i in range(3)], [_words(24 + i * 8, 8, 8) for i in range(3)])
+        chunks = self._chunks(data, max_tokens=20, overlap_tokens=0)
+
+        self.assertEqual([(chunk["page_start"], chunk["page_end"]) for chunk in chunks], [(1, 1), (1, 2), (2, 2)])
+        self.assertEqual([n for chunk in chunks for n in _numbers(chunk["text"])], list(range(48)))
+
+    def test_chunk_after_a_page_break_starts_on_its_page(self):
+        data = _pdf([_words(0, 8, 8), _words(8, 8, 8)], [_words(16, 8, 8), _words(24, 8, 8)])
+        chunks = self._chunks(data, max_tokens=20, overlap_tokens=0)
+        self.assertEqual([(chunk["page_start"], chunk["page_end"]) for chunk in chunks], [(1, 1), (2, 2)])
+
+        # With overlap it starts on the page the overlap comes from
+        chunks = self._chunks(data, max_tokens=20, overlap_tokens=2)
+        self.assertEqual([(chunk["page_start"], chunk["page_end"]) for chunk in chunks], [(1, 1), (1, 2)])
+
+    def test_overlap_is_bounded(self):
+        data = _pdf([_words(i * 10, 10, 10) for i in range(4)], [_words(40 + i * 10, 10, 10) for i in range(4)])
+        chunks = self._chunks(data, max_tokens=25, overlap_tokens=6)
+        self.assertGreater(len(chunks), 3)
+
+        for previous, chunk in zip(chunks, chunks[1:]):
+            # The next chunk starts with the last words of the previous one, at most overlap_tokens of them
+            overlap = chunk["text"].split("\n")[0]
+            self.assertTrue(previous["text"].endswith(overlap))
+            self.assertLessEqual(count_tokens(overlap), 6)
+            self.assertGreater(count_tokens(overlap), 0)
+        self.assertEqual(sorted({n for chunk in chunks for n in _numbers(chunk["text"])}), list(range(80)))
+
+    def test_overlap_never_pushes_a_chunk_over_the_limit(self):
+        data = _pdf([_words(0, 15, 15), _words(15, 15, 15), _words(30, 15, 15)])
+        chunks = self._chunks(data, max_tokens=17, overlap_tokens=10)  # 16 tokens per paragraph
+        self.assertEqual([_numbers(chunk["text"]) for chunk in chunks],
+                         [list(range(0, 15)), list(range(15, 30)), list(range(30, 45))])
+
+    def test_oversized_paragraph_is_split_by_sentences(self):
+        data = _pdf([_words(0, 60, 6)])  # 60 words in sentences of 6 words (7 tokens)
+        chunks = self._chunks(data, max_tokens=15, overlap_tokens=0)
+
+        self.assertEqual([_numbers(chunk["text"]) for chunk in chunks],
+                         [list(range(i, i + 12)) for i in range(0, 60, 12)])
+        for chunk in chunks:
+            self.assertTrue(chunk["text"].endswith("."))
+
+    def test_oversized_sentence_is_split_by_words(self):
+        data = _pdf([_words(0, 50)])
+        chunks = self._chunks(data, max_tokens=15, overlap_tokens=0)
+
+        self.assertEqual([_numbers(chunk["text"]) for chunk in chunks],
+                         [list(range(i, min(i + 15, 50))) for i in range(0, 50, 15)])
+
+    def test_overlap_must_be_smaller_than_the_limit(self):
+        with self.assertRaises(ValueError):
+            list(self.processor.iter_chunks(_pdf(["Text."]), max_tokens=10, overlap_tokens=10))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from ..src.utils import principal_cache
+from ..src.utils.principal_cache import Principal, TTLCache
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = TTLCache("test", ttl_seconds=10, max_entries=2, clock=self.clock)
+
+    def test_entries_expire(self):
+        self.cache.set("a", 1)
+        self.clock.now += 9.9
+        self.assertEqual(self.cache.get("a"), 1)
+        self.clock.now += 0.1
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_ttl_is_capped(self):
+        self.cache.set("short", 1, ttl_seconds=2)
+        self.cache.set("long", 2, ttl_seconds=60)
+        self.clock.now += 2
+        self.assertIsNone(self.cache.get("short"))
+        self.clock.now += 7.9
+        self.assertEqual(self.cache.get("long"), 2)
+        self.clock.now += 0.1
+        self.assertIsNone(self.cache.get("long"))
+
+        self.cache.set("expired", 3, ttl_seconds=-1)  # e.g. a token that already expired
+        self.assertIsNone(self.cache.get("expired"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.assertEqual(self.cache.get("a"), 1)  # b is now the least recently used
+        self.cache.set("c", 3)
+
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual((self.cache.get("a"), self.cache.get("c")), (1, 3))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_stats(self):
+        self.cache.set("a", 1)
+        self.cache.get("a")
+        self.cache.get("missing")
+        self.assertEqual(self.cache.stats(),
+                         {"size": 1, "hits": 1, "misses": 1, "evictions": 0, "hit_rate": 0.5})
+
+
+class TestPrincipalCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        for name in ("token_cache", "principal_cache"):
+            patcher = patch.object(principal_cache, name, TTLCache(name, 10, 100, clock=self.clock))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _user(user_id="u1", is_active=True):
+        return SimpleNamespace(id=user_id, is_active=is_active, is_admin=False, is_subscribed=True, email="x")
+
+    def test_remember_and_invalidate_user(self):
+        principal = principal_cache.remember_user(self._user())
+        self.assertEqual(principal, Principal(id="u1", is_active=True, is_admin=False, is_subscribed=True))
+        self.assertEqual(principal_cache.get_principal("u1"), principal)
+
+        principal_cache.invalidate_user("u1")
+        self.assertIsNone(principal_cache.get_principal("u1"))
+
+    def test_inactive_users_are_not_cached(self):
+        self.assertFalse(principal_cache.remember_user(self._user(is_active=False)).is_active)
+        self.assertIsNone(principal_cache.get_principal("u1"))
+
+    def test_token_is_verified_once(self):
+        calls = []
+
+        def verify(token):
+            calls.append(token)
+            return {"user_id": 42}
+
+        self.assertEqual(principal_cache.user_id_for_token("token", verify), "42")
+        self.assertEqual(principal_cache.user_id_for_token("token", verify), "42")
+        self.assertEqual(calls, ["token"])
+
+        self.clock.now += 10
+        principal_cache.user_id_for_token("token", verify)
+        self.assertEqual(calls, ["token", "token"])
+
+
+if __name__ == "__main__":
+    unittest.main()
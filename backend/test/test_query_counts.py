@@ -0,0 +1,149 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from ..src.api.routers import courses, search
+from ..src.db.database import Base, get_async_db
+from ..src.db.models import db_chat, db_course, db_file, db_note, db_statistics, db_usage, db_user  # noqa: F401
+from ..src.db.models.db_course import Chapter, Course
+from ..src.db.models.db_user import User
+from ..src.services import search_index, usage_writer
+from ..src.utils.auth import get_current_active_user
+from .query_counter import QueryCountMixin
+
+
+class TestQueryCounts(QueryCountMixin, unittest.TestCase):
+    """The read endpoints of courses and search issue a fixed number of queries, however many rows they return"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, "test.db")
+        self.engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=self.engine)
+        # Every request of the TestClient runs in its own event loop, so no pooled connections
+        self.async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+        Session = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+        self.query_engine = self.async_engine.sync_engine
+
+        self.index = search_index.SQLiteSearchIndex(":memory:")
+        search_index.set_search_index(self.index)
+        search_index.track_changes()
+
+        with sessionmaker(bind=self.engine)() as db:
+            db.add_all([User(id=user_id, username=user_id, email=f"{user_id}@example.com", hashed_password="x")
+                        for user_id in ("u1", "u2")])
+            for course_id in (1, 2, 3):
+                db.add(Course(id=course_id, user_id="u1", query="q", total_time_hours=1, language="en",
+                              difficulty="easy", title=f"Course {course_id}", is_public=course_id == 1,
+                              created_at=datetime(2026, 1, course_id)))
+                db.add_all([Chapter(course_id=course_id, index=i, caption=f"Chapter {i}", summary="s",
+                                    content="() => <p>Photosynthesis</p>", time_minutes=5, image_url="",
+                                    is_completed=i < 3)
+                            for i in range(1, 6)])
+            db.commit()
+        search_index.wait_for_pending()
+
+        async def get_test_db():
+            async with Session() as db:
+                yield db
+
+        app = FastAPI()
+        app.include_router(courses.router)
+        app.include_router(search.router)
+        self.user = SimpleNamespace(id="u1")
+        app.dependency_overrides[get_async_db] = get_test_db
+        app.dependency_overrides[get_current_active_user] = lambda: self.user
+        self.client = TestClient(app)
+
+        log_search = patch.object(usage_writer, "log_search")
+        log_search.start()
+        self.addCleanup(log_search.stop)
+
+    def tearDown(self):
+        self.client.close()
+        search_index.stop_tracking_changes()
+        search_index.set_search_index(None)
+        self.index.close()
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def _get(self, url, max_queries):
+        with self.assertMaxQueries(max_queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.text)
+        return response.json()
+
+    def test_courses(self):
+        listed = self._get("/courses/", 1)
+        self.assertEqual([course["completed_chapter_count"] for course in listed], [2, 2, 2])
+        self.assertEqual(self._get("/courses/2", 1)["completed_chapter_count"], 2)
+
+    def test_course_last_modified_covers_chapters(self):
+        response = self.client.get("/courses/2")
+        last_modified = response.headers["last-modified"]
+        self.assertEqual(self.client.get("/courses/2", headers={"If-Modified-Since": last_modified}).status_code, 304)
+
+        with sessionmaker(bind=self.engine)() as db:
+            db.query(Chapter).filter(Chapter.course_id == 2, Chapter.index == 4).update({"is_completed": True})
+            db.commit()
+
+        response = self.client.get("/courses/2", headers={"If-Modified-Since": last_modified})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["completed_chapter_count"], 3)
+        self.assertNotEqual(response.headers["last-modified"], last_modified)
+
+    def test_course_cursor_pages(self):
+        with self.assertMaxQueries(1):
+            first = self.client.get("/courses/?limit=2")
+        cursor = first.headers["x-next-cursor"]
+        with self.assertMaxQueries(1):
+            second = self.client.get(f"/courses/?limit=2&cursor={cursor}")
+        self.assertEqual([course["course_id"] for course in first.json() + second.json()], [3, 2, 1])
+        self.assertNotIn("x-next-cursor", second.headers)
+        self.assertEqual(self.client.get("/courses/public?cursor=garbage").status_code, 400)
+
+    def test_chapters(self):
+        # Access check, versions (for the ETag) and the chapters with their content
+        chapters = self._get("/courses/2/chapters", 3)
+        self.assertEqual(len(chapters), 5)
+        self.assertEqual(chapters[0]["content"], "() => <p>Photosynthesis</p>")
+        chapter_id = chapters[0]["id"]
+        self.assertEqual(self._get(f"/courses/2/chapters/{chapter_id}", 3)["caption"], "Chapter 1")
+
+    def test_chapter_summaries(self):
+        # Access check and one projection that also provides the validators
+        summaries = self._get("/courses/2/chapters?view=summary", 2)
+        self.assertEqual([chapter["caption"] for chapter in summaries], [f"Chapter {i}" for i in range(1, 6)])
+        self.assertNotIn("content", summaries[0])
+        self.assertEqual(sum(chapter["is_completed"] for chapter in summaries), 2)
+
+        response = self.client.get("/courses/2/chapters?view=summary")
+        etag = response.headers["etag"]
+        self.assertNotEqual(etag, self.client.get("/courses/2/chapters").headers["etag"])
+        self.assertEqual(self.client.get("/courses/2/chapters?view=summary",
+                                         headers={"If-None-Match": etag}).status_code, 304)
+
+    def test_access_check(self):
+        self.user.id = "u2"
+        self.assertTrue(self._get("/courses/1", 1)["is_public"])
+        with self.assertMaxQueries(1):
+            self.assertEqual(self.client.get("/courses/2").status_code, 404)
+
+    def test_search_needs_no_database(self):
+        results = self._get("/search/?query=photo", 0)
+        self.assertEqual(len(results), 15)
+        self.assertEqual(self._get("/search/suggest?query=cours", 0)[0]["title"], "Course 1")
+
+
+if __name__ == "__main__":
+    unittest.main()
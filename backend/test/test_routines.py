@@ -0,0 +1,125 @@
+import os
+import tempfile
+import time
+import unittest
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from ..src.core import routines
+from ..src.db.crud import files_crud
+from ..src.db.database import Base
+from ..src.db.models import db_chat, db_course, db_file, db_note, db_statistics, db_usage, db_user  # noqa: F401
+from ..src.db.models.db_course import Course, CourseStatus
+from ..src.db.models.db_file import Document
+from ..src.db.models.db_user import User
+from ..src.services.blob_store import LocalBlobStore
+
+
+def _course(course_id, status=CourseStatus.FINISHED):
+    return Course(id=course_id, user_id="u1", query="q", total_time_hours=1, language="en", difficulty="easy",
+                  title=f"Course {course_id}", status=status)
+
+
+class FakeVectorService:
+    """Vector store with vectors for courses 1-4; a new course commits while its shards are scanned"""
+
+    def __init__(self, on_scan):
+        self.on_scan = on_scan
+        self.deleted = []
+
+    def list_course_ids(self):
+        self.on_scan()
+        return {1, 2, 3, 4}
+
+    def delete_course_vectors(self, course_id, **kwargs):
+        self.deleted.append(course_id)
+        return {"vectors": 10, "bytes": 100, "complete": True}
+
+
+class SweepTestCase(unittest.TestCase):
+    """Routines run against an in-memory database"""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=self.engine)
+        self.Session = sessionmaker(bind=self.engine, autoflush=False)
+        with self.Session() as db:
+            db.add(User(id="u1", username="u1", email="u1@example.com", hashed_password="x"))
+            db.add_all([_course(1), _course(2, CourseStatus.FAILED)])
+            db.commit()
+
+        @contextmanager
+        def get_test_db_context():
+            with self.Session() as db:
+                yield db
+
+        patcher = patch.object(routines, "get_db_context", get_test_db_context)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+
+class TestSweepOrphanedVectors(SweepTestCase):
+
+    def _commit_course_4(self):
+        with self.Session() as db:
+            db.add(_course(4, CourseStatus.CREATING))
+            db.commit()
+
+    def test_course_created_during_the_scan_keeps_its_vectors(self):
+        vector_service = FakeVectorService(on_scan=self._commit_course_4)
+        with patch.object(routines, "VectorService", return_value=vector_service):
+            report = routines.sweep_orphaned_vectors()
+
+        self.assertEqual(vector_service.deleted, [2, 3])  # failed and deleted course, never the new course 4
+        self.assertEqual(report, {"courses": 2, "vectors": 20, "bytes": 200})
+
+
+class TestSweepOrphanedBlobs(SweepTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = LocalBlobStore(self.tmp.name)
+        old = time.time() - 24 * 3600
+        self.hashes = {}
+        for name in ("referenced", "touched", "committed", "orphaned"):
+            self.hashes[name], _ = self.store.put(name.encode())
+            os.utime(self.store.local_path(self.hashes[name]), (old, old))
+        self._add_document("referenced")
+
+        for name, value in (("get_blob_store", lambda: self.store), ("delete_variants", lambda blob_hash: 0)):
+            patcher = patch.object(routines, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _add_document(self, name):
+        with self.Session() as db:
+            db.add(Document(user_id="u1", filename=f"{name}.txt", content_type="text/plain",
+                            blob_hash=self.hashes[name], file_size=len(name)))
+            db.commit()
+
+    def test_blobs_referenced_after_the_snapshot_are_kept(self):
+        get_referenced_blob_hashes = files_crud.get_referenced_blob_hashes
+
+        def get_snapshot(db):
+            referenced = get_referenced_blob_hashes(db)
+            # Two dedup uploads race the sweep: one touched its blob and has not committed its row yet,
+            # the other committed its row right after the snapshot.
+            self.store.put(b"touched")
+            self._add_document("committed")
+            return referenced
+
+        with patch.object(files_crud, "get_referenced_blob_hashes", get_snapshot):
+            report = routines.sweep_orphaned_blobs()
+
+        self.assertEqual(report, {"blobs": 1, "bytes": len("orphaned"), "tmp_files": 0})
+        self.assertEqual({name for name, blob_hash in self.hashes.items() if self.store.exists(blob_hash)},
+                         {"referenced", "touched", "committed"})
@@ -0,0 +1,178 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from ..src.db.database import Base
+from ..src.db.models import db_chat, db_course, db_file, db_note, db_statistics, db_usage, db_user  # noqa: F401
+from ..src.db.models.db_course import Chapter, Course
+from ..src.db.models.db_note import Note
+from ..src.db.models.db_user import User
+from ..src.services import search_index, search_suggest
+
+CONTENT = """() => {
+  const steps = [
+    { title: "Light reactions", text: "Chlorophyll absorbs photons and splits water." },
+    { title: "Calvin cycle", text: `Carbon ${amount} is fixed into glucose.` },
+  ];
+  return (<div className="min-h-screen w-full bg-white text-gray-800">
+    <h1 className="text-2xl font-bold">Photosynthesis &amp; energy</h1>
+    <p>Plants turn {steps.length} stages into sugar</p>
+  </div>);
+}"""
+
+
+class TestContentText(unittest.TestCase):
+
+    def test_extracts_prose_not_code(self):
+        text = search_index.content_text(CONTENT)
+        for expected in ("Chlorophyll absorbs photons", "Photosynthesis & energy", "Plants turn", "into sugar"):
+            self.assertIn(expected, text)
+        for code in ("className", "text-gray-800", "steps", "amount", "const"):
+            self.assertNotIn(code, text)
+
+
+class TestSearchIndex(unittest.TestCase):
+    """The index follows the commits of ordinary sessions"""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine, autoflush=False)()
+        self.index = search_index.SQLiteSearchIndex(":memory:")
+        search_index.set_search_index(self.index)
+        search_index.track_changes()
+
+        self.db.add_all([User(id=user_id, username=user_id, email=f"{user_id}@example.com", hashed_password="x")
+                         for user_id in ("u1", "u2")])
+        self.course = Course(user_id="u1", total_time_hours=1, query="q", language="en", difficulty="easy",
+                             title="Biology basics", description="Plants and cells")
+        self.db.add(self.course)
+        self._commit()
+        self.chapter = Chapter(course_id=self.course.id, index=1, caption="Photosynthesis",
+                               summary="How plants make sugar", content=CONTENT, time_minutes=5, image_url="")
+        self.db.add(self.chapter)
+        self._commit()
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+        search_index.stop_tracking_changes()
+        search_index.set_search_index(None)
+        self.index.close()
+
+    def _commit(self):
+        self.db.commit()
+        search_index.wait_for_pending()  # applied by the background thread
+
+    def _search(self, query, user_id="u1"):
+        return [(hit.kind, hit.doc_id) for hit in self.index.search(user_id, query)]
+
+    def test_prefix_content_and_owner(self):
+        self.assertEqual(self._search("photo"), [("chapter", self.chapter.id)])
+        self.assertEqual(self._search("chloro"), [("chapter", self.chapter.id)])  # from the React content
+        self.assertEqual(self._search("plants"), [("course", self.course.id), ("chapter", self.chapter.id)])
+        self.assertEqual(self._search("photo", user_id="u2"), [])
+        self.assertEqual(self._search("photosynthesis cells"), [])  # all terms in one document
+
+    def test_title_ranks_first(self):
+        self.db.add(Chapter(course_id=self.course.id, index=2, caption="Cells", summary="Cells need glucose",
+                            content="() => <p>Glucose everywhere</p>", time_minutes=5, image_url=""))
+        self._commit()
+        hits = self.index.search("u1", "glucose")
+        self.assertEqual([hit.title for hit in hits], ["Cells", "Photosynthesis"])
+        self.assertEqual(hits[0].course_title, "Biology basics")
+
+    def test_updates_and_deletes(self):
+        note = Note(course_id=self.course.id, chapter_id=self.chapter.id, user_id="u1", text="Remember the cycle")
+        self.db.add(note)
+        self._commit()
+        hit, = self.index.search("u1", "remember")
+        self.assertEqual((hit.kind, hit.chapter_title), ("note", "Photosynthesis"))
+
+        # Only the changed column is replaced, the deferred content was not loaded
+        self.db.expire_all()
+        self.db.get(Chapter, self.chapter.id).caption = "Light and sugar"
+        self._commit()
+        self.assertEqual([hit.title for hit in self.index.search("u1", "chloro")], ["Light and sugar"])
+
+        # Rolled back changes are not indexed
+        self.db.get(Chapter, self.chapter.id).caption = "Discarded"
+        self.db.flush()
+        self.db.rollback()
+        self.assertEqual(self._search("discarded"), [])
+
+        self.db.delete(self.db.get(Chapter, self.chapter.id))
+        self._commit()
+        self.assertEqual(self._search("remember"), [])
+        self.db.delete(self.db.get(Course, self.course.id))
+        self._commit()
+        self.assertEqual(self.index.count(), 0)
+
+    def test_applied_off_the_committing_thread(self):
+        threads = []
+        upsert = self.index.upsert
+
+        def record_thread(documents):
+            threads.append(threading.current_thread().name)
+            upsert(documents)
+
+        with patch.object(self.index, "upsert", record_thread):
+            self.db.get(Chapter, self.chapter.id).caption = "Light reactions"
+            self._commit()
+        self.assertEqual(threads, ["search-index"])
+        self.assertEqual(self._search("light"), [("chapter", self.chapter.id)])
+
+    def test_rebuild(self):
+        chapter_id = self.chapter.id
+        self.index.clear()
+        self.assertEqual(search_index.rebuild_search_index(self.db, self.index), 2)
+        self.assertEqual(self._search("chloro"), [("chapter", chapter_id)])
+
+
+class TestSuggest(unittest.TestCase):
+    """Typeahead completions from the per-user title index"""
+
+    def setUp(self):
+        self.index = search_index.SQLiteSearchIndex(":memory:")
+        search_index.set_search_index(self.index)
+        Document = search_index.SearchDocument
+        self.index.upsert([
+            Document("course", 1, "u1", 1, None, {"title": "Machine Learning"}),
+            Document("chapter", 10, "u1", 1, 10, {"title": "Linear regression"}),
+            Document("chapter", 11, "u1", 1, 11, {"title": "Learning rates and gradient descent"}),
+            Document("course", 2, "u2", 2, None, {"title": "Learning German"}),
+        ])
+
+    def tearDown(self):
+        search_index.set_search_index(None)
+        search_suggest.invalidate(None)
+        self.index.close()
+
+    def _suggest(self, query, user_id="u1"):
+        return [(result.type, result.title) for result in asyncio.run(search_suggest.suggest(user_id, query))]
+
+    def test_completions(self):
+        self.assertEqual(self._suggest("lea"), [("chapter", "Learning rates and gradient descent"),
+                                                ("course", "Machine Learning")])
+        self.assertEqual(self._suggest("machine le"), [("course", "Machine Learning")])
+        self.assertEqual(self._suggest("grad lear"), [("chapter", "Learning rates and gradient descent")])
+        self.assertEqual(self._suggest("lea", user_id="u2"), [("course", "Learning German")])
+        self.assertEqual(self._suggest("l"), [])
+        result = asyncio.run(search_suggest.suggest("u1", "linear"))[0]
+        self.assertEqual((result.course_id, result.course_title), ("1", "Machine Learning"))
+
+    def test_changes_invalidate(self):
+        self.assertEqual(self._suggest("deep"), [])
+        self.index.upsert([search_index.SearchDocument("chapter", 12, None, 1, 12, {"title": "Deep networks"})])
+        self.assertEqual(self._suggest("deep"), [("chapter", "Deep networks")])
+        self.index.delete("course", 1)
+        self.assertEqual(self._suggest("deep"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
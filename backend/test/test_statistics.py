@@ -0,0 +1,146 @@
+import unittest
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from ..src.db.database import Base
+from ..src.db.models import db_chat, db_course, db_file, db_note, db_statistics, db_usage, db_user  # noqa: F401
+from ..src.db.models.db_course import Chapter, Course
+from ..src.db.models.db_user import User
+from ..src.db.models.db_statistics import LearnSession, LearnTime
+from ..src.db.crud import learn_time_crud, statistics_crud, usage_crud
+
+NOW = datetime(2026, 3, 2, 12, 0)
+YESTERDAY = NOW - timedelta(days=1)
+
+
+class StatisticsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine, autoflush=False)()
+        self.db.add(User(id="u1", username="alice", email="alice@example.com", hashed_password="x",
+                         created_at=YESTERDAY))
+        self.db.add(User(id="u2", username="bob", email="bob@example.com", hashed_password="x", created_at=NOW))
+        self.db.add(Course(id=1, user_id="u1", query="q", total_time_hours=1, language="en", difficulty="b",
+                           created_at=YESTERDAY))
+        self.db.add(Chapter(id=1, course_id=1, index=1, caption="c", summary="s", content="x", time_minutes=5,
+                            image_url="", created_at=YESTERDAY))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def _day(self, day: date):
+        return {row.day: row for row in statistics_crud.get_daily_stats(self.db, day, day)}[day]
+
+
+class TestStatisticsRefresh(StatisticsTestCase):
+    """Incremental refreshes add up to the same numbers as counting everything"""
+
+    def _usages(self, *events):
+        usage_crud.insert_usages(self.db, [
+            {"user_id": user_id, "action": action, "course_id": 1, "chapter_id": 1, "timestamp": timestamp}
+            for user_id, action, timestamp in events
+        ])
+
+    def test_incremental_refresh(self):
+        self._usages(("u1", "chat", YESTERDAY), ("u1", "site_visible", YESTERDAY), ("u1", "chat", NOW))
+        stats = statistics_crud.refresh_statistics(self.db, now=NOW + timedelta(minutes=5))
+        self.assertEqual((stats.users, stats.courses, stats.chapters, stats.messages, stats.active_today),
+                         (2, 1, 1, 2, 1))
+
+        # Written late with an old timestamp (buffered writer), and one event that has not settled yet
+        self._usages(("u2", "chat", YESTERDAY), ("u1", "site_visible", YESTERDAY),
+                     ("u2", "chat", NOW + timedelta(minutes=9, seconds=30)))
+        stats = statistics_crud.refresh_statistics(self.db, now=NOW + timedelta(minutes=10))
+        self.assertEqual((stats.messages, stats.active_today), (3, 1))
+
+        yesterday = self._day(YESTERDAY.date())
+        self.assertEqual((yesterday.active_users, yesterday.chat_messages), (2, 2))
+        self.assertEqual((yesterday.new_users, yesterday.courses_created, yesterday.chapters_created), (1, 1, 1))
+        self.assertEqual(self._day(NOW.date()).new_users, 1)
+
+        stats = statistics_crud.refresh_statistics(self.db, now=NOW + timedelta(minutes=20))
+        self.assertEqual((stats.messages, stats.active_today), (4, 2))
+        self.assertEqual(self._day(NOW.date()).active_users, 2)
+
+        # Nothing new: a refresh changes nothing
+        stats = statistics_crud.refresh_statistics(self.db, now=NOW + timedelta(minutes=30))
+        self.assertEqual((stats.messages, self._day(YESTERDAY.date()).chat_messages), (4, 2))
+
+    def test_course_committed_after_a_higher_id_is_counted(self):
+        def course(course_id, created_at):
+            return Course(id=course_id, user_id="u1", query="q", total_time_hours=1, language="en", difficulty="b",
+                          created_at=created_at)
+
+        # Course 3 is committed while the transaction that inserted course 2 is still open
+        self.db.add(course(3, NOW + timedelta(minutes=9, seconds=30)))
+        self.db.commit()
+        statistics_crud.refresh_statistics(self.db, now=NOW + timedelta(minutes=10))
+        self.db.add(course(2, NOW + timedelta(minutes=9)))
+        self.db.commit()
+
+        stats = statistics_crud.refresh_statistics(self.db, now=NOW + timedelta(minutes=20))
+        self.assertEqual((stats.courses, stats.course_watermark), (3, 3))
+        self.assertEqual(self._day(NOW.date()).courses_created, 2)
+
+
+class TestLearnTime(StatisticsTestCase):
+    """Dwell intervals between a user's pings, with idle cutoff and tail credit"""
+
+    def _pings(self, *pings):
+        usage_crud.insert_usages(self.db, [
+            {"user_id": "u1", "action": "site_visible" if visible else "site_hidden", "course_id": course_id,
+             "chapter_id": 1 if course_id else None, "timestamp": NOW + timedelta(seconds=offset)}
+            for offset, course_id, visible in pings
+        ])
+
+    def _sessionize(self, offset):
+        return learn_time_crud.sessionize_learn_time(self.db, idle_cutoff_seconds=60, tail_seconds=10,
+                                                     settle_seconds=0, now=NOW + timedelta(seconds=offset))
+
+    def test_incremental_sessionization(self):
+        self._pings((0, 1, True), (10, 1, True), (20, 1, True))
+        self.assertEqual(self._sessionize(20), 20)
+        self.assertEqual(self.db.get(LearnSession, "u1").timestamp, NOW + timedelta(seconds=20))
+
+        # hidden ends the interval, long gaps get the tail credit, pages without a chapter count nothing
+        self._pings((30, 1, False), (300, 1, True), (1000, 2, True), (1100, None, True))
+        self.assertEqual(self._sessionize(2000), 10 + 10 + 10)
+        self.assertFalse(self.db.get(LearnSession, "u1").visible)
+
+        # late ping, older than what was sessionized already
+        self._pings((5, 1, True))
+        self._sessionize(3000)
+
+        self.assertEqual({(row.course_id, row.seconds) for row in self.db.query(LearnTime).all()}, {(1, 40), (2, 10)})
+        self.assertEqual(learn_time_crud.get_total_learn_seconds(self.db, "u1"), 50)
+        self.assertEqual(learn_time_crud.get_total_learn_seconds_by_user(self.db, ["u1", "u2"]), {"u1": 50, "u2": 0})
+        self.assertEqual(
+            {row["user"].id: row["total_usage_time"] for row in usage_crud.get_user_with_total_usage_time(self.db)},
+            {"u1": 0, "u2": 0}
+        )
+        self.assertEqual(self._day(NOW.date()).learn_minutes, 0)
+
+    def test_learn_minutes_add_up_across_runs(self):
+        self._pings((0, 1, True), (40, 1, False))
+        self._sessionize(40)
+        self._pings((100, 1, True), (140, 1, False))
+        self._sessionize(140)
+        self.assertEqual(self._day(NOW.date()).learn_minutes, 1)
+
+        # The per-day sum reads the day index, not the whole table
+        day_sum = select(func.sum(LearnTime.seconds)).where(LearnTime.day == NOW.date())
+        plan = " ".join(row[-1] for row in self.db.execute(text("EXPLAIN QUERY PLAN " + str(
+            day_sum.compile(self.engine, compile_kwargs={"literal_binds": True})
+        ))))
+        self.assertIn("COVERING INDEX ix_learn_time_day_seconds", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
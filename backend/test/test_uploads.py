@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import unittest
+
+from fastapi import FastAPI, HTTPException
+from starlette.requests import Request
+
+from ..src.api.routers import files, flashcard
+from ..src.services.blob_store import LocalBlobStore
+from ..src.utils.uploads import MULTIPART_OVERHEAD, stream_upload
+
+BOUNDARY = "upload-boundary"
+
+
+def _multipart(data: bytes, filename="notes.txt", content_type="text/plain") -> bytes:
+    return (
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="title"\r\n\r\nNotes\r\n'
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + data + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+class StreamedRequest:
+    """An ASGI request whose body arrives in chunks, counting how many were received"""
+
+    def __init__(self, body: bytes, chunk_size=1024, content_length=True):
+        self.chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+        self.received = 0
+        headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+        if content_length:
+            headers.append((b"content-length", str(len(body)).encode()))
+        self.request = Request({"type": "http", "method": "POST", "headers": headers}, self._receive)
+
+    async def _receive(self):
+        self.received += 1
+        more = self.received < len(self.chunks)
+        return {"type": "http.request", "body": self.chunks[self.received - 1], "more_body": more}
+
+
+class TestStreamUpload(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = LocalBlobStore(self.tmp.name)
+
+    def _upload(self, streamed: StreamedRequest, max_size=None, accept=None):
+        return asyncio.run(stream_upload(streamed.request, self.store.writer(max_size), accept=accept))
+
+    def _assert_nothing_stored(self):
+        self.assertEqual(list(self.store.iter_hashes()), [])
+        self.assertEqual(os.listdir(self.store.tmp_dir), [])
+
+    def test_file_is_hashed_while_streamed(self):
+        data = os.urandom(10_000)
+        upload = self._upload(StreamedRequest(_multipart(data)), max_size=len(data))
+
+        self.assertEqual((upload.filename, upload.content_type, upload.size), ("notes.txt", "text/plain", len(data)))
+        self.assertEqual(upload.blob_hash, hashlib.sha256(data).hexdigest())
+        self.assertEqual(self.store.get(upload.blob_hash), data)
+
+    def test_content_length_over_the_limit_is_rejected_before_reading(self):
+        streamed = StreamedRequest(_multipart(b"x" * (MULTIPART_OVERHEAD + 2000)))
+        with self.assertRaises(HTTPException) as raised:
+            self._upload(streamed, max_size=1000)
+
+        self.assertEqual(raised.exception.status_code, 413)
+        self.assertEqual(streamed.received, 0)
+        self._assert_nothing_stored()
+
+    def test_stream_over_the_limit_is_aborted(self):
+        streamed = StreamedRequest(_multipart(b"x" * 200_000), content_length=False)
+        with self.assertRaises(HTTPException) as raised:
+            self._upload(streamed, max_size=1000)
+
+        self.assertEqual(raised.exception.status_code, 413)
+        self.assertLess(streamed.received, len(streamed.chunks))
+        self._assert_nothing_stored()
+
+    def test_file_over_the_limit_within_the_overhead(self):
+        with self.assertRaises(HTTPException) as raised:
+            self._upload(StreamedRequest(_multipart(b"x" * 1001)), max_size=1000)
+        self.assertEqual(raised.exception.status_code, 413)
+        self._assert_nothing_stored()
+
+    def test_rejected_type_stores_nothing(self):
+        def accept(filename, content_type):
+            raise HTTPException(status_code=400, detail="File type not allowed")
+
+        streamed = StreamedRequest(_multipart(b"x" * 10_000))
+        with self.assertRaises(HTTPException) as raised:
+            self._upload(streamed, accept=accept)
+
+        self.assertEqual(raised.exception.status_code, 400)
+        self.assertEqual(streamed.received, 1)
+        self._assert_nothing_stored()
+
+
+class TestUploadOpenAPI(unittest.TestCase):
+    """The upload endpoints read the body themselves, the schema documents it"""
+
+    def test_file_field_and_413_are_documented(self):
+        app = FastAPI()
+        app.include_router(files.router)
+        app.include_router(flashcard.router)
+        paths = app.openapi()["paths"]
+
+        for path in ("/files/documents", "/files/images", "/anki/upload"):
+            operation = paths[path]["post"]
+            schema = operation["requestBody"]["content"]["multipart/form-data"]["schema"]
+            self.assertEqual(schema["properties"]["file"], {"type": "string", "format": "binary"}, path)
+            self.assertIn("413", operation["responses"])
+            self.assertIn("200", operation["responses"])
+
+
+if __name__ == "__main__":
+    unittest.main()
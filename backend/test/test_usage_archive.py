@@ -0,0 +1,146 @@
+import os
+import tempfile
+import threading
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from ..src.db.database import Base
+from ..src.db.models import db_chat, db_course, db_file, db_note, db_statistics, db_usage, db_user  # noqa: F401
+from ..src.db.models.db_statistics import PlatformStats
+from ..src.db.models.db_usage import Usage
+from ..src.db.crud import statistics_crud, usage_crud
+from ..src.services import usage_archive
+
+NOW = datetime(2026, 3, 2, 12, 0)
+
+
+class TestUsageArchive(unittest.TestCase):
+    """Old usage rows move to jsonl.zst files and can be read back"""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine, autoflush=False)()
+        self.tmp = tempfile.TemporaryDirectory()
+        # 10 old rows (2 of them quota relevant), 2 recent ones
+        usage_crud.insert_usages(self.db, [
+            {"user_id": "u1", "action": "create_course" if i in (2, 7) else "chat", "details": f"message {i}",
+             "timestamp": NOW - timedelta(days=100 - i)}
+            for i in range(10)
+        ] + [
+            {"user_id": "u1", "action": "chat", "details": "new", "timestamp": NOW - timedelta(days=1)}
+            for _ in range(2)
+        ])
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def _archive(self, **kwargs):
+        return usage_archive.archive_old_usages(self.db, retention_days=30, archive_dir=self.tmp.name, batch_size=3,
+                                                keep_actions=["create_course"], now=NOW, **kwargs)
+
+    def _remaining(self):
+        return self.db.scalars(select(Usage.action).order_by(Usage.id)).all()
+
+    def test_only_aggregated_rows_are_archived(self):
+        self.assertEqual(self._archive(), {"rows": 0, "files": 0})
+        self.db.add(PlatformStats(id=1, usage_watermark=4, session_watermark=12))
+        self.db.commit()
+        self.assertEqual(self._archive(), {"rows": 3, "files": 1})  # ids 1, 2, 4 (3 is a create_course)
+
+    def test_archive_and_read_back(self):
+        self.db.add(PlatformStats(id=1, usage_watermark=12, session_watermark=12))
+        self.db.commit()
+
+        self.assertEqual(self._archive(), {"rows": 8, "files": 3})
+        self.assertEqual(self._remaining(), ["create_course", "create_course", "chat", "chat"])
+        self.assertEqual(len(usage_archive.archive_files(self.tmp.name)), 3)
+
+        rows = list(usage_archive.iter_archived_usages(self.tmp.name))
+        self.assertEqual([row["details"] for row in rows], [f"message {i}" for i in (0, 1, 3, 4, 5, 6, 8, 9)])
+        since = (NOW - timedelta(days=95)).date()
+        self.assertEqual(len(list(usage_archive.iter_archived_usages(self.tmp.name, since=since))), 4)
+        self.assertEqual(list(usage_archive.iter_archived_usages(self.tmp.name, until=date(2000, 1, 1))), [])
+
+    def test_rows_of_an_existing_archive_are_only_deleted(self):
+        self.db.add(PlatformStats(id=1, usage_watermark=12, session_watermark=12))
+        self.db.commit()
+        # A run that died after writing its first file
+        self._archive(max_batches=1)
+        first_file = usage_archive.archive_files(self.tmp.name)[0]
+        self.db.execute(Usage.__table__.insert(), [
+            {"id": row["id"], "user_id": row["user_id"], "action": row["action"], "details": row["details"],
+             "timestamp": datetime.fromisoformat(row["timestamp"])}
+            for row in usage_archive.read_archive(first_file)
+        ])
+        self.db.commit()
+
+        self.assertEqual(self._archive(), {"rows": 5, "files": 2})
+        self.assertEqual(len(list(usage_archive.iter_archived_usages(self.tmp.name))), 8)
+        self.assertFalse([name for name in os.listdir(self.tmp.name) if name.endswith(".tmp")])
+
+    def test_concurrent_runs_archive_each_row_once(self):
+        # Two workers on a shared database. SQLite has no FOR UPDATE, BEGIN IMMEDIATE gives lock_platform_stats
+        # the same effect: the second run waits for the first one's transaction.
+        engine = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'shared.db')}",
+                               connect_args={"check_same_thread": False})
+        self.addCleanup(engine.dispose)
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        with Session() as db:
+            usage_crud.insert_usages(db, [{"user_id": "u1", "action": "chat", "details": f"message {i}",
+                                           "timestamp": NOW - timedelta(days=100 - i)} for i in range(6)])
+            db.add(PlatformStats(id=1, usage_watermark=6, session_watermark=6))
+            db.commit()
+
+        lock_platform_stats = statistics_crud.lock_platform_stats
+
+        def lock_immediate(db):
+            db.commit()
+            db.execute(text("BEGIN IMMEDIATE"))
+            return lock_platform_stats(db)
+
+        both_writing = threading.Barrier(2)
+        write_archive = usage_archive._write_archive
+
+        def write_when_both_run(path, rows):
+            try:
+                both_writing.wait(timeout=0.5)  # only reached by both runs at once without the lock
+            except threading.BrokenBarrierError:
+                pass
+            write_archive(path, rows)
+
+        reports, errors = [], []
+
+        def run():
+            try:
+                with Session() as db:
+                    reports.append(usage_archive.archive_old_usages(
+                        db, retention_days=30, archive_dir=self.tmp.name, batch_size=3, keep_actions=[], now=NOW
+                    ))
+            except Exception as e:
+                errors.append(e)
+
+        with patch.object(statistics_crud, "lock_platform_stats", lock_immediate), \
+                patch.object(usage_archive, "_write_archive", write_when_both_run):
+            threads = [threading.Thread(target=run) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sum(report["rows"] for report in reports), 6)
+        self.assertEqual([row["id"] for row in usage_archive.iter_archived_usages(self.tmp.name)], list(range(1, 7)))
+        self.assertFalse([name for name in os.listdir(self.tmp.name) if name.endswith(".tmp")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from ..src.db.database import Base
+from ..src.db.models import db_chat, db_course, db_file, db_note, db_usage, db_user  # noqa: F401 (register all tables)
+from ..src.db.models.db_usage import UsageCounter
+from ..src.db.models.db_user import User
+from ..src.db.crud import usage_crud
+
+
+class TestUsageCounters(unittest.TestCase):
+    """Counters maintained on write match the counts over the usages table"""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine, autoflush=False)()
+        self.db.add(User(id="u1", username="alice", email="alice@example.com", hashed_password="x"))
+        self.db.add(User(id="u2", username="bob", email="bob@example.com", hashed_password="x"))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def _counters(self):
+        return sorted(self.db.execute(select(UsageCounter.user_id, UsageCounter.name, UsageCounter.total)).all())
+
+    def test_counters_match_rebuild(self):
+        usage_crud.log_course_creation(self.db, "u1", course_id=1, detail="{}")
+        usage_crud.log_course_creation(self.db, "u1", course_id=2, detail="{}")
+        usage_crud.log_chat_usage(self.db, "u2", course_id=1, chapter_id=1, message="hi")
+        usage_crud.insert_usages(self.db, [
+            {"user_id": "u1", "action": "site_visible", "course_id": 1, "chapter_id": 1},
+            {"user_id": "u1", "action": "site_visible", "course_id": 1, "chapter_id": 2},
+            {"user_id": "u1", "action": "site_visible", "course_id": None, "chapter_id": None},
+            {"user_id": "u2", "action": "site_hidden", "course_id": 1, "chapter_id": 1},
+            {"user_id": "u2", "action": "chat", "course_id": 1, "chapter_id": 1},
+        ])
+
+        self.assertEqual(usage_crud.get_total_created_courses(self.db, "u1"), 2)
+        self.assertEqual(usage_crud.get_total_created_courses(self.db, "u2"), 0)
+        self.assertEqual(usage_crud.get_total_chat_usages(self.db, "u2"), 2)
+        self.assertEqual(usage_crud.get_counter(self.db, "u1", "site_visible"), 3)
+
+        maintained = self._counters()
+        usage_crud.rebuild_usage_counters(self.db)
+        self.assertEqual(self._counters(), maintained)
+
+    def test_ensure_fills_counters_once(self):
+        usage_crud.insert_usages(self.db, [{"user_id": "u1", "action": "login"}])
+        self.db.query(UsageCounter).delete()
+        self.db.commit()
+
+        usage_crud.ensure_usage_counters(self.db)
+        self.assertEqual(usage_crud.get_counter(self.db, "u1", "login"), 1)
+        usage_crud.ensure_usage_counters(self.db)
+        self.assertEqual(usage_crud.get_counter(self.db, "u1", "login"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
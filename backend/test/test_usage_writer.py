@@ -0,0 +1,135 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from ..src.db.crud import usage_crud
+from ..src.services import usage_writer
+
+
+class TestUsageWriter(unittest.TestCase):
+    """Buffered usage events, with insert_usages stubbed"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.spill_path = os.path.join(self.tmp.name, "usage_spill.jsonl")
+        self.written = []
+        self.fail = False
+
+        @contextmanager
+        def get_test_db_context():
+            yield None
+
+        settings = {"USAGE_SPILL_PATH": self.spill_path, "USAGE_BUFFER_MAX_EVENTS": 3,
+                    "USAGE_FLUSH_MAX_EVENTS": 100, "USAGE_FLUSH_INTERVAL_MS": 60_000, "USAGE_DROP_POLICY": "drop_oldest"}
+        patchers = [patch.object(usage_writer, name, value) for name, value in settings.items()]
+        patchers += [patch.object(usage_writer, "get_db_context", get_test_db_context),
+                     patch.object(usage_crud, "insert_usages", self._insert_usages)]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self._reset()
+
+    def tearDown(self):
+        self.fail = False
+        usage_writer.stop()
+        self._reset()
+        self.tmp.cleanup()
+
+    @staticmethod
+    def _reset():
+        usage_writer._buffer.clear()
+        usage_writer._metrics.update({name: 0 for name in usage_writer._metrics})
+
+    def _insert_usages(self, db, events):
+        if self.fail:
+            raise ConnectionError("database unavailable")
+        self.written.extend(events)
+
+    def _record(self, *details):
+        for detail in details:
+            usage_writer.record("u1", "chat", details=detail)
+
+    def _written(self):
+        return [event["details"] for event in self.written]
+
+    def _wait_for_written(self, count, timeout=2):
+        deadline = time.monotonic() + timeout
+        while len(self.written) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_flushes_when_the_batch_is_full(self):
+        usage_writer.USAGE_FLUSH_MAX_EVENTS = 2
+        self._record("a", "b")
+        self._wait_for_written(2)
+        self.assertEqual(self._written(), ["a", "b"])
+        self.assertEqual(usage_writer.stats()["flushes"], 1)
+
+    def test_flushes_after_the_interval(self):
+        usage_writer.USAGE_FLUSH_INTERVAL_MS = 50
+        self._record("a")
+        self._wait_for_written(1)
+        self.assertEqual(self._written(), ["a"])
+        self.assertIsInstance(self.written[0]["timestamp"], datetime)
+
+    def test_drop_oldest(self):
+        self._record("a", "b", "c", "d", "e")
+        usage_writer.flush()
+        self.assertEqual(self._written(), ["c", "d", "e"])
+        self.assertEqual(usage_writer.stats()["dropped"], 2)
+
+    def test_drop_newest(self):
+        usage_writer.USAGE_DROP_POLICY = "drop_newest"
+        self._record("a", "b", "c", "d", "e")
+        usage_writer.flush()
+        self.assertEqual(self._written(), ["a", "b", "c"])
+        self.assertEqual(usage_writer.stats()["dropped"], 2)
+
+    def test_failed_write_is_requeued_in_order(self):
+        self._record("a", "b")
+        self.fail = True
+        self.assertFalse(usage_writer.flush())
+        self._record("c")
+        self.assertEqual(usage_writer.stats()["buffered"], 3)
+
+        self.fail = False
+        self.assertTrue(usage_writer.flush())
+        self.assertEqual(self._written(), ["a", "b", "c"])
+        self.assertEqual(usage_writer.stats()["failed_flushes"], 1)
+
+    def test_stop_writes_what_is_left(self):
+        self._record("a")
+        usage_writer.stop()
+        self.assertEqual(self._written(), ["a"])
+        self.assertFalse(os.path.exists(self.spill_path))
+
+    def test_spill_and_replay(self):
+        self._record("a", "b")
+        self.fail = True
+        usage_writer.stop()
+        with open(self.spill_path, encoding="utf-8") as f:
+            self.assertEqual([json.loads(line)["details"] for line in f], ["a", "b"])
+
+        # A replay that died before removing its claimed file
+        leftover = {"user_id": "u1", "action": "chat", "course_id": None, "chapter_id": None, "details": "old",
+                    "timestamp": datetime(2026, 1, 1, tzinfo=timezone.utc).isoformat()}
+        with open(self.spill_path + ".replay-0", "w", encoding="utf-8") as f:
+            f.write(json.dumps(leftover) + "\n")
+
+        self.fail = False
+        usage_writer.replay_spill()
+        usage_writer.flush()
+        self.assertEqual(self._written(), ["old", "a", "b"])
+        self.assertEqual(self.written[0]["timestamp"], datetime(2026, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+        usage_writer.replay_spill()  # nothing left to replay
+        self.assertEqual(usage_writer.stats()["buffered"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -34,7 +34,8 @@ export const courseService = {
 
   // Get all courses with pagination
   getCourseChapters: async (courseId) => {
-    const chapters = (await apiWithCookies.get(`/courses/${courseId}/chapters`)).data;
+    // Metadata only, the content of a chapter is fetched with getChapter
+    const chapters = (await apiWithCookies.get(`/courses/${courseId}/chapters?view=summary`)).data;
     if (!chapters || chapters.length === 0) return [];
     
     // Sort chapters by index to ensure correct order
@@ -97,8 +98,10 @@ export const courseService = {
     return response.data;
   },
 
-  downloadImage: async (imageId) => {
+  // Pass a width (128, 256, 512 or 1024) to get a resized variant instead of the original
+  downloadImage: async (imageId, width) => {
     const response = await apiWithCookies.get(`/files/images/${imageId}`, {
+      params: width ? { width } : undefined,
       responseType: 'blob',
     });
     return response.data;
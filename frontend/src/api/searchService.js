@@ -94,6 +94,35 @@ export const searchCoursesAndChapters = async (query) => {
   }
 };
 
+/**
+ * Typeahead: titles of the user's courses and chapters that complete the typed query.
+ * Cheap enough for every keystroke and not logged as a search, use searchCoursesAndChapters on submit.
+ * @param {string} query - The typed text (minimum 2 characters)
+ * @param {number} [limit=8] - Maximum number of suggestions
+ * @returns {Promise<SearchResult[]>} Suggestions in the search result format (without description)
+ */
+export const suggestCoursesAndChapters = async (query, limit = 8) => {
+  const trimmedQuery = query?.trim() || '';
+  if (trimmedQuery.length < 2) {
+    return [];
+  }
+
+  try {
+    const response = await apiWithCookies.get('/search/suggest', {
+      params: { query: trimmedQuery, limit },
+      timeout: 5000,
+      withCredentials: true,
+    });
+    return Array.isArray(response?.data) ? response.data : [];
+  } catch (error) {
+    if (error.response?.status === 400) {
+      return [];
+    }
+    console.error('Search suggestions failed:', error.message);
+    throw new Error(`Search failed: ${error.message}`);
+  }
+};
+
 /**
  * Get the URL to navigate to for a search result
  * @param {SearchResult} result - The search result object
@@ -128,5 +157,6 @@ export const getResultUrl = (result) => {
 // For backward compatibility
 export default {
   searchCoursesAndChapters,
+  suggestCoursesAndChapters,
   getResultUrl,
 };
@@ -3,7 +3,7 @@ import { Input, Box, Paper, Text, Group, Badge, Loader, useMantineTheme, Progres
 import { useTranslation } from 'react-i18next';
 import { IconSearch, IconBook, IconFileText } from '@tabler/icons-react';
 import { useDebouncedValue } from '@mantine/hooks';
-import { searchCoursesAndChapters, getResultUrl } from '../api/searchService';
+import { searchCoursesAndChapters, suggestCoursesAndChapters, getResultUrl } from '../api/searchService';
 
 function EnhancedSearch({ courses, onSearchResultClick }) {
   const { t } = useTranslation('dashboard');
@@ -13,39 +13,44 @@ function EnhancedSearch({ courses, onSearchResultClick }) {
   const [loading, setLoading] = useState(false);
   const [isFocused, setIsFocused] = useState(false);
   const searchRef = useRef();
+  const submittedQueryRef = useRef(null);
   const theme = useMantineTheme();
 
-  useEffect(() => {
-    const search = async () => {
-      if (!debouncedQuery.trim()) {
-        setResults([]);
-        return;
-      }
+  // Title suggestions while typing, the full search (content and notes) runs on Enter
+  const search = async (query, fetchResults) => {
+    if (!query.trim()) {
+      setResults([]);
+      return;
+    }
+
+    setLoading(true);
 
-      setLoading(true);
-      
-      try {
-        const searchResults = await searchCoursesAndChapters(debouncedQuery);
-        // Map the API response to the expected format
-        const formattedResults = searchResults.map(result => ({
-          type: result.type,
-          id: result.id,
-          title: result.title,
-          description: result.description || '',
-          courseId: result.course_id,
-          courseTitle: result.course_title || '',
-        }));
-        
-        setResults(formattedResults);
-      } catch (error) {
-        console.error('Search error:', error);
-        // Keep previous results on error
-      } finally {
-        setLoading(false);
-      }
-    };
+    try {
+      const searchResults = await fetchResults(query);
+      // Map the API response to the expected format
+      const formattedResults = searchResults.map(result => ({
+        type: result.type,
+        id: result.id,
+        title: result.title,
+        description: result.description || '',
+        courseId: result.course_id,
+        courseTitle: result.course_title || '',
+      }));
 
-    search();
+      setResults(formattedResults);
+    } catch (error) {
+      console.error('Search error:', error);
+      // Keep previous results on error
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  useEffect(() => {
+    if (debouncedQuery === submittedQueryRef.current) {
+      return; // submitted before the debounce fired, keep the full results
+    }
+    search(debouncedQuery, suggestCoursesAndChapters);
   }, [debouncedQuery, courses]);
 
   const handleResultClick = (result) => {
@@ -68,6 +73,13 @@ function EnhancedSearch({ courses, onSearchResultClick }) {
         placeholder={t('search.placeholder', 'Search courses and chapters...')}
         value={searchQuery}
         onChange={(e) => setSearchQuery(e.target.value)}
+        onKeyDown={(e) => {
+          if (e.key === 'Enter' && searchQuery.trim().length > 1) {
+            e.preventDefault();
+            submittedQueryRef.current = searchQuery;
+            search(searchQuery, searchCoursesAndChapters);
+          }
+        }}
         icon={<IconSearch size={16} />}
         onFocus={() => setIsFocused(true)}
         onBlur={() => setTimeout(() => setIsFocused(false), 200)}
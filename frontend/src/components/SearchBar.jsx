@@ -2,7 +2,7 @@ import { useState, useRef, useEffect } from 'react';
 import { TextInput, Loader, ScrollArea, Paper, Group, Text, UnstyledButton } from '@mantine/core';
 import { IconSearch, IconBook, IconFileText } from '@tabler/icons-react';
 import { useNavigate } from 'react-router-dom';
-import { searchCoursesAndChapters, getResultUrl } from '../api/searchService';
+import { searchCoursesAndChapters, suggestCoursesAndChapters, getResultUrl } from '../api/searchService';
 import { useDebouncedValue } from '@mantine/hooks';
 import { useTranslation } from 'react-i18next';
 import { useCallback } from 'react';
@@ -21,6 +21,7 @@ const SearchBar = () => {
   const [debouncedQuery] = useDebouncedValue(searchQuery, 300);
   const [activeIndex, setActiveIndex] = useState(-1);
   const resultsRef = useRef(null);
+  const submittedQueryRef = useRef(null);
 
 
   // Close dropdown when clicking outside or pressing Escape
@@ -51,6 +52,25 @@ const SearchBar = () => {
     };
   }, [searchRef, closeDropdown]);
   
+  // Full search (content and notes), only on submit so typing is not logged as searches
+  const submitSearch = useCallback(async () => {
+    submittedQueryRef.current = searchQuery;
+    setIsSearching(true);
+    setError(null);
+    setActiveIndex(-1);
+    try {
+      const results = await searchCoursesAndChapters(searchQuery);
+      setSearchResults(results);
+      setIsDropdownOpen(true);
+    } catch (err) {
+      console.error('Error fetching search results:', err);
+      setError(t('search.error'));
+      setSearchResults([]);
+    } finally {
+      setIsSearching(false);
+    }
+  }, [searchQuery, t]);
+
   // Handle keyboard navigation
   const handleKeyDown = useCallback((e) => {
     if (!isDropdownOpen) return;
@@ -74,9 +94,9 @@ const SearchBar = () => {
         e.preventDefault();
         if (activeIndex >= 0 && activeIndex < searchResults.length) {
           handleResultClick(searchResults[activeIndex]);
-        } else if (searchQuery.trim() && searchResults.length > 0) {
-          // If no result is selected but there are results, select the first one
-          handleResultClick(searchResults[0]);
+        } else if (searchQuery.trim().length > 1) {
+          // No suggestion selected: run the full search (content and notes)
+          submitSearch();
         }
         break;
         
@@ -87,7 +107,7 @@ const SearchBar = () => {
       default:
         break;
     }
-  }, [isDropdownOpen, searchResults, activeIndex, searchQuery, closeDropdown]);
+  }, [isDropdownOpen, searchResults, activeIndex, searchQuery, closeDropdown, submitSearch]);
   
   // Set up keyboard event listener
   useEffect(() => {
@@ -112,7 +132,7 @@ const SearchBar = () => {
     }
   }, [activeIndex]);
 
-  // Fetch search results when debounced query changes
+  // Fetch title suggestions when debounced query changes (the full search only runs on submit)
   useEffect(() => {
     const fetchResults = async () => {
       if (!debouncedQuery || debouncedQuery.length < 2) {
@@ -120,13 +140,16 @@ const SearchBar = () => {
         setError(null);
         return;
       }
+      if (debouncedQuery === submittedQueryRef.current) {
+        return; // submitted before the debounce fired, keep the full results
+      }
 
       setIsSearching(true);
       setError(null);
       setActiveIndex(-1); // Reset active index when starting new search
       
       try {
-        const results = await searchCoursesAndChapters(debouncedQuery);
+        const results = await suggestCoursesAndChapters(debouncedQuery);
         setSearchResults(results);
         setIsDropdownOpen(true);
       } catch (err) {
@@ -153,8 +176,10 @@ const SearchBar = () => {
       <form 
         onSubmit={(e) => {
           e.preventDefault();
-          if (searchQuery.trim() && searchResults.length > 0) {
-            handleResultClick(searchResults[Math.max(0, activeIndex)]);
+          if (activeIndex >= 0 && activeIndex < searchResults.length) {
+            handleResultClick(searchResults[activeIndex]);
+          } else if (searchQuery.trim().length > 1) {
+            submitSearch();
           }
         }}
         role="search"
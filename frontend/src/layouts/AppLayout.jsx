@@ -239,14 +239,7 @@ function AppLayout() {
   const currentPath = window.location.pathname;
 
   // Logic to determine avatar source
-  let avatarSrc = null;
-  if (user && user.profile_image_base64) {
-    if (user.profile_image_base64.startsWith("data:image")) {
-      avatarSrc = user.profile_image_base64;
-    } else {
-      avatarSrc = `data:image/jpeg;base64,${user.profile_image_base64}`;
-    }
-  }
+  const avatarSrc = user?.profile_image_url || null;
 
   const mainLinksData = [
     {
@@ -47,14 +47,7 @@ function MainLayout() {
   const isMobile = useMediaQuery('(max-width: 768px)'); // Add mobile detection
 
   // Logic to determine avatar source
-  let avatarSrc = null;
-  if (user && user.profile_image_base64) {
-    if (user.profile_image_base64.startsWith('data:image')) {
-      avatarSrc = user.profile_image_base64;
-    } else {
-      avatarSrc = `data:image/jpeg;base64,${user.profile_image_base64}`;
-    }
-  }
+  const avatarSrc = user?.profile_image_url || null;
 
   const handleLogout = () => {
     logout();
@@ -50,16 +50,6 @@ import authService from '../api/authService';
 import { useDisclosure } from '@mantine/hooks';
 
 
-// Helper function to determine MIME type from base64 string
-function getMimeTypeFromBase64(base64String) {
-  if (!base64String) return 'image/png'; // Default or handle error
-  if (base64String.startsWith('/9j/')) return 'image/jpeg';
-  if (base64String.startsWith('iVBOR')) return 'image/png';
-  if (base64String.startsWith('R0lGOD')) return 'image/gif';
-  if (base64String.startsWith('UklGR')) return 'image/webp';
-  return 'image/png'; // Fallback
-}
-
 function AdminView() {
   const { t } = useTranslation('adminView');
   const theme = useMantineTheme();
@@ -551,9 +541,9 @@ function AdminView() {
                   sortedUsers.map((user) => (
                     <tr key={user.id}>
                       <td>
-                        {user.profile_image_base64 ? (
+                        {user.profile_image_url ? (
                           <img
-                            src={`data:${getMimeTypeFromBase64(user.profile_image_base64)};base64,${user.profile_image_base64}`}
+                            src={user.profile_image_url}
                             alt={t('table.profilePictureAlt', { username: user.username })}
                             style={{ width: '40px', height: '40px', borderRadius: '50%', objectFit: 'cover' }}
                           />
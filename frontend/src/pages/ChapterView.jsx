@@ -165,7 +165,7 @@ function ChapterView() {
 
             try {
               console.log(`Fetching image ${image.id}...`);
-              const blob = await courseService.downloadImage(image.id);
+              const blob = await courseService.downloadImage(image.id, 512);
               const objectUrl = URL.createObjectURL(blob);
               console.log(`Successfully fetched image ${image.id}`);
               return { ...image, objectUrl, loading: false, error: null };
@@ -97,7 +97,7 @@ function SettingsPage() {
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState(null);
   const [passwordError, setPasswordError] = useState(null);  const [profileImageFile, setProfileImageFile] = useState(null);
-  const [previewImage, setPreviewImage] = useState(user?.profile_image_base64 || null);
+  const [previewImage, setPreviewImage] = useState(user?.profile_image_url || null);
   const resetRef = useRef(null);
 
   const generalForm = useForm({
@@ -147,17 +147,8 @@ function SettingsPage() {
         setPreviewImage(reader.result); // This is a data URI
       };
       reader.readAsDataURL(profileImageFile);
-    } else if (user && user.profile_image_base64) { // No local file, but user has an image in context (from DB)
-      const rawBase64FromDB = user.profile_image_base64;
-      // Convert raw base64 string from DB to a data URI. Assuming JPEG as a common default.
-      // A more robust solution would involve storing/retrieving the MIME type from the backend.
-      if (rawBase64FromDB && !rawBase64FromDB.startsWith('data:image')) {
-        setPreviewImage(`data:image/jpeg;base64,${rawBase64FromDB}`);
-      } else if (rawBase64FromDB) { // It might already be a data URI (less likely with current backend)
-        setPreviewImage(rawBase64FromDB);
-      } else {
-        setPreviewImage(null);
-      }
+    } else if (user && user.profile_image_url) { // No local file, but user has an image (served by the avatar endpoint)
+      setPreviewImage(user.profile_image_url);
     } else { // No local file, and no image in user context (or no user)
       setPreviewImage(null);
     }
@@ -182,7 +173,7 @@ function SettingsPage() {
       reader.readAsDataURL(file);
     } else {
       setProfileImageFile(null);
-      setPreviewImage(user?.profile_image_base64 || null);
+      setPreviewImage(user?.profile_image_url || null);
       if (resetRef.current) {
         resetRef.current();
       }
@@ -210,7 +201,7 @@ function SettingsPage() {
         throw new Error(t('authError.userIdMissing', "User ID is missing, please log in again."));
       }
 
-      if (profileImageFile || previewImage !== user.profile_image_base64) {
+      if (profileImageFile || previewImage !== (user.profile_image_url || null)) {
         userDataToUpdate.profile_image_base64 = previewImage;
       }
 